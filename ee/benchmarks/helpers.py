@@ -3,6 +3,7 @@ import sys
 from contextlib import contextmanager
 from functools import wraps
 from os.path import dirname
+from time import perf_counter
 
 from django.utils.timezone import now
 
@@ -26,8 +27,10 @@ def run_query(fn, *args):
     uuid = str(UUIDT())
     tag_queries(kind="benchmark", id=f"{uuid}::${fn.__name__}")
     try:
+        start_time = perf_counter()
         fn(*args)
-        return get_clickhouse_query_stats(uuid)
+        wall_time_ms = int((perf_counter() - start_time) * 1000)
+        return {"wall_time_ms": wall_time_ms, **get_clickhouse_query_stats(uuid)}
     finally:
         reset_query_tags()
 
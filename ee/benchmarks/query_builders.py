@@ -0,0 +1,236 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import *
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, List
+
+from ee.clickhouse.queries.funnels.funnel_correlation import FunnelCorrelation
+from posthog.client import sync_execute
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.parser import parse_select
+from posthog.hogql.printer import print_ast
+from posthog.models import Organization, Team
+from posthog.models.filters.filter import Filter
+from posthog.models.property.util import parse_prop_grouped_clauses
+from posthog.queries.funnels import ClickhouseFunnel
+from posthog.queries.trends.breakdown import TrendsBreakdown
+
+# Filters like the ones of complex dashboard insights: nested property groups mixing event and person properties
+PROPERTY_GROUPS = {
+    "type": "AND",
+    "values": [
+        {
+            "type": "OR",
+            "values": [
+                {"key": "$current_url", "operator": "icontains", "value": "/pricing", "type": "event"},
+                {"key": "$current_url", "operator": "icontains", "value": "/signup", "type": "event"},
+                {"key": "$browser", "operator": "exact", "value": ["Chrome", "Firefox", "Safari"], "type": "event"},
+            ],
+        },
+        {
+            "type": "AND",
+            "values": [
+                {"key": "email", "operator": "not_icontains", "value": "@posthog.com", "type": "person"},
+                {"key": "$initial_referring_domain", "operator": "is_set", "value": "is_set", "type": "person"},
+                {"key": "revenue", "operator": "gt", "value": 100, "type": "event"},
+                {"key": "signed_up_at", "operator": "is_date_after", "value": "2021-01-01", "type": "person"},
+            ],
+        },
+    ],
+}
+DATE_RANGE = {"date_from": "2021-01-01", "date_to": "2021-10-01", "interval": "day"}
+
+TRENDS_FILTER = {
+    "insight": "TRENDS",
+    "events": [
+        {"id": "$pageview", "math": "dau", "properties": [{"key": "$host", "value": "app.posthog.com"}]},
+        {"id": "$autocapture", "math": "total"},
+    ],
+    "breakdown": "$browser",
+    "breakdown_type": "event",
+    "properties": PROPERTY_GROUPS,
+    **DATE_RANGE,
+}
+FUNNEL_FILTER = {
+    "insight": "FUNNELS",
+    "events": [
+        {"id": "$pageview", "order": 0, "properties": [{"key": "$current_url", "value": "/pricing"}]},
+        {"id": "signed up", "order": 1},
+        {"id": "paid", "order": 2, "properties": [{"key": "plan", "value": ["scale", "enterprise"]}]},
+    ],
+    "funnel_window_days": 14,
+    "breakdown": "$browser",
+    "breakdown_type": "event",
+    "properties": PROPERTY_GROUPS,
+    **DATE_RANGE,
+}
+HOGQL_QUERY = """
+    SELECT
+        properties.$browser AS browser,
+        count() AS pageviews,
+        uniq(person_id) AS persons,
+        avg(toFloat(properties.revenue)) AS average_revenue
+    FROM events
+    WHERE event = '$pageview'
+        AND timestamp > now() - interval 30 day
+        AND (properties.$current_url ILIKE '%pricing%' OR person.properties.email NOT ILIKE '%@posthog.com')
+    GROUP BY browser
+    HAVING persons > 10
+    ORDER BY pageviews DESC
+    LIMIT 100
+"""
+BREAKDOWN_VALUES = [f"breakdown value {index}" for index in range(25)]
+
+
+def peak_traced_memory(fn: Callable[[], Any]) -> int:
+    "Peak bytes allocated by Python while running `fn`"
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class QueryBuilderSuite:
+    """
+    Python-side cost of turning insight filters into ClickHouse SQL and ClickHouse rows into API results.
+
+    ClickHouse is mocked out, so these measure only query building and result formatting, stage by stage. `time_*`
+    benchmarks track CPU time, `track_*_peak_memory` ones the memory Python allocates for the same stage.
+    """
+
+    timeout = 300.0
+    version = "v001"
+
+    team: Team
+
+    def setup(self):
+        # :TRICKY: Patches the ClickHouse client rather than the callers, as they import `sync_execute` by name
+        self._sync_execute_impl = sync_execute._impl  # type: ignore
+        sync_execute._patch(  # type: ignore
+            lambda fn, query, args=None, settings=None, with_column_types=False, **kwargs: (
+                ([], []) if with_column_types else []
+            )
+        )
+
+        team = Team.objects.filter(id=2).first()
+        if team is None:
+            organization = Organization.objects.create()
+            team = Team.objects.create(id=2, organization=organization, name="The Bakery")
+        self.team = team
+
+        self.trends_filter = Filter(data=TRENDS_FILTER, team=self.team)
+        self.funnel_filter = Filter(data=FUNNEL_FILTER, team=self.team)
+        self.correlation_filter = Filter(
+            data={**FUNNEL_FILTER, "funnel_correlation_type": "properties", "funnel_correlation_names": ["$browser"]},
+            team=self.team,
+        )
+        self.hogql_query = parse_select(HOGQL_QUERY)
+        self.funnel_rows = self._funnel_rows()
+        self.trend_rows = self._trend_rows()
+
+    def teardown(self):
+        sync_execute._impl = self._sync_execute_impl  # type: ignore
+
+    def time_filter_parsing(self):
+        self._parse_filter()
+
+    def track_filter_parsing_peak_memory(self):
+        return peak_traced_memory(self._parse_filter)
+
+    track_filter_parsing_peak_memory.unit = "bytes"  # type: ignore
+
+    def time_property_clauses(self):
+        self._build_property_clauses()
+
+    def track_property_clauses_peak_memory(self):
+        return peak_traced_memory(self._build_property_clauses)
+
+    track_property_clauses_peak_memory.unit = "bytes"  # type: ignore
+
+    def time_funnel_query(self):
+        self._build_funnel_query()
+
+    def track_funnel_query_peak_memory(self):
+        return peak_traced_memory(self._build_funnel_query)
+
+    track_funnel_query_peak_memory.unit = "bytes"  # type: ignore
+
+    def time_funnel_correlation_query(self):
+        self._build_funnel_correlation_query()
+
+    def track_funnel_correlation_query_peak_memory(self):
+        return peak_traced_memory(self._build_funnel_correlation_query)
+
+    track_funnel_correlation_query_peak_memory.unit = "bytes"  # type: ignore
+
+    def time_hogql_print_ast(self):
+        self._print_hogql()
+
+    def track_hogql_print_ast_peak_memory(self):
+        return peak_traced_memory(self._print_hogql)
+
+    track_hogql_print_ast_peak_memory.unit = "bytes"  # type: ignore
+
+    def time_format_funnel_results(self):
+        self._format_funnel_results()
+
+    def track_format_funnel_results_peak_memory(self):
+        return peak_traced_memory(self._format_funnel_results)
+
+    track_format_funnel_results_peak_memory.unit = "bytes"  # type: ignore
+
+    def time_parse_trend_breakdown_results(self):
+        self._parse_trend_breakdown_results()
+
+    def track_parse_trend_breakdown_results_peak_memory(self):
+        return peak_traced_memory(self._parse_trend_breakdown_results)
+
+    track_parse_trend_breakdown_results_peak_memory.unit = "bytes"  # type: ignore
+
+    def _parse_filter(self):
+        filter = Filter(data=TRENDS_FILTER, team=self.team)
+        # Filter attributes are parsed lazily
+        filter.to_dict()
+        filter.property_groups.flat
+
+    def _build_property_clauses(self):
+        parse_prop_grouped_clauses(
+            team_id=self.team.pk,
+            property_group=self.trends_filter.property_groups,
+            hogql_context=HogQLContext(team_id=self.team.pk),
+        )
+
+    def _build_funnel_query(self):
+        ClickhouseFunnel(self.funnel_filter, self.team).get_query()
+
+    def _build_funnel_correlation_query(self):
+        FunnelCorrelation(self.correlation_filter, self.team).get_contingency_table_query()
+
+    def _print_hogql(self):
+        print_ast(self.hogql_query, HogQLContext(team_id=self.team.pk, enable_select_queries=True), "clickhouse")
+
+    def _format_funnel_results(self):
+        ClickhouseFunnel(self.funnel_filter, self.team)._format_results(self.funnel_rows)
+
+    def _parse_trend_breakdown_results(self):
+        entity = self.trends_filter.entities[0]
+        TrendsBreakdown(entity, self.trends_filter, self.team)._parse_trend_result(self.trends_filter, entity)(
+            self.trend_rows
+        )
+
+    def _funnel_rows(self) -> List[List[Any]]:
+        # Step counts, average and median conversion times between steps, breakdown value
+        return [
+            [1000 - index, 500 - index, 100 - index, 3600.0, 7200.0, 1800.0, 3600.0, [breakdown_value]]
+            for index, breakdown_value in enumerate(BREAKDOWN_VALUES)
+        ]
+
+    def _trend_rows(self) -> List[List[Any]]:
+        dates = [datetime(2021, 1, 1) + timedelta(days=day) for day in range(273)]
+        return [
+            [dates, [float(index + day % 7) for day in range(len(dates))], breakdown_value]
+            for index, breakdown_value in enumerate(BREAKDOWN_VALUES)
+        ]
@@ -0,0 +1,69 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import *
+import json
+import random
+
+import lzstring
+
+from posthog.lz64 import decompress_from_base64
+
+
+def _capture_payload(event_count: int) -> str:
+    "A /batch payload like posthog-js sends, with pageviews and autocapture events"
+    rng = random.Random(event_count)
+    events = []
+    for index in range(event_count):
+        event = rng.choice(["$pageview", "$autocapture", "$pageleave"])
+        events.append(
+            {
+                "event": event,
+                "properties": {
+                    "$os": "Mac OS X",
+                    "$browser": rng.choice(["Chrome", "Firefox", "Safari"]),
+                    "$current_url": f"https://app.example.com/project/{rng.randint(1, 999)}/insights/{rng.randint(1, 10**6)}",
+                    "$host": "app.example.com",
+                    "$pathname": f"/project/{rng.randint(1, 999)}/insights",
+                    "$screen_height": 1080,
+                    "$screen_width": 1920,
+                    "$lib": "web",
+                    "$lib_version": "1.30.0",
+                    "$insert_id": "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=16)),
+                    "$time": 1680000000 + index,
+                    "distinct_id": f"{rng.randint(10**17, 10**18)}",
+                    "$device_id": f"{rng.randint(10**17, 10**18)}",
+                    "$session_id": f"{rng.randint(10**17, 10**18)}",
+                    "$referrer": "$direct",
+                    "token": "phc_benchmarkbenchmarkbenchmarkbenchmarkbenc",
+                    "$elements": [
+                        {
+                            "tag_name": rng.choice(["button", "a", "span", "div"]),
+                            "classes": ["LemonButton", "LemonButton--primary"],
+                            "attr__class": "LemonButton LemonButton--primary",
+                            "nth_child": rng.randint(1, 9),
+                            "nth_of_type": rng.randint(1, 9),
+                            "$el_text": rng.choice(["Save", "Cancel", "New insight", "Sauvegarder ✓"]),
+                        }
+                        for _ in range(rng.randint(2, 8) if event == "$autocapture" else 0)
+                    ],
+                },
+                "timestamp": f"2023-03-28T10:{index % 60:02d}:00.000Z",
+            }
+        )
+    return json.dumps(events, ensure_ascii=False)
+
+
+class Lz64DecompressionSuite:
+    "Decompression of `compression=lz64` payloads sent by older posthog-js versions, against the lzstring library"
+
+    params = [1, 50, 500]
+    param_names = ["event_count"]
+
+    def setup(self, event_count):
+        self.compressed = lzstring.LZString().compressToBase64(_capture_payload(event_count))
+
+    def time_decompress_from_base64(self, event_count):
+        decompress_from_base64(self.compressed)
+
+    def time_lzstring_decompress_from_base64(self, event_count):
+        lzstring.LZString().decompressFromBase64(self.compressed)
@@ -0,0 +1,334 @@
+"""
+Runs the `QuerySuite` benchmarks against a local ClickHouse filled with deterministic demo data.
+
+Unlike `asv run`, this doesn't need access to the pre-filled benchmarking node: ClickHouse is provisioned locally
+(in docker or from a `clickhouse` binary), and events, persons and recordings are generated with the demo Matrix
+from a fixed seed, so that runs at the same scale read the same data. Results include latency, `read_rows` and
+`read_bytes` of every benchmark, as JSON. See README.md for usage.
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from os.path import abspath, dirname, join
+from typing import Any, Callable, Dict, List, Optional
+
+REPO_ROOT = dirname(dirname(dirname(abspath(__file__))))
+CLICKHOUSE_CONFIG_DIR = join(REPO_ROOT, "docker", "clickhouse")
+CLICKHOUSE_IMAGE = os.getenv("CLICKHOUSE_SERVER_IMAGE", "clickhouse/clickhouse-server:23.4.2.11")
+CONTAINER_NAME = "posthog-benchmarks-clickhouse"
+
+# :TRICKY: `QuerySuite` date ranges are fixed, the simulation covers all of them
+SIMULATION_NOW = dt.datetime(2021, 11, 22, 12, tzinfo=dt.timezone.utc)
+SIMULATION_DAYS_PAST = 330
+# `QuerySuite.setup` expects data under this team, as on the benchmarking node
+BENCHMARK_TEAM_ID = 2
+
+METRICS = ["wall_time_ms", "ch_query_time", "query_count", "read_rows", "read_bytes", "memory_usage"]
+# Regressions of these are reported by --compare. Read rows and bytes are deterministic for a given dataset
+COMPARED_METRICS = ["ch_query_time", "read_rows", "read_bytes"]
+
+
+class LocalClickhouse:
+    """Provisions a throwaway ClickHouse server with the cluster configuration of the dev docker-compose setup."""
+
+    # :TRICKY: Django settings have no ClickHouse port overrides, so the server listens on the default ports.
+    # Stop the dev docker-compose ClickHouse first, or benchmark it with --clickhouse=existing.
+    HTTP_PORT = 8123
+    TCP_PORT = 9000
+
+    def __init__(self, mode: str, keep: bool):
+        self.mode = mode
+        self.keep = keep
+        self._process: Optional[subprocess.Popen] = None
+        self._data_dir: Optional[str] = None
+
+    def __enter__(self) -> "LocalClickhouse":
+        if self.mode == "docker":
+            subprocess.run(["docker", "rm", "-f", CONTAINER_NAME], capture_output=True)
+            subprocess.run(
+                [
+                    "docker",
+                    "run",
+                    "--detach",
+                    "--name",
+                    CONTAINER_NAME,
+                    "--publish",
+                    f"{self.HTTP_PORT}:8123",
+                    "--publish",
+                    f"{self.TCP_PORT}:9000",
+                    "--volume",
+                    f"{join(CLICKHOUSE_CONFIG_DIR, 'config.xml')}:/etc/clickhouse-server/config.xml",
+                    "--volume",
+                    f"{join(CLICKHOUSE_CONFIG_DIR, 'users-dev.xml')}:/etc/clickhouse-server/users.xml",
+                    CLICKHOUSE_IMAGE,
+                ],
+                check=True,
+            )
+        elif self.mode == "binary":
+            binary = shutil.which("clickhouse")
+            if binary is None:
+                raise RuntimeError("`clickhouse` binary not found in PATH, use --clickhouse=docker instead")
+            self._data_dir = tempfile.mkdtemp(prefix="posthog-benchmarks-clickhouse-")
+            self._process = subprocess.Popen(
+                [
+                    binary,
+                    "server",
+                    f"--config-file={join(CLICKHOUSE_CONFIG_DIR, 'config.xml')}",
+                    "--",
+                    f"--path={self._data_dir}/",
+                    f"--tmp_path={self._data_dir}/tmp/",
+                    f"--user_files_path={self._data_dir}/user_files/",
+                    f"--users_config={join(CLICKHOUSE_CONFIG_DIR, 'users-dev.xml')}",
+                    f"--http_port={self.HTTP_PORT}",
+                    f"--tcp_port={self.TCP_PORT}",
+                    f"--logger.log={self._data_dir}/clickhouse-server.log",
+                    f"--logger.errorlog={self._data_dir}/clickhouse-server.err.log",
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+
+        self._wait_until_ready()
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self.keep:
+            print(f"Keeping ClickHouse running on ports {self.HTTP_PORT} (HTTP) and {self.TCP_PORT} (native)")
+            return
+        if self.mode == "docker":
+            subprocess.run(["docker", "rm", "-f", CONTAINER_NAME], capture_output=True)
+        elif self._process is not None:
+            self._process.terminate()
+            self._process.wait(timeout=60)
+            shutil.rmtree(self._data_dir or "", ignore_errors=True)
+
+    def _wait_until_ready(self, timeout_seconds: int = 120) -> None:
+        deadline = time.monotonic() + timeout_seconds
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://localhost:{self.HTTP_PORT}/ping", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError(f"ClickHouse didn't become ready within {timeout_seconds}s")
+
+
+def setup_environment(args: argparse.Namespace) -> None:
+    "Points Django at the local ClickHouse. Must run before Django is set up, i.e. before importing `helpers`."
+    if args.clickhouse != "existing":
+        os.environ["CLICKHOUSE_HOST"] = "localhost"
+    # :TRICKY: Test mode writes events, persons and recordings straight into ClickHouse rather than through Kafka,
+    # and creates plain MergeTree tables. It also points ClickHouse and Postgres at the `posthog_test` databases.
+    os.environ["TEST"] = "1"
+    os.environ.setdefault("CLICKHOUSE_SECURE", "false")
+    sys.path.append(REPO_ROOT)
+
+
+def prepare_databases() -> None:
+    from django.core.management import call_command
+
+    from posthog.client import sync_execute
+    from posthog.conftest import create_clickhouse_tables
+    from posthog.settings import CLICKHOUSE_DATABASE
+
+    call_command("migrate", interactive=False, verbosity=0)
+    sync_execute(f"CREATE DATABASE IF NOT EXISTS {CLICKHOUSE_DATABASE}")
+    create_clickhouse_tables(0)
+
+
+def generate_data(seed: str, scale: int) -> Dict[str, int]:
+    """
+    Simulates `scale` clusters of the Hedgebox demo product into the benchmark team and records their sessions.
+    The same seed and scale always generate the same events, persons and recordings.
+    """
+    from posthog.client import sync_execute
+    from posthog.demo.matrix import MatrixManager
+    from posthog.demo.products.hedgebox import HedgeboxMatrix
+    from posthog.models import Organization, OrganizationMembership, Team, User
+
+    team = Team.objects.filter(pk=BENCHMARK_TEAM_ID).first()
+    if team is not None:
+        organization = team.organization
+    else:
+        organization = Organization.objects.create(name="Benchmarks")
+        team = MatrixManager.create_team(organization, id=BENCHMARK_TEAM_ID, name="The Bakery")
+    user = User.objects.filter(email="benchmarks@posthog.com").first() or User.objects.create_and_join(
+        organization, "benchmarks@posthog.com", None, "Benchmarks", OrganizationMembership.Level.ADMIN
+    )
+
+    print(f"Simulating {scale} clusters with seed {seed}...")
+    matrix = HedgeboxMatrix(seed, now=SIMULATION_NOW, days_past=SIMULATION_DAYS_PAST, days_future=0, n_clusters=scale)
+    matrix.simulate()
+
+    print("Saving simulated events and persons...")
+    MatrixManager(matrix).run_on_team(team, user)
+
+    print("Saving session recordings...")
+    recording_events = _save_recordings(matrix)
+
+    counts = {
+        table: sync_execute(f"SELECT count() FROM {table} WHERE team_id = %(team_id)s", {"team_id": team.pk})[0][0]
+        for table in ["events", "person", "person_distinct_id2", "session_recording_events"]
+    }
+    counts["simulated_recording_events"] = recording_events
+    return counts
+
+
+def _save_recordings(matrix) -> int:
+    "Records every simulated session as a full snapshot followed by an incremental snapshot per event"
+    from posthog.session_recordings.session_recording_helpers import RRWEB_MAP_EVENT_TYPE
+    from posthog.session_recordings.test.test_factory import create_session_recording_events
+
+    saved = 0
+    for person in matrix.people:
+        sessions: Dict[str, List[Any]] = defaultdict(list)
+        for event in person.past_events:
+            session_id = event.properties.get("$session_id")
+            if session_id:
+                sessions[session_id].append(event)
+
+        for session_id, events in sessions.items():
+            snapshots = [
+                {
+                    "type": RRWEB_MAP_EVENT_TYPE.FullSnapshot
+                    if index == 0
+                    else RRWEB_MAP_EVENT_TYPE.IncrementalSnapshot,
+                    "data": {} if index == 0 else {"source": 2},
+                    "timestamp": round(event.timestamp.timestamp() * 1000),
+                }
+                for index, event in enumerate(events)
+            ]
+            create_session_recording_events(
+                team_id=BENCHMARK_TEAM_ID,
+                timestamp=events[0].timestamp,
+                distinct_id=events[0].distinct_id,
+                session_id=session_id,
+                snapshots=snapshots,
+            )
+            saved += len(snapshots)
+    return saved
+
+
+def run_benchmarks(pattern: Optional[str], repeat: int) -> Dict[str, Any]:
+    from ee.benchmarks.benchmarks import QuerySuite
+    from ee.benchmarks.helpers import run_query
+
+    suite = QuerySuite()
+    suite.setup()
+
+    results: Dict[str, Any] = {}
+    for name in sorted(dir(suite)):
+        if not name.startswith("track_") or (pattern and not re.search(pattern, name)):
+            continue
+
+        # Unwrap `benchmark_clickhouse`, which only reports query time
+        benchmark: Callable = getattr(QuerySuite, name).__wrapped__
+        print(f"Running {name}...")
+        samples = [run_query(benchmark, suite) for _ in range(repeat)]
+        results[name] = {
+            "samples": samples,
+            "median": {metric: statistics.median(sample[metric] for sample in samples) for metric in METRICS},
+        }
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    "Returns the benchmarks whose median got worse than the baseline by more than `threshold` (a ratio)"
+    regressions = []
+    for name, result in results.items():
+        baseline_result = baseline.get("benchmarks", {}).get(name)
+        if baseline_result is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = baseline_result["median"][metric], result["median"][metric]
+            if before > 0 and after / before > threshold:
+                regressions.append(f"{name}: {metric} {before} -> {after} ({after / before:.2f}x)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--clickhouse",
+        choices=["docker", "binary", "existing"],
+        default="docker",
+        help="How to provision ClickHouse. `existing` uses CLICKHOUSE_HOST and friends as-is (default: docker)",
+    )
+    parser.add_argument("--keep", action="store_true", help="Leave the provisioned ClickHouse running afterwards")
+    parser.add_argument("--scale", type=int, default=50, help="Number of simulated clusters of people (default: 50)")
+    parser.add_argument("--seed", type=str, default="posthog-benchmarks", help="Simulation seed")
+    parser.add_argument(
+        "--reuse-data", action="store_true", help="Skip data generation if the benchmark team already has events"
+    )
+    parser.add_argument("--bench", type=str, help="Only run benchmarks whose name matches this regex")
+    parser.add_argument("--repeat", type=int, default=4, help="Samples per benchmark (default: 4)")
+    parser.add_argument("--output", type=str, help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", type=str, help="JSON results of a previous run to check for regressions")
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="Ratio over the baseline reported as a regression (default: 1.2)"
+    )
+    args = parser.parse_args()
+
+    setup_environment(args)
+    with LocalClickhouse(args.clickhouse, keep=args.keep):
+        import ee.benchmarks.helpers  # noqa: F401 Sets up Django
+        from posthog.client import sync_execute
+
+        prepare_databases()
+
+        existing_events = sync_execute(
+            "SELECT count() FROM events WHERE team_id = %(team_id)s", {"team_id": BENCHMARK_TEAM_ID}
+        )[0][0]
+        if args.reuse_data and existing_events > 0:
+            print(f"Reusing {existing_events} existing events")
+            dataset: Dict[str, Any] = {"events": existing_events, "reused": True}
+        else:
+            if existing_events > 0:
+                raise RuntimeError("The benchmark team already has data, pass --reuse-data or use a fresh ClickHouse")
+            dataset = generate_data(args.seed, args.scale)
+
+        report = {
+            "metadata": {
+                "seed": args.seed,
+                "scale": args.scale,
+                "simulation_now": SIMULATION_NOW.isoformat(),
+                "clickhouse_version": sync_execute("SELECT version()")[0][0],
+                "git_commit": subprocess.run(
+                    ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True
+                ).stdout.strip(),
+                "dataset": dataset,
+            },
+            "benchmarks": run_benchmarks(args.bench, args.repeat),
+        }
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report["benchmarks"], json.load(f), args.threshold)
+        if regressions:
+            print("Regressions found:\n" + "\n".join(regressions), file=sys.stderr)
+            return 1
+        print("No regressions found", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,20 @@
-import re
 from collections import defaultdict
 from datetime import timedelta
-from typing import Dict, Generator, List, Optional, Set, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
+import sqlparse
 import structlog
+from sqlparse import sql
+from sqlparse import tokens as T
 
 from ee.clickhouse.materialized_columns.columns import (
     DEFAULT_TABLE_COLUMN,
+    MaterializedColumnType,
     backfill_materialized_columns,
     get_materialized_columns,
+    get_typed_materialized_columns,
     materialize,
+    materialize_typed,
 )
 from ee.settings import (
     MATERIALIZE_COLUMNS_ANALYSIS_PERIOD_HOURS,
@@ -20,115 +25,223 @@ from ee.settings import (
 from posthog.cache_utils import instance_memoize
 from posthog.client import sync_execute
 from posthog.models.filters.mixins.utils import cached_property
-from posthog.models.person.sql import GET_EVENT_PROPERTIES_COUNT, GET_PERSON_PROPERTIES_COUNT
+from posthog.models.person.sql import GET_PERSON_PROPERTIES_COUNT
 from posthog.models.property import PropertyName, TableColumn, TableWithProperties
 from posthog.models.property_definition import PropertyDefinition
 from posthog.models.team import Team
 
-Suggestion = Tuple[TableWithProperties, TableColumn, PropertyName, int]
-
 logger = structlog.get_logger(__name__)
 
+# A second of query time above the minimum weighs as much as a GiB read
+READ_BYTES_PER_COST_UNIT = 1024**3
+# Skip indexes are recommended for properties whose cost mostly comes from filtering on them
+FILTER_COST_SHARE_FOR_INDEX = 0.5
+
+# The type of a property usage is inferred from the function its extraction is wrapped in, e.g.
+# `toFloat64OrNull(replaceRegexpAll(JSONExtractRaw(properties, 'price'), ...)) > 5`. Function names are lowercased.
+NUMERIC_FUNCTIONS = {
+    "tofloat64",
+    "tofloat64ornull",
+    "tofloat64orzero",
+    "toint64",
+    "toint64ornull",
+    "toint64orzero",
+    "jsonextractfloat",
+    "jsonextractint",
+    "jsonextractuint",
+}
+DATETIME_FUNCTIONS = {
+    "parsedatetimebesteffort",
+    "parsedatetimebesteffortornull",
+    "parsedatetime64besteffortornull",
+    "todatetime",
+    "todatetimeornull",
+}
+# Functions that don't change how the property is used, so the type is inferred from the function around them
+TRANSPARENT_FUNCTIONS = {"replaceregexpall", "trim", "nullif", "coalesce", "substring", "argmax", "any"}
+# Person properties are read from subqueries exposing them as `person_props`
+PERSON_PROPERTIES_COLUMNS = {"person_props"}
+EVENTS_TABLES = {"events", "sharded_events", "writable_events"}
+TABLE_QUALIFIERS: Dict[str, TableWithProperties] = {"e": "events", "events": "events", "person": "person"}
+
+
+class Suggestion(NamedTuple):
+    table: TableWithProperties
+    table_column: TableColumn
+    property_name: PropertyName
+    cost: int
+    column_type: MaterializedColumnType = "String"
+    # Skip index to add to the column: "minmax", "bloom_filter" or None
+    index_type: Optional[str] = None
+
+
+class PropertyUsage(NamedTuple):
+    table: TableWithProperties
+    table_column: TableColumn
+    property_name: PropertyName
+    column_type: MaterializedColumnType
+    # Whether the property is filtered on (in a WHERE clause or an -If aggregate condition) rather than only selected
+    is_filter: bool
+
 
 class TeamManager:
     @instance_memoize
-    def person_properties(self, team_id: str) -> Set[str]:
-        return self._get_properties(GET_PERSON_PROPERTIES_COUNT, team_id)
+    def person_properties(self, team_id: int) -> Set[str]:
+        rows = sync_execute(GET_PERSON_PROPERTIES_COUNT, {"team_id": team_id})
+        return set(name for name, _ in rows)
 
     @instance_memoize
-    def event_properties(self, team_id: str) -> Set[str]:
+    def event_properties(self, team_id: int) -> Set[str]:
         return set(
             PropertyDefinition.objects.filter(team_id=team_id, type=PropertyDefinition.Type.EVENT).values_list(
                 "name", flat=True
             )
         )
 
-    @instance_memoize
-    def person_on_events_properties(self, team_id: str) -> Set[str]:
-        return self._get_properties(GET_EVENT_PROPERTIES_COUNT.format(column_name="person_properties"), team_id)
-
-    @instance_memoize
-    def group_on_events_properties(self, group_type_index: int, team_id: str) -> Set[str]:
-        return self._get_properties(
-            GET_EVENT_PROPERTIES_COUNT.format(column_name=f"group{group_type_index}_properties"), team_id
-        )
-
-    def _get_properties(self, query, team_id) -> Set[str]:
-        rows = sync_execute(query, {"team_id": team_id})
-        return set(name for name, _ in rows)
-
 
 class Query:
-    def __init__(self, query_string: str, query_time_ms: float, min_query_time=MATERIALIZE_COLUMNS_MINIMUM_QUERY_TIME):
+    def __init__(
+        self,
+        query_string: str,
+        query_time_ms: float,
+        read_bytes: int = 0,
+        team_id: Optional[int] = None,
+        tables: Iterable[str] = (),
+        min_query_time=MATERIALIZE_COLUMNS_MINIMUM_QUERY_TIME,
+    ):
         self.query_string = query_string
         self.query_time_ms = query_time_ms
+        self.read_bytes = read_bytes
+        self.team_id = team_id
+        # `system.query_log.tables` lists tables as `database.table`
+        self.tables = {table.split(".")[-1] for table in tables}
         self.min_query_time = min_query_time
 
     @property
     def cost(self) -> int:
-        return int((self.query_time_ms - self.min_query_time) / 1000) + 1
+        time_cost = max(self.query_time_ms - self.min_query_time, 0) / 1000
+        return int(time_cost + self.read_bytes / READ_BYTES_PER_COST_UNIT) + 1
 
     @cached_property
-    def is_valid(self):
-        return self.team_id is not None and Team.objects.filter(pk=self.team_id).exists()
+    def _extractions(self) -> List[Tuple[Optional[str], str, PropertyName, MaterializedColumnType, bool]]:
+        "(qualifier, column, property, column type, is filter) of every property extraction in the query"
+        extractions: List[Tuple[Optional[str], str, PropertyName, MaterializedColumnType, bool]] = []
+        for statement in sqlparse.parse(self.query_string):
+            _collect_extractions(statement, [], False, extractions)
+        return extractions
+
+    def property_usages(self, team_manager: TeamManager) -> List[PropertyUsage]:
+        usages: List[PropertyUsage] = []
+        for qualifier, column, property_name, column_type, is_filter in self._extractions:
+            for table, table_column in self._resolve_tables(team_manager, qualifier, column, property_name):
+                # Typed columns are only supported on events, see `materialize_typed`
+                usage = PropertyUsage(
+                    table, table_column, property_name, column_type if table == "events" else "String", is_filter
+                )
+                if usage not in usages:
+                    usages.append(usage)
+        return usages
+
+    def _resolve_tables(
+        self, team_manager: TeamManager, qualifier: Optional[str], column: str, property_name: PropertyName
+    ) -> List[Tuple[TableWithProperties, TableColumn]]:
+        if column == "person_properties" or (column.startswith("group") and column.endswith("_properties")):
+            return [("events", column)]
+        if column in PERSON_PROPERTIES_COLUMNS:
+            return [("person", DEFAULT_TABLE_COLUMN)]
+        if column != DEFAULT_TABLE_COLUMN:
+            return []
+
+        if qualifier in TABLE_QUALIFIERS:
+            return [(TABLE_QUALIFIERS[qualifier], DEFAULT_TABLE_COLUMN)]
+
+        reads_events = bool(self.tables & EVENTS_TABLES)
+        reads_person = "person" in self.tables
+        if reads_events != reads_person:
+            return [("events" if reads_events else "person", DEFAULT_TABLE_COLUMN)]
+
+        # :KLUDGE: Unqualified `properties` of a query reading both tables, fall back to the team's known properties.
+        # The same property will be found on both tables if both have it.
+        candidates: List[Tuple[TableWithProperties, TableColumn]] = []
+        if self.team_id is not None and property_name in team_manager.event_properties(self.team_id):
+            candidates.append(("events", DEFAULT_TABLE_COLUMN))
+        if self.team_id is not None and property_name in team_manager.person_properties(self.team_id):
+            candidates.append(("person", DEFAULT_TABLE_COLUMN))
+        return candidates
+
+
+def _collect_extractions(
+    token: sql.Token,
+    functions: List[str],
+    is_filter: bool,
+    extractions: List[Tuple[Optional[str], str, PropertyName, MaterializedColumnType, bool]],
+) -> None:
+    if isinstance(token, sql.Where):
+        is_filter = True
 
-    @cached_property
-    def team_id(self) -> Optional[str]:
-        matches = re.findall(r"team_id = (\d+)", self.query_string)
-        return matches[0] if matches else None
+    if isinstance(token, sql.Function):
+        name = (token.get_name() or "").lower()
+        if name.startswith("jsonextract"):
+            extraction = _parse_extraction(token)
+            if extraction is not None:
+                qualifier, column, property_name = extraction
+                extractions.append(
+                    (qualifier, column, property_name, _infer_column_type([*functions, name]), is_filter)
+                )
+                return
+        functions = [*functions, name]
+        # e.g. countIf(<condition>)
+        is_filter = is_filter or (name.endswith("if") and name != "if")
 
-    @cached_property
-    def _all_properties(self) -> List[Tuple[str, PropertyName]]:
-        return re.findall(r"JSONExtract\w+\((\S+), '([^']+)'\)", self.query_string)
-
-    def properties(
-        self, team_manager: TeamManager
-    ) -> Generator[Tuple[TableWithProperties, TableColumn, PropertyName], None, None]:
-        # Reverse-engineer whether a property is an "event" or "person" property by getting their event definitions.
-        # :KLUDGE: Note that the same property will be found on both tables if both are used.
-        # We try to hone in on the right column by looking at the column from which the property is extracted.
-        person_props = team_manager.person_properties(self.team_id)
-        event_props = team_manager.event_properties(self.team_id)
-        person_on_events_props = team_manager.person_on_events_properties(self.team_id)
-        group0_props = team_manager.group_on_events_properties(0, self.team_id)
-        group1_props = team_manager.group_on_events_properties(1, self.team_id)
-        group2_props = team_manager.group_on_events_properties(2, self.team_id)
-        group3_props = team_manager.group_on_events_properties(3, self.team_id)
-        group4_props = team_manager.group_on_events_properties(4, self.team_id)
-
-        for table_column, property in self._all_properties:
-            if property in event_props:
-                yield "events", DEFAULT_TABLE_COLUMN, property
-            if property in person_props:
-                yield "person", DEFAULT_TABLE_COLUMN, property
-
-            if property in person_on_events_props and "person_properties" in table_column:
-                yield "events", "person_properties", property
-            if property in group0_props and "group0_properties" in table_column:
-                yield "events", "group0_properties", property
-            if property in group1_props and "group1_properties" in table_column:
-                yield "events", "group1_properties", property
-            if property in group2_props and "group2_properties" in table_column:
-                yield "events", "group2_properties", property
-            if property in group3_props and "group3_properties" in table_column:
-                yield "events", "group3_properties", property
-            if property in group4_props and "group4_properties" in table_column:
-                yield "events", "group4_properties", property
+    if token.is_group:
+        for child in token.tokens:
+            _collect_extractions(child, functions, is_filter, extractions)
+
+
+def _parse_extraction(function: sql.Function) -> Optional[Tuple[Optional[str], str, PropertyName]]:
+    parameters = list(function.get_parameters())
+    if len(parameters) < 2 or not isinstance(parameters[0], sql.Identifier):
+        return None
+
+    column, key = parameters[0], parameters[1]
+    if key.ttype not in T.Literal.String:
+        return None
+
+    return column.get_parent_name(), column.get_real_name(), _unquote(key.value)
+
+
+def _infer_column_type(functions: List[str]) -> MaterializedColumnType:
+    for name in reversed(functions):
+        if name in NUMERIC_FUNCTIONS:
+            return "Float64"
+        if name in DATETIME_FUNCTIONS:
+            return "DateTime"
+        if name not in TRANSPARENT_FUNCTIONS and not name.startswith("jsonextract"):
+            break
+    return "String"
+
+
+def _unquote(literal: str) -> str:
+    value = literal[1:-1]
+    return value.replace("\\'", "'").replace("\\\\", "\\")
 
 
 def _get_queries(since_hours_ago: int, min_query_time: int) -> List[Query]:
-    "Finds queries that have happened since cutoff that were slow"
+    "Finds queries tagged with a team that have happened since cutoff that were slow"
 
     raw_queries = sync_execute(
-        f"""
+        """
         SELECT
             query,
-            query_duration_ms
+            query_duration_ms,
+            read_bytes,
+            JSONExtractInt(log_comment, 'team_id') AS team_id,
+            tables
         FROM system.query_log
         WHERE
             query NOT LIKE '%%query_log%%'
-            AND (query LIKE '/* user_id:%%' OR query LIKE '/* request:%%')
-            AND query NOT LIKE '%%INSERT%%'
+            AND JSONHas(log_comment, 'team_id')
+            AND query_kind = 'Select'
             AND type = 'QueryFinish'
             AND query_start_time > now() - toIntervalHour(%(since)s)
             AND query_duration_ms > %(min_query_time)s
@@ -136,30 +249,65 @@ def _get_queries(since_hours_ago: int, min_query_time: int) -> List[Query]:
         """,
         {"since": since_hours_ago, "min_query_time": min_query_time},
     )
-    return [Query(query, query_duration_ms, min_query_time) for query, query_duration_ms in raw_queries]
+    return [
+        Query(query, query_duration_ms, read_bytes, team_id, tables, min_query_time)
+        for query, query_duration_ms, read_bytes, team_id, tables in raw_queries
+    ]
 
 
 def _analyze(queries: List[Query]) -> List[Suggestion]:
     """
-    Analyzes query history to find which properties could get materialized.
+    Analyzes query history to find which properties could get materialized, and as which type.
 
     Returns an ordered list of suggestions by cost.
     """
 
     team_manager = TeamManager()
+    valid_team_ids = set(
+        Team.objects.filter(pk__in={query.team_id for query in queries if query.team_id is not None}).values_list(
+            "pk", flat=True
+        )
+    )
     costs: defaultdict = defaultdict(int)
+    filter_costs: defaultdict = defaultdict(int)
 
     for query in queries:
-        if not query.is_valid:
+        if query.team_id not in valid_team_ids:
             continue
 
-        for table, table_column, property in query.properties(team_manager):
-            costs[(table, table_column, property)] += query.cost
+        for usage in query.property_usages(team_manager):
+            key = (usage.table, usage.table_column, usage.property_name, usage.column_type)
+            costs[key] += query.cost
+            if usage.is_filter:
+                filter_costs[key] += query.cost
+
+    suggestions = []
+    for (table, table_column, property_name, column_type), cost in sorted(costs.items(), key=lambda kv: -kv[1]):
+        filter_share = filter_costs[(table, table_column, property_name, column_type)] / cost
+        suggestions.append(
+            Suggestion(
+                table, table_column, property_name, cost, column_type, _index_type(table, column_type, filter_share)
+            )
+        )
+    return suggestions
 
-    return [
-        (table, table_column, property_name, cost)
-        for (table, table_column, property_name), cost in sorted(costs.items(), key=lambda kv: -kv[1])
-    ]
+
+def _index_type(table: TableWithProperties, column_type: MaterializedColumnType, filter_share: float) -> Optional[str]:
+    # Persons are read through `argMax` subqueries, which skip indexes don't help
+    if table != "events" or filter_share < FILTER_COST_SHARE_FOR_INDEX:
+        return None
+    # Range comparisons on typed columns skip with minmax, equality on strings with bloom filters
+    return "bloom_filter" if column_type == "String" else "minmax"
+
+
+def _is_materialized(suggestion: Suggestion) -> bool:
+    if suggestion.column_type == "String":
+        return (suggestion.property_name, suggestion.table_column) in get_materialized_columns(suggestion.table)
+    return (
+        suggestion.property_name,
+        suggestion.table_column,
+        suggestion.column_type,
+    ) in get_typed_materialized_columns(suggestion.table)
 
 
 def materialize_properties_task(
@@ -176,26 +324,42 @@ def materialize_properties_task(
 
     if columns_to_materialize is None:
         columns_to_materialize = _analyze(_get_queries(time_to_analyze_hours, min_query_time))
-    result = []
-    for suggestion in columns_to_materialize:
-        table, table_column, property_name, _ = suggestion
-        if (property_name, table_column) not in get_materialized_columns(table):
-            result.append(suggestion)
+    result = [suggestion for suggestion in columns_to_materialize if not _is_materialized(suggestion)]
 
     if len(result) > 0:
         logger.info(f"Calculated columns that could be materialized. count={len(result)}")
     else:
         logger.info("Found no columns to materialize.")
 
-    properties: Dict[TableWithProperties, List[Tuple[PropertyName, TableColumn]]] = {"events": [], "person": []}
-    for table, table_column, property_name, cost in result[:maximum]:
-        logger.info(f"Materializing column. table={table}, property_name={property_name}, cost={cost}")
+    properties: Dict[
+        Tuple[TableWithProperties, MaterializedColumnType], List[Tuple[PropertyName, TableColumn]]
+    ] = defaultdict(list)
+    for table, table_column, property_name, cost, column_type, index_type in result[:maximum]:
+        logger.info(
+            f"Materializing column. table={table}, property_name={property_name}, column_type={column_type}, index_type={index_type}, cost={cost}"
+        )
 
         if not dry_run:
-            materialize(table, property_name, table_column=table_column)
-        properties[table].append((property_name, table_column))
+            if column_type == "String":
+                materialize(
+                    table,
+                    property_name,
+                    table_column=table_column,
+                    create_bloom_filter_index=index_type == "bloom_filter",
+                )
+            else:
+                materialize_typed(
+                    table,
+                    property_name,
+                    column_type,
+                    table_column=table_column,
+                    create_minmax_index=index_type == "minmax",
+                )
+        properties[(table, column_type)].append((property_name, table_column))
 
     if backfill_period_days > 0 and not dry_run:
         logger.info(f"Starting backfill for new materialized columns. period_days={backfill_period_days}")
-        backfill_materialized_columns("events", properties["events"], timedelta(days=backfill_period_days))
-        backfill_materialized_columns("person", properties["person"], timedelta(days=backfill_period_days))
+        for (table, column_type), table_properties in properties.items():
+            backfill_materialized_columns(
+                table, table_properties, timedelta(days=backfill_period_days), column_type=column_type
+            )
@@ -15,12 +15,27 @@ from posthog.settings import CLICKHOUSE_CLUSTER, CLICKHOUSE_DATABASE, TEST
 
 ColumnName = str
 DEFAULT_TABLE_COLUMN: Literal["properties"] = "properties"
+MaterializedColumnType = Literal["String", "Float64", "DateTime"]
 
 
 TablesWithMaterializedColumns = Union[TableWithProperties, Literal["session_recording_events"]]
 
 TRIM_AND_EXTRACT_PROPERTY = trim_quotes_expr("JSONExtractRaw({table_column}, %(property)s)")
 
+# Typed columns hold the values of the expressions `prop_filter_json_extract` otherwise computes for numeric and date
+# comparisons, so that they can be used in their place. (ClickHouse type, expression over the extracted property)
+TYPED_COLUMN_DEFINITIONS: Dict[MaterializedColumnType, Tuple[str, str]] = {
+    "Float64": (
+        "Nullable(Float64)",
+        "toFloat64OrNull(" + trim_quotes_expr("replaceRegexpAll({extract}, ' ', '')") + ")",
+    ),
+    "DateTime": (
+        "Nullable(DateTime)",
+        "coalesce(parseDateTimeBestEffortOrNull({extract}), parseDateTimeBestEffortOrNull(substring({extract}, 1, 10)))",
+    ),
+}
+TYPED_COLUMN_NAME_PREFIX: Dict[MaterializedColumnType, str] = {"String": "", "Float64": "num_", "DateTime": "dt_"}
+
 SHORT_TABLE_COLUMN_NAME = {
     "properties": "p",
     "group_properties": "gp",
@@ -53,12 +68,33 @@ def get_materialized_columns(
         return {}
 
 
+@cache_for(timedelta(minutes=15))
+def get_typed_materialized_columns(
+    table: TablesWithMaterializedColumns,
+) -> Dict[Tuple[PropertyName, TableColumn, MaterializedColumnType], ColumnName]:
+    rows = sync_execute(
+        """
+        SELECT comment, name
+        FROM system.columns
+        WHERE database = %(database)s
+          AND table = %(table)s
+          AND comment LIKE 'typed_materializer::%%'
+    """,
+        {"database": CLICKHOUSE_DATABASE, "table": table},
+    )
+    if rows and get_instance_setting("MATERIALIZED_COLUMNS_ENABLED"):
+        return {_extract_typed_property(comment): column_name for comment, column_name in rows}
+    else:
+        return {}
+
+
 def materialize(
     table: TableWithProperties,
     property: PropertyName,
     column_name=None,
     table_column: TableColumn = DEFAULT_TABLE_COLUMN,
     create_minmax_index=not TEST,
+    create_bloom_filter_index=False,
 ) -> None:
     if (property, table_column) in get_materialized_columns(table, use_cache=False):
         if TEST:
@@ -113,14 +149,86 @@ def materialize(
 
     if create_minmax_index:
         add_minmax_index(table, column_name)
+    if create_bloom_filter_index:
+        add_bloom_filter_index(table, column_name)
+
+
+def materialize_typed(
+    table: TableWithProperties,
+    property: PropertyName,
+    column_type: MaterializedColumnType,
+    table_column: TableColumn = DEFAULT_TABLE_COLUMN,
+    create_minmax_index=not TEST,
+) -> None:
+    """
+    Materializes a property as a numeric or date column, see `TYPED_COLUMN_DEFINITIONS`.
+
+    Only supported on events, as person properties are read through `argMax` subqueries which only expose the
+    `VARCHAR` materialized columns.
+    """
+    if table != "events":
+        raise ValueError(f"Typed materialized columns are only supported on events. table={table}")
+
+    if column_type not in TYPED_COLUMN_DEFINITIONS:
+        raise ValueError(f"Invalid column_type={column_type} for typed materialisation")
+
+    if (property, table_column, column_type) in get_typed_materialized_columns(table, use_cache=False):
+        if TEST:
+            return
+
+        raise ValueError(
+            f"Property already materialized. table={table}, property={property}, column={table_column}, type={column_type}"
+        )
+
+    if table_column not in SHORT_TABLE_COLUMN_NAME:
+        raise ValueError(f"Invalid table_column={table_column} for materialisation")
+
+    column_name = _materialized_column_name(table, property, table_column, column_type)
+    sql_type, expression = typed_column_definition(column_type, table_column)
+
+    sync_execute(
+        f"""
+        ALTER TABLE sharded_{table}
+        ON CLUSTER '{CLICKHOUSE_CLUSTER}'
+        ADD COLUMN IF NOT EXISTS
+        {column_name} {sql_type} MATERIALIZED {expression}
+    """,
+        {"property": property},
+        settings={"alter_sync": 1},
+    )
+    sync_execute(
+        f"""
+        ALTER TABLE {table}
+        ON CLUSTER '{CLICKHOUSE_CLUSTER}'
+        ADD COLUMN IF NOT EXISTS
+        {column_name} {sql_type}
+    """,
+        settings={"alter_sync": 1},
+    )
+    sync_execute(
+        f"ALTER TABLE {table} ON CLUSTER '{CLICKHOUSE_CLUSTER}' COMMENT COLUMN {column_name} %(comment)s",
+        {"comment": f"typed_materializer::{column_type}::{table_column}::{property}"},
+        settings={"alter_sync": 1},
+    )
+
+    if create_minmax_index:
+        add_minmax_index(table, column_name)
 
 
 def add_minmax_index(table: TablesWithMaterializedColumns, column_name: str):
+    return _add_skip_index(table, column_name, f"minmax_{column_name}", "minmax")
+
+
+def add_bloom_filter_index(table: TablesWithMaterializedColumns, column_name: str):
+    # Helps equality and `IN` filters on high cardinality string columns, which minmax indexes can't skip for
+    return _add_skip_index(table, column_name, f"bloom_filter_{column_name}", "bloom_filter(0.01)")
+
+
+def _add_skip_index(table: TablesWithMaterializedColumns, column_name: str, index_name: str, index_type: str):
     # Note: This will be populated on backfill
     execute_on_cluster = f"ON CLUSTER '{CLICKHOUSE_CLUSTER}'" if table == "events" else ""
 
     updated_table = "sharded_events" if table == "events" else table
-    index_name = f"minmax_{column_name}"
 
     try:
         sync_execute(
@@ -128,7 +236,7 @@ def add_minmax_index(table: TablesWithMaterializedColumns, column_name: str):
             ALTER TABLE {updated_table}
             {execute_on_cluster}
             ADD INDEX {index_name} {column_name}
-            TYPE minmax GRANULARITY 1
+            TYPE {index_type} GRANULARITY 1
             """,
             settings={"alter_sync": 1},
         )
@@ -144,6 +252,7 @@ def backfill_materialized_columns(
     properties: List[Tuple[PropertyName, TableColumn]],
     backfill_period: timedelta,
     test_settings=None,
+    column_type: MaterializedColumnType = "String",
 ) -> None:
     """
     Backfills the materialized column after its creation.
@@ -158,28 +267,37 @@ def backfill_materialized_columns(
     # :TRICKY: On cloud, we ON CLUSTER updates to events/sharded_events but not to persons. Why? ¯\_(ツ)_/¯
     execute_on_cluster = f"ON CLUSTER '{CLICKHOUSE_CLUSTER}'" if table == "events" else ""
 
-    materialized_columns = get_materialized_columns(table, use_cache=False)
+    if column_type == "String":
+        materialized_columns = get_materialized_columns(table, use_cache=False)
+        column_names = [materialized_columns[(property, table_column)] for property, table_column in properties]
+    else:
+        typed_materialized_columns = get_typed_materialized_columns(table, use_cache=False)
+        column_names = [
+            typed_materialized_columns[(property, table_column, column_type)] for property, table_column in properties
+        ]
 
     # Hack from https://github.com/ClickHouse/ClickHouse/issues/19785
     # Note that for this to work all inserts should list columns explicitly
     # Improve this if https://github.com/ClickHouse/ClickHouse/issues/27730 ever gets resolved
-    for property, table_column in properties:
+    for column_name, (property, table_column) in zip(column_names, properties):
+        if column_type == "String":
+            sql_type, expression = "VARCHAR", TRIM_AND_EXTRACT_PROPERTY.format(table_column=table_column)
+        else:
+            sql_type, expression = typed_column_definition(column_type, table_column)
+
         sync_execute(
             f"""
             ALTER TABLE {updated_table}
             {execute_on_cluster}
             MODIFY COLUMN
-            {materialized_columns[(property, table_column)]} VARCHAR DEFAULT {TRIM_AND_EXTRACT_PROPERTY.format(table_column=table_column)}
+            {column_name} {sql_type} DEFAULT {expression}
             """,
             {"property": property},
             settings=test_settings,
         )
 
     # Kick off mutations which will update clickhouse partitions in the background. This will return immediately
-    assignments = ", ".join(
-        f"{materialized_columns[property_and_column]} = {materialized_columns[property_and_column]}"
-        for property_and_column in properties
-    )
+    assignments = ", ".join(f"{column_name} = {column_name}" for column_name in column_names)
 
     sync_execute(
         f"""
@@ -194,17 +312,23 @@ def backfill_materialized_columns(
 
 
 def _materialized_column_name(
-    table: TableWithProperties, property: PropertyName, table_column: TableColumn = DEFAULT_TABLE_COLUMN
+    table: TableWithProperties,
+    property: PropertyName,
+    table_column: TableColumn = DEFAULT_TABLE_COLUMN,
+    column_type: MaterializedColumnType = "String",
 ) -> str:
     "Returns a sanitized and unique column name to use for materialized column"
 
     prefix = "mat_" if table == "events" or table == "groups" else "pmat_"
+    prefix += TYPED_COLUMN_NAME_PREFIX[column_type]
 
     if table_column != DEFAULT_TABLE_COLUMN:
         prefix += f"{SHORT_TABLE_COLUMN_NAME[table_column]}_"
     property_str = re.sub("[^0-9a-zA-Z$]", "_", property)
 
-    existing_materialized_columns = set(get_materialized_columns(table, use_cache=False).values())
+    existing_materialized_columns = set(get_materialized_columns(table, use_cache=False).values()) | set(
+        get_typed_materialized_columns(table, use_cache=False).values()
+    )
     suffix = ""
 
     while f"{prefix}{property_str}{suffix}" in existing_materialized_columns:
@@ -222,3 +346,14 @@ def _extract_property(comment: str) -> Tuple[PropertyName, TableColumn]:
         return split_column[1], DEFAULT_TABLE_COLUMN
 
     return split_column[2], cast(TableColumn, split_column[1])
+
+
+def _extract_typed_property(comment: str) -> Tuple[PropertyName, TableColumn, MaterializedColumnType]:
+    # Comments have the format "typed_materializer::column_type::table_column::property"
+    _, column_type, table_column, property = comment.split("::", 3)
+    return property, cast(TableColumn, table_column), cast(MaterializedColumnType, column_type)
+
+
+def typed_column_definition(column_type: MaterializedColumnType, table_column: TableColumn) -> Tuple[str, str]:
+    sql_type, expression = TYPED_COLUMN_DEFINITIONS[column_type]
+    return sql_type, expression.format(extract=TRIM_AND_EXTRACT_PROPERTY.format(table_column=table_column))
@@ -1,7 +1,6 @@
-from ee.clickhouse.materialized_columns.analyze import Query, TeamManager
+from ee.clickhouse.materialized_columns.analyze import PropertyUsage, Query, Suggestion, TeamManager, _analyze
 from posthog.clickhouse.kafka_engine import trim_quotes_expr
 from posthog.models import Person, PropertyDefinition
-from posthog.models.event.util import bulk_create_events
 from posthog.test.base import BaseTest, ClickhouseTestMixin
 
 
@@ -14,110 +13,134 @@ class TestMaterializedColumnsAnalyze(ClickhouseTestMixin, BaseTest):
                 SELECT JSONExtractString(e.properties, 'event_prop')
                 FROM events e
                 WHERE team_id = {self.team.pk}
-                  AND {trim_quotes_expr("JSONExtractRaw(properties, 'another_prop')")}
+                  AND {trim_quotes_expr("JSONExtractRaw(properties, 'another_prop')")} = 'value'
                 """,
                 6723,
+                0,
+                self.team.pk,
+                ["posthog_test.events"],
+            ),
+            (
+                f"SELECT JSONExtractString(properties, 'person_prop') FROM person WHERE team_id = {self.team.pk}",
+                9723,
+                0,
+                self.team.pk,
+                ["posthog_test.person"],
             ),
-            (f"SELECT JSONExtractString(properties, 'person_prop') FROM person WHERE team_id = {self.team.pk}", 9723),
             (
                 f"""
                 SELECT JSONExtractString(person_properties, 'person_prop')
                 FROM events
                 WHERE team_id = {self.team.pk}
-                  AND {trim_quotes_expr("JSONExtractRaw(person_properties, 'another_person_prop')")}
+                  AND toFloat64OrNull({trim_quotes_expr("replaceRegexpAll(JSONExtractRaw(person_properties, 'age'), ' ', '')")}) > 30
                 """,
-                6723,
+                3000,
+                3 * 1024**3,
+                self.team.pk,
+                ["posthog_test.events"],
             ),
             (
                 f"""
                 SELECT JSONExtractString(e.group0_properties, 'group_prop')
                 FROM events e
                 WHERE team_id = {self.team.pk}
-                  AND {trim_quotes_expr("JSONExtractRaw(group2_properties, 'group_prop')")}
+                  AND coalesce(
+                    parseDateTimeBestEffortOrNull({trim_quotes_expr("JSONExtractRaw(group2_properties, 'created_at')")}),
+                    parseDateTimeBestEffortOrNull(substring({trim_quotes_expr("JSONExtractRaw(group2_properties, 'created_at')")}, 1, 10))
+                  ) > '2021-01-01'
                 """,
                 3100,
+                0,
+                self.team.pk,
+                ["posthog_test.events"],
             ),
         ]
 
-        # Create property definitions
-        PropertyDefinition.objects.create(team=self.team, name="event_prop")
-        PropertyDefinition.objects.create(team=self.team, name="another_prop")
+    def test_query_class(self):
+        event_query, person_query, person_on_events_query, group_on_events_query = [
+            Query(*query, min_query_time=3000) for query in self.DUMMY_QUERIES
+        ]
 
-        Person.objects.create(
-            team_id=self.team.pk,
-            distinct_ids=["2"],
-            properties={"person_prop": "something", "$another_prop": "something"},
+        self.assertEqual(
+            event_query.property_usages(TeamManager()),
+            [
+                PropertyUsage("events", "properties", "event_prop", "String", False),
+                PropertyUsage("events", "properties", "another_prop", "String", True),
+            ],
         )
-
-        bulk_create_events(
+        self.assertEqual(
+            person_query.property_usages(TeamManager()),
+            [PropertyUsage("person", "properties", "person_prop", "String", False)],
+        )
+        self.assertEqual(
+            person_on_events_query.property_usages(TeamManager()),
             [
-                {
-                    "event": "some-event",
-                    "distinct_id": f"user_id",
-                    "team": self.team,
-                    "timestamp": "2021-05-01 00:00:00",
-                    "person_properties": {"person_prop": "something", "another_person_prop": "something"},
-                    "group0_properties": {"group_prop": "something"},
-                    "group2_properties": {"group_prop": "something2"},
-                }
-            ]
+                PropertyUsage("events", "person_properties", "person_prop", "String", False),
+                PropertyUsage("events", "person_properties", "age", "Float64", True),
+            ],
+        )
+        self.assertEqual(
+            group_on_events_query.property_usages(TeamManager()),
+            [
+                PropertyUsage("events", "group0_properties", "group_prop", "String", False),
+                PropertyUsage("events", "group2_properties", "created_at", "DateTime", True),
+            ],
         )
 
-    def test_query_class(self):
-        with self.settings(MATERIALIZE_COLUMNS_MINIMUM_QUERY_TIME=3000):
-            event_query = Query(*self.DUMMY_QUERIES[0])
-            person_query = Query(*self.DUMMY_QUERIES[1])
-            person_on_events_query = Query(*self.DUMMY_QUERIES[2])
-            group_on_events_query = Query(*self.DUMMY_QUERIES[3])
-
-            self.assertTrue(event_query.is_valid)
-            self.assertTrue(person_query.is_valid)
-            self.assertTrue(person_on_events_query.is_valid)
-            self.assertTrue(group_on_events_query.is_valid)
-
-            self.assertEqual(event_query.team_id, str(self.team.pk))
-            self.assertEqual(person_query.team_id, str(self.team.pk))
-            self.assertEqual(person_on_events_query.team_id, str(self.team.pk))
-            self.assertEqual(group_on_events_query.team_id, str(self.team.pk))
+        self.assertEqual(event_query.cost, 4)
+        self.assertEqual(person_query.cost, 7)
+        # Read bytes count as much as query time
+        self.assertEqual(person_on_events_query.cost, 4)
+        self.assertEqual(group_on_events_query.cost, 1)
 
-            self.assertEqual(
-                list(event_query.properties(TeamManager())),
-                [("events", "properties", "event_prop"), ("events", "properties", "another_prop")],
-            )
+    def test_query_class_edge_cases(self):
+        query_with_escaped_property = Query(
+            "SELECT JSONExtractString(e.properties, 'it\\'s') FROM events e", 3400, team_id=self.team.pk
+        )
+        self.assertEqual(
+            query_with_escaped_property.property_usages(TeamManager()),
+            [PropertyUsage("events", "properties", "it's", "String", False)],
+        )
 
-            self.assertEqual(list(person_query.properties(TeamManager())), [("person", "properties", "person_prop")])
-            self.assertEqual(
-                list(person_on_events_query.properties(TeamManager())),
-                [
-                    ("person", "properties", "person_prop"),
-                    ("events", "person_properties", "person_prop"),
-                    ("events", "person_properties", "another_person_prop"),
-                ],
-            )
-            self.assertEqual(
-                list(group_on_events_query.properties(TeamManager())),
-                [("events", "group0_properties", "group_prop"), ("events", "group2_properties", "group_prop")],
-            )
+        # match group missing, should probably never happen, since the query is now wrong.
+        query_with_invalid_column = Query("SELECT JSONExtractString(, 'prop') FROM events", 3340, team_id=self.team.pk)
+        self.assertEqual(query_with_invalid_column.property_usages(TeamManager()), [])
 
-            self.assertEqual(event_query.cost, 4)
-            self.assertEqual(person_query.cost, 7)
-            self.assertEqual(person_on_events_query.cost, 4)
-            self.assertEqual(group_on_events_query.cost, 1)
+    def test_ambiguous_properties_fall_back_to_team_properties(self):
+        PropertyDefinition.objects.create(team=self.team, name="event_prop")
+        Person.objects.create(team_id=self.team.pk, distinct_ids=["2"], properties={"person_prop": "something"})
 
-    def test_query_class_edge_cases(self):
-        invalid_query = Query("SELECT * FROM events WHERE team_id = -1", 100)
-        self.assertFalse(invalid_query.is_valid)
-        self.assertIsNone(invalid_query.team_id)
+        query = Query(
+            """
+            SELECT JSONExtractString(properties, 'event_prop'), JSONExtractString(properties, 'person_prop')
+            FROM events JOIN (SELECT id FROM person WHERE JSONExtractString(properties, 'unknown_prop') = '') p ON 1
+            """,
+            3400,
+            team_id=self.team.pk,
+            tables=["posthog_test.events", "posthog_test.person"],
+        )
 
-        query_with_unknown_property = Query(
-            f"SELECT JSONExtractString(properties, '$unknown_prop') FROM events WHERE team_id = {self.team.pk}", 3400
+        self.assertEqual(
+            query.property_usages(TeamManager()),
+            [
+                PropertyUsage("events", "properties", "event_prop", "String", False),
+                PropertyUsage("person", "properties", "person_prop", "String", False),
+            ],
         )
-        self.assertEqual(list(query_with_unknown_property.properties(TeamManager())), [])
 
-        PropertyDefinition.objects.create(team=self.team, name="prop")
+    def test_analyze_recommends_indexes_for_filtered_properties(self):
+        queries = [Query(*query, min_query_time=3000) for query in self.DUMMY_QUERIES]
+        queries.append(Query(*self.DUMMY_QUERIES[0][:3], -1, ["posthog_test.events"], min_query_time=3000))
 
-        # match group missing, should probably never happen, since the query is now wrong.
-        query_with_invalid_column = Query(
-            f"SELECT JSONExtractString(, 'prop') FROM events WHERE team_id = {self.team.pk}", 3340
+        self.assertEqual(
+            _analyze(queries),
+            [
+                Suggestion("person", "properties", "person_prop", 7, "String", None),
+                Suggestion("events", "properties", "event_prop", 4, "String", None),
+                Suggestion("events", "properties", "another_prop", 4, "String", "bloom_filter"),
+                Suggestion("events", "person_properties", "person_prop", 4, "String", None),
+                Suggestion("events", "person_properties", "age", 4, "Float64", "minmax"),
+                Suggestion("events", "group0_properties", "group_prop", 1, "String", None),
+                Suggestion("events", "group2_properties", "created_at", 1, "DateTime", "minmax"),
+            ],
         )
-        self.assertEqual(list(query_with_invalid_column.properties(TeamManager())), [])
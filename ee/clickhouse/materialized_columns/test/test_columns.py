@@ -7,7 +7,9 @@ from freezegun import freeze_time
 from ee.clickhouse.materialized_columns.columns import (
     backfill_materialized_columns,
     get_materialized_columns,
+    get_typed_materialized_columns,
     materialize,
+    materialize_typed,
 )
 from posthog.client import sync_execute
 from posthog.conftest import create_clickhouse_tables
@@ -185,6 +187,39 @@ class TestMaterializedColumns(ClickhouseTestMixin, BaseTest):
             mark_all_materialized()
             self.assertEqual(("MATERIALIZED", expr), self._get_column_types("mat_myprop"))
 
+    def test_typed_columns(self):
+        materialize_typed("events", "price", "Float64")
+        materialize_typed("events", "signed_up_at", "DateTime")
+
+        self.assertEqual(
+            get_typed_materialized_columns("events"),
+            {
+                ("price", "properties", "Float64"): "mat_num_price",
+                ("signed_up_at", "properties", "DateTime"): "mat_dt_signed_up_at",
+            },
+        )
+
+        _create_event(
+            event="some_event",
+            distinct_id="1",
+            team=self.team,
+            timestamp="2021-05-01 00:00:00",
+            properties={"price": " 12.5", "signed_up_at": "2021-04-02T10:00:00Z"},
+        )
+        _create_event(
+            event="some_event",
+            distinct_id="1",
+            team=self.team,
+            timestamp="2021-05-02 00:00:00",
+            properties={"price": "not a number", "signed_up_at": "2021-04-03"},
+        )
+        _create_event(event="some_event", distinct_id="1", team=self.team, timestamp="2021-05-03 00:00:00")
+
+        self.assertEqual(
+            sync_execute("SELECT mat_num_price, toString(mat_dt_signed_up_at) FROM events ORDER BY timestamp"),
+            [(12.5, "2021-04-02 10:00:00"), (None, "2021-04-03 00:00:00"), (None, None)],
+        )
+
     def _count_materialized_rows(self, column):
         return sync_execute(
             """
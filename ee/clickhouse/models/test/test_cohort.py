@@ -8,8 +8,8 @@ from posthog.hogql.hogql import HogQLContext
 from posthog.models.action import Action
 from posthog.models.action_step import ActionStep
 from posthog.models.cohort import Cohort
-from posthog.models.cohort.sql import GET_COHORTPEOPLE_BY_COHORT_ID
-from posthog.models.cohort.util import format_filter_query, get_person_ids_by_cohort_id
+from posthog.models.cohort.sql import GET_COHORTPEOPLE_BY_COHORT_ID, GET_INCREMENTAL_COHORTPEOPLE_BY_COHORT_ID
+from posthog.models.cohort.util import format_filter_query, get_person_ids_by_cohort_id, has_incremental_cohortpeople
 from posthog.models.filters import Filter
 from posthog.models.organization import Organization
 from posthog.models.person import Person
@@ -39,7 +39,10 @@ def _create_action(**kwargs):
 class TestCohort(ClickhouseTestMixin, BaseTest):
     def _get_cohortpeople(self, cohort: Cohort):
         return sync_execute(
-            GET_COHORTPEOPLE_BY_COHORT_ID, {"team_id": self.team.pk, "cohort_id": cohort.pk, "version": cohort.version}
+            GET_INCREMENTAL_COHORTPEOPLE_BY_COHORT_ID
+            if has_incremental_cohortpeople(cohort)
+            else GET_COHORTPEOPLE_BY_COHORT_ID,
+            {"team_id": self.team.pk, "cohort_id": cohort.pk, "version": cohort.version},
         )
 
     def test_prop_cohort_basic(self):
@@ -1092,3 +1095,130 @@ class TestCohort(ClickhouseTestMixin, BaseTest):
         # Should have p1 in this cohort even if version is different
         results = self._get_cohortpeople(cohort1)
         self.assertEqual(len(results), 1)
+
+    def test_incremental_calculation_applies_changes_to_current_version(self):
+        p1 = Person.objects.create(team_id=self.team.pk, distinct_ids=["1"], properties={"$some_prop": "something"})
+        p2 = Person.objects.create(team_id=self.team.pk, distinct_ids=["2"], properties={"$some_prop": "something"})
+
+        cohort1 = Cohort.objects.create(
+            team=self.team,
+            groups=[{"properties": [{"key": "$some_prop", "value": "something", "type": "person"}]}],
+            name="cohort1",
+        )
+        cohort1.calculate_people_ch(pending_version=0)
+        self.assertIsNotNone(cohort1.calculation_watermark)
+        self.assertEqual(cohort1.last_full_calculation, cohort1.calculation_watermark)
+        self.assertFalse(has_incremental_cohortpeople(cohort1))
+
+        p2.version = 1
+        p2.properties = {"$some_prop": "another"}
+        p2.save()
+        p3 = Person.objects.create(team_id=self.team.pk, distinct_ids=["3"], properties={"$some_prop": "something"})
+
+        self.assertTrue(cohort1.calculate_people_ch_incremental())
+        self.assertTrue(has_incremental_cohortpeople(cohort1))
+
+        results = self._get_cohortpeople(cohort1)
+        self.assertEqual(cohort1.version, 0)
+        self.assertEqual(cohort1.count, 2)
+        self.assertEqual(sorted(row[0] for row in results), sorted([p1.uuid, p3.uuid]))
+
+        # Recalculating without changes is a no-op
+        self.assertTrue(cohort1.calculate_people_ch_incremental())
+        self.assertEqual(len(self._get_cohortpeople(cohort1)), 2)
+
+    def test_incremental_calculation_not_supported_for_complex_behavioral_cohorts(self):
+        cohort1 = Cohort.objects.create(
+            team=self.team,
+            filters={
+                "properties": {
+                    "type": "OR",
+                    "values": [
+                        {
+                            "event_type": "events",
+                            "key": "signup",
+                            "time_interval": "day",
+                            "time_value": 15,
+                            "type": "behavioral",
+                            "value": "performed_event_first_time",
+                        }
+                    ],
+                }
+            },
+            name="cohort1",
+        )
+        cohort1.calculate_people_ch(pending_version=0)
+
+        self.assertFalse(cohort1.calculate_people_ch_incremental())
+
+    def test_batch_calculation_matches_individual_calculation(self):
+        p1 = _create_person(team_id=self.team.pk, distinct_ids=["1"], properties={"$some_prop": "something"})
+        _create_person(team_id=self.team.pk, distinct_ids=["2"], properties={"$some_prop": "another"})
+        p3 = _create_person(team_id=self.team.pk, distinct_ids=["3"], properties={})
+        _create_event(event="$pageview", team=self.team, distinct_id="2", timestamp=datetime.now() - timedelta(days=1))
+        _create_event(event="$pageview", team=self.team, distinct_id="3", timestamp=datetime.now() - timedelta(days=1))
+        _create_event(event="signup", team=self.team, distinct_id="3", timestamp=datetime.now() - timedelta(days=20))
+        flush_persons_and_events()
+
+        property_cohort = Cohort.objects.create(
+            team=self.team,
+            groups=[{"properties": [{"key": "$some_prop", "value": "something", "type": "person"}]}],
+            name="property cohort",
+        )
+        behavioral_cohort = Cohort.objects.create(
+            team=self.team,
+            filters={
+                "properties": {
+                    "type": "AND",
+                    "values": [
+                        {
+                            "key": "$pageview",
+                            "event_type": "events",
+                            "time_value": 7,
+                            "time_interval": "day",
+                            "type": "behavioral",
+                            "value": "performed_event",
+                        },
+                        {"key": "$some_prop", "value": "another", "type": "person", "negation": True},
+                    ],
+                }
+            },
+            name="behavioral cohort",
+        )
+        first_time_cohort = Cohort.objects.create(
+            team=self.team,
+            filters={
+                "properties": {
+                    "type": "OR",
+                    "values": [
+                        {
+                            "key": "signup",
+                            "event_type": "events",
+                            "time_value": 30,
+                            "time_interval": "day",
+                            "type": "behavioral",
+                            "value": "performed_event_first_time",
+                        }
+                    ],
+                }
+            },
+            name="first time cohort",
+        )
+        cohorts = [property_cohort, behavioral_cohort, first_time_cohort]
+
+        Cohort.calculate_people_ch_batch({cohort: 0 for cohort in cohorts})
+        batch_results = {}
+        for cohort in cohorts:
+            cohort.refresh_from_db()
+            self.assertEqual(cohort.version, 0)
+            self.assertFalse(cohort.is_calculating)
+            batch_results[cohort.pk] = sorted(row[0] for row in self._get_cohortpeople(cohort))
+
+        self.assertEqual(batch_results[property_cohort.pk], [p1.uuid])
+        self.assertEqual(batch_results[behavioral_cohort.pk], [p3.uuid])
+        self.assertEqual(batch_results[first_time_cohort.pk], [p3.uuid])
+
+        for cohort in cohorts:
+            cohort.calculate_people_ch(pending_version=1)
+            self.assertEqual(sorted(row[0] for row in self._get_cohortpeople(cohort)), batch_results[cohort.pk])
+            self.assertEqual(cohort.count, len(batch_results[cohort.pk]))
@@ -6,7 +6,7 @@ import pytest
 from freezegun.api import freeze_time
 from rest_framework.exceptions import ValidationError
 
-from ee.clickhouse.materialized_columns.columns import materialize
+from ee.clickhouse.materialized_columns.columns import materialize, materialize_typed
 from posthog.client import sync_execute
 from posthog.constants import PropertyOperatorType
 from posthog.models.cohort import Cohort
@@ -1226,6 +1226,35 @@ def test_prop_filter_json_extract_materialized(
     assert uuids == expected
 
 
+@pytest.mark.parametrize("property,expected_event_indexes", TEST_PROPERTIES)
+@freeze_time("2021-04-01T01:00:00.000Z")
+def test_prop_filter_json_extract_typed_materialized(
+    test_events, clean_up_materialised_columns, property, expected_event_indexes, team
+):
+    materialize_typed("events", property.key, "Float64")
+    materialize_typed("events", property.key, "DateTime")
+
+    query, params = prop_filter_json_extract(property, 0, allow_denormalized_props=True)
+
+    if property.operator in ("gt", "lt", "gte", "lte") or (property.operator or "").startswith("is_date_"):
+        assert "parseDateTimeBestEffortOrNull" not in query
+        assert "toFloat64OrNull" not in query
+
+    uuids = list(
+        sorted(
+            [
+                str(uuid)
+                for (uuid,) in sync_execute(
+                    f"SELECT uuid FROM events WHERE team_id = %(team_id)s {query}", {"team_id": team.pk, **params}
+                )
+            ]
+        )
+    )
+    expected = list(sorted([test_events[index] for index in expected_event_indexes]))
+
+    assert uuids == expected
+
+
 @pytest.mark.parametrize("property,expected_event_indexes", TEST_PROPERTIES)
 @freeze_time("2021-04-01T01:00:00.000Z")
 def test_prop_filter_json_extract_person_on_events_materialized(
@@ -301,6 +301,7 @@ class EnterpriseCohortQuery(FOSSCohortQuery):
         WHERE team_id = %(team_id)s
         AND event IN %({event_param_name})s
         {date_condition}
+        {self._get_person_ids_condition()}
         {person_prop_query}
         """
 
@@ -103,6 +103,13 @@ class FunnelCorrelation:
     MIN_PERSON_COUNT = 25
     MIN_PERSON_PERCENTAGE = 0.02
     PRIOR_COUNT = 1
+    TOP_K = 10
+    # z-score of the log odds ratio above which a correlation is considered significant, i.e. p < 0.05
+    SIGNIFICANCE_Z_SCORE = 1.96
+    # Sampling factors of progressive correlations, from the first run on a sample to the final run on all data
+    PROGRESSIVE_SAMPLING_FACTORS = (0.01, 0.1, 1.0)
+    # Minimum number of funnel step events the first sample of a progressive correlation should contain
+    PROGRESSIVE_SAMPLE_EVENT_COUNT = 1_000_000
 
     def __init__(
         self,
@@ -647,12 +654,7 @@ class FunnelCorrelation:
         if not success_total or not failure_total:
             return [], True
 
-        skewed_totals = False
-
-        # If the ratio is greater than 1:10, then we have a skewed result, so we should
-        # warn the user.
-        if success_total / failure_total > 10 or failure_total / success_total > 10:
-            skewed_totals = True
+        skewed_totals = self.are_totals_skewed(success_total, failure_total)
 
         odds_ratios = [
             get_entity_odds_ratio(event_stats, FunnelCorrelation.PRIOR_COUNT)
@@ -673,9 +675,145 @@ class FunnelCorrelation:
         )
 
         # Return the top ten positively correlated events, and top then negatively correlated events
-        events = positively_correlated_events[:10] + negatively_correlated_events[:10]
+        events = positively_correlated_events[: self.TOP_K] + negatively_correlated_events[: self.TOP_K]
         return events, skewed_totals
 
+    def run_odds_ratios_query(self) -> Tuple[List[EventOddsRatio], bool, bool]:
+        """
+        Same as `_run`, but odds ratios are calculated in ClickHouse, so that only the top correlated events or
+        properties are pulled across the wire.
+
+        Also returns whether all the returned correlations are statistically significant, which tells progressive
+        correlations whether a sample is large enough.
+        """
+        query, params = self.get_odds_ratios_query()
+        results = insight_sync_execute(
+            query,
+            {**params, **self._filter.hogql_context.values},
+            query_type="funnel_correlation_odds_ratios",
+            filter=self._filter,
+            team_id=self._team.pk,
+        )
+
+        _, _, _, success_total, failure_total, _, _ = [
+            result for result in results if result[0] == self.TOTAL_IDENTIFIER
+        ][0]
+        success_total = int(correct_result_for_sampling(success_total, self._filter.sampling_factor))
+        failure_total = int(correct_result_for_sampling(failure_total, self._filter.sampling_factor))
+
+        if not success_total or not failure_total:
+            return [], True, True
+
+        # Results are ordered by correlation type and strength already
+        odds_ratios = [
+            EventOddsRatio(
+                event=name,
+                success_count=int(correct_result_for_sampling(success_count, self._filter.sampling_factor)),
+                failure_count=int(correct_result_for_sampling(failure_count, self._filter.sampling_factor)),
+                odds_ratio=odds_ratio,
+                correlation_type="success" if odds_ratio > 1 else "failure",
+            )
+            for name, success_count, failure_count, _, _, odds_ratio, _ in results
+            if name != self.TOTAL_IDENTIFIER
+        ]
+        significant = all(
+            significance >= self.SIGNIFICANCE_Z_SCORE
+            for name, _, _, _, _, _, significance in results
+            if name != self.TOTAL_IDENTIFIER
+        )
+
+        return odds_ratios, self.are_totals_skewed(success_total, failure_total), significant
+
+    def get_odds_ratios_query(self) -> Tuple[str, Dict[str, Any]]:
+        """
+        Wraps the contingency table query to calculate odds ratios (see `get_entity_odds_ratio`) and their
+        significance, returning the totals row and the `TOP_K` most positively and negatively correlated values.
+
+        Significance is the z-score of the log odds ratio, see
+        https://en.wikipedia.org/wiki/Odds_ratio#Statistical_inference
+        """
+        contingency_table_query, params = self.get_contingency_table_query()
+
+        query = f"""
+            SELECT name, success_count, failure_count, success_total, failure_total, odds_ratio, significance
+            FROM (
+                SELECT
+                    row.1 AS name,
+                    row.2 AS success_count,
+                    row.3 AS failure_count,
+                    success_total,
+                    failure_total,
+                    success_count + %(prior_count)s AS visited_success,
+                    failure_count + %(prior_count)s AS visited_failure,
+                    success_total - success_count + %(prior_count)s AS not_visited_success,
+                    failure_total - failure_count + %(prior_count)s AS not_visited_failure,
+                    (visited_success * not_visited_failure) / (not_visited_success * visited_failure) AS odds_ratio,
+                    abs(log(odds_ratio)) / sqrt(
+                        1 / visited_success + 1 / visited_failure + 1 / not_visited_success + 1 / not_visited_failure
+                    ) AS significance,
+                    multiIf(name = '{self.TOTAL_IDENTIFIER}', 0, odds_ratio > 1, 1, 2) AS correlation_group
+                FROM (
+                    -- Collect the rows in one array, so that the totals are available to every row without running
+                    -- the contingency table query twice
+                    SELECT
+                        groupArray((name, success_count, failure_count)) AS rows,
+                        anyIf(success_count, name = '{self.TOTAL_IDENTIFIER}') AS success_total,
+                        anyIf(failure_count, name = '{self.TOTAL_IDENTIFIER}') AS failure_total
+                    FROM ({contingency_table_query})
+                )
+                ARRAY JOIN rows AS row
+            )
+            -- Same as `are_results_insignificant`
+            WHERE name = '{self.TOTAL_IDENTIFIER}'
+               OR success_count + failure_count >= least(
+                   %(min_person_count)s, %(min_person_percentage)s * (success_total + failure_total)
+               )
+            -- Strongest positive correlations first, then strongest negative ones
+            ORDER BY correlation_group, if(correlation_group = 1, -odds_ratio, odds_ratio)
+            LIMIT %(top_k)s BY correlation_group
+        """
+        params = {
+            **params,
+            "prior_count": self.PRIOR_COUNT,
+            "min_person_count": self.MIN_PERSON_COUNT,
+            "min_person_percentage": self.MIN_PERSON_PERCENTAGE,
+            "top_k": self.TOP_K,
+        }
+
+        return query, params
+
+    def get_progressive_sampling_factor(self) -> float:
+        """
+        Picks the smallest of `PROGRESSIVE_SAMPLING_FACTORS` that samples at least `PROGRESSIVE_SAMPLE_EVENT_COUNT`
+        funnel step events. Counting the events of the funnel steps is cheap compared to the funnel itself, as it
+        only reads the primary key.
+        """
+        _, funnel_actors_params = self.get_funnel_actors_cte()
+        funnel_step_names = self._get_funnel_step_names()
+        # Actions might match any event
+        event_filter = "AND event IN %(funnel_step_names)s" if funnel_step_names else ""
+
+        query = f"""
+            SELECT count()
+            FROM events
+            WHERE team_id = %(team_id)s
+              AND timestamp >= toDateTime(%(date_from)s, %(timezone)s)
+              AND timestamp < toDateTime(%(date_to)s, %(timezone)s)
+              {event_filter}
+        """
+        ((event_count,),) = insight_sync_execute(
+            query,
+            {**funnel_actors_params, "team_id": self._team.pk, "funnel_step_names": funnel_step_names},
+            query_type="funnel_correlation_event_count",
+            filter=self._filter,
+            team_id=self._team.pk,
+        )
+
+        for sampling_factor in self.PROGRESSIVE_SAMPLING_FACTORS:
+            if event_count * sampling_factor >= self.PROGRESSIVE_SAMPLE_EVENT_COUNT:
+                return sampling_factor
+        return 1.0
+
     def construct_people_url(self, success: bool, event_definition: EventDefinition) -> Optional[str]:
         """
         Given an event_definition and success/failure flag, returns a url that
@@ -836,6 +974,12 @@ class FunnelCorrelation:
 
         return self._funnel_actors_generator.actor_query(limit_actors=False, extra_fields=extra_fields)
 
+    @staticmethod
+    def are_totals_skewed(success_total: int, failure_total: int) -> bool:
+        # If the ratio is greater than 1:10, then we have a skewed result, so we should
+        # warn the user.
+        return success_total / failure_total > 10 or failure_total / success_total > 10
+
     @staticmethod
     def are_results_insignificant(event_contingency_table: EventContingencyTable) -> bool:
         """
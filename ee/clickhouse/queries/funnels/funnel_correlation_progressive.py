@@ -0,0 +1,141 @@
+import json
+import time
+from dataclasses import asdict as dataclass_asdict
+from typing import List, Optional, Tuple, cast
+from uuid import uuid4
+
+import structlog
+
+from ee.clickhouse.queries.funnels.funnel_correlation import FunnelCorrelation, FunnelCorrelationResponse
+from ee.tasks.funnel_correlation import refine_funnel_correlation
+from posthog import celery, redis
+from posthog.clickhouse.client.execute_async import REDIS_STATUS_TTL, QueryStatus, generate_redis_results_key
+from posthog.models.filters import Filter
+from posthog.models.team import Team
+from posthog.utils import generate_cache_key
+
+logger = structlog.get_logger(__name__)
+
+
+class ProgressiveFunnelCorrelationResponse(FunnelCorrelationResponse, total=False):
+    # `None` once the correlation ran on all data
+    sampling_factor: Optional[float]
+    # Set while a more precise result is being calculated
+    loading: bool
+
+
+class ProgressiveFunnelCorrelation:
+    """
+    Funnel correlation that answers from a sample of the funnel first, then refines the answer asynchronously.
+
+    The first run samples just enough of the funnel (see `FunnelCorrelation.get_progressive_sampling_factor`) and
+    only pulls the top correlations out of ClickHouse. A celery task then reruns the correlation with the larger
+    `PROGRESSIVE_SAMPLING_FACTORS`, storing each partial result as the status of an async query, which the API
+    returns with `loading` set until the result is final.
+
+    Refinement stops early when all the top correlations are significant and the same as for the previous sample.
+    """
+
+    def __init__(self, filter: Filter, team: Team, base_uri: str = "/", query_id: Optional[str] = None) -> None:
+        self._filter = filter
+        self._team = team
+        self._base_uri = base_uri
+        self.query_id = query_id or generate_cache_key(f"funnel_correlation_{filter.toJSON()}_{team.pk}")
+        # People urls shouldn't be limited to the sample
+        self._correlation = FunnelCorrelation(filter, team, base_uri)
+
+    def run(self, refresh: bool = False) -> ProgressiveFunnelCorrelationResponse:
+        if not self._filter.entities:
+            return ProgressiveFunnelCorrelationResponse(events=[], skewed=False, sampling_factor=None, loading=False)
+
+        query_status = self._get_status()
+        if query_status is not None:
+            if not refresh:
+                return query_status.results
+            if query_status.task_id:
+                # Don't let a refinement of stale results overwrite the new ones
+                celery.app.control.revoke(query_status.task_id, terminate=True)
+
+        sampling_factor = self._correlation.get_progressive_sampling_factor()
+        response, complete = self._run_with_sampling_factor(sampling_factor)
+
+        if complete:
+            self._set_status(response)
+        else:
+            # Set the status before the task starts, as it picks up from there
+            task_id = str(uuid4())
+            self._set_status(response, task_id=task_id)
+            refine_funnel_correlation.apply_async(
+                (self._team.pk, self._filter.to_dict(), self._base_uri, self.query_id), task_id=task_id
+            )
+
+        return response
+
+    def refine(self, task_id: Optional[str] = None) -> None:
+        query_status = self._get_status()
+        if query_status is None or query_status.complete:
+            return
+
+        response: ProgressiveFunnelCorrelationResponse = query_status.results
+        try:
+            for sampling_factor in FunnelCorrelation.PROGRESSIVE_SAMPLING_FACTORS:
+                if sampling_factor <= (response["sampling_factor"] or 1.0):
+                    continue
+
+                response, complete = self._run_with_sampling_factor(sampling_factor, previous_response=response)
+                self._set_status(response, task_id=task_id)
+                if complete:
+                    return
+        except Exception as err:
+            # The last partial result is still valid, return it for good rather than retrying on every request
+            logger.exception("funnel_correlation_refinement_failed", team_id=self._team.pk, query_id=self.query_id)
+            response["loading"] = False
+            self._set_status(response, task_id=task_id, error_message=str(err))
+            raise
+
+    def _run_with_sampling_factor(
+        self, sampling_factor: float, previous_response: Optional[ProgressiveFunnelCorrelationResponse] = None
+    ) -> Tuple[ProgressiveFunnelCorrelationResponse, bool]:
+        filter = self._filter.shallow_clone({"sampling_factor": sampling_factor if sampling_factor < 1 else None})
+        odds_ratios, skewed, significant = FunnelCorrelation(filter, self._team).run_odds_ratios_query()
+
+        # An empty sample tells nothing about the rest of the funnel
+        complete = sampling_factor >= 1 or (
+            significant
+            and bool(odds_ratios)
+            and previous_response is not None
+            and _top_events(previous_response) == {odds_ratio["event"] for odds_ratio in odds_ratios}
+        )
+
+        response = ProgressiveFunnelCorrelationResponse(
+            **self._correlation.format_results((odds_ratios, skewed)),
+            sampling_factor=filter.sampling_factor,
+            loading=not complete,
+        )
+        return response, complete
+
+    def _get_status(self) -> Optional[QueryStatus]:
+        status = redis.get_client().get(generate_redis_results_key(self.query_id))
+        if not status:
+            return None
+        return QueryStatus(**json.loads(status))
+
+    def _set_status(
+        self, response: ProgressiveFunnelCorrelationResponse, task_id: Optional[str] = None, error_message: str = ""
+    ) -> None:
+        query_status = QueryStatus(
+            team_id=self._team.pk,
+            complete=not response["loading"],
+            error=bool(error_message),
+            error_message=error_message,
+            results=response,
+            end_time=time.time(),
+            task_id=task_id,
+        )
+        redis.get_client().set(
+            generate_redis_results_key(self.query_id), json.dumps(dataclass_asdict(query_status)), ex=REDIS_STATUS_TTL
+        )
+
+
+def _top_events(response: ProgressiveFunnelCorrelationResponse) -> set:
+    return {event["event"]["event"] for event in cast(List, response["events"])}
@@ -1,8 +1,10 @@
 import unittest
+from unittest.mock import patch
 
 from rest_framework.exceptions import ValidationError
 
 from ee.clickhouse.queries.funnels.funnel_correlation import EventContingencyTable, EventStats, FunnelCorrelation
+from ee.clickhouse.queries.funnels.funnel_correlation_progressive import ProgressiveFunnelCorrelation
 from ee.clickhouse.queries.funnels.funnel_correlation_persons import FunnelCorrelationActors
 from posthog.constants import INSIGHT_FUNNELS
 from posthog.models.action import Action
@@ -1568,6 +1570,127 @@ class TestClickhouseFunnelCorrelation(ClickhouseTestMixin, APIBaseTest):
             6,
         )
 
+    def _create_basic_correlation_events(self):
+        for i in range(10):
+            _create_person(distinct_ids=[f"user_{i}"], team_id=self.team.pk)
+            _create_event(
+                team=self.team, event="user signed up", distinct_id=f"user_{i}", timestamp="2020-01-02T14:00:00Z"
+            )
+            if i % 2 == 0:
+                _create_event(
+                    team=self.team,
+                    event="positively_related",
+                    distinct_id=f"user_{i}",
+                    timestamp="2020-01-03T14:00:00Z",
+                )
+            _create_event(team=self.team, event="paid", distinct_id=f"user_{i}", timestamp="2020-01-04T14:00:00Z")
+
+        for i in range(10, 20):
+            _create_person(distinct_ids=[f"user_{i}"], team_id=self.team.pk)
+            _create_event(
+                team=self.team, event="user signed up", distinct_id=f"user_{i}", timestamp="2020-01-02T14:00:00Z"
+            )
+            if i % 2 == 0:
+                _create_event(
+                    team=self.team,
+                    event="negatively_related",
+                    distinct_id=f"user_{i}",
+                    timestamp="2020-01-03T14:00:00Z",
+                )
+
+    def test_odds_ratios_query_matches_python_calculation(self):
+        self._create_basic_correlation_events()
+        filter = Filter(
+            data={
+                "events": [
+                    {"id": "user signed up", "type": "events", "order": 0},
+                    {"id": "paid", "type": "events", "order": 1},
+                ],
+                "insight": INSIGHT_FUNNELS,
+                "date_from": "2020-01-01",
+                "date_to": "2020-01-14",
+                "funnel_correlation_type": "events",
+            }
+        )
+        correlation = FunnelCorrelation(filter, self.team)
+
+        expected_odds_ratios, expected_skewed = correlation._run()
+        odds_ratios, skewed, significant = correlation.run_odds_ratios_query()
+
+        self.assertEqual(
+            [odds_ratio["event"] for odds_ratio in odds_ratios], ["positively_related", "negatively_related"]
+        )
+        for odds_ratio, expected_odds_ratio in zip(odds_ratios, expected_odds_ratios):
+            self.assertAlmostEqual(odds_ratio.pop("odds_ratio"), expected_odds_ratio.pop("odds_ratio"))  # type: ignore
+        self.assertEqual(odds_ratios, expected_odds_ratios)
+        self.assertEqual(skewed, expected_skewed)
+        # z-score of log(11) with 5 people on each side is just above 1.96
+        self.assertTrue(significant)
+
+    @patch("ee.clickhouse.queries.funnels.funnel_correlation_progressive.refine_funnel_correlation")
+    def test_progressive_correlation_refines_sampled_results(self, refine_funnel_correlation):
+        self._create_basic_correlation_events()
+        filter = Filter(
+            data={
+                "events": [
+                    {"id": "user signed up", "type": "events", "order": 0},
+                    {"id": "paid", "type": "events", "order": 1},
+                ],
+                "insight": INSIGHT_FUNNELS,
+                "date_from": "2020-01-01",
+                "date_to": "2020-01-14",
+                "funnel_correlation_type": "events",
+                "funnel_correlation_progressive": True,
+            },
+            team=self.team,
+        )
+        progressive_correlation = ProgressiveFunnelCorrelation(filter, self.team)
+
+        with patch.object(FunnelCorrelation, "PROGRESSIVE_SAMPLE_EVENT_COUNT", 0):
+            response = progressive_correlation.run()
+
+        self.assertEqual(response["sampling_factor"], 0.01)
+        self.assertTrue(response["loading"])
+        refine_funnel_correlation.apply_async.assert_called_once()
+        # Polling returns the partial result
+        self.assertEqual(progressive_correlation.run(), response)
+
+        progressive_correlation.refine()
+
+        response = progressive_correlation.run()
+        self.assertFalse(response["loading"])
+        # Samples of 20 people are too small to be significant, so refinement ran on all data
+        self.assertEqual(response["sampling_factor"], None)
+        self.assertEqual(
+            [(event["event"]["event"], event["correlation_type"]) for event in response["events"]],
+            [("positively_related", "success"), ("negatively_related", "failure")],
+        )
+
+    @patch("ee.clickhouse.queries.funnels.funnel_correlation_progressive.refine_funnel_correlation")
+    def test_progressive_correlation_on_small_funnels_runs_on_all_data(self, refine_funnel_correlation):
+        self._create_basic_correlation_events()
+        filter = Filter(
+            data={
+                "events": [
+                    {"id": "user signed up", "type": "events", "order": 0},
+                    {"id": "paid", "type": "events", "order": 1},
+                ],
+                "insight": INSIGHT_FUNNELS,
+                "date_from": "2020-01-01",
+                "date_to": "2020-01-15",
+                "funnel_correlation_type": "events",
+                "funnel_correlation_progressive": True,
+            },
+            team=self.team,
+        )
+
+        response = ProgressiveFunnelCorrelation(filter, self.team).run()
+
+        self.assertEqual(response["sampling_factor"], None)
+        self.assertFalse(response["loading"])
+        self.assertEqual(len(response["events"]), 2)
+        refine_funnel_correlation.apply_async.assert_not_called()
+
 
 class TestCorrelationFunctions(unittest.TestCase):
     def test_are_results_insignificant(self):
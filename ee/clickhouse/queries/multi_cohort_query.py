@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+from ee.clickhouse.queries.enterprise_cohort_query import EnterpriseCohortQuery
+from posthog.clickhouse.materialized_columns import ColumnName
+from posthog.hogql.hogql import HogQLContext
+from posthog.models import Filter, Team
+from posthog.models.cohort import Cohort
+from posthog.queries.foss_cohort_query import Relative_Date, relative_date_is_greater
+from posthog.utils import PersonOnEventsMode
+
+logger = structlog.get_logger(__name__)
+
+
+class SharedScanCohortQuery(EnterpriseCohortQuery):
+    """
+    Builds the predicate of one cohort for `MultiCohortQuery`.
+
+    Person filters are never pushed down into a per-cohort person query, so that the predicate only references the
+    columns of the behavior and person subqueries shared by all cohorts.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._outer_property_groups = self._filter.property_groups
+        self._inner_property_groups = None
+
+    def get_predicate(self) -> Tuple[str, Dict[str, Any]]:
+        conditions, params = self._get_conditions()
+        self.params.update(params)
+        return conditions[len("AND ") :], self.params
+
+
+class MultiCohortQuery:
+    """
+    Evaluates several dynamic cohorts of a team in one pass over its events and persons.
+
+    The per-cohort `countIf`/`minIf` aggregates of `EnterpriseCohortQuery` are computed side by side in one events
+    scan, persons are read once, and the query returns one boolean column per cohort (see `column_name`).
+    Cohorts the shared scan doesn't support are left in `unsupported_cohorts` to be calculated one by one.
+    """
+
+    BEHAVIOR_QUERY_ALIAS = EnterpriseCohortQuery.BEHAVIOR_QUERY_ALIAS
+    PERSON_TABLE_ALIAS = EnterpriseCohortQuery.PERSON_TABLE_ALIAS
+
+    def __init__(self, cohorts: List[Cohort], team: Team, hogql_context: HogQLContext) -> None:
+        self._team = team
+        self.cohorts: List[Cohort] = []
+        self.unsupported_cohorts: List[Cohort] = []
+        self._predicates: Dict[int, str] = {}
+        self._queries: List[SharedScanCohortQuery] = []
+        self.params: Dict[str, Any] = {"team_id": team.pk}
+
+        for cohort in cohorts:
+            query = self._get_cohort_query(cohort, hogql_context)
+            if query is None:
+                self.unsupported_cohorts.append(cohort)
+                continue
+
+            predicate, params = query.get_predicate()
+            self.cohorts.append(cohort)
+            self._queries.append(query)
+            self._predicates[cohort.pk] = predicate
+            self.params.update(params)
+
+    @staticmethod
+    def column_name(cohort: Cohort) -> str:
+        return f"cohort_{cohort.pk}"
+
+    def get_query(self) -> Tuple[str, Dict[str, Any]]:
+        behavior_query, behavior_params = self._get_behavior_subquery()
+        person_query = self._get_persons_query()
+        self.params.update(behavior_params)
+
+        cohort_columns = ", ".join(
+            f"toUInt8({self._predicates[cohort.pk]}) AS {self.column_name(cohort)}" for cohort in self.cohorts
+        )
+
+        if not behavior_query:
+            return (
+                f"SELECT person_id AS id, {cohort_columns} FROM ({person_query}) {self.PERSON_TABLE_ALIAS}",
+                self.params,
+            )
+
+        # As in `FOSSCohortQuery._build_sources`, the FULL OUTER JOIN leaves a blank uuid on one side
+        query = f"""
+        SELECT
+            if({self.BEHAVIOR_QUERY_ALIAS}.person_id = '00000000-0000-0000-0000-000000000000', {self.PERSON_TABLE_ALIAS}.person_id, {self.BEHAVIOR_QUERY_ALIAS}.person_id) AS id,
+            {cohort_columns}
+        FROM ({behavior_query}) {self.BEHAVIOR_QUERY_ALIAS}
+        FULL OUTER JOIN ({person_query}) {self.PERSON_TABLE_ALIAS}
+        ON {self.PERSON_TABLE_ALIAS}.person_id = {self.BEHAVIOR_QUERY_ALIAS}.person_id
+        """
+        return query, self.params
+
+    def _get_cohort_query(self, cohort: Cohort, hogql_context: HogQLContext) -> Optional[SharedScanCohortQuery]:
+        if cohort.is_static or not cohort.properties.values:
+            return None
+
+        try:
+            query = SharedScanCohortQuery(
+                Filter(data={"properties": cohort.properties}, team=self._team, hogql_context=hogql_context),
+                self._team,
+                cohort_pk=cohort.pk,
+            )
+        except ValueError:
+            # Invalid filters, calculating the cohort on its own surfaces the error
+            logger.warning("multi_cohort_query_unsupported_cohort", cohort_id=cohort.pk, exc_info=True)
+            return None
+
+        # Sequences are evaluated with window functions over a differently shaped events subquery
+        if query.sequence_filters_to_query:
+            return None
+
+        return query
+
+    def _get_behavior_subquery(self) -> Tuple[str, Dict[str, Any]]:
+        behavioral_queries = [query for query in self._queries if query._should_join_behavioral_query]
+        if not behavioral_queries:
+            return "", {}
+
+        # All the queries are for the same team, so they join person ids the same way
+        reference_query = behavioral_queries[0]
+        person_id_alias = (
+            reference_query.DISTINCT_ID_TABLE_ALIAS
+            if reference_query._person_on_events_mode == PersonOnEventsMode.DISABLED
+            else reference_query.EVENT_TABLE_ALIAS
+        )
+
+        fields = [f"{person_id_alias}.person_id AS person_id"]
+        events: Set[str] = set()
+        for query in behavioral_queries:
+            fields.extend(query._fields)
+            events.update(query._events)
+
+        date_condition, date_params = self._get_date_condition(behavioral_queries)
+
+        query = f"""
+        SELECT {", ".join(fields)} FROM events {reference_query.EVENT_TABLE_ALIAS}
+        {reference_query._get_person_ids_query()}
+        WHERE team_id = %(team_id)s
+        AND event IN %(multi_cohort_event_ids)s
+        {date_condition}
+        GROUP BY person_id
+        """
+        return query, {"multi_cohort_event_ids": sorted(events), **date_params}
+
+    def _get_date_condition(self, queries: List[SharedScanCohortQuery]) -> Tuple[str, Dict[str, Any]]:
+        earliest_time: Optional[Relative_Date] = None
+        for query in queries:
+            if not query._restrict_event_query_by_time:
+                # e.g. "performed event for the first time" needs to see all events
+                return "", {}
+            query_earliest_time = query._earliest_time_for_event_query
+            if query_earliest_time is None:
+                continue
+            if earliest_time is None or relative_date_is_greater(query_earliest_time, earliest_time):
+                earliest_time = query_earliest_time
+
+        if earliest_time is None:
+            return "", {}
+
+        return (
+            f"AND timestamp <= now() AND timestamp >= now() - INTERVAL %(multi_cohort_earliest_time)s {earliest_time[1]}",
+            {"multi_cohort_earliest_time": earliest_time[0]},
+        )
+
+    def _get_persons_query(self) -> str:
+        # Materialized person columns referenced by any of the predicates, `properties` is exposed as `person_props`
+        columns: Set[ColumnName] = {"properties"}
+        for query in self._queries:
+            columns |= query._column_optimizer.person_columns_to_query
+
+        fields = "".join(
+            f", argMax({column}, version) AS {'person_props' if column == 'properties' else column}"
+            for column in sorted(columns)
+        )
+        return f"""
+        SELECT id, id AS person_id{fields}
+        FROM person
+        WHERE team_id = %(team_id)s
+        GROUP BY id
+        HAVING max(is_deleted) = 0
+        """
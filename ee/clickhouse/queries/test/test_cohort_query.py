@@ -208,6 +208,52 @@ class TestCohortQuery(ClickhouseTestMixin, BaseTest):
 
         self.assertEqual([p1.uuid], [r[0] for r in res])
 
+    def test_restricted_to_person_ids(self):
+        p1 = _create_person(team_id=self.team.pk, distinct_ids=["p1"], properties={"name": "test"})
+        _create_event(
+            team=self.team,
+            event="$pageview",
+            properties={},
+            distinct_id="p1",
+            timestamp=datetime.now() - timedelta(days=2),
+        )
+
+        _create_person(team_id=self.team.pk, distinct_ids=["p2"], properties={"name": "test"})
+        _create_event(
+            team=self.team,
+            event="$pageview",
+            properties={},
+            distinct_id="p2",
+            timestamp=datetime.now() - timedelta(days=2),
+        )
+        flush_persons_and_events()
+
+        filter = Filter(
+            data={
+                "properties": {
+                    "type": "OR",
+                    "values": [
+                        {
+                            "key": "$pageview",
+                            "event_type": "events",
+                            "time_value": 1,
+                            "time_interval": "week",
+                            "value": "performed_event",
+                            "type": "behavioral",
+                        },
+                        {"key": "name", "value": "test", "type": "person"},
+                    ],
+                }
+            }
+        )
+
+        q, params = CohortQuery(
+            filter=filter, team=self.team, person_ids_query="SELECT toUUID(%(restricted_person_id)s)"
+        ).get_query()
+        res = sync_execute(q, {**params, **filter.hogql_context.values, "restricted_person_id": str(p1.uuid)})
+
+        self.assertEqual([p1.uuid], [r[0] for r in res])
+
     def test_performed_event_multiple(self):
         p1 = _create_person(
             team_id=self.team.pk, distinct_ids=["p1"], properties={"name": "test", "email": "test@posthog.com"}
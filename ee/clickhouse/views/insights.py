@@ -5,7 +5,8 @@ from rest_framework.permissions import SAFE_METHODS, BasePermission
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from ee.clickhouse.queries.funnels.funnel_correlation import FunnelCorrelation
+from ee.clickhouse.queries.funnels.funnel_correlation import FunnelCorrelation, FunnelCorrelationResponse
+from ee.clickhouse.queries.funnels.funnel_correlation_progressive import ProgressiveFunnelCorrelation
 from ee.clickhouse.queries.paths import ClickhousePaths
 from ee.clickhouse.queries.retention import ClickhouseRetention
 from ee.clickhouse.queries.stickiness import ClickhouseStickiness
@@ -14,6 +15,7 @@ from posthog.decorators import cached_function
 from posthog.models import Insight
 from posthog.models.dashboard import Dashboard
 from posthog.models.filters import Filter
+from posthog.utils import refresh_requested_by_client
 
 
 class CanEditInsight(BasePermission):
@@ -38,6 +40,8 @@ class ClickhouseInsightsViewSet(InsightViewSet):
     #
     # params:
     # - params are the same as for funnel
+    # - funnel_correlation_progressive: answer from a sample first, while the
+    #   result is refined in the background. Poll until `loading` is unset
     #
     # Returns significant events, i.e. those that are correlated with a person
     # making it through a funnel
@@ -53,6 +57,12 @@ class ClickhouseInsightsViewSet(InsightViewSet):
         filter = Filter(request=request, team=team)
 
         base_uri = request.build_absolute_uri("/")
-        result = FunnelCorrelation(filter=filter, team=team, base_uri=base_uri).run()
+        result: FunnelCorrelationResponse
+        if filter.correlation_progressive:
+            result = ProgressiveFunnelCorrelation(filter=filter, team=team, base_uri=base_uri).run(
+                refresh=refresh_requested_by_client(request)
+            )
+        else:
+            result = FunnelCorrelation(filter=filter, team=team, base_uri=base_uri).run()
 
         return {"result": result}
@@ -2,7 +2,7 @@ import logging
 
 from django.core.management.base import BaseCommand
 
-from ee.clickhouse.materialized_columns.analyze import logger, materialize_properties_task
+from ee.clickhouse.materialized_columns.analyze import Suggestion, logger, materialize_properties_task
 from ee.clickhouse.materialized_columns.columns import DEFAULT_TABLE_COLUMN
 from posthog.settings import (
     MATERIALIZE_COLUMNS_ANALYSIS_PERIOD_HOURS,
@@ -27,6 +27,13 @@ class Command(BaseCommand):
             help="The column to which --property should be materialised from.",
             default=DEFAULT_TABLE_COLUMN,
         )
+        parser.add_argument(
+            "--column-type",
+            type=str,
+            default="String",
+            choices=["String", "Float64", "DateTime"],
+            help="Type to materialize --property as. Typed columns are only supported on events.",
+        )
         parser.add_argument(
             "--backfill-period",
             type=int,
@@ -60,10 +67,20 @@ class Command(BaseCommand):
             logger.warn("Dry run: No changes to the tables will be made!")
 
         if options.get("property"):
-            logger.info(f"Materializing column. table={options['property_table']}, property_name={options['property']}")
+            logger.info(
+                f"Materializing column. table={options['property_table']}, property_name={options['property']}, column_type={options['column_type']}"
+            )
 
             materialize_properties_task(
-                columns_to_materialize=[(options["property_table"], options["table_column"], options["property"], 0)],
+                columns_to_materialize=[
+                    Suggestion(
+                        options["property_table"],
+                        options["table_column"],
+                        options["property"],
+                        0,
+                        options["column_type"],
+                    )
+                ],
                 backfill_period_days=options["backfill_period"],
                 dry_run=options["dry_run"],
             )
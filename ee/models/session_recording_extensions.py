@@ -21,20 +21,23 @@ logger = structlog.get_logger(__name__)
 MINIMUM_AGE_FOR_RECORDING = timedelta(hours=24)
 
 
+PERSISTED_RECORDING_FIELDS = [
+    "object_storage_path",
+    "distinct_id",
+    "start_time",
+    "end_time",
+    "duration",
+    "click_count",
+    "keypress_count",
+    "start_url",
+]
+
+
 def persist_recording(recording_id: str, team_id: int) -> None:
     """Persist a recording to the S3"""
 
     logger.info("Persisting recording: init", recording_id=recording_id, team_id=team_id)
 
-    start_time = timezone.now()
-    analytics_payload = {
-        "total_time_ms": 0.0,
-        "metadata_load_time_ms": 0.0,
-        "snapshots_load_time_ms": 0.0,
-        "content_size_in_bytes": 0,
-        "compressed_size_in_bytes": 0,
-    }
-
     if not settings.OBJECT_STORAGE_ENABLED:
         return
 
@@ -49,6 +52,31 @@ def persist_recording(recording_id: str, team_id: int) -> None:
         )
         return
 
+    if persist_loaded_recording(recording) is not None:
+        recording.save()
+
+
+def persist_loaded_recording(recording: SessionRecording) -> Optional[bool]:
+    """
+    Writes an already fetched recording to S3 without saving the model, so that callers can save in bulk.
+
+    If the recording's metadata was set beforehand (e.g. by a batched ClickHouse query) it is not loaded again.
+    Returns True if the recording was written to S3, False if only its metadata should be saved
+    and None if there is nothing to save.
+    """
+
+    recording_id = recording.session_id
+    team_id = recording.team_id
+
+    start_time = timezone.now()
+    analytics_payload = {
+        "total_time_ms": 0.0,
+        "metadata_load_time_ms": 0.0,
+        "snapshots_load_time_ms": 0.0,
+        "content_size_in_bytes": 0,
+        "compressed_size_in_bytes": 0,
+    }
+
     logger.info("Persisting recording: loading metadata...", recording_id=recording_id, team_id=team_id)
 
     recording.load_metadata()
@@ -62,8 +90,7 @@ def persist_recording(recording_id: str, team_id: int) -> None:
             recording_id=recording_id,
             team_id=team_id,
         )
-        recording.save()
-        return
+        return False
 
     recording.load_snapshots(100_000)  # TODO: Paginate rather than hardcode a limit
     analytics_payload["snapshots_load_time_ms"] = (
@@ -90,18 +117,19 @@ def persist_recording(recording_id: str, team_id: int) -> None:
         object_path = recording.build_object_storage_path()
         object_storage.write(object_path, string_content.encode("utf-8"))
         recording.object_storage_path = object_path
-        recording.save()
 
         analytics_payload["total_time_ms"] = (timezone.now() - start_time).total_seconds() * 1000
         report_team_action(recording.team, "session recording persisted", analytics_payload)
 
         logger.info("Persisting recording: done!", recording_id=recording_id, team_id=team_id)
+        return True
     except object_storage.ObjectStorageError as ose:
         capture_exception(ose)
         report_team_action(recording.team, "session recording persist failed", analytics_payload)
         logger.error(
             "session_recording.object-storage-error", recording_id=recording.session_id, exception=ose, exc_info=True
         )
+        return None
 
 
 def load_persisted_recording(recording: SessionRecording) -> Optional[PersistedRecordingV1]:
@@ -1,11 +1,18 @@
-from .session_recording.persistence import persist_finished_recordings, persist_single_recording
+from .funnel_correlation import refine_funnel_correlation
+from .session_recording.persistence import (
+    persist_finished_recordings,
+    persist_recordings_batch,
+    persist_single_recording,
+)
 from .subscriptions import deliver_subscription_report, handle_subscription_value_change, schedule_all_subscriptions
 
 # As our EE tasks are not included at startup for Celery, we need to ensure they are declared here so that they are imported by posthog/settings/celery.py
 
 __all__ = [
+    "refine_funnel_correlation",
     "persist_single_recording",
     "persist_finished_recordings",
+    "persist_recordings_batch",
     "schedule_all_subscriptions",
     "deliver_subscription_report",
     "handle_subscription_value_change",
@@ -0,0 +1,17 @@
+from typing import Any, Dict
+
+from posthog.celery import app
+
+
+@app.task(ignore_result=True, bind=True)
+def refine_funnel_correlation(self, team_id: int, filter_data: Dict[str, Any], base_uri: str, query_id: str) -> None:
+    """
+    Reruns a progressive funnel correlation on larger samples, see `ProgressiveFunnelCorrelation`
+    """
+    from ee.clickhouse.queries.funnels.funnel_correlation_progressive import ProgressiveFunnelCorrelation
+    from posthog.models.filters import Filter
+    from posthog.models.team import Team
+
+    team = Team.objects.get(pk=team_id)
+    filter = Filter(data=filter_data, team=team)
+    ProgressiveFunnelCorrelation(filter, team, base_uri, query_id=query_id).refine(task_id=self.request.id)
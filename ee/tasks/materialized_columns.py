@@ -1,6 +1,12 @@
 from celery.utils.log import get_task_logger
 
-from ee.clickhouse.materialized_columns.columns import TRIM_AND_EXTRACT_PROPERTY, ColumnName, get_materialized_columns
+from ee.clickhouse.materialized_columns.columns import (
+    TRIM_AND_EXTRACT_PROPERTY,
+    ColumnName,
+    get_materialized_columns,
+    get_typed_materialized_columns,
+    typed_column_definition,
+)
 from posthog.client import sync_execute
 from posthog.settings import CLICKHOUSE_CLUSTER, CLICKHOUSE_DATABASE
 
@@ -12,7 +18,7 @@ def mark_all_materialized() -> None:
         logger.info("There are running mutations, skipping marking as materialized")
         return
 
-    for table, property_name, table_column, column_name in get_materialized_columns_with_default_expression():
+    for table, property_name, column_name, sql_type, expression in get_materialized_columns_with_default_expression():
         updated_table = "sharded_events" if table == "events" else table
 
         # :TRICKY: On cloud, we ON CLUSTER updates to events/sharded_events but not to persons. Why? ¯\_(ツ)_/¯
@@ -23,7 +29,7 @@ def mark_all_materialized() -> None:
             ALTER TABLE {updated_table}
             {execute_on_cluster}
             MODIFY COLUMN
-            {column_name} VARCHAR MATERIALIZED {TRIM_AND_EXTRACT_PROPERTY.format(table_column=table_column)}
+            {column_name} {sql_type} MATERIALIZED {expression}
             """,
             {"property": property_name},
         )
@@ -34,7 +40,14 @@ def get_materialized_columns_with_default_expression():
         materialized_columns = get_materialized_columns(table, use_cache=False)
         for (property_name, table_column), column_name in materialized_columns.items():
             if is_default_expression(table, column_name):
-                yield table, property_name, table_column, column_name
+                yield table, property_name, column_name, "VARCHAR", TRIM_AND_EXTRACT_PROPERTY.format(
+                    table_column=table_column
+                )
+
+    typed_materialized_columns = get_typed_materialized_columns("events", use_cache=False)
+    for (property_name, table_column, column_type), column_name in typed_materialized_columns.items():
+        if is_default_expression("events", column_name):
+            yield ("events", property_name, column_name, *typed_column_definition(column_type, table_column))
 
 
 def any_ongoing_mutations() -> bool:
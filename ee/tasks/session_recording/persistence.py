@@ -1,26 +1,186 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from typing import Dict, List, Optional
 
 import structlog
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from prometheus_client import Counter, Gauge
+from sentry_sdk import capture_exception
 
-from ee.models.session_recording_extensions import persist_recording
+from ee.models.session_recording_extensions import (
+    PERSISTED_RECORDING_FIELDS,
+    persist_loaded_recording,
+    persist_recording,
+)
 from posthog.celery import app
+from posthog.metrics import pushed_metrics_registry
 from posthog.models.session_recording.session_recording import SessionRecording
+from posthog.queries.session_recordings.session_recording_events import SessionRecordingEvents
 
 logger = structlog.get_logger(__name__)
 
+# Number of recordings persisted by a single `persist_recordings_batch` task
+PERSIST_RECORDINGS_BATCH_SIZE = 100
+# Upper bound of batches enqueued per scheduling run, anything left over is picked up by the next run
+PERSIST_RECORDINGS_MAX_BATCHES_PER_RUN = 1_000
+# Upper bound of concurrent snapshot loads + S3 uploads within one batch task
+PERSIST_RECORDINGS_MAX_CONCURRENT_UPLOADS = 4
+# Recordings that failed or had no metadata this many times are no longer picked up, so they cannot starve newer ones
+PERSIST_RECORDINGS_MAX_ATTEMPTS = 3
+
+RECORDINGS_PERSISTED_COUNTER = Counter(
+    "session_recording_persisted_total",
+    "Number of session recordings moved to object storage by the batched persistence task",
+)
+
+RECORDINGS_PERSIST_SKIPPED_COUNTER = Counter(
+    "session_recording_persist_skipped_total",
+    "Number of session recordings the batched persistence task did not move to object storage",
+    labelnames=["reason"],
+)
+
 
 @app.task()
 def persist_single_recording(id: str, team_id: int) -> None:
     persist_recording(id, team_id)
 
 
+def finished_recordings_queryset():
+    one_day_old = timezone.now() - timedelta(hours=24)
+    return (
+        SessionRecording.objects.filter(created_at__lte=one_day_old, object_storage_path=None)
+        .exclude(deleted=True)
+        .exclude(persist_attempts__gte=PERSIST_RECORDINGS_MAX_ATTEMPTS)
+    )
+
+
 @app.task()
 def persist_finished_recordings() -> None:
-    one_day_old = timezone.now() - timedelta(hours=24)
-    finished_recordings = SessionRecording.objects.filter(created_at__lte=one_day_old, object_storage_path=None)
+    """
+    Walks the finished, not yet persisted recordings by primary key (keyset pagination, so no recording is enqueued
+    twice within a run and no OFFSET scans are needed) and enqueues one `persist_recordings_batch` task per page.
+    """
+    if not settings.OBJECT_STORAGE_ENABLED:
+        return
+
+    finished_recordings = finished_recordings_queryset()
+    cursor: Optional[str] = None
+    batches_enqueued = 0
+    recordings_enqueued = 0
+
+    while batches_enqueued < PERSIST_RECORDINGS_MAX_BATCHES_PER_RUN:
+        page = finished_recordings.order_by("id")
+        if cursor is not None:
+            page = page.filter(id__gt=cursor)
+        recording_ids = [str(id) for id in page.values_list("id", flat=True)[:PERSIST_RECORDINGS_BATCH_SIZE]]
+
+        if not recording_ids:
+            break
+
+        persist_recordings_batch.delay(recording_ids)
+        cursor = recording_ids[-1]
+        batches_enqueued += 1
+        recordings_enqueued += len(recording_ids)
+
+    backlog = finished_recordings.count() - recordings_enqueued
+
+    logger.info(
+        "Persisting finished recordings",
+        batches=batches_enqueued,
+        count=recordings_enqueued,
+        remaining_backlog=backlog,
+    )
+
+    with pushed_metrics_registry("celery_session_recording_persistence") as registry:
+        enqueued_gauge = Gauge(
+            "posthog_celery_session_recording_persist_enqueued",
+            "Number of finished session recordings enqueued for persistence by the last run.",
+            registry=registry,
+        )
+        enqueued_gauge.set(recordings_enqueued)
+        backlog_gauge = Gauge(
+            "posthog_celery_session_recording_persist_backlog",
+            "Number of finished session recordings left over for the next persistence run.",
+            registry=registry,
+        )
+        backlog_gauge.set(max(backlog, 0))
+
+
+@app.task(ignore_result=True)
+def persist_recordings_batch(recording_ids: List[str]) -> None:
+    """
+    Persists a page of recordings: metadata is loaded with one ClickHouse query per team, snapshots are loaded and
+    uploaded with bounded concurrency, and the recordings are saved with one bulk update.
+    """
+    recordings = list(
+        SessionRecording.objects.select_related("team")
+        .filter(id__in=recording_ids, object_storage_path=None)
+        .exclude(deleted=True)
+    )
+    RECORDINGS_PERSIST_SKIPPED_COUNTER.labels(reason="already_persisted_or_deleted").inc(
+        len(recording_ids) - len(recordings)
+    )
+
+    recordings_by_team_id: Dict[int, List[SessionRecording]] = {}
+    for recording in recordings:
+        recordings_by_team_id.setdefault(recording.team_id, []).append(recording)
+
+    for team_recordings in recordings_by_team_id.values():
+        team = team_recordings[0].team
+        start_times = [recording.start_time for recording in team_recordings]
+        metadata_by_session_id = SessionRecordingEvents.get_metadata_for_sessions(
+            team=team,
+            session_ids=[recording.session_id for recording in team_recordings],
+            recording_start_times=start_times if all(start_times) else None,
+        )
+        for recording in team_recordings:
+            metadata = metadata_by_session_id.get(recording.session_id)
+            if metadata:
+                recording.set_metadata(metadata)
+
+    with ThreadPoolExecutor(max_workers=PERSIST_RECORDINGS_MAX_CONCURRENT_UPLOADS) as executor:
+        results = list(executor.map(_persist_loaded_recording, recordings))
+
+    to_update = [recording for recording, result in zip(recordings, results) if result is not None]
+    SessionRecording.objects.bulk_update(to_update, fields=PERSISTED_RECORDING_FIELDS)
+
+    # Without metadata there is no start time, and so nothing to ever persist, so like failures these count as attempts
+    no_metadata_ids = [
+        recording.id for recording, result in zip(recordings, results) if result is False and not recording.start_time
+    ]
+    failed_ids = [recording.id for recording, result in zip(recordings, results) if result is None]
+    if no_metadata_ids or failed_ids:
+        SessionRecording.objects.filter(id__in=no_metadata_ids + failed_ids).update(
+            persist_attempts=Coalesce(F("persist_attempts"), Value(0)) + 1
+        )
+
+    persisted_count = results.count(True)
+    RECORDINGS_PERSISTED_COUNTER.inc(persisted_count)
+    RECORDINGS_PERSIST_SKIPPED_COUNTER.labels(reason="too_recent").inc(results.count(False) - len(no_metadata_ids))
+    RECORDINGS_PERSIST_SKIPPED_COUNTER.labels(reason="no_metadata").inc(len(no_metadata_ids))
+    RECORDINGS_PERSIST_SKIPPED_COUNTER.labels(reason="failed").inc(len(failed_ids))
+
+    logger.info(
+        "Persisted recordings batch",
+        count=len(recording_ids),
+        persisted=persisted_count,
+        saved=len(to_update),
+    )
 
-    logger.info("Persisting finished recordings", count=finished_recordings.count())
 
-    for recording in finished_recordings:
-        persist_single_recording.delay(recording.session_id, recording.team_id)
+def _persist_loaded_recording(recording: SessionRecording) -> Optional[bool]:
+    try:
+        return persist_loaded_recording(recording)
+    except Exception as e:
+        capture_exception(e)
+        logger.error(
+            "Persisting recording: failed", recording_id=recording.session_id, team_id=recording.team_id, exc_info=True
+        )
+        return None
+    finally:
+        # Worker threads get their own database connection, which would otherwise be left open
+        connection.close()
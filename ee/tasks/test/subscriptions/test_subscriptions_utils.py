@@ -12,8 +12,7 @@ from posthog.models.insight import Insight
 from posthog.test.base import APIBaseTest
 
 
-@patch("ee.tasks.subscriptions.subscription_utils.group")
-@patch("ee.tasks.subscriptions.subscription_utils.exporter.export_asset")
+@patch("ee.tasks.subscriptions.subscription_utils.image_exporter.export_image")
 class TestSubscriptionsTasksUtils(APIBaseTest):
     dashboard: Dashboard
     insight: Insight
@@ -30,23 +29,23 @@ class TestSubscriptionsTasksUtils(APIBaseTest):
 
         self.subscription = create_subscription(team=self.team, insight=self.insight, created_by=self.user)
 
-    def test_generate_assets_for_insight(self, mock_export_task: MagicMock, mock_group: MagicMock) -> None:
+    def test_generate_assets_for_insight(self, mock_export_image: MagicMock) -> None:
         insights, assets = generate_assets(self.subscription)
 
         assert insights == [self.insight]
         assert len(assets) == 1
-        assert mock_export_task.s.call_count == 1
+        assert mock_export_image.call_count == 1
 
-    def test_generate_assets_for_dashboard(self, mock_export_task: MagicMock, mock_group: MagicMock) -> None:
+    def test_generate_assets_for_dashboard(self, mock_export_image: MagicMock) -> None:
         subscription = create_subscription(team=self.team, dashboard=self.dashboard, created_by=self.user)
 
         insights, assets = generate_assets(subscription)
 
         assert len(insights) == len(self.tiles)
         assert len(assets) == DEFAULT_MAX_ASSET_COUNT
-        assert mock_export_task.s.call_count == DEFAULT_MAX_ASSET_COUNT
+        assert mock_export_image.call_count == DEFAULT_MAX_ASSET_COUNT
 
-    def test_raises_if_missing_resource(self, mock_export_task: MagicMock, mock_group: MagicMock) -> None:
+    def test_raises_if_missing_resource(self, mock_export_image: MagicMock) -> None:
         subscription = create_subscription(team=self.team, created_by=self.user)
 
         with pytest.raises(Exception) as e:
@@ -54,7 +53,7 @@ class TestSubscriptionsTasksUtils(APIBaseTest):
 
         assert str(e.value) == "There are no insights to be sent for this Subscription"
 
-    def test_excludes_deleted_insights_for_dashboard(self, mock_export_task: MagicMock, mock_group: MagicMock) -> None:
+    def test_excludes_deleted_insights_for_dashboard(self, mock_export_image: MagicMock) -> None:
         for i in range(1, 10):
             current_tile = self.tiles[i]
             if current_tile.insight is None:
@@ -67,4 +66,4 @@ class TestSubscriptionsTasksUtils(APIBaseTest):
 
         assert len(insights) == 1
         assert len(assets) == 1
-        assert mock_export_task.s.call_count == 1
+        assert mock_export_image.call_count == 1
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.utils import timezone
+from freezegun import freeze_time
+
+from ee.tasks.session_recording.persistence import persist_finished_recordings, persist_recordings_batch
+from posthog.models.session_recording.session_recording import SessionRecording
+from posthog.session_recordings.test.test_factory import create_session_recording_events
+from posthog.test.base import APIBaseTest, ClickhouseTestMixin
+
+
+class TestSessionRecordingPersistence(ClickhouseTestMixin, APIBaseTest):
+    def create_snapshot(self, session_id, timestamp):
+        create_session_recording_events(
+            team_id=self.team.pk,
+            distinct_id="distinct_id_1",
+            timestamp=timestamp,
+            session_id=session_id,
+            window_id="window_1",
+            snapshots=[
+                {
+                    "timestamp": timestamp.timestamp() * 1000,
+                    "has_full_snapshot": 1,
+                    "type": 2,
+                    "data": {"source": 0, "href": "https://app.posthog.com/my-url"},
+                }
+            ],
+        )
+
+    @patch("ee.tasks.session_recording.persistence.PERSIST_RECORDINGS_BATCH_SIZE", 2)
+    @patch("ee.tasks.session_recording.persistence.persist_recordings_batch.delay")
+    def test_persist_finished_recordings_enqueues_keyset_pages(self, mock_delay):
+        with freeze_time(timezone.now() - timedelta(hours=48)):
+            recordings = [SessionRecording.objects.create(team=self.team, session_id=f"s{index}") for index in range(5)]
+            SessionRecording.objects.create(team=self.team, session_id="deleted", deleted=True)
+            SessionRecording.objects.create(team=self.team, session_id="persisted", object_storage_path="some/path")
+            SessionRecording.objects.create(team=self.team, session_id="given_up", persist_attempts=3)
+        SessionRecording.objects.create(team=self.team, session_id="too_recent")
+
+        persist_finished_recordings()
+
+        enqueued_ids = [call[0][0] for call in mock_delay.call_args_list]
+        assert [len(ids) for ids in enqueued_ids] == [2, 2, 1]
+        assert sorted(id for ids in enqueued_ids for id in ids) == sorted(str(r.id) for r in recordings)
+
+    def test_persist_recordings_batch(self):
+        with freeze_time("2022-01-01T12:00:00Z"):
+            old_recording = SessionRecording.objects.create(team=self.team, session_id="s1")
+            self.create_snapshot(old_recording.session_id, old_recording.created_at - timedelta(hours=48))
+            self.create_snapshot(old_recording.session_id, old_recording.created_at - timedelta(hours=46))
+        recent_recording = SessionRecording.objects.create(team=self.team, session_id="s2")
+        self.create_snapshot(recent_recording.session_id, recent_recording.created_at)
+
+        persist_recordings_batch([str(old_recording.id), str(recent_recording.id)])
+
+        old_recording.refresh_from_db()
+        recent_recording.refresh_from_db()
+
+        assert old_recording.object_storage_path == f"session_recordings_lts/team-{self.team.pk}/session-s1"
+        assert old_recording.duration == 7200
+        assert old_recording.distinct_id == "distinct_id_1"
+        assert old_recording.start_url == "https://app.posthog.com/my-url"
+
+        # Too recent to be moved to object storage, but the metadata is saved
+        assert recent_recording.object_storage_path is None
+        assert recent_recording.distinct_id == "distinct_id_1"
+
+    def test_persist_recordings_batch_counts_attempts_of_recordings_without_metadata(self):
+        with freeze_time(timezone.now() - timedelta(hours=48)):
+            recording = SessionRecording.objects.create(team=self.team, session_id="no_events")
+
+        for _ in range(3):
+            persist_recordings_batch([str(recording.id)])
+
+        recording.refresh_from_db()
+        assert recording.object_storage_path is None
+        assert recording.persist_attempts == 3
+
+        with patch("ee.tasks.session_recording.persistence.persist_recordings_batch.delay") as mock_delay:
+            persist_finished_recordings()
+        mock_delay.assert_not_called()
@@ -1833,6 +1833,8 @@ export interface TrendResult {
     persons_urls?: { url: string }[]
     persons?: Person
     filter?: TrendsFilterType
+    /** 95% confidence intervals of `data`, when the results are sampled */
+    confidence_intervals?: [number, number][]
 }
 
 interface Person {
@@ -1851,6 +1853,8 @@ export interface FunnelStep {
     order: number
     people?: string[]
     type: EntityType
+    /** 95% confidence interval of `count`, when the results are sampled */
+    count_confidence_interval?: [number, number]
     labels?: string[]
     breakdown?: BreakdownKeyType
     breakdowns?: BreakdownKeyType[]
@@ -2811,6 +2815,7 @@ export interface ExportedAssetType {
     export_context?: ExportContext
     has_content: boolean
     filename: string
+    exported_row_count?: number | null
 }
 
 export enum FeatureFlagReleaseType {
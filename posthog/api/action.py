@@ -18,13 +18,12 @@ from posthog.client import sync_execute
 from posthog.constants import LIMIT, TREND_FILTER_TYPE_EVENTS
 from posthog.event_usage import report_user_action
 from posthog.hogql.hogql import HogQLContext
-from posthog.models import Action, ActionStep, Filter, Person
+from posthog.models import Action, ActionStep, Filter
 from posthog.models.action.util import format_action_filter
 from posthog.permissions import ProjectMembershipNecessaryPermissions, TeamMemberAccessPermission
 from posthog.queries.trends.trends_actors import TrendsActors
 
 from .forbid_destroy_model import ForbidDestroyModel
-from .person import get_person_name
 from .tagged_item import TaggedItemSerializerMixin, TaggedItemViewSetMixin
 
 
@@ -196,7 +195,7 @@ class ActionViewSet(TaggedItemViewSetMixin, StructuredViewSetMixin, ForbidDestro
 
         entity = get_target_entity(filter)
 
-        actors, serialized_actors, raw_count = TrendsActors(team, entity, filter).get_actors()
+        _, serialized_actors, raw_count = TrendsActors(team, entity, filter).get_actors()
 
         current_url = request.get_full_path()
         next_url: Optional[str] = request.get_full_path()
@@ -214,14 +213,14 @@ class ActionViewSet(TaggedItemViewSetMixin, StructuredViewSetMixin, ForbidDestro
         if request.accepted_renderer.format == "csv":
             content = [
                 {
-                    "Name": get_person_name(team, person),
-                    "Distinct ID": person.distinct_ids[0] if person.distinct_ids else "",
-                    "Internal ID": str(person.uuid),
-                    "Email": person.properties.get("email"),
-                    "Properties": person.properties,
+                    "Name": person["name"],
+                    "Distinct ID": person["distinct_ids"][0] if person["distinct_ids"] else "",
+                    "Internal ID": str(person["uuid"]),
+                    "Email": person["properties"].get("email"),
+                    "Properties": person["properties"],
                 }
-                for person in actors
-                if isinstance(person, Person)
+                for person in serialized_actors
+                if person["type"] == "person"
             ]
             return Response(content)
 
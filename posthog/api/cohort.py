@@ -99,6 +99,7 @@ class CohortSerializer(serializers.ModelSerializer):
 
         if not validated_data.get("is_static"):
             validated_data["is_calculating"] = True
+            validated_data["calculation_started_at"] = timezone.now()
         cohort = Cohort.objects.create(team_id=self.context["team_id"], **validated_data)
 
         if cohort.is_static:
@@ -163,6 +164,7 @@ class CohortSerializer(serializers.ModelSerializer):
 
         if not cohort.is_static and not is_deletion_change:
             cohort.is_calculating = True
+            cohort.calculation_started_at = timezone.now()
 
         if will_create_loops(cohort):
             raise ValidationError("Cohorts cannot reference other cohorts in a loop.")
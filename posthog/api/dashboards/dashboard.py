@@ -1,15 +1,17 @@
 import json
-from typing import Any, Dict, List, Optional, Type, cast
+from typing import Any, Dict, Iterator, List, Optional, Type, cast
 from rest_framework.serializers import BaseSerializer
 
 import structlog
 from django.db.models import Prefetch, QuerySet
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 from rest_framework import exceptions, serializers, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import SAFE_METHODS, BasePermission, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.utils.serializer_helpers import ReturnDict
@@ -20,6 +22,13 @@ from posthog.api.insight import InsightSerializer, InsightViewSet
 from posthog.api.routing import StructuredViewSetMixin
 from posthog.api.shared import UserBasicSerializer
 from posthog.api.tagged_item import TaggedItemSerializerMixin, TaggedItemViewSetMixin
+from posthog.caching.fetch_from_cache import (
+    InsightResult,
+    fetch_dashboard_tile_results,
+    iter_dashboard_tile_results,
+)
+from posthog.clickhouse.client.execute import cancel_client_query
+from posthog.clickhouse.query_tagging import get_query_tag_value, get_query_tags, reset_query_tags, tag_queries
 from posthog.constants import AvailableFeature
 from posthog.event_usage import report_user_action
 from posthog.helpers import create_dashboard_from_template
@@ -31,6 +40,7 @@ from posthog.models.team.team import check_is_feature_available_for_team
 from posthog.models.user import User
 from posthog.permissions import ProjectMembershipNecessaryPermissions, TeamMemberAccessPermission
 from posthog.user_permissions import UserPermissionsSerializerMixin
+from posthog.utils import generate_short_id, str_to_bool
 
 logger = structlog.get_logger(__name__)
 
@@ -342,31 +352,65 @@ class DashboardSerializer(DashboardBasicSerializer):
         Insight.objects.bulk_update(insights_to_undelete, ["deleted"])
 
     def get_tiles(self, dashboard: Dashboard) -> Optional[List[ReturnDict]]:
-        if self.context["view"].action == "list":
+        if self.context["view"].action == "list" or self.context.get("stream_tiles"):
             return None
 
+        tiles = self._get_tiles(dashboard)
+        # used by insight serializer to not fetch or refresh the results of each tile one by one
+        self.context.update(
+            {
+                "dashboard_tile_results": fetch_dashboard_tile_results(
+                    tiles, request=self.context["request"], is_shared=self.context.get("is_shared", False)
+                )
+            }
+        )
+
+        return [self._serialize_tile(tile) for tile in tiles]
+
+    def iter_tiles(self, dashboard: Dashboard) -> Iterator[ReturnDict]:
+        """Serialized tiles, each one as soon as the result of its insight is available"""
+        tiles = self._get_tiles(dashboard)
+        tiles_by_id = {tile.pk: tile for tile in tiles}
+        tile_results: Dict[int, InsightResult] = {}
+        self.context.update({"dashboard_tile_results": tile_results})
+
+        # Tiles without insight results don't need to wait
+        for tile in tiles:
+            if tile.insight is None:
+                yield self._serialize_tile(tiles_by_id.pop(tile.pk))
+
+        for tile_id, tile_result in iter_dashboard_tile_results(
+            tiles, request=self.context["request"], is_shared=self.context.get("is_shared", False)
+        ):
+            tile_results[tile_id] = tile_result
+            yield self._serialize_tile(tiles_by_id.pop(tile_id))
+
+        for tile in tiles_by_id.values():
+            yield self._serialize_tile(tile)
+
+    def _get_tiles(self, dashboard: Dashboard) -> List[DashboardTile]:
         # used by insight serializer to load insight filters in correct context
         self.context.update({"dashboard": dashboard})
 
-        serialized_tiles = []
-
-        tiles = DashboardTile.dashboard_queryset(dashboard.tiles).prefetch_related(
-            Prefetch(
-                "insight__tagged_items", queryset=TaggedItem.objects.select_related("tag"), to_attr="prefetched_tags"
+        tiles = list(
+            DashboardTile.dashboard_queryset(dashboard.tiles).prefetch_related(
+                Prefetch(
+                    "insight__tagged_items",
+                    queryset=TaggedItem.objects.select_related("tag"),
+                    to_attr="prefetched_tags",
+                )
             )
         )
-        self.user_permissions.set_preloaded_dashboard_tiles(list(tiles))
+        self.user_permissions.set_preloaded_dashboard_tiles(tiles)
+        return tiles
 
-        for tile in tiles:
-            self.context.update({"dashboard_tile": tile})
-
-            if isinstance(tile.layouts, str):
-                tile.layouts = json.loads(tile.layouts)
+    def _serialize_tile(self, tile: DashboardTile) -> ReturnDict:
+        self.context.update({"dashboard_tile": tile})
 
-            tile_data = DashboardTileSerializer(tile, many=False, context=self.context).data
-            serialized_tiles.append(tile_data)
+        if isinstance(tile.layouts, str):
+            tile.layouts = json.loads(tile.layouts)
 
-        return serialized_tiles
+        return DashboardTileSerializer(tile, many=False, context=self.context).data
 
     def validate(self, data):
         if data.get("use_dashboard", None) and data.get("use_template", None):
@@ -447,9 +491,43 @@ class DashboardsViewSet(TaggedItemViewSetMixin, StructuredViewSetMixin, ForbidDe
         dashboard = get_object_or_404(queryset, pk=pk)
         dashboard.last_accessed_at = now()
         dashboard.save(update_fields=["last_accessed_at"])
+
+        if str_to_bool(request.query_params.get("stream")):
+            # The request's query tags are reset once the view returns, which is before the response is streamed
+            query_tags = {
+                **get_query_tags(),
+                "team_id": self.team_id,
+                "client_query_id": get_query_tag_value("client_query_id") or f"dashboard_{pk}_{generate_short_id()}",
+            }
+            return StreamingHttpResponse(
+                self._stream_dashboard(dashboard, request, query_tags), content_type="application/x-ndjson"
+            )
+
         serializer = DashboardSerializer(dashboard, context={"view": self, "request": request})
         return Response(serializer.data)
 
+    def _stream_dashboard(self, dashboard: Dashboard, request: Request, query_tags: Dict[str, Any]) -> Iterator[bytes]:
+        """
+        Dashboard as newline delimited JSON. The first line has the dashboard without its tiles, then there's a line
+        per tile as soon as its result is available, with the fastest tiles first.
+
+        Queries still running when the client disconnects are cancelled.
+        """
+        tag_queries(**query_tags)
+        renderer = JSONRenderer()
+        serializer = DashboardSerializer(dashboard, context={"view": self, "request": request, "stream_tiles": True})
+        streamed = False
+        try:
+            yield renderer.render({"type": "dashboard", "dashboard": serializer.data}) + b"\n"
+            for tile_data in serializer.iter_tiles(dashboard):
+                yield renderer.render({"type": "tile", "tile": tile_data}) + b"\n"
+            streamed = True
+        finally:
+            # Reset first, so that the cancelling query isn't tagged with the client query id it cancels
+            reset_query_tags()
+            if not streamed:
+                cancel_client_query(self.team_id, query_tags["client_query_id"])
+
     @action(methods=["PATCH"], detail=True)
     def move_tile(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         # TODO could things be rearranged so this is  PATCH call on a resource and not a custom endpoint?
@@ -1,5 +1,7 @@
+import hashlib
 from random import random
 import re
+import time
 from typing import Any, Dict, List, Optional, Union
 from urllib.parse import urlparse
 from posthog.models.feature_flag.flag_analytics import increment_request_count
@@ -7,6 +9,7 @@ from posthog.models.filters.mixins.utils import process_bool
 
 import structlog
 import posthoganalytics
+from django.core.cache import cache
 from django.http import HttpRequest, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
@@ -19,30 +22,42 @@ from posthog.api.utils import get_project_id, get_token
 from posthog.exceptions import RequestParsingError, generate_exception_response
 from posthog.logging.timing import timed
 from posthog.models import Team, User
+from posthog.models.team import (
+    get_decide_config_in_cache,
+    set_decide_config_in_cache,
+    set_decide_config_in_local_cache,
+)
 from posthog.models.feature_flag import get_all_feature_flags
 from posthog.models.utils import execute_with_timeout
 from posthog.plugins.site import get_decide_site_apps
 from posthog.utils import cors_response, get_ip_address, load_data_from_request
 
 
-def on_permitted_recording_domain(team: Team, request: HttpRequest) -> bool:
+def on_permitted_recording_domain(permitted_domains: List[str], request: HttpRequest) -> bool:
     origin = parse_domain(request.headers.get("Origin"))
     referer = parse_domain(request.headers.get("Referer"))
-    return hostname_in_allowed_url_list(team.recording_domains, origin) or hostname_in_allowed_url_list(
-        team.recording_domains, referer
+    return hostname_in_permitted_domains(permitted_domains, origin) or hostname_in_permitted_domains(
+        permitted_domains, referer
     )
 
 
 def hostname_in_allowed_url_list(allowed_url_list: Optional[List[str]], hostname: Optional[str]) -> bool:
-    if not hostname:
-        return False
+    return hostname_in_permitted_domains(get_permitted_domains(allowed_url_list), hostname)
 
+
+def get_permitted_domains(allowed_url_list: Optional[List[str]]) -> List[str]:
     permitted_domains = []
     if allowed_url_list:
         for url in allowed_url_list:
             host = parse_domain(url)
             if host:
                 permitted_domains.append(host)
+    return permitted_domains
+
+
+def hostname_in_permitted_domains(permitted_domains: List[str], hostname: Optional[str]) -> bool:
+    if not hostname:
+        return False
 
     for permitted_domain in permitted_domains:
         if "*" in permitted_domain:
@@ -59,6 +74,81 @@ def parse_domain(url: Any) -> Optional[str]:
     return urlparse(url).hostname
 
 
+def get_team_decide_config(team: Team) -> Dict[str, Any]:
+    """
+    The parts of decide responses that only depend on the team, cached until the team or its site apps change, so that
+    decide requests don't query Postgres for them. If site apps can't be loaded, the last config computed is used.
+    """
+    cached_config = get_decide_config_in_cache(team.pk)
+    if (
+        cached_config is not None
+        and time.time() - cached_config["computed_at"] < settings.DECIDE_CONFIG_REFRESH_SECONDS
+    ):
+        return cached_config
+
+    site_apps: List[dict] = []
+    if team.inject_web_apps:
+        try:
+            with execute_with_timeout(200):
+                site_apps = get_decide_site_apps(team)
+        except Exception:
+            if cached_config is not None:
+                set_decide_config_in_local_cache(team.pk, cached_config)
+                return cached_config
+            return _decide_config(team, [])
+
+    config = _decide_config(team, site_apps)
+    try:
+        set_decide_config_in_cache(team.pk, config)
+    except Exception:
+        # redis is unavailable
+        pass
+    return config
+
+
+def _decide_config(team: Team, site_apps: List[dict]) -> Dict[str, Any]:
+    session_recording: Union[bool, Dict[str, Any]] = False
+    if team.session_recording_opt_in:
+        session_recording = {
+            "endpoint": "/s/",
+            "consoleLogRecordingEnabled": True if team.capture_console_log_opt_in else False,
+            "recorderVersion": "v2" if team.session_recording_version == "v2" else "v1",
+        }
+
+    return {
+        "computed_at": time.time(),
+        "response": {
+            "capturePerformance": True if team.capture_performance_opt_in else False,
+            "autocapture_opt_out": True if team.autocapture_opt_out else False,
+            "autocaptureExceptions": True if team.autocapture_exceptions_opt_in else False,
+            "siteApps": site_apps,
+        },
+        # Only sent to sites on the recording domains, if any are set
+        "session_recording": session_recording,
+        "recording_domains": get_permitted_domains(team.recording_domains) if team.recording_domains else None,
+    }
+
+
+def get_user_from_personal_api_key(key_value: str) -> Optional[User]:
+    "Like `User.objects.get_from_personal_api_key`, remembering keys that matched no user for a while"
+    invalid_key_cache_key = f"personal_api_key_invalid:{hashlib.sha256(key_value.encode('utf-8')).hexdigest()}"
+    try:
+        if settings.INVALID_API_TOKEN_CACHE_SECONDS > 0 and cache.get(invalid_key_cache_key):
+            return None
+    except Exception:
+        # redis is unavailable
+        pass
+
+    user = User.objects.get_from_personal_api_key(key_value)
+    if user is None and settings.INVALID_API_TOKEN_CACHE_SECONDS > 0:
+        try:
+            cache.set(invalid_key_cache_key, True, settings.INVALID_API_TOKEN_CACHE_SECONDS)
+        except Exception:
+            # redis is unavailable
+            pass
+    return user
+
+
 @csrf_exempt
 @timed("posthog_cloud_decide_endpoint")
 def get_decide(request: HttpRequest):
@@ -118,7 +208,7 @@ def get_decide(request: HttpRequest):
                     ),
                 )
 
-            user = User.objects.get_from_personal_api_key(token)
+            user = get_user_from_personal_api_key(token)
             if user is None:
                 return cors_response(
                     request,
@@ -183,29 +273,13 @@ def get_decide(request: HttpRequest):
                 # default v1
                 response["featureFlags"] = list(active_flags.keys())
 
-            response["capturePerformance"] = True if team.capture_performance_opt_in else False
-            response["autocapture_opt_out"] = True if team.autocapture_opt_out else False
-            response["autocaptureExceptions"] = True if team.autocapture_exceptions_opt_in else False
-
-            if team.session_recording_opt_in and (
-                on_permitted_recording_domain(team, request) or not team.recording_domains
+            config = get_team_decide_config(team)
+            response.update(config["response"])
+            if config["session_recording"] and (
+                config["recording_domains"] is None
+                or on_permitted_recording_domain(config["recording_domains"], request)
             ):
-                capture_console_logs = True if team.capture_console_log_opt_in else False
-                response["sessionRecording"] = {
-                    "endpoint": "/s/",
-                    "consoleLogRecordingEnabled": capture_console_logs,
-                    "recorderVersion": "v2" if team.session_recording_version == "v2" else "v1",
-                }
-
-            site_apps = []
-            if team.inject_web_apps:
-                try:
-                    with execute_with_timeout(200):
-                        site_apps = get_decide_site_apps(team)
-                except Exception:
-                    pass
-
-            response["siteApps"] = site_apps
+                response["sessionRecording"] = config["session_recording"]
 
             # NOTE: Whenever you add something to decide response, update this test:
             # `test_decide_doesnt_error_out_when_database_is_down`
@@ -1,8 +1,8 @@
 import json
 import urllib
-from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 
+from django.core.cache import cache
 from django.db.models.query import Prefetch
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
@@ -18,10 +18,10 @@ from posthog.api.documentation import PropertiesSerializer, extend_schema
 from posthog.api.routing import StructuredViewSetMixin
 from posthog.client import query_with_columns, sync_execute
 from posthog.hogql.constants import DEFAULT_RETURNED_ROWS, MAX_SELECT_RETURNED_ROWS
-from posthog.models import Element, Filter, Person
+from posthog.models import Element, Filter
 from posthog.models.event.query_event_list import query_events_list
 from posthog.models.event.sql import GET_CUSTOM_EVENTS, SELECT_ONE_EVENT_SQL
-from posthog.models.event.util import ClickhouseEventSerializer
+from posthog.models.event.util import ClickhouseEventSerializer, serialize_event_person
 from posthog.models.person.util import get_persons_by_distinct_ids
 from posthog.models.team import Team
 from posthog.models.utils import UUIDT
@@ -31,6 +31,8 @@ from posthog.rate_limit import ClickHouseBurstRateThrottle, ClickHouseSustainedR
 from posthog.utils import convert_property_value, flatten
 
 QUERY_DEFAULT_EXPORT_LIMIT = 3_500
+# How long persons shown in the events list are cached for, while paging through the list
+EVENTS_LIST_PERSON_CACHE_TTL = 5 * 60
 
 
 class ElementSerializer(serializers.ModelSerializer):
@@ -58,14 +60,18 @@ class EventViewSet(StructuredViewSetMixin, mixins.RetrieveModelMixin, mixins.Lis
     permission_classes = [IsAuthenticated, ProjectMembershipNecessaryPermissions, TeamMemberAccessPermission]
     throttle_classes = [ClickHouseBurstRateThrottle, ClickHouseSustainedRateThrottle]
 
-    def _build_next_url(self, request: request.Request, last_event_timestamp: datetime, order_by: List[str]) -> str:
+    def _build_next_url(self, request: request.Request, last_event: Dict[str, Any], order_by: List[str]) -> str:
         params = request.GET.dict()
+        params.pop("offset", None)
         reverse = "-timestamp" in order_by
-        timestamp = last_event_timestamp.astimezone().isoformat()
+        # Keyset cursor, events at the same timestamp are ordered by uuid
+        timestamp = last_event["timestamp"].astimezone().isoformat()
         if reverse:
             params["before"] = timestamp
+            params["before_uuid"] = str(last_event["uuid"])
         else:
             params["after"] = timestamp
+            params["after_uuid"] = str(last_event["uuid"])
         return request.build_absolute_uri(f"{request.path}?{urllib.parse.urlencode(params)}")
 
     @extend_schema(
@@ -133,40 +139,46 @@ class EventViewSet(StructuredViewSetMixin, mixins.RetrieveModelMixin, mixins.Lis
                 action_id=request.GET.get("action_id"),
             )
 
-            # Retry the query without the 1 day optimization
-            if len(query_result) < limit and not request.GET.get("after"):
-                query_result = query_events_list(
-                    unbounded_date_from=True,  # only this changed from the query above
-                    filter=filter,
-                    team=team,
-                    limit=limit,
-                    offset=offset,
-                    request_get_query_dict=request.GET.dict(),
-                    order_by=order_by,
-                    action_id=request.GET.get("action_id"),
-                )
-
             result = ClickhouseEventSerializer(
-                query_result[0:limit], many=True, context={"people": self._get_people(query_result, team)}
+                query_result[0:limit], many=True, context={"people": self._get_people(query_result[0:limit], team)}
             ).data
 
             next_url: Optional[str] = None
             if not is_csv_request and len(query_result) > limit:
-                next_url = self._build_next_url(request, query_result[limit - 1]["timestamp"], order_by)
+                next_url = self._build_next_url(request, query_result[limit - 1], order_by)
             return response.Response({"next": next_url, "results": result})
 
         except Exception as ex:
             capture_exception(ex)
             raise ex
 
-    def _get_people(self, query_result: List[Dict], team: Team) -> Dict[str, Any]:
-        distinct_ids = [event["distinct_id"] for event in query_result]
-        persons = get_persons_by_distinct_ids(team.pk, distinct_ids)
-        persons = persons.prefetch_related(Prefetch("persondistinctid_set", to_attr="distinct_ids_cache"))
-        distinct_to_person: Dict[str, Person] = {}
-        for person in persons:
-            for distinct_id in person.distinct_ids:
-                distinct_to_person[distinct_id] = person
+    def _get_people(self, query_result: List[Dict], team: Team) -> Dict[str, Dict[str, Any]]:
+        "Persons of the events by distinct id, cached for a bit as the next pages mostly show the same persons"
+        distinct_ids = {event["distinct_id"] for event in query_result}
+        cache_keys = {distinct_id: f"events_list_person_{team.pk}_{distinct_id}" for distinct_id in distinct_ids}
+        cached_people = cache.get_many(list(cache_keys.values()))
+
+        distinct_to_person: Dict[str, Dict[str, Any]] = {
+            distinct_id: cached_people[cache_key]
+            for distinct_id, cache_key in cache_keys.items()
+            if cache_key in cached_people
+        }
+        missing_distinct_ids = [distinct_id for distinct_id in distinct_ids if distinct_id not in distinct_to_person]
+        if missing_distinct_ids:
+            persons = get_persons_by_distinct_ids(team.pk, missing_distinct_ids)
+            persons = persons.prefetch_related(Prefetch("persondistinctid_set", to_attr="distinct_ids_cache"))
+            for person in persons:
+                person_data = serialize_event_person(person)
+                for distinct_id in person.distinct_ids:
+                    distinct_to_person[distinct_id] = person_data
+            cache.set_many(
+                {
+                    cache_keys[distinct_id]: distinct_to_person[distinct_id]
+                    for distinct_id in missing_distinct_ids
+                    if distinct_id in distinct_to_person
+                },
+                EVENTS_LIST_PERSON_CACHE_TTL,
+            )
         return distinct_to_person
 
     def retrieve(
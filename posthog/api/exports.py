@@ -37,8 +37,9 @@ class ExportedAssetSerializer(serializers.ModelSerializer):
             "has_content",
             "export_context",
             "filename",
+            "exported_row_count",
         ]
-        read_only_fields = ["id", "created_at", "has_content", "filename"]
+        read_only_fields = ["id", "created_at", "has_content", "filename", "exported_row_count"]
 
     def validate(self, attrs: Dict) -> Dict:
         if not attrs.get("export_format"):
@@ -22,7 +22,6 @@ from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework_csv import renderers as csvrenderers
 from sentry_sdk import capture_exception
-from statshog.defaults.django import statsd
 
 from posthog import schema
 from posthog.api.documentation import extend_schema
@@ -40,7 +39,7 @@ from posthog.api.utils import format_paginated_url
 from posthog.auth import SharingAccessTokenAuthentication
 from posthog.caching.fetch_from_cache import InsightResult, fetch_cached_insight_result, synchronously_update_cache
 from posthog.caching.insights_api import should_refresh_insight
-from posthog.client import sync_execute
+from posthog.clickhouse.client.execute import cancel_client_query
 from posthog.constants import (
     BREAKDOWN_VALUES_LIMIT,
     INSIGHT,
@@ -84,7 +83,6 @@ from posthog.queries.trends.trends import Trends
 from posthog.queries.util import get_earliest_timestamp
 from posthog.rate_limit import ClickHouseBurstRateThrottle, ClickHouseSustainedRateThrottle
 from posthog.settings import CAPTURE_TIME_TO_SEE_DATA, SITE_URL
-from posthog.settings.data_stores import CLICKHOUSE_CLUSTER
 from prometheus_client import Counter
 from posthog.user_permissions import UserPermissionsSerializerMixin
 from posthog.utils import DEFAULT_DATE_FROM_DAYS, refresh_requested_by_client, relative_date_parse, str_to_bool
@@ -504,6 +502,10 @@ class InsightSerializer(InsightBasicSerializer, UserPermissionsSerializerMixin):
         dashboard_tile = self.dashboard_tile_from_context(insight, dashboard)
         target = insight if dashboard is None else dashboard_tile
 
+        dashboard_tile_results: Dict[int, InsightResult] = self.context.get("dashboard_tile_results", {})
+        if dashboard_tile is not None and dashboard_tile.pk in dashboard_tile_results:
+            return dashboard_tile_results[dashboard_tile.pk]
+
         is_shared = self.context.get("is_shared", False)
         refresh_insight_now, refresh_frequency = should_refresh_insight(
             insight, dashboard_tile, request=self.context["request"], is_shared=is_shared
@@ -997,11 +999,7 @@ Using the correct cache and enriching the response with dashboard specific confi
     def cancel(self, request: request.Request, **kwargs):
         if "client_query_id" not in request.data:
             raise serializers.ValidationError({"client_query_id": "Field is required."})
-        sync_execute(
-            f"KILL QUERY ON CLUSTER '{CLICKHOUSE_CLUSTER}' WHERE query_id LIKE %(client_query_id)s",
-            {"client_query_id": f"{self.team.pk}_{request.data['client_query_id']}%"},
-        )
-        statsd.incr("clickhouse.query.cancellation_requested", tags={"team_id": self.team.pk})
+        cancel_client_query(self.team.pk, request.data["client_query_id"])
         return Response(status=status.HTTP_201_CREATED)
 
     @action(methods=["POST"], detail=False)
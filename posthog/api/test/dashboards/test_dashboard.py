@@ -13,6 +13,7 @@ from rest_framework import status
 from ee.api.test.fixtures.available_product_features import AVAILABLE_PRODUCT_FEATURES
 from posthog.api.dashboards.dashboard import DashboardSerializer
 from posthog.api.test.dashboards import DashboardAPI
+from posthog.clickhouse.query_tagging import get_query_tags
 from posthog.constants import AvailableFeature
 from posthog.models import Dashboard, DashboardTile, Filter, Insight, Team, User
 from posthog.models.organization import Organization
@@ -340,6 +341,50 @@ class TestDashboard(APIBaseTest, QueryMatchingTest):
             self.assertAlmostEqual(item_default.caching_state.last_refresh, now(), delta=timezone.timedelta(seconds=5))
             self.assertAlmostEqual(item_trends.caching_state.last_refresh, now(), delta=timezone.timedelta(seconds=5))
 
+    def test_stream_dashboard(self):
+        dashboard = Dashboard.objects.create(team=self.team, name="dashboard")
+        insight = Insight.objects.create(
+            filters=Filter(data={"events": [{"id": "$pageview"}]}).to_dict(), team=self.team, order=0
+        )
+        insight_tile = DashboardTile.objects.create(dashboard=dashboard, insight=insight)
+        self.dashboard_api.create_text_tile(dashboard.pk)
+
+        response = self.client.get(f"/api/projects/{self.team.id}/dashboards/{dashboard.pk}?stream=true&refresh=true")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+        self.assertEqual(lines[0]["type"], "dashboard")
+        self.assertEqual(lines[0]["dashboard"]["name"], "dashboard")
+        self.assertEqual(lines[0]["dashboard"]["tiles"], None)
+        # Text tiles come first, as they don't wait for any results
+        self.assertEqual([line["type"] for line in lines[1:]], ["tile", "tile"])
+        self.assertEqual(lines[1]["tile"]["text"]["body"], "I AM TEXT!")
+        self.assertEqual(lines[2]["tile"]["id"], insight_tile.pk)
+        self.assertEqual(lines[2]["tile"]["is_cached"], False)
+        self.assertIsNotNone(lines[2]["tile"]["insight"]["result"])
+
+    @patch("posthog.api.dashboards.dashboard.cancel_client_query")
+    def test_stream_dashboard_cancels_queries_when_client_disconnects(self, mock_cancel_client_query):
+        dashboard = Dashboard.objects.create(team=self.team, name="dashboard")
+        insight = Insight.objects.create(
+            filters=Filter(data={"events": [{"id": "$pageview"}]}).to_dict(), team=self.team, order=0
+        )
+        DashboardTile.objects.create(dashboard=dashboard, insight=insight)
+        tags_when_cancelling = []
+        mock_cancel_client_query.side_effect = lambda *args: tags_when_cancelling.append(dict(get_query_tags()))
+
+        response = self.client.get(
+            f"/api/projects/{self.team.id}/dashboards/{dashboard.pk}?stream=true&client_query_id=some-query"
+        )
+        next(iter(response.streaming_content))
+        response.close()
+
+        mock_cancel_client_query.assert_called_once_with(self.team.pk, "some-query")
+        # The cancelling query mustn't be tagged with, and so match, the client query id it cancels
+        self.assertEqual(tags_when_cancelling, [{}])
+
     def test_dashboard_endpoints(self):
         # create
         _, response_json = self.dashboard_api.create_dashboard({"name": "Default", "pinned": "true"})
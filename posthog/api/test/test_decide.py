@@ -8,6 +8,7 @@ import time
 from django.core.cache import cache
 from django.db import connection
 from django.test.client import Client
+from django.utils.timezone import now
 from freezegun import freeze_time
 from rest_framework import status
 
@@ -17,6 +18,7 @@ from posthog.models.cohort.cohort import Cohort
 from posthog.models.personal_api_key import hash_key_value
 from posthog.models.plugin import sync_team_inject_web_apps
 from posthog.models.team.team import Team
+from posthog.plugins.site import get_decide_site_apps
 from posthog.models.utils import generate_random_token_personal
 from posthog.test.base import BaseTest, QueryMatchingTest, snapshot_postgres_queries, snapshot_postgres_queries_context
 from posthog.utils import is_postgres_connected_cached_check
@@ -280,6 +282,62 @@ class TestDecide(BaseTest, QueryMatchingTest):
             self.assertEqual(len(injected), 1)
             self.assertTrue(injected[0]["url"].startswith(f"/site_app/{plugin_config.id}/{plugin_config.web_token}/"))
 
+    @patch("posthog.api.decide.get_decide_site_apps", wraps=get_decide_site_apps)
+    def test_team_decide_config_is_cached_until_team_or_site_apps_change(self, mock_get_decide_site_apps, *args):
+        plugin = Plugin.objects.create(organization=self.team.organization, name="My Plugin", plugin_type="source")
+        source_file = PluginSourceFile.objects.create(
+            plugin=plugin,
+            filename="site.ts",
+            source="export function inject (){}",
+            transpiled="function inject(){}",
+            status=PluginSourceFile.Status.TRANSPILED,
+        )
+        PluginConfig.objects.create(
+            plugin=plugin, enabled=True, order=1, team=self.team, config={}, web_token="tokentoken"
+        )
+        mock_get_decide_site_apps.reset_mock()
+
+        first_site_apps = self._post_decide().json()["siteApps"]
+        self.assertEqual(self._post_decide().json()["siteApps"], first_site_apps)
+        self.assertEqual(mock_get_decide_site_apps.call_count, 1)
+
+        source_file.transpiled = "function inject(){ return 1 }"
+        source_file.updated_at = now()
+        source_file.save()
+        second_site_apps = self._post_decide().json()["siteApps"]
+        self.assertNotEqual(second_site_apps, first_site_apps)
+        self.assertEqual(mock_get_decide_site_apps.call_count, 2)
+
+        self._update_team({"session_recording_opt_in": True, "recording_domains": ["https://*.example.com"]})
+        response = self._post_decide(origin="https://app.example.com").json()
+        self.assertEqual(
+            response["sessionRecording"],
+            {"endpoint": "/s/", "recorderVersion": "v1", "consoleLogRecordingEnabled": False},
+        )
+        self.assertEqual(response["siteApps"], second_site_apps)
+        self.assertEqual(self._post_decide(origin="https://evil.com").json()["sessionRecording"], False)
+        self.assertEqual(mock_get_decide_site_apps.call_count, 3)
+
+    def test_stale_team_decide_config_is_used_when_site_apps_cant_be_loaded(self, *args):
+        plugin = Plugin.objects.create(organization=self.team.organization, name="My Plugin", plugin_type="source")
+        PluginSourceFile.objects.create(
+            plugin=plugin,
+            filename="site.ts",
+            source="export function inject (){}",
+            transpiled="function inject(){}",
+            status=PluginSourceFile.Status.TRANSPILED,
+        )
+        PluginConfig.objects.create(
+            plugin=plugin, enabled=True, order=1, team=self.team, config={}, web_token="tokentoken"
+        )
+        site_apps = self._post_decide().json()["siteApps"]
+        self.assertEqual(len(site_apps), 1)
+
+        with self.settings(DECIDE_CONFIG_REFRESH_SECONDS=0), patch(
+            "posthog.api.decide.get_decide_site_apps", side_effect=Exception("Postgres is down")
+        ):
+            self.assertEqual(self._post_decide().json()["siteApps"], site_apps)
+
     def test_feature_flags(self, *args):
         self.team.app_urls = ["https://example.com"]
         self.team.save()
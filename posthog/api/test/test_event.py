@@ -1,5 +1,6 @@
 import json
 from datetime import datetime
+from typing import List, Optional
 from unittest.mock import patch
 from urllib.parse import unquote, urlencode
 
@@ -333,13 +334,56 @@ class TestEvents(ClickhouseTestMixin, APIBaseTest):
             self.assertEqual(len(page2["results"]), 100)
             self.assertEqual(
                 unquote(page2["next"]),
-                f"http://testserver/api/projects/{self.team.id}/events/?distinct_id=1&before=2020-12-30T12:03:53.829294+00:00",
+                f"http://testserver/api/projects/{self.team.id}/events/?distinct_id=1&before=2020-12-30T12:03:53.829294+00:00&before_uuid={page2['results'][-1]['id']}",
             )
 
             page3 = self.client.get(page2["next"]).json()
             self.assertEqual(len(page3["results"]), 50)
             self.assertIsNone(page3["next"])
 
+    def test_pagination_of_events_at_the_same_timestamp(self):
+        with freeze_time("2021-10-10T12:03:03.829294Z"):
+            _create_person(team=self.team, distinct_ids=["1"])
+            for _ in range(0, 5):
+                _create_event(team=self.team, event="some event", distinct_id="1", timestamp=timezone.now())
+
+            event_ids: List[str] = []
+            next_url: Optional[str] = f"/api/projects/{self.team.id}/events/?distinct_id=1&limit=2"
+            while next_url:
+                response = self.client.get(next_url).json()
+                event_ids.extend(event["id"] for event in response["results"])
+                next_url = response["next"]
+
+            self.assertEqual(len(event_ids), 5)
+            self.assertEqual(len(set(event_ids)), 5)
+
+    def test_events_list_goes_back_in_time_until_the_page_is_full(self):
+        with freeze_time("2021-10-10T12:03:03.829294Z"):
+            _create_person(team=self.team, distinct_ids=["1"], properties={"email": "someone@posthog.com"})
+            for delta in [
+                relativedelta(minutes=30),
+                relativedelta(days=2),
+                relativedelta(days=3),
+                relativedelta(months=3),
+            ]:
+                _create_event(team=self.team, event="some event", distinct_id="1", timestamp=timezone.now() - delta)
+
+            response = self.client.get(f"/api/projects/{self.team.id}/events/?distinct_id=1&limit=3").json()
+            self.assertEqual(
+                [event["timestamp"] for event in response["results"]],
+                [
+                    "2021-10-10T11:33:03.829294+00:00",
+                    "2021-10-08T12:03:03.829294+00:00",
+                    "2021-10-07T12:03:03.829294+00:00",
+                ],
+            )
+            self.assertEqual(response["results"][0]["person"]["properties"], {"email": "someone@posthog.com"})
+            self.assertIsNotNone(response["next"])
+
+            page2 = self.client.get(response["next"]).json()
+            self.assertEqual([event["timestamp"] for event in page2["results"]], ["2021-07-10T12:03:03.829294+00:00"])
+            self.assertIsNone(page2["next"])
+
     def test_pagination_bounded_date_range(self):
         with freeze_time("2021-10-10T12:03:03.829294Z"):
             _create_person(team=self.team, distinct_ids=["1"])
@@ -79,6 +79,7 @@ class TestExports(APIBaseTest):
                 "has_content": False,
                 "insight": None,
                 "export_context": None,
+                "exported_row_count": None,
             },
         )
 
@@ -122,6 +123,7 @@ class TestExports(APIBaseTest):
                 "has_content": False,
                 "dashboard": None,
                 "export_context": None,
+                "exported_row_count": None,
             },
         )
 
@@ -274,8 +276,7 @@ class TestExports(APIBaseTest):
             },
         )
 
-    @patch("posthog.tasks.exports.csv_exporter.requests.request")
-    def test_can_download_a_csv(self, patched_request) -> None:
+    def test_can_download_a_csv(self) -> None:
         with self.settings(SITE_URL="http://testserver"):
 
             _create_event(event="event_name", team=self.team, distinct_id="2", properties={"$browser": "Chrome"})
@@ -292,11 +293,6 @@ class TestExports(APIBaseTest):
 
             after = (datetime.datetime.now() - datetime.timedelta(minutes=10)).isoformat()
 
-            def requests_side_effect(*args, **kwargs):
-                return self.client.get(kwargs["url"], kwargs["json"], **kwargs["headers"])
-
-            patched_request.side_effect = requests_side_effect
-
             response = self.client.post(
                 f"/api/projects/{self.team.id}/exports",
                 {
@@ -367,24 +363,17 @@ class TestExportMixin(APIBaseTest):
         Use this function to test the CSV output of exports in other tests
         """
         with self.settings(SITE_URL="http://testserver", OBJECT_STORAGE_ENABLED=False):
-            with patch("posthog.tasks.exports.csv_exporter.requests.request") as patched_request:
-
-                def requests_side_effect(*args, **kwargs):
-                    return self.client.get(kwargs["url"], kwargs["json"], **kwargs["headers"])
-
-                patched_request.side_effect = requests_side_effect
-
-                response = self.client.post(
-                    f"/api/projects/{self.team.pk}/exports/",
-                    {
-                        "export_context": {
-                            "max_limit": 10000,
-                            "path": path,
-                        },
-                        "export_format": "text/csv",
+            response = self.client.post(
+                f"/api/projects/{self.team.pk}/exports/",
+                {
+                    "export_context": {
+                        "max_limit": 10000,
+                        "path": path,
                     },
-                )
-                download_response = self.client.get(
-                    f"/api/projects/{self.team.id}/exports/{response.json()['id']}/content?download=true"
-                )
-                return [str(x) for x in download_response.content.splitlines()]
+                    "export_format": "text/csv",
+                },
+            )
+            download_response = self.client.get(
+                f"/api/projects/{self.team.id}/exports/{response.json()['id']}/content?download=true"
+            )
+            return [str(x) for x in download_response.content.splitlines()]
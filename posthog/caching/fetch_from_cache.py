@@ -1,15 +1,32 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union, cast
 
+import structlog
+from django.conf import settings
+from django.db import connection
 from django.utils.timezone import now
 from prometheus_client import Counter
+from rest_framework.request import Request
+from sentry_sdk import capture_exception
 
 from posthog.caching.calculate_results import calculate_cache_key, calculate_result_by_insight
 from posthog.caching.insight_cache import update_cached_state
+from posthog.caching.insights_api import (
+    DashboardTileRefresh,
+    should_refresh_dashboard_tiles,
+    sleep_if_refresh_is_running_somewhere_else,
+)
+from posthog.clickhouse.client.execute import cancel_client_query
+from posthog.clickhouse.query_tagging import get_query_tag_value, get_query_tags, reset_query_tags, tag_queries
 from posthog.models import DashboardTile, Insight
 from posthog.models.dashboard import Dashboard
-from posthog.utils import get_safe_cache
+from posthog.utils import generate_short_id, get_safe_cache, get_safe_cache_many
+
+logger = structlog.get_logger(__name__)
 
 insight_cache_read_counter = Counter(
     "posthog_cloud_insight_cache_read", "A read from the redis insight cache", labelnames=["result"]
@@ -48,8 +65,25 @@ def fetch_cached_insight_result(target: Union[Insight, DashboardTile], refresh_f
     if cache_key is None:
         return NothingInCacheResult(cache_key=None)
 
-    cached_result = get_safe_cache(cache_key)
+    return _insight_result_from_cache(cache_key, get_safe_cache(cache_key), refresh_frequency)
+
+
+def fetch_cached_insight_results(targets: List[Tuple[Union[Insight, DashboardTile], timedelta]]) -> List[InsightResult]:
+    "Same as `fetch_cached_insight_result` for many insights, with one round trip to the cache"
+    cache_keys = [calculate_cache_key(target) for target, _ in targets]
+    cached_results = get_safe_cache_many([cache_key for cache_key in cache_keys if cache_key is not None])
 
+    return [
+        _insight_result_from_cache(cache_key, cached_results.get(cache_key), refresh_frequency)
+        if cache_key is not None
+        else NothingInCacheResult(cache_key=None)
+        for cache_key, (_, refresh_frequency) in zip(cache_keys, targets)
+    ]
+
+
+def _insight_result_from_cache(
+    cache_key: str, cached_result: Optional[Dict[str, Any]], refresh_frequency: timedelta
+) -> InsightResult:
     if cached_result is None:
         insight_cache_read_counter.labels("cache_miss").inc()
         return NothingInCacheResult(cache_key=cache_key)
@@ -71,6 +105,117 @@ def fetch_cached_insight_result(target: Union[Insight, DashboardTile], refresh_f
         )
 
 
+def fetch_dashboard_tile_results(
+    tiles: List[DashboardTile], *, request: Request, is_shared=False
+) -> Dict[int, InsightResult]:
+    """
+    Results of the insight tiles of a dashboard by tile id, as `InsightSerializer` would return them one by one.
+
+    Cached results are fetched with one round trip to the cache, and tiles due for a refresh are refreshed
+    concurrently. Tiles that aren't refreshed within DASHBOARD_TILE_REFRESH_BUDGET_SECONDS return their cached
+    result, and their refresh is cancelled, as nothing would wait for it.
+    """
+    return dict(iter_dashboard_tile_results(tiles, request=request, is_shared=is_shared))
+
+
+def iter_dashboard_tile_results(
+    tiles: List[DashboardTile], *, request: Request, is_shared=False
+) -> Iterator[Tuple[int, InsightResult]]:
+    """
+    Same as `fetch_dashboard_tile_results`, yielding each tile's result as soon as it's available: cached results of
+    tiles not due for a refresh first, then refreshed results in the order the refreshes finish.
+
+    Refreshes still running when the iterator is closed early are cancelled, as with the refresh budget.
+    """
+    tiles = [tile for tile in tiles if tile.insight is not None and not tile.deleted]
+    tile_refreshes = should_refresh_dashboard_tiles(tiles, request=request, is_shared=is_shared)
+    cached_results = fetch_cached_insight_results([(tile, tile_refreshes[tile.pk].refresh_frequency) for tile in tiles])
+    tile_results = {tile.pk: cached_result for tile, cached_result in zip(tiles, cached_results)}
+
+    tiles_to_refresh = [tile for tile in tiles if tile_refreshes[tile.pk].refresh_now]
+    for tile in tiles:
+        if not tile_refreshes[tile.pk].refresh_now:
+            yield tile.pk, tile_results[tile.pk]
+    if not tiles_to_refresh:
+        return
+
+    from posthog.api.insight import INSIGHT_REFRESH_INITIATED_COUNTER
+
+    INSIGHT_REFRESH_INITIATED_COUNTER.labels(is_shared=is_shared).inc(len(tiles_to_refresh))
+
+    deadline = time.monotonic() + settings.DASHBOARD_TILE_REFRESH_BUDGET_SECONDS
+    if settings.DASHBOARD_TILE_REFRESH_CONCURRENCY <= 1:
+        for tile in tiles_to_refresh:
+            if time.monotonic() < deadline:
+                yield tile.pk, _refresh_dashboard_tile(tile, tile_refreshes[tile.pk])
+            else:
+                yield tile.pk, tile_results[tile.pk]
+        return
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(settings.DASHBOARD_TILE_REFRESH_CONCURRENCY, len(tiles_to_refresh)),
+        thread_name_prefix="dashboard-tile-refresh",
+    )
+    team_id = tiles[0].insight.team_id  # type: ignore
+    # The refreshes' own client query id, so that the ones still running past the budget can be cancelled
+    client_query_id = get_query_tag_value("client_query_id") or f"dashboard_{tiles[0].dashboard_id}"
+    refresh_client_query_id = f"{client_query_id}_refresh_{generate_short_id()}"
+    query_tags = {**get_query_tags(), "team_id": team_id, "client_query_id": refresh_client_query_id}
+    futures = {
+        executor.submit(_refresh_dashboard_tile_in_thread, tile, tile_refreshes[tile.pk], query_tags): tile
+        for tile in tiles_to_refresh
+    }
+    refreshed_tile_ids: Set[int] = set()
+    try:
+        for future in as_completed(futures, timeout=max(deadline - time.monotonic(), 0)):
+            refreshed_tile_ids.add(futures[future].pk)
+            yield futures[future].pk, future.result()
+    except FuturesTimeoutError:
+        logger.warning(
+            "dashboard_tile_refresh_over_budget",
+            team_id=team_id,
+            dashboard_id=tiles[0].dashboard_id,
+            tiles_refreshing=len(tiles_to_refresh) - len(refreshed_tile_ids),
+        )
+        for tile in tiles_to_refresh:
+            if tile.pk not in refreshed_tile_ids:
+                yield tile.pk, tile_results[tile.pk]
+    finally:
+        # The request doesn't wait for refreshes past the budget, so they are cancelled rather than left running
+        executor.shutdown(wait=False, cancel_futures=True)
+        if not all(future.done() for future in futures):
+            _cancel_tile_refreshes(team_id, refresh_client_query_id)
+
+
+def _cancel_tile_refreshes(team_id: int, refresh_client_query_id: str) -> None:
+    try:
+        cancel_client_query(team_id, refresh_client_query_id)
+    except Exception as e:
+        # The refreshes finish on their own, without anything waiting for them
+        logger.warning("dashboard_tile_refresh_cancel_failed", team_id=team_id, exc_info=e)
+        capture_exception(e)
+
+
+def _refresh_dashboard_tile(tile: DashboardTile, tile_refresh: DashboardTileRefresh) -> InsightResult:
+    insight = cast(Insight, tile.insight)
+    if sleep_if_refresh_is_running_somewhere_else(tile_refresh.caching_state, now()):
+        return fetch_cached_insight_result(tile, tile_refresh.refresh_frequency)
+
+    return synchronously_update_cache(insight, tile.dashboard, tile_refresh.refresh_frequency)
+
+
+def _refresh_dashboard_tile_in_thread(
+    tile: DashboardTile, tile_refresh: DashboardTileRefresh, query_tags: Dict[str, Any]
+) -> InsightResult:
+    tag_queries(**query_tags)
+    try:
+        return _refresh_dashboard_tile(tile, tile_refresh)
+    finally:
+        reset_query_tags()
+        # Each thread has its own database connection, which would otherwise be left open
+        connection.close()
+
+
 def synchronously_update_cache(
     insight: Insight, dashboard: Optional[Dashboard], refresh_frequency: Optional[timedelta] = None
 ) -> InsightResult:
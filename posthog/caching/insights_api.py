@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from math import ceil
 from time import sleep
-from typing import Optional, Tuple, Union
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union, cast
 import zoneinfo
 from rest_framework import request
 
@@ -31,6 +31,72 @@ def should_refresh_insight(
 
     If a refresh already is being processed somewhere else, this function will wait for that to finish (or time out).
     """
+    refresh_frequency = _get_refresh_frequency(insight, dashboard_tile, is_shared=is_shared)
+
+    refresh_insight_now = False
+    if refresh_requested_by_client(request):
+        now = datetime.now(tz=zoneinfo.ZoneInfo("UTC"))
+        target: Union[Insight, DashboardTile] = insight if dashboard_tile is None else dashboard_tile
+        cache_key = calculate_cache_key(target)
+        # Most recently queued caching state
+        caching_state = (
+            InsightCachingState.objects.filter(team_id=insight.team.pk, cache_key=cache_key, insight=insight)
+            .order_by("-last_refresh_queued_at")
+            .first()
+        )
+        refresh_insight_now = _is_refresh_due(caching_state, refresh_frequency, now)
+
+        if refresh_insight_now:
+            has_refreshed_somewhere_else = sleep_if_refresh_is_running_somewhere_else(caching_state, now)
+            if has_refreshed_somewhere_else:
+                refresh_insight_now = False
+
+    return refresh_insight_now, refresh_frequency
+
+
+class DashboardTileRefresh(NamedTuple):
+    refresh_now: bool
+    refresh_frequency: timedelta
+    # Most recently queued caching state, if the refresh was requested
+    caching_state: Optional[InsightCachingState]
+
+
+def should_refresh_dashboard_tiles(
+    tiles: List[DashboardTile], *, request: request.Request, is_shared=False
+) -> Dict[int, DashboardTileRefresh]:
+    """Same as `should_refresh_insight` for all insight tiles of a dashboard, with one caching state query.
+
+    Doesn't wait for refreshes running somewhere else, which is up to whoever refreshes the tiles.
+    """
+    refresh_frequencies = {
+        tile.pk: _get_refresh_frequency(cast(Insight, tile.insight), tile, is_shared=is_shared) for tile in tiles
+    }
+    if not tiles or not refresh_requested_by_client(request):
+        return {tile.pk: DashboardTileRefresh(False, refresh_frequencies[tile.pk], None) for tile in tiles}
+
+    now = datetime.now(tz=zoneinfo.ZoneInfo("UTC"))
+    cache_keys = {tile.pk: calculate_cache_key(tile) for tile in tiles}
+    caching_states: Dict[Tuple[Optional[str], int], InsightCachingState] = {}
+    for caching_state in InsightCachingState.objects.filter(
+        team_id=cast(Insight, tiles[0].insight).team_id,
+        cache_key__in={cache_key for cache_key in cache_keys.values() if cache_key is not None},
+        insight_id__in={tile.insight_id for tile in tiles},
+    ).order_by("-last_refresh_queued_at"):
+        # Most recently queued caching state
+        caching_states.setdefault((caching_state.cache_key, caching_state.insight_id), caching_state)
+
+    tile_refreshes = {}
+    for tile in tiles:
+        caching_state = caching_states.get((cache_keys[tile.pk], cast(int, tile.insight_id)))
+        tile_refreshes[tile.pk] = DashboardTileRefresh(
+            _is_refresh_due(caching_state, refresh_frequencies[tile.pk], now),
+            refresh_frequencies[tile.pk],
+            caching_state,
+        )
+    return tile_refreshes
+
+
+def _get_refresh_frequency(insight: Insight, dashboard_tile: Optional[DashboardTile], *, is_shared: bool) -> timedelta:
     filter = get_filter(
         data=insight.dashboard_filters(dashboard_tile.dashboard if dashboard_tile is not None else None),
         team=insight.team,
@@ -49,32 +115,18 @@ def should_refresh_insight(
         # The interval is shorter for short-term insights
         refresh_frequency = REDUCED_MINIMUM_INSIGHT_REFRESH_INTERVAL
 
-    refresh_insight_now = False
-    if refresh_requested_by_client(request):
-        now = datetime.now(tz=zoneinfo.ZoneInfo("UTC"))
-        target: Union[Insight, DashboardTile] = insight if dashboard_tile is None else dashboard_tile
-        cache_key = calculate_cache_key(target)
-        # Most recently queued caching state
-        caching_state = (
-            InsightCachingState.objects.filter(team_id=insight.team.pk, cache_key=cache_key, insight=insight)
-            .order_by("-last_refresh_queued_at")
-            .first()
-        )
-        refresh_insight_now = (
-            caching_state is None
-            or caching_state.last_refresh is None
-            or (caching_state.last_refresh + refresh_frequency <= now)
-        )
+    return refresh_frequency
 
-        if refresh_insight_now:
-            has_refreshed_somewhere_else = _sleep_if_refresh_is_running_somewhere_else(caching_state, now)
-            if has_refreshed_somewhere_else:
-                refresh_insight_now = False
 
-    return refresh_insight_now, refresh_frequency
+def _is_refresh_due(caching_state: Optional[InsightCachingState], refresh_frequency: timedelta, now: datetime) -> bool:
+    return (
+        caching_state is None
+        or caching_state.last_refresh is None
+        or (caching_state.last_refresh + refresh_frequency <= now)
+    )
 
 
-def _sleep_if_refresh_is_running_somewhere_else(caching_state: Optional[InsightCachingState], now: datetime) -> bool:
+def sleep_if_refresh_is_running_somewhere_else(caching_state: Optional[InsightCachingState], now: datetime) -> bool:
     """Prevent the same query from running concurrently needlessly."""
     is_refresh_currently_running = _is_refresh_currently_running_somewhere_else(caching_state, now)
     if is_refresh_currently_running:
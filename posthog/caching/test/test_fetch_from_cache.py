@@ -1,16 +1,22 @@
+import threading
 from datetime import timedelta
+from unittest.mock import patch
 
+from django.http import HttpRequest
+from django.test import override_settings
 from django.utils.timezone import now
 from freezegun import freeze_time
+from rest_framework.request import Request
 
 from posthog.caching.fetch_from_cache import (
     InsightResult,
     NothingInCacheResult,
     fetch_cached_insight_result,
+    fetch_dashboard_tile_results,
     synchronously_update_cache,
 )
 from posthog.decorators import CacheType
-from posthog.models import Insight
+from posthog.models import DashboardTile, Insight
 from posthog.test.base import BaseTest, ClickhouseTestMixin, _create_event, _create_insight, flush_persons_and_events
 from posthog.utils import get_safe_cache
 
@@ -101,3 +107,95 @@ class TestFetchFromCache(ClickhouseTestMixin, BaseTest):
         assert isinstance(from_cache_result, NothingInCacheResult)
         assert from_cache_result.result is None
         assert from_cache_result.cache_key is None
+
+    def test_fetch_dashboard_tile_results_from_cache(self):
+        other_insight = Insight.objects.create(
+            team=self.team, filters={"events": [{"id": "$pageview"}], "properties": []}
+        )
+        other_dashboard_tile = DashboardTile.objects.create(dashboard=self.dashboard, insight=other_insight)
+        cached_result = synchronously_update_cache(self.insight, self.dashboard, timedelta(minutes=3))
+
+        with self.assertNumQueries(0):
+            tile_results = fetch_dashboard_tile_results(
+                [self.dashboard_tile, other_dashboard_tile], request=Request(HttpRequest())
+            )
+
+        assert tile_results[self.dashboard_tile.pk].result == cached_result.result
+        assert tile_results[self.dashboard_tile.pk].is_cached
+        assert isinstance(tile_results[other_dashboard_tile.pk], NothingInCacheResult)
+
+    def test_fetch_dashboard_tile_results_refreshes_tiles(self):
+        django_request = HttpRequest()
+        django_request.GET["refresh"] = "true"
+
+        with override_settings(DASHBOARD_TILE_REFRESH_BUDGET_SECONDS=0):
+            tile_results = fetch_dashboard_tile_results([self.dashboard_tile], request=Request(django_request))
+
+        # Out of time to refresh
+        assert isinstance(tile_results[self.dashboard_tile.pk], NothingInCacheResult)
+
+        tile_results = fetch_dashboard_tile_results([self.dashboard_tile], request=Request(django_request))
+
+        assert tile_results[self.dashboard_tile.pk].result is not None
+        assert tile_results[self.dashboard_tile.pk].last_refresh == now()
+        assert not tile_results[self.dashboard_tile.pk].is_cached
+
+    @override_settings(DASHBOARD_TILE_REFRESH_CONCURRENCY=2)
+    def test_fetch_dashboard_tile_results_refreshes_tiles_concurrently(self):
+        other_insight = Insight.objects.create(
+            team=self.team, filters={"events": [{"id": "$pageview"}], "properties": []}
+        )
+        other_dashboard_tile = DashboardTile.objects.create(dashboard=self.dashboard, insight=other_insight)
+        django_request = HttpRequest()
+        django_request.GET["refresh"] = "true"
+        refreshing_threads = set()
+
+        # Refreshes run off the test thread, outside of its transaction, so they must not read the database
+        def refresh(tile, tile_refresh):
+            refreshing_threads.add(threading.get_ident())
+            return InsightResult(result=[tile.pk], last_refresh=now(), cache_key=None, is_cached=False, timezone=None)
+
+        with patch("posthog.caching.fetch_from_cache._refresh_dashboard_tile", side_effect=refresh), patch(
+            "posthog.caching.fetch_from_cache.cancel_client_query"
+        ) as mock_cancel_client_query:
+            tile_results = fetch_dashboard_tile_results(
+                [self.dashboard_tile, other_dashboard_tile], request=Request(django_request)
+            )
+
+        for tile in [self.dashboard_tile, other_dashboard_tile]:
+            assert tile_results[tile.pk].result == [tile.pk]
+            assert not tile_results[tile.pk].is_cached
+        assert threading.get_ident() not in refreshing_threads
+        mock_cancel_client_query.assert_not_called()
+
+    @override_settings(DASHBOARD_TILE_REFRESH_CONCURRENCY=2, DASHBOARD_TILE_REFRESH_BUDGET_SECONDS=0)
+    def test_fetch_dashboard_tile_results_cancels_refreshes_over_budget(self):
+        other_insight = Insight.objects.create(
+            team=self.team, filters={"events": [{"id": "$pageview"}], "properties": []}
+        )
+        other_dashboard_tile = DashboardTile.objects.create(dashboard=self.dashboard, insight=other_insight)
+        django_request = HttpRequest()
+        django_request.GET["refresh"] = "true"
+        refresh_may_finish = threading.Event()
+
+        def slow_refresh(tile, tile_refresh):
+            refresh_may_finish.wait(timeout=10)
+            return NothingInCacheResult(cache_key=None)
+
+        with patch("posthog.caching.fetch_from_cache._refresh_dashboard_tile", side_effect=slow_refresh), patch(
+            "posthog.caching.fetch_from_cache.cancel_client_query"
+        ) as mock_cancel_client_query:
+            try:
+                tile_results = fetch_dashboard_tile_results(
+                    [self.dashboard_tile, other_dashboard_tile], request=Request(django_request)
+                )
+            finally:
+                refresh_may_finish.set()
+
+        # Out of time to refresh
+        assert isinstance(tile_results[self.dashboard_tile.pk], NothingInCacheResult)
+        assert isinstance(tile_results[other_dashboard_tile.pk], NothingInCacheResult)
+        mock_cancel_client_query.assert_called_once()
+        team_id, refresh_client_query_id = mock_cancel_client_query.call_args[0]
+        assert team_id == self.team.pk
+        assert refresh_client_query_id.startswith(f"dashboard_{self.dashboard.pk}_refresh_")
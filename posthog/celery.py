@@ -6,7 +6,7 @@ from uuid import UUID
 
 from celery import Celery
 from celery.schedules import crontab
-from celery.signals import setup_logging, task_postrun, task_prerun, worker_process_init
+from celery.signals import setup_logging, task_postrun, task_prerun, worker_process_init, worker_process_shutdown
 from django.conf import settings
 from django.db import connection
 from django.dispatch import receiver
@@ -67,6 +67,13 @@ def on_worker_start(**kwargs) -> None:
     sentry_init()
 
 
+@worker_process_shutdown.connect
+def on_worker_shutdown(**kwargs) -> None:
+    from posthog.tasks.exports.image_exporter import browser_pool
+
+    browser_pool.close()
+
+
 @app.on_after_configure.connect
 def setup_periodic_tasks(sender: Celery, **kwargs):
     # Monitoring tasks
@@ -109,6 +116,11 @@ def setup_periodic_tasks(sender: Celery, **kwargs):
     # Sync all Organization.available_features every hour, only for billing v1 orgs
     sender.add_periodic_task(crontab(minute=30, hour="*"), sync_all_organization_available_features.s())
 
+    # Drop the tokens of deleted teams from the filter that rejects unknown API tokens
+    sender.add_periodic_task(
+        crontab(minute=20, hour="*"), rebuild_api_token_filter.s(), name="rebuild API token filter"
+    )
+
     sync_insight_cache_states_schedule = get_crontab(settings.SYNC_INSIGHT_CACHE_STATES_SCHEDULE)
     if sync_insight_cache_states_schedule:
         sender.add_periodic_task(
@@ -131,6 +143,13 @@ def setup_periodic_tasks(sender: Celery, **kwargs):
     sender.add_periodic_task(120, clickhouse_mutation_count.s(), name="clickhouse table mutations count")
     sender.add_periodic_task(120, clickhouse_errors_count.s(), name="clickhouse instance errors count")
 
+    if settings.CLICKHOUSE_ADMISSION_CONTROL != "off":
+        sender.add_periodic_task(
+            crontab(minute=15, hour="*"),
+            refresh_clickhouse_query_cost_baselines.s(),
+            name="refresh clickhouse query cost baselines",
+        )
+
     sender.add_periodic_task(120, pg_row_count.s(), name="PG tables row counts")
     sender.add_periodic_task(120, pg_table_cache_hit_rate.s(), name="PG table cache hit rate")
     sender.add_periodic_task(
@@ -140,6 +159,12 @@ def setup_periodic_tasks(sender: Celery, **kwargs):
 
     sender.add_periodic_task(120, calculate_cohort.s(), name="recalculate cohorts")
 
+    sender.add_periodic_task(crontab(hour=3, minute=0), calculate_daily_event_counts.s(), name="count daily events")
+
+    property_values_index_crontab = get_crontab(settings.PROPERTY_VALUES_INDEX_SCHEDULE_CRON)
+    if property_values_index_crontab:
+        sender.add_periodic_task(property_values_index_crontab, index_property_values.s(), name="index property values")
+
     if settings.ASYNC_EVENT_PROPERTY_USAGE:
         sender.add_periodic_task(
             get_crontab(settings.EVENT_PROPERTY_USAGE_INTERVAL_CRON),
@@ -707,6 +732,27 @@ def calculate_event_property_usage():
     return calculate_event_property_usage()
 
 
+@app.task(ignore_result=True)
+def refresh_clickhouse_query_cost_baselines():
+    from posthog.clickhouse.client.admission import refresh_query_cost_baselines
+
+    refresh_query_cost_baselines()
+
+
+@app.task(ignore_result=True)
+def calculate_daily_event_counts():
+    from posthog.queries.sampling import calculate_daily_event_counts
+
+    calculate_daily_event_counts()
+
+
+@app.task(ignore_result=True)
+def index_property_values():
+    from posthog.tasks.property_values import index_property_values
+
+    index_property_values()
+
+
 @app.task(ignore_result=True)
 def count_teams_with_no_property_query_count():
     import structlog
@@ -796,6 +842,13 @@ def sync_all_organization_available_features():
     sync_all_organization_available_features()
 
 
+@app.task(ignore_result=True)
+def rebuild_api_token_filter():
+    from posthog.models.team.api_token_filter import rebuild_api_token_filter
+
+    rebuild_api_token_filter()
+
+
 @app.task(ignore_result=False, track_started=True, max_retries=0)
 def check_async_migration_health():
     from posthog.tasks.async_migrations import check_async_migration_health
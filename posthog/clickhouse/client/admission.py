@@ -0,0 +1,240 @@
+"""
+Admission control of ClickHouse queries.
+
+Before a query runs, the bytes it will read are estimated from its query tags and from what the team's queries of the
+same type historically read. The estimated bytes of queries in flight are tracked per team and per workload in redis,
+so that one team's expensive queries can't starve everyone else of the cluster. Queries over budget are moved to the
+offline cluster where there is one, wait a while for budget to free up, or are rejected.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import structlog
+from django.conf import settings
+from statshog.defaults.django import statsd
+
+from posthog.clickhouse.client import connection
+from posthog.clickhouse.client.connection import Workload
+from posthog.clickhouse.query_tagging import get_query_tags
+from posthog.exceptions import QueryAdmissionRejected
+from posthog.redis import get_client
+
+logger = structlog.get_logger(__name__)
+
+BASELINES_KEY = "clickhouse_admission:baselines"
+IN_FLIGHT_KEY_PREFIX = "clickhouse_admission:in_flight"
+# Queries that have been in flight for longer than this stop counting, so that workers that died mid query don't
+# hold on to budget
+IN_FLIGHT_TTL_SECONDS = 600
+
+# Bytes read per day of the date range per entity, for teams and query types without history
+DEFAULT_BYTES_PER_RANGE_DAY = 50 * 1024**2  # 50MB
+# Date range assumed for queries without one, e.g. queries that aren't insights
+DEFAULT_RANGE_DAYS = 7
+BREAKDOWN_COST_FACTOR = 2.0
+# Filters on persons and cohorts join the persons tables in
+PERSON_FILTER_TYPES = {"person", "cohort", "precalculated-cohort", "static-cohort"}
+PERSON_FILTER_COST_FACTOR = 1.5
+
+MIN_QUEUE_POLL_SECONDS = 0.1
+MAX_QUEUE_POLL_SECONDS = 1.0
+
+
+def estimate_query_bytes(team_id: int, tags: Dict) -> int:
+    "Estimates the bytes a query will read, from the query tags of the query and the history of the team"
+    baseline = _get_baseline(team_id, tags.get("query_type"))
+    range_days = tags.get("query_time_range_days") or DEFAULT_RANGE_DAYS
+    entities = tags.get("number_of_entities") or 1
+
+    estimate = baseline * max(range_days, 1) * max(entities, 1)
+    if tags.get("breakdown_by"):
+        estimate *= BREAKDOWN_COST_FACTOR
+    if PERSON_FILTER_TYPES.intersection(tags.get("filter_by_type") or []):
+        estimate *= PERSON_FILTER_COST_FACTOR
+    return int(estimate)
+
+
+def _get_baseline(team_id: int, query_type: Optional[str]) -> float:
+    # From most to least specific: the query type of the team, any query of the team, any query of any team
+    fields = [f"{team_id}:{query_type or ''}", f"{team_id}:", "0:"]
+    for value in get_client().hmget(BASELINES_KEY, fields):
+        if value is not None:
+            return float(value)
+    return DEFAULT_BYTES_PER_RANGE_DAY
+
+
+def refresh_query_cost_baselines() -> None:
+    """
+    Stores what queries of the last week read per day of their date range per entity, by team and query type, which
+    is what `estimate_query_bytes` scales up by the tags of a query. The 90th percentile is used to err on the side of
+    queries being expensive.
+    """
+    from posthog.clickhouse.client.execute import sync_execute
+
+    rows = sync_execute(
+        f"""
+        WITH JSONExtractInt(log_comment, 'team_id') as team_id,
+             JSONExtractString(log_comment, 'query_type') as query_type,
+             JSONExtractInt(log_comment, 'query_time_range_days') as range_days,
+             JSONExtractInt(log_comment, 'number_of_entities') as entities
+        SELECT team_id, query_type, quantile(0.9)(read_bytes / if(range_days > 0, range_days, %(default_range_days)s) / greatest(entities, 1))
+        FROM clusterAllReplicas({settings.CLICKHOUSE_CLUSTER}, system.query_log)
+        WHERE type = 'QueryFinish'
+          AND is_initial_query = 1
+          AND event_date >= today() - 7
+          AND query_start_time >= now() - INTERVAL 7 DAY
+          AND team_id > 0
+          AND query_type != ''
+        GROUP BY team_id, query_type WITH ROLLUP
+    """,
+        {"default_range_days": DEFAULT_RANGE_DAYS},
+    )
+
+    # Rolled up rows have the default value for the columns they roll up, i.e. team 0 and the empty query type
+    baselines = {f"{team_id}:{query_type}": int(baseline) for team_id, query_type, baseline in rows}
+    pipe = get_client().pipeline()
+    pipe.delete(BASELINES_KEY)
+    if baselines:
+        pipe.hset(BASELINES_KEY, mapping=baselines)  # type: ignore
+        pipe.expire(BASELINES_KEY, 24 * 60 * 60)
+    pipe.execute()
+    logger.info("clickhouse_admission.baselines_refreshed", count=len(baselines))
+
+
+@contextmanager
+def admit_query(team_id: Optional[int], workload: Workload) -> Iterator[Workload]:
+    """
+    Holds budget for the query while it runs, and yields the workload to run it with. Depending on
+    CLICKHOUSE_ADMISSION_CONTROL, decisions are only reported ("observe") or applied ("enforce").
+
+    Redis being unavailable admits queries, as not running queries at all is worse than running too many.
+    """
+    mode = settings.CLICKHOUSE_ADMISSION_CONTROL
+    if mode not in ("observe", "enforce") or team_id is None:
+        yield workload
+        return
+
+    try:
+        admission = _admit(team_id, workload, enforce=mode == "enforce")
+    except QueryAdmissionRejected:
+        raise
+    except Exception as err:
+        logger.warn("clickhouse_admission.failed", team_id=team_id, error=err)
+        statsd.incr("clickhouse_admission.decision", tags={"decision": "error", "mode": mode})
+        admission = None
+
+    if admission is None:
+        yield workload
+        return
+
+    admitted_workload, keys, member = admission
+    try:
+        yield admitted_workload
+    finally:
+        _unregister(keys, member)
+
+
+def _admit(team_id: int, workload: Workload, enforce: bool) -> Tuple[Workload, List[str], str]:
+    cost = estimate_query_bytes(team_id, get_query_tags())
+    member = f"{uuid.uuid4()}:{cost}"
+    mode = "enforce" if enforce else "observe"
+
+    candidates = [workload]
+    if _cluster_of(workload) == Workload.ONLINE and settings.CLICKHOUSE_OFFLINE_CLUSTER_HOST is not None:
+        candidates.append(Workload.OFFLINE)
+
+    start_time = time.monotonic()
+    deadline = start_time + settings.CLICKHOUSE_ADMISSION_QUEUE_SECONDS
+    poll_seconds = MIN_QUEUE_POLL_SECONDS
+    while True:
+        over_budget = None
+        for candidate in candidates:
+            keys = [_team_key(team_id), _workload_key(candidate)]
+            over_budget = _register(keys, member, cost, team_id)
+            if over_budget is None or not enforce:
+                break
+            _unregister(keys, member)
+            # Moving to another cluster doesn't help teams over their own budget
+            if over_budget == "team":
+                break
+
+        if over_budget is None or not enforce:
+            decision = "admitted" if over_budget is None else f"over_{over_budget}_budget"
+            if candidate != workload:
+                decision = "demoted"
+                logger.info("clickhouse_admission.demoted", team_id=team_id, estimated_bytes=cost)
+            statsd.incr("clickhouse_admission.decision", tags={"decision": decision, "mode": mode})
+            statsd.timing("clickhouse_admission.wait_time", (time.monotonic() - start_time) * 1000.0)
+            return candidate, keys, member
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            statsd.incr("clickhouse_admission.decision", tags={"decision": "rejected", "mode": mode})
+            logger.warn("clickhouse_admission.rejected", team_id=team_id, estimated_bytes=cost, over_budget=over_budget)
+            raise QueryAdmissionRejected()
+
+        time.sleep(min(poll_seconds, remaining))
+        poll_seconds = min(poll_seconds * 2, MAX_QUEUE_POLL_SECONDS)
+
+
+def _register(keys: List[str], member: str, cost: int, team_id: int) -> Optional[str]:
+    """
+    Adds the query to the queries in flight, and returns which budget it takes over, if any. Queries are added before
+    checking the budget, so that concurrent queries can't all see budget left. The first query in flight is always
+    within budget, so that queries more expensive than the budget on their own can still run.
+    """
+    now = time.time()
+    pipe = get_client().pipeline()
+    for key in keys:
+        pipe.zremrangebyscore(key, "-inf", now)
+        pipe.zadd(key, {member: now + IN_FLIGHT_TTL_SECONDS})
+        pipe.expire(key, IN_FLIGHT_TTL_SECONDS)
+        pipe.zrange(key, 0, -1)
+    results = pipe.execute()
+    team_members, workload_members = results[3], results[7]
+
+    team_budget = settings.CLICKHOUSE_ADMISSION_TEAM_BUDGET_OVERRIDES.get(
+        str(team_id), settings.CLICKHOUSE_ADMISSION_TEAM_BUDGET_BYTES
+    )
+    if len(team_members) > 1 and _in_flight_bytes(team_members) > team_budget:
+        return "team"
+    if (
+        len(workload_members) > 1
+        and _in_flight_bytes(workload_members) > settings.CLICKHOUSE_ADMISSION_WORKLOAD_BUDGET_BYTES
+    ):
+        return "workload"
+    return None
+
+
+def _unregister(keys: List[str], member: str) -> None:
+    try:
+        pipe = get_client().pipeline()
+        for key in keys:
+            pipe.zrem(key, member)
+        pipe.execute()
+    except Exception as err:
+        # The query stops counting once it's past the in flight TTL either way
+        logger.warn("clickhouse_admission.unregister_failed", error=err)
+
+
+def _in_flight_bytes(members: List[bytes]) -> int:
+    return sum(int(member.rsplit(b":", 1)[1]) for member in members)
+
+
+def _cluster_of(workload: Workload) -> Workload:
+    "The cluster `get_pool` runs queries of this workload on"
+    if workload == Workload.DEFAULT:
+        workload = connection._default_workload
+    if workload == Workload.OFFLINE and settings.CLICKHOUSE_OFFLINE_CLUSTER_HOST is not None:
+        return Workload.OFFLINE
+    return Workload.ONLINE
+
+
+def _team_key(team_id: int) -> str:
+    return f"{IN_FLIGHT_KEY_PREFIX}:team:{team_id}"
+
+
+def _workload_key(workload: Workload) -> str:
+    return f"{IN_FLIGHT_KEY_PREFIX}:workload:{_cluster_of(workload).value}"
@@ -1,4 +1,5 @@
 import json
+import re
 import threading
 import types
 from contextlib import contextmanager
@@ -11,6 +12,7 @@ from clickhouse_driver import Client as SyncClient
 from django.conf import settings as app_settings
 from statshog.defaults.django import statsd
 
+from posthog.clickhouse.client.admission import admit_query
 from posthog.clickhouse.client.connection import Workload, get_pool
 from posthog.clickhouse.client.escape import substitute_params
 from posthog.clickhouse.query_tagging import get_query_tag_value, get_query_tags
@@ -35,6 +37,9 @@ CLICKHOUSE_SUPPORTED_JOIN_ALGORITHMS = [
     "auto",
 ]
 
+# SELECT or WITH, after any whitespace and leading comments
+READ_QUERY_REGEX = re.compile(r"\s*(--[^\n]*\n\s*)*(SELECT|WITH)\b", re.IGNORECASE)
+
 is_invalid_algorithm = lambda algo: algo not in CLICKHOUSE_SUPPORTED_JOIN_ALGORITHMS
 
 
@@ -90,7 +95,12 @@ def sync_execute(
         except ModuleNotFoundError:  # when we run plugin server tests it tries to run above, ignore
             pass
 
-    with get_pool(workload, team_id, readonly).get_client() as client:
+    # Only reads have a cost to admit, and e.g. killing queries mustn't wait for the budget it frees up
+    is_read = not isinstance(args, (list, tuple, types.GeneratorType)) and _is_read_query(query)
+    admission_team_id = team_id or get_query_tag_value("team_id") if is_read else None
+    with admit_query(admission_team_id, workload) as workload, get_pool(
+        workload, team_id, readonly
+    ).get_client() as client:
         start_time = perf_counter()
 
         prepared_sql, prepared_args, tags = _prepare_query(client=client, query=query, args=args, workload=workload)
@@ -124,6 +134,19 @@ def sync_execute(
     return result
 
 
+def _is_read_query(query: str) -> bool:
+    return READ_QUERY_REGEX.match(query) is not None
+
+
+def cancel_client_query(team_id: int, client_query_id: str) -> None:
+    "Kill the queries running for a client query id, see `validated_client_query_id`"
+    sync_execute(
+        f"KILL QUERY ON CLUSTER '{app_settings.CLICKHOUSE_CLUSTER}' WHERE query_id LIKE %(client_query_id)s",
+        {"client_query_id": f"{team_id}_{client_query_id}%"},
+    )
+    statsd.incr("clickhouse.query.cancellation_requested", tags={"team_id": team_id})
+
+
 def query_with_columns(
     query: str,
     args: Optional[QueryArgs] = None,
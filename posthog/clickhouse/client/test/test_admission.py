@@ -0,0 +1,141 @@
+from unittest.mock import patch
+
+import pytest
+
+from posthog.clickhouse.client.admission import (
+    BASELINES_KEY,
+    DEFAULT_BYTES_PER_RANGE_DAY,
+    admit_query,
+    estimate_query_bytes,
+)
+from posthog.clickhouse.client.connection import Workload
+from posthog.clickhouse.query_tagging import reset_query_tags, tag_queries
+from posthog.exceptions import QueryAdmissionRejected
+from posthog.redis import get_client
+
+GB = 1024**3
+
+
+def test_estimate_query_bytes_scales_baseline_by_query_tags():
+    get_client().hset(BASELINES_KEY, mapping={"2:trends": GB, "2:": 2 * GB, "0:": 3 * GB})
+
+    assert estimate_query_bytes(2, {"query_type": "trends", "query_time_range_days": 30}) == 30 * GB
+    assert estimate_query_bytes(2, {"query_type": "funnels", "query_time_range_days": 1}) == 2 * GB
+    assert estimate_query_bytes(3, {"query_type": "trends", "query_time_range_days": 1}) == 3 * GB
+    assert estimate_query_bytes(
+        2,
+        {
+            "query_type": "trends",
+            "query_time_range_days": 1,
+            "number_of_entities": 2,
+            "breakdown_by": ["event"],
+            "filter_by_type": ["cohort"],
+        },
+    ) == int(2 * 2 * 1.5 * GB)
+
+
+def test_estimate_query_bytes_without_history():
+    assert estimate_query_bytes(2, {}) == 7 * DEFAULT_BYTES_PER_RANGE_DAY
+
+
+def test_admission_control_off(settings):
+    settings.CLICKHOUSE_ADMISSION_CONTROL = "off"
+
+    with admit_query(2, Workload.ONLINE) as workload:
+        assert workload == Workload.ONLINE
+        assert _in_flight_keys() == []
+
+
+def test_queries_over_team_budget_are_rejected(settings):
+    settings.CLICKHOUSE_ADMISSION_TEAM_BUDGET_BYTES = 10 * GB
+    tag_queries(query_time_range_days=200)
+
+    # The first query in flight is admitted even when it's over budget on its own
+    with admit_query(2, Workload.ONLINE) as workload:
+        assert workload == Workload.ONLINE
+
+        with pytest.raises(QueryAdmissionRejected):
+            with admit_query(2, Workload.ONLINE):
+                pass
+
+        # Other teams have budgets of their own
+        with admit_query(3, Workload.ONLINE) as workload:
+            assert workload == Workload.ONLINE
+
+    # Budget is freed up once queries finish
+    assert _in_flight_keys() == []
+    with admit_query(2, Workload.ONLINE):
+        pass
+
+
+def test_team_budget_overrides(settings):
+    settings.CLICKHOUSE_ADMISSION_TEAM_BUDGET_BYTES = 10 * GB
+    settings.CLICKHOUSE_ADMISSION_TEAM_BUDGET_OVERRIDES = {"2": 1000 * GB}
+    tag_queries(query_time_range_days=200)
+
+    with admit_query(2, Workload.ONLINE), admit_query(2, Workload.ONLINE):
+        pass
+
+
+def test_queries_over_workload_budget_are_demoted_to_offline_cluster(settings):
+    settings.CLICKHOUSE_ADMISSION_WORKLOAD_BUDGET_BYTES = 10 * GB
+    settings.CLICKHOUSE_OFFLINE_CLUSTER_HOST = "ch-offline.example.com"
+    tag_queries(query_time_range_days=200)
+
+    with admit_query(2, Workload.ONLINE) as first, admit_query(3, Workload.DEFAULT) as second:
+        assert first == Workload.ONLINE
+        assert second == Workload.OFFLINE
+
+        with pytest.raises(QueryAdmissionRejected):
+            with admit_query(4, Workload.ONLINE):
+                pass
+
+
+def test_queued_queries_run_once_budget_frees_up(settings):
+    settings.CLICKHOUSE_ADMISSION_TEAM_BUDGET_BYTES = 10 * GB
+    settings.CLICKHOUSE_ADMISSION_QUEUE_SECONDS = 5
+    tag_queries(query_time_range_days=200)
+
+    with admit_query(2, Workload.ONLINE):
+        # The query in flight finishes while the second one waits
+        with patch(
+            "posthog.clickhouse.client.admission.time.sleep",
+            side_effect=lambda _: get_client().delete(*_in_flight_keys()),
+        ):
+            with admit_query(2, Workload.ONLINE) as workload:
+                assert workload == Workload.ONLINE
+
+
+def test_observe_mode_admits_queries_over_budget(settings):
+    settings.CLICKHOUSE_ADMISSION_CONTROL = "observe"
+    settings.CLICKHOUSE_ADMISSION_TEAM_BUDGET_BYTES = 10 * GB
+    tag_queries(query_time_range_days=200)
+
+    with admit_query(2, Workload.ONLINE), admit_query(2, Workload.ONLINE) as workload:
+        assert workload == Workload.ONLINE
+
+
+def test_queries_are_admitted_when_redis_is_unavailable():
+    with patch("posthog.clickhouse.client.admission.get_client", side_effect=ConnectionError):
+        with admit_query(2, Workload.ONLINE) as workload:
+            assert workload == Workload.ONLINE
+
+
+def _in_flight_keys():
+    return list(get_client().scan_iter("clickhouse_admission:in_flight:*"))
+
+
+@pytest.fixture(autouse=True)
+def admission_control(settings):
+    settings.CLICKHOUSE_ADMISSION_CONTROL = "enforce"
+    settings.CLICKHOUSE_ADMISSION_QUEUE_SECONDS = 0
+    settings.CLICKHOUSE_ADMISSION_TEAM_BUDGET_OVERRIDES = {}
+    settings.CLICKHOUSE_OFFLINE_CLUSTER_HOST = None
+    reset_query_tags()
+
+    yield
+
+    reset_query_tags()
+    keys = list(get_client().scan_iter("clickhouse_admission:*"))
+    if keys:
+        get_client().delete(*keys)
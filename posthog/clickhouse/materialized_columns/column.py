@@ -5,6 +5,7 @@ from posthog.cache_utils import cache_for
 from posthog.models.property import PropertyName, TableColumn, TableWithProperties
 
 ColumnName = str
+MaterializedColumnType = Literal["String", "Float64", "DateTime"]
 
 TablesWithMaterializedColumns = Union[TableWithProperties, Literal["session_recording_events"]]
 
@@ -16,12 +17,30 @@ def get_materialized_columns(
     return {}
 
 
+@cache_for(timedelta(minutes=15))
+def get_typed_materialized_columns(
+    table: TablesWithMaterializedColumns,
+) -> Dict[Tuple[PropertyName, TableColumn, MaterializedColumnType], ColumnName]:
+    return {}
+
+
 def materialize(
     table: TableWithProperties,
     property: PropertyName,
     column_name=None,
     table_column: TableColumn = "properties",
     create_minmax_index=False,
+    create_bloom_filter_index=False,
+) -> None:
+    pass
+
+
+def materialize_typed(
+    table: TableWithProperties,
+    property: PropertyName,
+    column_type: MaterializedColumnType,
+    table_column: TableColumn = "properties",
+    create_minmax_index=False,
 ) -> None:
     pass
 
@@ -31,5 +50,6 @@ def backfill_materialized_columns(
     properties: List[Tuple[PropertyName, TableColumn]],
     backfill_period: timedelta,
     test_settings=None,
+    column_type: MaterializedColumnType = "String",
 ) -> None:
     pass
@@ -0,0 +1,7 @@
+from posthog.clickhouse.client.migration_tools import run_sql_with_exceptions
+from posthog.models.property_values.sql import DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL, PROPERTY_VALUES_TABLE_SQL
+
+operations = [
+    run_sql_with_exceptions(PROPERTY_VALUES_TABLE_SQL()),
+    run_sql_with_exceptions(DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL()),
+]
@@ -0,0 +1,12 @@
+from posthog.clickhouse.client.migration_tools import run_sql_with_exceptions
+from posthog.models.events_hourly_rollup.sql import (
+    DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL,
+    EVENTS_HOURLY_ROLLUP_MV_SQL,
+    EVENTS_HOURLY_ROLLUP_TABLE_SQL,
+)
+
+operations = [
+    run_sql_with_exceptions(EVENTS_HOURLY_ROLLUP_TABLE_SQL()),
+    run_sql_with_exceptions(DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL()),
+    run_sql_with_exceptions(EVENTS_HOURLY_ROLLUP_MV_SQL()),
+]
@@ -0,0 +1,4 @@
+from posthog.clickhouse.client.migration_tools import run_sql_with_exceptions
+from posthog.models.funnel_slice_results.sql import FUNNEL_SLICE_RESULTS_TABLE_SQL
+
+operations = [run_sql_with_exceptions(FUNNEL_SLICE_RESULTS_TABLE_SQL())]
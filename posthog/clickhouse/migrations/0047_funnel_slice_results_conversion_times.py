@@ -0,0 +1,8 @@
+from posthog.clickhouse.client.migration_tools import run_sql_with_exceptions
+from posthog.models.funnel_slice_results.sql import DROP_FUNNEL_SLICE_RESULTS_TABLE_SQL, FUNNEL_SLICE_RESULTS_TABLE_SQL
+
+# Rows are only cached slices, which are looked up by a new cache key once conversion times are stored per attempt
+operations = [
+    run_sql_with_exceptions(DROP_FUNNEL_SLICE_RESULTS_TABLE_SQL()),
+    run_sql_with_exceptions(FUNNEL_SLICE_RESULTS_TABLE_SQL()),
+]
@@ -0,0 +1,4 @@
+from posthog.clickhouse.client.migration_tools import run_sql_with_exceptions
+from posthog.models.property_values.sql import ALTER_PROPERTY_VALUES_TTL_SQL
+
+operations = [run_sql_with_exceptions(ALTER_PROPERTY_VALUES_TTL_SQL())]
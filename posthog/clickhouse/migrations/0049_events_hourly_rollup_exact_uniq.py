@@ -0,0 +1,20 @@
+from posthog.clickhouse.client.migration_tools import run_sql_with_exceptions
+from posthog.models.events_hourly_rollup.sql import (
+    DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL,
+    DROP_DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL,
+    DROP_EVENTS_HOURLY_ROLLUP_MV_SQL,
+    DROP_EVENTS_HOURLY_ROLLUP_TABLE_SQL,
+    EVENTS_HOURLY_ROLLUP_MV_SQL,
+    EVENTS_HOURLY_ROLLUP_TABLE_SQL,
+)
+
+# uniq states can't be converted to uniqExact ones, so the rollup is created again. Teams reading it have to be
+# backfilled again, with the time of this migration as `--before`
+operations = [
+    run_sql_with_exceptions(DROP_EVENTS_HOURLY_ROLLUP_MV_SQL()),
+    run_sql_with_exceptions(DROP_DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL()),
+    run_sql_with_exceptions(DROP_EVENTS_HOURLY_ROLLUP_TABLE_SQL()),
+    run_sql_with_exceptions(EVENTS_HOURLY_ROLLUP_TABLE_SQL()),
+    run_sql_with_exceptions(DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL()),
+    run_sql_with_exceptions(EVENTS_HOURLY_ROLLUP_MV_SQL()),
+]
@@ -6,6 +6,12 @@ from posthog.clickhouse.plugin_log_entries import *
 from posthog.models.app_metrics.sql import *
 from posthog.models.cohort.sql import *
 from posthog.models.event.sql import *
+from posthog.models.events_hourly_rollup.sql import (
+    DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL,
+    EVENTS_HOURLY_ROLLUP_MV_SQL,
+    EVENTS_HOURLY_ROLLUP_TABLE_SQL,
+)
+from posthog.models.funnel_slice_results.sql import FUNNEL_SLICE_RESULTS_TABLE_SQL
 from posthog.models.group.sql import *
 from posthog.models.ingestion_warnings.sql import (
     DISTRIBUTED_INGESTION_WARNINGS_TABLE_SQL,
@@ -27,6 +33,7 @@ from posthog.models.person_overrides.sql import (
     PERSON_OVERRIDES_CREATE_MATERIALIZED_VIEW_SQL,
     PERSON_OVERRIDES_CREATE_TABLE_SQL,
 )
+from posthog.models.property_values.sql import DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL, PROPERTY_VALUES_TABLE_SQL
 from posthog.models.session_recording_event.sql import *
 from posthog.models.session_replay_event.sql import (
     KAFKA_SESSION_REPLAY_EVENTS_TABLE_SQL,
@@ -51,6 +58,9 @@ CREATE_MERGETREE_TABLE_QUERIES = (
     APP_METRICS_DATA_TABLE_SQL,
     PERFORMANCE_EVENTS_TABLE_SQL,
     SESSION_REPLAY_EVENTS_TABLE_SQL,
+    PROPERTY_VALUES_TABLE_SQL,
+    EVENTS_HOURLY_ROLLUP_TABLE_SQL,
+    FUNNEL_SLICE_RESULTS_TABLE_SQL,
 )
 CREATE_DISTRIBUTED_TABLE_QUERIES = (
     WRITABLE_EVENTS_TABLE_SQL,
@@ -62,6 +72,8 @@ CREATE_DISTRIBUTED_TABLE_QUERIES = (
     WRITABLE_PERFORMANCE_EVENTS_TABLE_SQL,
     DISTRIBUTED_PERFORMANCE_EVENTS_TABLE_SQL,
     DISTRIBUTED_SESSION_REPLAY_EVENTS_TABLE_SQL,
+    DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL,
+    DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL,
 )
 CREATE_KAFKA_TABLE_QUERIES = (
     KAFKA_DEAD_LETTER_QUEUE_TABLE_SQL,
@@ -92,6 +104,7 @@ CREATE_MV_TABLE_QUERIES = (
     APP_METRICS_MV_TABLE_SQL,
     PERFORMANCE_EVENTS_TABLE_MV_SQL,
     SESSION_REPLAY_EVENTS_TABLE_MV_SQL,
+    EVENTS_HOURLY_ROLLUP_MV_SQL,
 )
 
 CREATE_TABLE_QUERIES = (
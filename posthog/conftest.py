@@ -32,6 +32,8 @@ def reset_clickhouse_tables():
     from posthog.models.app_metrics.sql import TRUNCATE_APP_METRICS_TABLE_SQL
     from posthog.models.cohort.sql import TRUNCATE_COHORTPEOPLE_TABLE_SQL
     from posthog.models.event.sql import TRUNCATE_EVENTS_TABLE_SQL
+    from posthog.models.events_hourly_rollup.sql import TRUNCATE_EVENTS_HOURLY_ROLLUP_TABLE_SQL
+    from posthog.models.funnel_slice_results.sql import TRUNCATE_FUNNEL_SLICE_RESULTS_TABLE_SQL
     from posthog.models.group.sql import TRUNCATE_GROUPS_TABLE_SQL
     from posthog.models.performance.sql import TRUNCATE_PERFORMANCE_EVENTS_TABLE_SQL
     from posthog.models.person.sql import (
@@ -56,6 +58,8 @@ def reset_clickhouse_tables():
         TRUNCATE_GROUPS_TABLE_SQL,
         TRUNCATE_APP_METRICS_TABLE_SQL,
         TRUNCATE_PERFORMANCE_EVENTS_TABLE_SQL,
+        TRUNCATE_EVENTS_HOURLY_ROLLUP_TABLE_SQL(),
+        TRUNCATE_FUNNEL_SLICE_RESULTS_TABLE_SQL(),
     ]
 
     run_clickhouse_statement_in_parallel(TABLES_TO_CREATE_DROP)
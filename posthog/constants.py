@@ -165,6 +165,7 @@ FUNNEL_CORRELATION_PROPERTY_VALUES = "funnel_correlation_property_values"
 FUNNEL_CORRELATION_EVENT_NAMES = "funnel_correlation_event_names"
 FUNNEL_CORRELATION_EXCLUDE_EVENT_NAMES = "funnel_correlation_exclude_event_names"
 FUNNEL_CORRELATION_EVENT_EXCLUDE_PROPERTY_NAMES = "funnel_correlation_event_exclude_property_names"
+FUNNEL_CORRELATION_PROGRESSIVE = "funnel_correlation_progressive"
 FUNNEL_CORRELATION_PERSON_ENTITY = "funnel_correlation_person_entity"
 FUNNEL_CORRELATION_PERSON_LIMIT = "funnel_correlation_person_limit"
 FUNNEL_CORRELATION_PERSON_OFFSET = "funnel_correlation_person_offset"
@@ -192,6 +193,8 @@ AGGREGATION_GROUP_TYPE_INDEX = "aggregation_group_type_index"
 BREAKDOWN_HISTOGRAM_BIN_COUNT = "breakdown_histogram_bin_count"
 BREAKDOWN_NORMALIZE_URL = "breakdown_normalize_url"
 SAMPLING_FACTOR = "sampling_factor"
+# Value of `sampling_factor` which picks a factor from the volume of events the insight covers
+AUTO_SAMPLING = "auto"
 
 
 BREAKDOWN_TYPES = Literal["event", "person", "cohort", "group", "session", "hogql"]
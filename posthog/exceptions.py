@@ -38,6 +38,12 @@ class EstimatedQueryExecutionTimeTooLong(APIException):
     default_detail = "Estimated query execution time is too long"
 
 
+class QueryAdmissionRejected(APIException):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_detail = "Too many expensive queries are running for this project at the moment. Please try again shortly"
+    default_code = "query_admission_rejected"
+
+
 class ExceptionContext(TypedDict):
     request: HttpRequest
 
@@ -0,0 +1,49 @@
+import logging
+
+import structlog
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posthog.clickhouse.client.connection import Workload
+from posthog.client import sync_execute
+from posthog.models.events_hourly_rollup.sql import BACKFILL_EVENTS_HOURLY_ROLLUP_SQL
+
+logger = structlog.get_logger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class Command(BaseCommand):
+    help = "Backfill the hourly rollup of events of a team with events ingested before the rollup was created"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--team-id", default=None, type=int, help="Specify a team to backfill data for.")
+        parser.add_argument(
+            "--before",
+            default=None,
+            type=str,
+            help="Ingestion time the rollup materialized view was created at, e.g. '2023-06-01 12:00:00'. Events "
+            "ingested after it are already in the rollup.",
+        )
+        parser.add_argument("--live-run", action="store_true", help="Run changes, default is dry-run")
+
+    def handle(self, *args, **options):
+        run(options)
+
+
+def run(options):
+    if not options["team_id"] or not options["before"]:
+        logger.error("You must specify --team-id and --before to run this script")
+        exit(1)
+
+    params = {"team_id": options["team_id"], "before": options["before"]}
+
+    if not options["live_run"]:
+        logger.info("Dry run, would have run", query=BACKFILL_EVENTS_HOURLY_ROLLUP_SQL, params=params)
+        return
+
+    start_time = timezone.now()
+    sync_execute(
+        BACKFILL_EVENTS_HOURLY_ROLLUP_SQL, params, settings={"max_execution_time": 0}, workload=Workload.OFFLINE
+    )
+    logger.info("Backfilled events hourly rollup", team_id=options["team_id"], duration=timezone.now() - start_time)
+    logger.info("Add the team to TRENDS_ROLLUP_TEAM_IDS for its trends to read the rollup")
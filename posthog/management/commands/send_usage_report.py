@@ -18,6 +18,7 @@ class Command(BaseCommand):
         )
         parser.add_argument("--organization-id", type=str, help="Only send the report for this organization ID")
         parser.add_argument("--async", type=bool, help="Run the task asynchronously")
+        parser.add_argument("--run-id", type=str, help="Resume the run with this ID, e.g. the ID of a failed task")
 
     def handle(self, *args, **options):
         dry_run = options["dry_run"]
@@ -26,14 +27,25 @@ class Command(BaseCommand):
         skip_capture_event = options["skip_capture_event"]
         organization_id = options["organization_id"]
         run_async = options["async"]
+        run_id = options["run_id"]
 
         if run_async:
             results = send_all_org_usage_reports.delay(
-                dry_run, date, event_name, skip_capture_event=skip_capture_event, only_organization_id=organization_id
+                dry_run,
+                date,
+                event_name,
+                skip_capture_event=skip_capture_event,
+                only_organization_id=organization_id,
+                run_id=run_id,
             )
         else:
             results = send_all_org_usage_reports(
-                dry_run, date, event_name, skip_capture_event=skip_capture_event, only_organization_id=organization_id
+                dry_run,
+                date,
+                event_name,
+                skip_capture_event=skip_capture_event,
+                only_organization_id=organization_id,
+                run_id=run_id,
             )
             if options["print_reports"]:
                 print("")  # noqa T201
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.18 on 2023-06-05 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posthog", "0325_alter_dashboardtemplate_scope"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cohort",
+            name="calculation_watermark",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="cohort",
+            name="last_full_calculation",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2023-06-07 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posthog", "0326_cohort_calculation_watermark"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cohort",
+            name="calculation_duration_ms",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2023-06-08 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posthog", "0327_cohort_calculation_duration_ms"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportedasset",
+            name="exported_row_count",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
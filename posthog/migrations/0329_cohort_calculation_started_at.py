@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2023-06-14 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posthog", "0328_exportedasset_exported_row_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cohort",
+            name="calculation_started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
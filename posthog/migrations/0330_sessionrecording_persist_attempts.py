@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2023-06-15 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posthog", "0329_cohort_calculation_started_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sessionrecording",
+            name="persist_attempts",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -14,6 +14,7 @@ TABLES_TO_DELETE_TEAM_DATA_FROM = [
     "cohortpeople",
     "person_static_cohort",
     "plugin_log_entries",
+    "sharded_events_hourly_rollup",
 ]
 
 
@@ -1,5 +1,5 @@
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Literal, Optional, cast
 
 import structlog
@@ -30,6 +30,13 @@ ON CONFLICT DO NOTHING
 """
 
 
+# Persons changed shortly before the watermark are re-evaluated too, to account for ingestion lag
+INCREMENTAL_CALCULATION_WATERMARK_OVERLAP = timedelta(minutes=15)
+
+# Weight of the latest calculation in the moving average of calculation durations
+CALCULATION_DURATION_SMOOTHING = 0.3
+
+
 class Group:
     def __init__(
         self,
@@ -87,6 +94,13 @@ class Cohort(models.Model):
     is_calculating: models.BooleanField = models.BooleanField(default=False)
     last_calculation: models.DateTimeField = models.DateTimeField(blank=True, null=True)
     errors_calculating: models.IntegerField = models.IntegerField(default=0)
+    # Start of the last successful calculation, persons changed after it are re-evaluated by incremental calculations
+    calculation_watermark: models.DateTimeField = models.DateTimeField(blank=True, null=True)
+    last_full_calculation: models.DateTimeField = models.DateTimeField(blank=True, null=True)
+    # Moving average of how long calculations of this cohort take, used to schedule calculations by cost
+    calculation_duration_ms: models.IntegerField = models.IntegerField(blank=True, null=True)
+    # When the calculation in flight was scheduled, to tell lost calculations apart from slow ones
+    calculation_started_at: models.DateTimeField = models.DateTimeField(blank=True, null=True)
 
     is_static: models.BooleanField = models.BooleanField(default=False)
 
@@ -196,26 +210,59 @@ class Cohort(models.Model):
 
         logger.info("cohort_calculation_started", id=self.pk, current_version=self.version, new_version=pending_version)
         start_time = time.monotonic()
+        calculation_started_at = timezone.now()
 
         try:
             count = recalculate_cohortpeople(self, pending_version)
-            self.count = count
+        except Exception:
+            self._calculation_failed(pending_version)
+            raise
 
-            self.last_calculation = timezone.now()
-            self.errors_calculating = 0
+        self._calculation_succeeded(pending_version, count, calculation_started_at, time.monotonic() - start_time)
+
+    @staticmethod
+    def calculate_people_ch_batch(pending_versions: Dict["Cohort", int]) -> None:
+        """
+        Calculates cohorts of one team with a single shared scan, see `recalculate_cohortpeople_batch`.
+        Cohorts the shared scan doesn't support are calculated one by one afterwards.
+        """
+        from posthog.models.cohort.util import recalculate_cohortpeople_batch
+
+        logger.info("cohort_batch_calculation_started", ids=[cohort.pk for cohort in pending_versions])
+        start_time = time.monotonic()
+        calculation_started_at = timezone.now()
+
+        try:
+            counts = recalculate_cohortpeople_batch(pending_versions)
         except Exception:
-            self.errors_calculating = F("errors_calculating") + 1
-            logger.warning(
-                "cohort_calculation_failed",
-                id=self.pk,
-                current_version=self.version,
-                new_version=pending_version,
-                exc_info=True,
-            )
+            for cohort, pending_version in pending_versions.items():
+                cohort._calculation_failed(pending_version)
             raise
-        finally:
-            self.is_calculating = False
-            self.save()
+
+        # The cost of the shared scan is split between the cohorts it calculated
+        duration = (time.monotonic() - start_time) / max(len(counts), 1)
+        for cohort, pending_version in pending_versions.items():
+            if cohort.pk in counts:
+                cohort._calculation_succeeded(pending_version, counts[cohort.pk], calculation_started_at, duration)
+                continue
+
+            try:
+                cohort.calculate_people_ch(pending_version)
+            except Exception as err:
+                # Already recorded on the cohort, don't let it fail the rest of the batch
+                capture_exception(err)
+
+    def _calculation_succeeded(
+        self, pending_version: int, count: Optional[int], calculation_started_at: datetime, duration_seconds: float
+    ) -> None:
+        self.count = count
+        self.last_calculation = timezone.now()
+        self.calculation_watermark = calculation_started_at
+        self.last_full_calculation = calculation_started_at
+        self.errors_calculating = 0
+        self._record_calculation_duration(duration_seconds)
+        self.is_calculating = False
+        self.save()
 
         # Update filter to match pending version if still valid
         Cohort.objects.filter(pk=self.pk).filter(Q(version__lt=pending_version) | Q(version__isnull=True)).update(
@@ -227,8 +274,72 @@ class Cohort(models.Model):
             "cohort_calculation_completed",
             id=self.pk,
             version=pending_version,
+            duration=duration_seconds,
+        )
+
+    def _calculation_failed(self, pending_version: int) -> None:
+        self.errors_calculating = F("errors_calculating") + 1
+        self.is_calculating = False
+        self.save()
+        logger.warning(
+            "cohort_calculation_failed",
+            id=self.pk,
+            current_version=self.version,
+            new_version=pending_version,
+            exc_info=True,
+        )
+
+    def calculate_people_ch_incremental(self) -> bool:
+        """
+        Applies the changes since the last calculation to the current version of the cohort.
+        Returns False if the cohort can't be calculated incrementally, in which case nothing is written.
+        """
+        from posthog.models.cohort.util import incrementally_recalculate_cohortpeople
+
+        if not self.calculation_watermark:
+            return False
+
+        logger.info("cohort_incremental_calculation_started", id=self.pk, version=self.version)
+        start_time = time.monotonic()
+        calculation_started_at = timezone.now()
+
+        try:
+            count = incrementally_recalculate_cohortpeople(
+                self, self.calculation_watermark - INCREMENTAL_CALCULATION_WATERMARK_OVERLAP
+            )
+            if count is None:
+                return False
+
+            self.count = count
+            self.last_calculation = timezone.now()
+            self.calculation_watermark = calculation_started_at
+            self.errors_calculating = 0
+            self._record_calculation_duration(time.monotonic() - start_time)
+        except Exception:
+            self.errors_calculating = F("errors_calculating") + 1
+            logger.warning("cohort_incremental_calculation_failed", id=self.pk, version=self.version, exc_info=True)
+            raise
+        finally:
+            self.is_calculating = False
+            self.save()
+
+        logger.info(
+            "cohort_incremental_calculation_completed",
+            id=self.pk,
+            version=self.version,
             duration=(time.monotonic() - start_time),
         )
+        return True
+
+    def _record_calculation_duration(self, duration_seconds: float) -> None:
+        duration_ms = int(duration_seconds * 1000)
+        if self.calculation_duration_ms is None:
+            self.calculation_duration_ms = duration_ms
+        else:
+            self.calculation_duration_ms = int(
+                CALCULATION_DURATION_SMOOTHING * duration_ms
+                + (1 - CALCULATION_DURATION_SMOOTHING) * self.calculation_duration_ms
+            )
 
     def insert_users_by_list(self, items: List[str]) -> None:
         """
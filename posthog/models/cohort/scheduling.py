@@ -0,0 +1,278 @@
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import structlog
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from prometheus_client import Gauge
+
+from posthog.caching.insight_caching_state import GENERALLY_VIEWED_THRESHOLD
+from posthog.metrics import LABEL_TEAM_ID, pushed_metrics_registry
+from posthog.models.cohort.cohort import Cohort
+from posthog.models.feature_flag import FeatureFlag
+from posthog.models.insight import Insight, InsightViewed
+
+logger = structlog.get_logger(__name__)
+
+# How many due cohorts are considered per scheduling run
+MAX_CANDIDATES = 1000
+# Cohorts without a measured calculation duration are assumed to be this expensive
+DEFAULT_CALCULATION_COST_SECONDS = 30.0
+# Floor for the cost of a cohort so that very cheap cohorts don't get infinite priority
+MIN_CALCULATION_COST_SECONDS = 1.0
+# Calculations scheduled longer ago than this are considered lost, e.g. to a killed worker, so their cohorts are
+# scheduled again and don't count as in flight. Two calculation intervals, well above how long cohort queries run
+STUCK_CALCULATION_THRESHOLD = timedelta(minutes=30)
+
+FLAG_USAGE_WEIGHT = 10.0
+INSIGHT_USAGE_WEIGHT = 3.0
+UNUSED_WEIGHT = 1.0
+
+
+@dataclass
+class CohortCalculationCandidate:
+    cohort: Cohort
+    staleness_seconds: float
+    estimated_cost_seconds: float
+    usage_weight: float = UNUSED_WEIGHT
+    # Ids of the cohorts this cohort's filters reference
+    dependencies: Set[int] = field(default_factory=set)
+
+    @property
+    def score(self) -> float:
+        """Higher is calculated sooner: stale, cheap and used cohorts first, unused ones catch up as they grow stale."""
+        return (
+            self.usage_weight * self.staleness_seconds / max(self.estimated_cost_seconds, MIN_CALCULATION_COST_SECONDS)
+        )
+
+
+def get_cohorts_to_calculate(limit: int, max_age: timedelta) -> List[Cohort]:
+    """
+    Picks which cohorts to calculate next:
+    - cohorts used by active feature flags or recently viewed insights are prioritized, as are their dependencies
+    - cohorts whose dependencies are calculating, or still due, are left for a later run, so that they are calculated
+      from up to date dependencies
+    - the estimated ClickHouse time of calculations in flight per team is capped
+    """
+    now = timezone.now()
+    due_cohorts = list(
+        Cohort.objects.filter(
+            # Calculations that never finished are retried
+            Q(is_calculating=False)
+            | Q(calculation_started_at__isnull=True)
+            | Q(calculation_started_at__lt=now - STUCK_CALCULATION_THRESHOLD),
+            deleted=False,
+            last_calculation__lte=now - max_age,
+            errors_calculating__lte=20,
+        )
+        .exclude(is_static=True)
+        .order_by(F("last_calculation").asc(nulls_first=True))[:MAX_CANDIDATES]
+    )
+    if not due_cohorts:
+        return []
+
+    candidates = {
+        cohort.pk: CohortCalculationCandidate(
+            cohort=cohort,
+            staleness_seconds=(now - cohort.last_calculation).total_seconds(),
+            estimated_cost_seconds=_estimated_cost(cohort.calculation_duration_ms),
+            dependencies={int(prop.value) for prop in cohort.properties.flat if prop.type == "cohort" and prop.value},
+        )
+        for cohort in due_cohorts
+    }
+    team_ids = {cohort.team_id for cohort in due_cohorts}
+
+    _add_usage_weights(candidates, team_ids)
+
+    report_cohort_staleness(candidates.values())
+
+    in_flight_cohort_ids, in_flight_cost_by_team = get_in_flight_calculations(team_ids, now)
+    scheduled: List[Cohort] = []
+    # Visited in dependency order, so any dependency that is due comes before the cohorts depending on it
+    not_calculated_ids = set(in_flight_cohort_ids)
+    for candidate in order_candidates(candidates):
+        if len(scheduled) >= limit:
+            break
+
+        not_calculated_ids.add(candidate.cohort.pk)
+        waiting_on = candidate.dependencies & not_calculated_ids
+        if waiting_on:
+            logger.info(
+                "cohort_calculation_waiting_on_dependencies",
+                cohort_id=candidate.cohort.pk,
+                team_id=candidate.cohort.team_id,
+                dependency_ids=sorted(waiting_on),
+            )
+            continue
+
+        team_id = candidate.cohort.team_id
+        in_flight_cost = in_flight_cost_by_team.get(team_id, 0.0)
+        # Always allow one calculation per team, otherwise a single expensive cohort could never run
+        if (
+            in_flight_cost > 0
+            and in_flight_cost + candidate.estimated_cost_seconds > settings.COHORT_CALCULATION_MAX_TEAM_COST_SECONDS
+        ):
+            logger.info(
+                "cohort_calculation_deferred",
+                cohort_id=candidate.cohort.pk,
+                team_id=team_id,
+                in_flight_cost=in_flight_cost,
+                estimated_cost=candidate.estimated_cost_seconds,
+            )
+            continue
+
+        in_flight_cost_by_team[team_id] = in_flight_cost + candidate.estimated_cost_seconds
+        scheduled.append(candidate.cohort)
+
+    return scheduled
+
+
+def order_candidates(candidates: Dict[int, CohortCalculationCandidate]) -> List[CohortCalculationCandidate]:
+    """
+    Topologically orders candidates so that dependencies come before the cohorts referencing them,
+    and otherwise by descending score. Dependency cycles (which the API prevents) are broken by score.
+    """
+    dependents: Dict[int, Set[int]] = {cohort_id: set() for cohort_id in candidates}
+    remaining_dependencies: Dict[int, int] = {}
+    for cohort_id, candidate in candidates.items():
+        due_dependencies = {dependency for dependency in candidate.dependencies if dependency in candidates}
+        remaining_dependencies[cohort_id] = len(due_dependencies)
+        for dependency in due_dependencies:
+            dependents[dependency].add(cohort_id)
+
+    ready = [
+        (-candidate.score, cohort_id)
+        for cohort_id, candidate in candidates.items()
+        if not remaining_dependencies[cohort_id]
+    ]
+    heapq.heapify(ready)
+
+    ordered: List[CohortCalculationCandidate] = []
+    visited: Set[int] = set()
+    while len(ordered) < len(candidates):
+        if not ready:
+            # Only cycles are left, release the highest scoring cohort of them
+            cohort_id = max(
+                (cohort_id for cohort_id in candidates if cohort_id not in visited),
+                key=lambda cohort_id: candidates[cohort_id].score,
+            )
+            heapq.heappush(ready, (-candidates[cohort_id].score, cohort_id))
+
+        _, cohort_id = heapq.heappop(ready)
+        if cohort_id in visited:
+            continue
+        visited.add(cohort_id)
+        ordered.append(candidates[cohort_id])
+
+        for dependent in dependents[cohort_id]:
+            remaining_dependencies[dependent] -= 1
+            if remaining_dependencies[dependent] == 0 and dependent not in visited:
+                heapq.heappush(ready, (-candidates[dependent].score, dependent))
+
+    return ordered
+
+
+def get_in_flight_calculations(team_ids: Iterable[int], now: datetime) -> Tuple[Set[int], Dict[int, float]]:
+    """Returns the ids of the cohorts being calculated, and the estimated cost of these calculations per team."""
+    in_flight_cohort_ids: Set[int] = set()
+    in_flight_cost_by_team: Dict[int, float] = {}
+    in_flight = Cohort.objects.filter(
+        team_id__in=team_ids,
+        calculation_started_at__gte=now - STUCK_CALCULATION_THRESHOLD,
+        is_calculating=True,
+        deleted=False,
+        is_static=False,
+    ).values_list("pk", "team_id", "calculation_duration_ms")
+
+    for cohort_id, team_id, calculation_duration_ms in in_flight:
+        in_flight_cohort_ids.add(cohort_id)
+        in_flight_cost_by_team[team_id] = in_flight_cost_by_team.get(team_id, 0.0) + _estimated_cost(
+            calculation_duration_ms
+        )
+    return in_flight_cohort_ids, in_flight_cost_by_team
+
+
+def report_cohort_staleness(candidates: Iterable[CohortCalculationCandidate]) -> None:
+    # Reported per team rather than per cohort, to keep the number of series bounded
+    max_staleness: Dict[Tuple[int, str], float] = {}
+    for candidate in candidates:
+        key = (candidate.cohort.team_id, _usage_label(candidate.usage_weight))
+        max_staleness[key] = max(max_staleness.get(key, 0.0), candidate.staleness_seconds)
+
+    with pushed_metrics_registry("celery_cohort_calculation_staleness") as registry:
+        staleness_gauge = Gauge(
+            "posthog_celery_cohort_staleness_seconds",
+            "Seconds since the stalest cohort due for calculation of the team was last calculated.",
+            labelnames=[LABEL_TEAM_ID, "used_by"],
+            registry=registry,
+        )
+        for (team_id, used_by), staleness_seconds in max_staleness.items():
+            staleness_gauge.labels(team_id=team_id, used_by=used_by).set(staleness_seconds)
+
+
+def _estimated_cost(calculation_duration_ms: Optional[int]) -> float:
+    if calculation_duration_ms is None:
+        return DEFAULT_CALCULATION_COST_SECONDS
+    return max(calculation_duration_ms / 1000, MIN_CALCULATION_COST_SECONDS)
+
+
+def _add_usage_weights(candidates: Dict[int, CohortCalculationCandidate], team_ids: Set[int]) -> None:
+    flag_cohort_ids: Set[int] = set()
+    for filters in FeatureFlag.objects.filter(team_id__in=team_ids, active=True, deleted=False).values_list(
+        "filters", flat=True
+    ):
+        flag_cohort_ids |= _referenced_cohort_ids(filters)
+
+    insight_cohort_ids: Set[int] = set()
+    recently_viewed_insight_ids = InsightViewed.objects.filter(
+        team_id__in=team_ids, last_viewed_at__gte=timezone.now() - GENERALLY_VIEWED_THRESHOLD
+    ).values("insight_id")
+    for filters in Insight.objects.filter(id__in=recently_viewed_insight_ids, deleted=False).values_list(
+        "filters", flat=True
+    ):
+        insight_cohort_ids |= _referenced_cohort_ids(filters)
+
+    for cohort_id, candidate in candidates.items():
+        if cohort_id in flag_cohort_ids:
+            candidate.usage_weight = FLAG_USAGE_WEIGHT
+        elif cohort_id in insight_cohort_ids:
+            candidate.usage_weight = INSIGHT_USAGE_WEIGHT
+
+    # Cohorts needed by used cohorts are as important as the cohorts using them
+    changed = True
+    while changed:
+        changed = False
+        for candidate in candidates.values():
+            for dependency in candidate.dependencies:
+                dependency_candidate = candidates.get(dependency)
+                if dependency_candidate and dependency_candidate.usage_weight < candidate.usage_weight:
+                    dependency_candidate.usage_weight = candidate.usage_weight
+                    changed = True
+
+
+def _referenced_cohort_ids(filters: Any) -> Set[int]:
+    """Walks flag or insight filters of any shape and collects the ids of cohort property filters."""
+    cohort_ids: Set[int] = set()
+    if isinstance(filters, dict):
+        if filters.get("type") in ("cohort", "precalculated-cohort") and filters.get("value") is not None:
+            try:
+                cohort_ids.add(int(filters["value"]))
+            except (TypeError, ValueError):
+                pass
+        for value in filters.values():
+            cohort_ids |= _referenced_cohort_ids(value)
+    elif isinstance(filters, list):
+        for value in filters:
+            cohort_ids |= _referenced_cohort_ids(value)
+    return cohort_ids
+
+
+def _usage_label(usage_weight: float) -> str:
+    if usage_weight >= FLAG_USAGE_WEIGHT:
+        return "feature_flag"
+    if usage_weight >= INSIGHT_USAGE_WEIGHT:
+        return "insight"
+    return "none"
@@ -30,6 +30,19 @@ FROM cohortpeople
 WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = %(version)s
 """
 
+# NOTE: Incremental recalculations write removals as sign = -1 rows within the same version, so membership of such a
+# version is determined by sum(sign) > 0 rather than by the presence of a row. See `has_incremental_cohortpeople`.
+GET_INCREMENTAL_COHORT_SIZE_SQL = """
+SELECT count()
+FROM (
+    SELECT person_id
+    FROM cohortpeople
+    WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = %(version)s
+    GROUP BY person_id
+    HAVING sum(sign) > 0
+)
+"""
+
 # Continually ensure that all previous version rows are deleted and insert persons that match the criteria
 RECALCULATE_COHORT_BY_ID = """
 INSERT INTO cohortpeople
@@ -43,6 +56,64 @@ FROM cohortpeople
 WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version < %(new_version)s AND sign = 1
 """
 
+# Same as RECALCULATE_COHORT_BY_ID for several cohorts of a team evaluated by one query, which returns a boolean
+# column per cohort. Matched cohorts are passed as (cohort_id, new_version, matched) tuples.
+RECALCULATE_COHORTS_BY_IDS = """
+INSERT INTO cohortpeople
+SELECT id, matched_cohort.1 AS cohort_id, %(team_id)s AS team_id, 1 AS sign, matched_cohort.2 AS version
+FROM (
+    {cohorts_filter}
+) as person
+ARRAY JOIN arrayFilter(cohort -> cohort.3 = 1, [{cohort_columns}]) AS matched_cohort
+UNION ALL
+SELECT person_id, cohort_id, team_id, -1, version
+FROM cohortpeople
+WHERE team_id = %(team_id)s AND cohort_id IN %(cohort_ids)s
+AND version < transform(cohort_id, %(cohort_ids)s, %(new_versions)s, toUInt64(0)) AND sign = 1
+"""
+
+# Persons whose properties or distinct ids changed since the watermark, plus persons with relevant events.
+# Relevant events are either newly ingested or are dropping out of a behavioral filter's time window.
+GET_CHANGED_PERSON_IDS_SINCE_WATERMARK = """
+SELECT id FROM person WHERE team_id = %(team_id)s AND _timestamp > %(watermark)s
+UNION ALL
+SELECT person_id FROM person_distinct_id2 WHERE team_id = %(team_id)s AND _timestamp > %(watermark)s
+{events_query}
+"""
+
+GET_CHANGED_PERSON_IDS_BY_EVENTS = """
+UNION ALL
+SELECT person_id FROM ({GET_TEAM_PERSON_DISTINCT_IDS}) WHERE distinct_id IN (
+    SELECT distinct_id FROM events
+    WHERE team_id = %(team_id)s AND event IN %(changed_event_names)s
+    AND (_timestamp > %(watermark)s {expiring_conditions})
+)
+"""
+
+# Writes only the difference between the cohort filter and the current version for the changed persons:
+# newly matching persons get a sign = 1 row, persons no longer matching get a sign = -1 row within the same version.
+# The cohort filter must already be restricted to the changed persons, see `format_person_query`.
+INCREMENTAL_RECALCULATE_COHORT_BY_ID = """
+INSERT INTO cohortpeople
+SELECT
+    if(matched.id = '00000000-0000-0000-0000-000000000000', current.person_id, matched.id) AS person_id,
+    %(cohort_id)s AS cohort_id,
+    %(team_id)s AS team_id,
+    if(matched.id = '00000000-0000-0000-0000-000000000000', -1, 1) AS sign,
+    %(version)s AS version
+FROM (
+    SELECT id FROM ({cohort_filter})
+) AS matched
+FULL OUTER JOIN (
+    SELECT person_id FROM cohortpeople
+    WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = %(version)s
+    AND person_id IN ({changed_persons})
+    GROUP BY person_id
+    HAVING sum(sign) > 0
+) AS current ON matched.id = current.person_id
+WHERE matched.id = '00000000-0000-0000-0000-000000000000' OR current.person_id = '00000000-0000-0000-0000-000000000000'
+"""
+
 # NOTE: Group by version id to ensure that signs are summed between corresponding rows.
 # Version filtering is not necessary as only positive rows of the latest version will be selected by sum(sign) > 0
 
@@ -50,6 +121,10 @@ GET_PERSON_ID_BY_PRECALCULATED_COHORT_ID = """
 SELECT DISTINCT person_id FROM cohortpeople WHERE team_id = %(team_id)s AND cohort_id = %({prepend}_cohort_id_{index})s AND version = %({prepend}_version_{index})s
 """
 
+GET_PERSON_ID_BY_INCREMENTAL_PRECALCULATED_COHORT_ID = """
+SELECT person_id FROM cohortpeople WHERE team_id = %(team_id)s AND cohort_id = %({prepend}_cohort_id_{index})s AND version = %({prepend}_version_{index})s GROUP BY person_id HAVING sum(sign) > 0
+"""
+
 GET_COHORTS_BY_PERSON_UUID = """
 SELECT DISTINCT cohort_id
 FROM cohortpeople
@@ -71,6 +146,15 @@ WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = %(versio
 ORDER BY person_id
 """
 
+GET_INCREMENTAL_COHORTPEOPLE_BY_COHORT_ID = """
+SELECT person_id
+FROM cohortpeople
+WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = %(version)s
+GROUP BY person_id
+HAVING sum(sign) > 0
+ORDER BY person_id
+"""
+
 GET_STATIC_COHORTPEOPLE_BY_COHORT_ID = f"""
 SELECT person_id
 FROM {PERSON_STATIC_COHORT_TABLE}
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.utils import timezone
+
+from posthog.models.cohort import Cohort
+from posthog.models.cohort.scheduling import get_cohorts_to_calculate
+from posthog.models.feature_flag import FeatureFlag
+from posthog.models.team import Team
+from posthog.tasks.calculate_cohort import calculate_cohort_ch, mark_calculations_in_flight
+from posthog.test.base import BaseTest
+
+MAX_AGE = timedelta(minutes=15)
+
+
+class TestCohortScheduling(BaseTest):
+    def _create_cohort(self, name, minutes_since_calculation, properties=None, team=None, **kwargs):
+        return Cohort.objects.create(
+            team=team or self.team,
+            name=name,
+            groups=[{"properties": properties or [{"key": "$some_prop", "value": "something", "type": "person"}]}],
+            last_calculation=timezone.now() - timedelta(minutes=minutes_since_calculation),
+            **kwargs,
+        )
+
+    def test_only_due_cohorts_are_scheduled(self):
+        due = self._create_cohort("due", 20)
+        self._create_cohort("fresh", 5)
+        self._create_cohort(
+            "calculating", 20, is_calculating=True, calculation_started_at=timezone.now() - timedelta(minutes=5)
+        )
+        stuck = self._create_cohort(
+            "stuck", 60, is_calculating=True, calculation_started_at=timezone.now() - timedelta(minutes=45)
+        )
+
+        self.assertEqual(set(get_cohorts_to_calculate(limit=10, max_age=MAX_AGE)), {due, stuck})
+
+    def test_cheaper_and_staler_cohorts_are_scheduled_first(self):
+        expensive = self._create_cohort("expensive", 30, calculation_duration_ms=600_000)
+        cheap = self._create_cohort("cheap", 30, calculation_duration_ms=1_000)
+        staler = self._create_cohort("staler", 60, calculation_duration_ms=1_000)
+
+        self.assertEqual(get_cohorts_to_calculate(limit=10, max_age=MAX_AGE), [staler, cheap, expensive])
+
+    def test_cohorts_used_by_active_flags_are_prioritized_with_their_dependencies(self):
+        unused = self._create_cohort("unused", 60, calculation_duration_ms=60_000)
+        dependency = self._create_cohort("dependency", 20, calculation_duration_ms=60_000)
+        flag_cohort = self._create_cohort(
+            "flag cohort",
+            20,
+            properties=[{"key": "id", "value": dependency.pk, "type": "cohort"}],
+            calculation_duration_ms=60_000,
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="flag",
+            created_by=self.user,
+            filters={"groups": [{"properties": [{"key": "id", "type": "cohort", "value": flag_cohort.pk}]}]},
+        )
+
+        # The flag cohort itself waits for its dependency to be calculated
+        self.assertEqual(get_cohorts_to_calculate(limit=10, max_age=MAX_AGE), [dependency, unused])
+
+    def test_cohorts_wait_for_their_dependencies_to_be_calculated(self):
+        dependency = self._create_cohort("dependency", 20)
+        dependent = self._create_cohort(
+            "dependent", 20, properties=[{"key": "id", "value": dependency.pk, "type": "cohort"}]
+        )
+
+        self.assertEqual(get_cohorts_to_calculate(limit=10, max_age=MAX_AGE), [dependency])
+
+        mark_calculations_in_flight([dependency.pk])
+        self.assertEqual(get_cohorts_to_calculate(limit=10, max_age=MAX_AGE), [])
+
+        Cohort.objects.filter(pk=dependency.pk).update(is_calculating=False, last_calculation=timezone.now())
+        self.assertEqual(get_cohorts_to_calculate(limit=10, max_age=MAX_AGE), [dependent])
+
+    @patch("posthog.models.cohort.scheduling.settings.COHORT_CALCULATION_MAX_TEAM_COST_SECONDS", 100)
+    def test_in_flight_cost_is_capped_per_team(self):
+        other_team = Team.objects.create(organization=self.organization)
+        self._create_cohort(
+            "in flight",
+            10,
+            is_calculating=True,
+            calculation_started_at=timezone.now(),
+            calculation_duration_ms=90_000,
+        )
+        too_expensive = self._create_cohort("too expensive", 30, calculation_duration_ms=20_000)
+        cheap = self._create_cohort("cheap", 30, calculation_duration_ms=5_000)
+        other_team_cohort = self._create_cohort("other team", 30, team=other_team, calculation_duration_ms=200_000)
+
+        scheduled = get_cohorts_to_calculate(limit=10, max_age=MAX_AGE)
+
+        self.assertIn(cheap, scheduled)
+        self.assertIn(other_team_cohort, scheduled)
+        self.assertNotIn(too_expensive, scheduled)
+
+    @patch("posthog.models.cohort.Cohort.calculate_people_ch", side_effect=Exception("killed"))
+    def test_failed_calculations_are_not_left_in_flight(self, _calculate_people_ch):
+        cohort = self._create_cohort("failing", 20)
+
+        mark_calculations_in_flight([cohort.pk])
+        cohort.refresh_from_db()
+        self.assertTrue(cohort.is_calculating)
+
+        with self.assertRaises(Exception):
+            calculate_cohort_ch(cohort.pk, 1)
+
+        cohort.refresh_from_db()
+        self.assertFalse(cohort.is_calculating)
+        self.assertEqual(get_cohorts_to_calculate(limit=10, max_age=MAX_AGE), [cohort])
@@ -17,12 +17,18 @@ from posthog.models.async_deletion import AsyncDeletion, DeletionType
 from posthog.models.cohort.cohort import Cohort
 from posthog.models.cohort.sql import (
     CALCULATE_COHORT_PEOPLE_SQL,
+    GET_CHANGED_PERSON_IDS_BY_EVENTS,
+    GET_CHANGED_PERSON_IDS_SINCE_WATERMARK,
     GET_COHORT_SIZE_SQL,
     GET_COHORTS_BY_PERSON_UUID,
+    GET_INCREMENTAL_COHORT_SIZE_SQL,
+    GET_PERSON_ID_BY_INCREMENTAL_PRECALCULATED_COHORT_ID,
     GET_PERSON_ID_BY_PRECALCULATED_COHORT_ID,
     GET_STATIC_COHORT_SIZE_SQL,
     GET_STATIC_COHORTPEOPLE_BY_PERSON_UUID,
+    INCREMENTAL_RECALCULATE_COHORT_BY_ID,
     RECALCULATE_COHORT_BY_ID,
+    RECALCULATE_COHORTS_BY_IDS,
     STALE_COHORTPEOPLE,
 )
 from posthog.models.person.sql import (
@@ -31,7 +37,7 @@ from posthog.models.person.sql import (
     INSERT_PERSON_STATIC_COHORT,
     PERSON_STATIC_COHORT_TABLE,
 )
-from posthog.models.property import Property, PropertyGroup
+from posthog.models.property import BehavioralPropertyType, Property, PropertyGroup
 from posthog.queries.insight import insight_sync_execute
 from posthog.queries.person_distinct_id_query import get_team_distinct_ids_query
 
@@ -41,7 +47,9 @@ TEMP_PRECALCULATED_MARKER = parser.parse("2021-06-07T15:00:00+00:00")
 logger = structlog.get_logger(__name__)
 
 
-def format_person_query(cohort: Cohort, index: int, hogql_context: HogQLContext) -> Tuple[str, Dict[str, Any]]:
+def format_person_query(
+    cohort: Cohort, index: int, hogql_context: HogQLContext, person_ids_query: Optional[str] = None
+) -> Tuple[str, Dict[str, Any]]:
     if cohort.is_static:
         return format_static_cohort_query(cohort, index, prepend="")
 
@@ -55,6 +63,7 @@ def format_person_query(cohort: Cohort, index: int, hogql_context: HogQLContext)
         Filter(data={"properties": cohort.properties}, team=cohort.team, hogql_context=hogql_context),
         cohort.team,
         cohort_pk=cohort.pk,
+        person_ids_query=person_ids_query,
     )
 
     query, params = query_builder.get_query()
@@ -70,8 +79,22 @@ def format_static_cohort_query(cohort: Cohort, index: int, prepend: str) -> Tupl
     )
 
 
+def has_incremental_cohortpeople(cohort: Cohort) -> bool:
+    """
+    Whether the current version of the cohort may contain sign = -1 rows written by an incremental recalculation,
+    in which case reads have to collapse the rows by sign instead of taking every person in the version.
+    """
+    return settings.COHORT_INCREMENTAL_CALCULATION_ENABLED or (
+        cohort.calculation_watermark is not None and cohort.calculation_watermark != cohort.last_full_calculation
+    )
+
+
 def format_precalculated_cohort_query(cohort: Cohort, index: int, prepend: str = "") -> Tuple[str, Dict[str, Any]]:
-    filter_query = GET_PERSON_ID_BY_PRECALCULATED_COHORT_ID.format(index=index, prepend=prepend)
+    filter_query = (
+        GET_PERSON_ID_BY_INCREMENTAL_PRECALCULATED_COHORT_ID
+        if has_incremental_cohortpeople(cohort)
+        else GET_PERSON_ID_BY_PRECALCULATED_COHORT_ID
+    ).format(index=index, prepend=prepend)
     return (filter_query, {f"{prepend}_cohort_id_{index}": cohort.pk, f"{prepend}_version_{index}": cohort.version})
 
 
@@ -286,6 +309,184 @@ def recalculate_cohortpeople(cohort: Cohort, pending_version: int) -> Optional[i
     return count
 
 
+def recalculate_cohortpeople_batch(pending_versions: Dict[Cohort, int]) -> Dict[int, Optional[int]]:
+    """
+    Calculates several cohorts of one team with a single scan over its events and persons, and writes the new
+    versions of all of them with one insert. Returns the new sizes by cohort id, cohorts the shared scan doesn't
+    support are left out and need to be calculated with `recalculate_cohortpeople`.
+    """
+    if not pending_versions or not settings.EE_AVAILABLE:
+        return {}
+
+    from ee.clickhouse.queries.multi_cohort_query import MultiCohortQuery
+
+    team = next(iter(pending_versions)).team
+    hogql_context = HogQLContext(within_non_hogql_query=True, team_id=team.pk)
+    query_builder = MultiCohortQuery(list(pending_versions), team, hogql_context)
+    if not query_builder.cohorts:
+        return {}
+
+    cohorts_query, cohorts_params = query_builder.get_query()
+    cohort_ids = [cohort.pk for cohort in query_builder.cohorts]
+    new_versions = [pending_versions[cohort] for cohort in query_builder.cohorts]
+    cohort_columns = ", ".join(
+        f"tuple(toInt64({cohort.pk}), toUInt64({pending_versions[cohort]}), {query_builder.column_name(cohort)})"
+        for cohort in query_builder.cohorts
+    )
+
+    logger.info("Recalculating cohortpeople batch starting", team_id=team.pk, cohort_ids=cohort_ids)
+
+    sync_execute(
+        RECALCULATE_COHORTS_BY_IDS.format(cohorts_filter=cohorts_query, cohort_columns=cohort_columns),
+        {
+            **cohorts_params,
+            **hogql_context.values,
+            "team_id": team.pk,
+            "cohort_ids": cohort_ids,
+            "new_versions": new_versions,
+        },
+        settings={"optimize_on_insert": 0},
+    )
+
+    counts = {
+        cohort.pk: get_cohort_size(cohort, override_version=pending_versions[cohort])
+        for cohort in query_builder.cohorts
+    }
+
+    logger.info("Recalculating cohortpeople batch done", team_id=team.pk, sizes=counts)
+
+    return counts
+
+
+def get_incremental_recalculation_events(cohort: Cohort) -> Optional[Tuple[List[str], List[Tuple[int, str]]]]:
+    """
+    Returns the event names and the distinct time windows the cohort depends on,
+    or None if the cohort can't be recalculated incrementally.
+
+    Only cohorts made of person properties and `performed_event`/`performed_event_multiple` filters (including those
+    of nested cohorts) are supported, as for them membership can only change when a person, their distinct ids or
+    their events in the time window change.
+    """
+    from posthog.queries.foss_cohort_query import (
+        FOSSCohortQuery,
+        parse_and_validate_positive_integer,
+        validate_interval,
+    )
+
+    if cohort.is_static or not cohort.properties.values:
+        return None
+
+    unwrapped_filter = FOSSCohortQuery.unwrap_cohort(
+        Filter(data={"properties": cohort.properties}, team=cohort.team), cohort.team_id
+    )
+
+    event_names: List[str] = []
+    time_windows: List[Tuple[int, str]] = []
+    for prop in unwrapped_filter.property_groups.flat:
+        if prop.type == "person":
+            continue
+        if prop.type != "behavioral" or prop.value not in (
+            BehavioralPropertyType.PERFORMED_EVENT,
+            BehavioralPropertyType.PERFORMED_EVENT_MULTIPLE,
+        ):
+            return None
+
+        try:
+            time_window = (
+                parse_and_validate_positive_integer(prop.time_value, "time_value"),
+                validate_interval(prop.time_interval),
+            )
+        except ValueError:
+            return None
+
+        if prop.event_type == "events":
+            event_names.append(str(prop.key))
+        elif prop.event_type == "actions":
+            try:
+                action = Action.objects.get(pk=prop.key, team_id=cohort.team_id)
+            except Action.DoesNotExist:
+                return None
+            step_events = [step.event for step in action.steps.all()]
+            if not step_events or None in step_events:
+                # Actions matching any event can't be narrowed down to a set of event names
+                return None
+            event_names.extend(step_events)
+        else:
+            return None
+
+        if time_window not in time_windows:
+            time_windows.append(time_window)
+
+    return event_names, time_windows
+
+
+def get_changed_person_ids_query(
+    cohort: Cohort, watermark: datetime, event_names: List[str], time_windows: List[Tuple[int, str]]
+) -> Tuple[str, Dict[str, Any]]:
+    params: Dict[str, Any] = {"watermark": watermark}
+    events_query = ""
+
+    if event_names:
+        expiring_conditions = ""
+        for index, (time_value, time_interval) in enumerate(time_windows):
+            param = f"expiring_time_value_{index}"
+            # Events leaving the time window since the watermark can remove the person from the cohort
+            expiring_conditions += f"OR (timestamp > %(watermark)s - INTERVAL %({param})s {time_interval} AND timestamp <= now() - INTERVAL %({param})s {time_interval}) "
+            params[param] = time_value
+
+        events_query = GET_CHANGED_PERSON_IDS_BY_EVENTS.format(
+            GET_TEAM_PERSON_DISTINCT_IDS=get_team_distinct_ids_query(cohort.team_id),
+            expiring_conditions=expiring_conditions,
+        )
+        params["changed_event_names"] = event_names
+
+    return GET_CHANGED_PERSON_IDS_SINCE_WATERMARK.format(events_query=events_query), params
+
+
+def incrementally_recalculate_cohortpeople(cohort: Cohort, watermark: datetime) -> Optional[int]:
+    """
+    Re-evaluates only persons that changed since the watermark against the cohort filter, and writes the difference
+    to the current version of the cohort. Returns None without writing anything if the cohort isn't eligible.
+    """
+    recalculation_events = get_incremental_recalculation_events(cohort)
+    if recalculation_events is None or cohort.version is None:
+        return None
+
+    event_names, time_windows = recalculation_events
+
+    changed_persons_query, changed_persons_params = get_changed_person_ids_query(
+        cohort, watermark, event_names, time_windows
+    )
+    hogql_context = HogQLContext(within_non_hogql_query=True, team_id=cohort.team_id)
+    # The changed persons are pushed down into the person and events subqueries, so only their rows are read
+    cohort_query, cohort_params = format_person_query(cohort, 0, hogql_context, person_ids_query=changed_persons_query)
+
+    sync_execute(
+        INCREMENTAL_RECALCULATE_COHORT_BY_ID.format(cohort_filter=cohort_query, changed_persons=changed_persons_query),
+        {
+            **cohort_params,
+            **hogql_context.values,
+            **changed_persons_params,
+            "cohort_id": cohort.pk,
+            "team_id": cohort.team_id,
+            "version": cohort.version,
+        },
+        settings={"optimize_on_insert": 0},
+    )
+
+    count = get_cohort_size(cohort)
+
+    logger.info(
+        "Incrementally recalculating cohortpeople done",
+        team_id=cohort.team_id,
+        cohort_id=cohort.pk,
+        watermark=watermark,
+        size=count,
+    )
+
+    return count
+
+
 def clear_stale_cohortpeople(cohort: Cohort, current_version: int) -> None:
 
     if cohort.version and cohort.version > 0:
@@ -305,7 +506,7 @@ def clear_stale_cohortpeople(cohort: Cohort, current_version: int) -> None:
 
 def get_cohort_size(cohort: Cohort, override_version: Optional[int] = None) -> Optional[int]:
     count_result = sync_execute(
-        GET_COHORT_SIZE_SQL,
+        GET_INCREMENTAL_COHORT_SIZE_SQL if has_incremental_cohortpeople(cohort) else GET_COHORT_SIZE_SQL,
         {
             "cohort_id": cohort.pk,
             "version": override_version if override_version is not None else cohort.version,
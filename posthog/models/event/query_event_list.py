@@ -1,6 +1,7 @@
-from datetime import timedelta
-from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union, cast
 
+import pytz
 from dateutil.parser import isoparse
 from django.utils.timezone import now
 
@@ -15,30 +16,57 @@ from posthog.models.event.sql import (
     SELECT_EVENT_BY_TEAM_AND_CONDITIONS_SQL,
 )
 from posthog.models.property.util import parse_prop_grouped_clauses
+from posthog.models.utils import UUIDT
 from posthog.queries.insight import insight_query_with_columns
 from posthog.utils import relative_date_parse
 
 
+# Time windows of the events list, each one covering the events from further back than the previous one. Most teams
+# fill a page from the first window, low volume teams only scan as far back as needed to fill the page.
+EVENTS_LIST_WINDOWS: Tuple[Optional[timedelta], ...] = (
+    timedelta(hours=1),
+    timedelta(days=1),
+    timedelta(days=7),
+    timedelta(days=30),
+    timedelta(days=365),
+    None,
+)
+
+
+def parse_timestamp(value: str) -> datetime:
+    try:
+        timestamp = isoparse(value)
+    except ValueError:
+        timestamp = relative_date_parse(value)
+    return timestamp.astimezone(pytz.utc) if timestamp.tzinfo else timestamp.replace(tzinfo=pytz.utc)
+
+
 def determine_event_conditions(conditions: Dict[str, Union[None, str, List[str]]]) -> Tuple[str, Dict]:
+    """
+    Conditions of the events list query. `before` and `after` are cursors when they come with the uuid of the event at
+    that timestamp (`before_uuid` and `after_uuid`), in which case events at the same timestamp are paginated by uuid.
+    """
     result = ""
     params: Dict[str, Union[str, List[str]]] = {}
     for k, v in conditions.items():
         if not isinstance(v, str):
             continue
         if k == "after":
-            try:
-                timestamp = isoparse(v).strftime("%Y-%m-%d %H:%M:%S.%f")
-            except ValueError:
-                timestamp = relative_date_parse(v).strftime("%Y-%m-%d %H:%M:%S.%f")
-            result += "AND timestamp > %(after)s "
-            params.update({"after": timestamp})
+            params.update({"after": parse_timestamp(v).strftime("%Y-%m-%d %H:%M:%S.%f")})
+            after_uuid = conditions.get("after_uuid")
+            if isinstance(after_uuid, str) and UUIDT.is_valid_uuid(after_uuid):
+                result += "AND timestamp >= %(after)s AND (timestamp > %(after)s OR uuid > toUUID(%(after_uuid)s)) "
+                params.update({"after_uuid": after_uuid})
+            else:
+                result += "AND timestamp > %(after)s "
         elif k == "before":
-            try:
-                timestamp = isoparse(v).strftime("%Y-%m-%d %H:%M:%S.%f")
-            except ValueError:
-                timestamp = relative_date_parse(v).strftime("%Y-%m-%d %H:%M:%S.%f")
-            result += "AND timestamp < %(before)s "
-            params.update({"before": timestamp})
+            params.update({"before": parse_timestamp(v).strftime("%Y-%m-%d %H:%M:%S.%f")})
+            before_uuid = conditions.get("before_uuid")
+            if isinstance(before_uuid, str) and UUIDT.is_valid_uuid(before_uuid):
+                result += "AND timestamp <= %(before)s AND (timestamp < %(before)s OR uuid < toUUID(%(before_uuid)s)) "
+                params.update({"before_uuid": before_uuid})
+            else:
+                result += "AND timestamp < %(before)s "
         elif k == "person_id":
             result += """AND distinct_id IN (%(distinct_ids)s) """
             person = get_pk_or_uuid(Person.objects.all(), v).first()
@@ -59,28 +87,22 @@ def query_events_list(
     request_get_query_dict: Dict,
     order_by: List[str],
     action_id: Optional[str],
-    unbounded_date_from: bool = False,
     limit: int = DEFAULT_RETURNED_ROWS,
     offset: int = 0,
 ) -> List:
+    """
+    Returns up to `limit + 1` events, the extra one telling whether there is a next page.
+
+    Newest first lists are queried window by window (see `EVENTS_LIST_WINDOWS`), going back from `before` until the
+    page is full, so that only the time range needed to fill the page is scanned.
+    """
     # Note: This code is inefficient and problematic, see https://github.com/PostHog/posthog/issues/13485 for details.
     # To isolate its impact from rest of the queries its queries are run on different nodes as part of "offline" workloads.
     hogql_context = HogQLContext(within_non_hogql_query=True, team_id=team.pk, enable_select_queries=True)
 
     limit += 1
-    limit_sql = "LIMIT %(limit)s"
-
-    if offset > 0:
-        limit_sql += " OFFSET %(offset)s"
-
-    workload = Workload.OFFLINE if unbounded_date_from else Workload.ONLINE
-
     conditions, condition_params = determine_event_conditions(
-        {
-            "after": None if unbounded_date_from else (now() - timedelta(days=1)).isoformat(),
-            "before": (now() + timedelta(seconds=5)).isoformat(),
-            **request_get_query_dict,
-        }
+        {"before": (now() + timedelta(seconds=5)).isoformat(), **request_get_query_dict}
     )
     prop_filters, prop_filter_params = parse_prop_grouped_clauses(
         team_id=team.pk, property_group=filter.property_groups, has_person_id_joined=False, hogql_context=hogql_context
@@ -99,34 +121,54 @@ def query_events_list(
         prop_filter_params = {**prop_filter_params, **params}
 
     order = "DESC" if len(order_by) == 1 and order_by[0] == "-timestamp" else "ASC"
-    if prop_filters != "":
-        return insight_query_with_columns(
-            SELECT_EVENT_BY_TEAM_AND_CONDITIONS_FILTERS_SQL.format(
-                conditions=conditions, limit=limit_sql, filters=prop_filters, order=order
-            ),
-            {
-                "team_id": team.pk,
-                "limit": limit,
-                "offset": offset,
-                **condition_params,
-                **prop_filter_params,
-                **hogql_context.values,
-            },
-            query_type="events_list",
-            workload=workload,
-            team_id=team.pk,
-        )
-    else:
+    params = {"team_id": team.pk, **condition_params, **prop_filter_params, **hogql_context.values}
+
+    def query_window(window_conditions: str, window_limit: int, workload: Workload) -> List:
+        limit_sql = "LIMIT %(limit)s"
+        if offset > 0:
+            limit_sql += " OFFSET %(offset)s"
+
+        if prop_filters != "":
+            query = SELECT_EVENT_BY_TEAM_AND_CONDITIONS_FILTERS_SQL.format(
+                conditions=conditions + window_conditions, limit=limit_sql, filters=prop_filters, order=order
+            )
+        else:
+            query = SELECT_EVENT_BY_TEAM_AND_CONDITIONS_SQL.format(
+                conditions=conditions + window_conditions, limit=limit_sql, order=order
+            )
         return insight_query_with_columns(
-            SELECT_EVENT_BY_TEAM_AND_CONDITIONS_SQL.format(conditions=conditions, limit=limit_sql, order=order),
-            {
-                "team_id": team.pk,
-                "limit": limit,
-                "offset": offset,
-                **condition_params,
-                **hogql_context.values,
-            },
+            query,
+            {**params, "limit": window_limit, "offset": offset},
             query_type="events_list",
             workload=workload,
             team_id=team.pk,
         )
+
+    # Offsets can't be split over windows, and oldest first lists would need to find the start of the data first
+    if order == "ASC" or offset > 0:
+        return query_window("", limit, Workload.OFFLINE)
+
+    page_end = parse_timestamp(cast(str, condition_params["before"]))
+    after = parse_timestamp(cast(str, condition_params["after"])) if "after" in condition_params else None
+
+    results: List = []
+    window_start: Optional[datetime] = None
+    for window in EVENTS_LIST_WINDOWS:
+        previous_window_start = window_start
+        window_start = page_end - window if window is not None else None
+        last_window = window_start is None or (after is not None and window_start <= after)
+
+        window_conditions = ""
+        if not last_window:
+            window_conditions += "AND timestamp >= %(window_start)s "
+            params["window_start"] = cast(datetime, window_start).strftime("%Y-%m-%d %H:%M:%S.%f")
+        if previous_window_start is not None:
+            window_conditions += "AND timestamp < %(window_end)s "
+            params["window_end"] = previous_window_start.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+        workload = Workload.ONLINE if window is not None and window <= timedelta(days=1) else Workload.OFFLINE
+        results.extend(query_window(window_conditions, limit - len(results), workload))
+        if len(results) >= limit or last_window:
+            break
+
+    return results
@@ -270,6 +270,17 @@ def parse_properties(properties: str, allow_list: Set[str] = set()) -> Dict:
     }
 
 
+def serialize_event_person(person: Person) -> Dict[str, Any]:
+    "The person of events as shown in the events list, see `ClickhouseEventSerializer`"
+    return {
+        "is_identified": person.is_identified,
+        "distinct_ids": person.distinct_ids[:1],  # only send the first one to avoid a payload bloat
+        "properties": {
+            key: person.properties[key] for key in ["email", "name", "username"] if key in person.properties
+        },
+    }
+
+
 # reference raw sql for
 class ClickhouseEventSerializer(serializers.Serializer):
     id = serializers.SerializerMethodField()
@@ -301,14 +312,7 @@ class ClickhouseEventSerializer(serializers.Serializer):
         if not self.context.get("people") or event["distinct_id"] not in self.context["people"]:
             return None
 
-        person = self.context["people"][event["distinct_id"]]
-        return {
-            "is_identified": person.is_identified,
-            "distinct_ids": person.distinct_ids[:1],  # only send the first one to avoid a payload bloat
-            "properties": {
-                key: person.properties[key] for key in ["email", "name", "username"] if key in person.properties
-            },
-        }
+        return self.context["people"][event["distinct_id"]]
 
     def get_elements(self, event):
         if not event["elements_chain"]:
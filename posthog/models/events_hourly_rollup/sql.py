@@ -0,0 +1,99 @@
+from django.conf import settings
+
+from posthog.clickhouse.table_engines import AggregatingMergeTree, Distributed, ReplicationScheme
+
+# Events counted per team, event and hour, with exact uniq states of their distinct ids, persons and sessions, backing
+# simple trends insights, see `posthog/queries/trends/rollup.py`. Hours rather than days, so that the rollup can be
+# read in any team timezone. Filled by a materialized view on ingestion, and backfilled per team with
+# `BACKFILL_EVENTS_HOURLY_ROLLUP_SQL`.
+# Rows are only ever added: events ingested twice are counted twice, and events deleted with their person are not
+# removed from the rollup, as it doesn't know the persons of its counts. Only deleting a whole team removes its rows.
+EVENTS_HOURLY_ROLLUP_DATA_TABLE = lambda: "sharded_events_hourly_rollup"
+
+SHARDED_EVENTS_HOURLY_ROLLUP_TABLE_ENGINE = lambda: AggregatingMergeTree(
+    "sharded_events_hourly_rollup", replication_scheme=ReplicationScheme.SHARDED
+)
+
+EVENTS_HOURLY_ROLLUP_TABLE_BASE_SQL = """
+CREATE TABLE IF NOT EXISTS {table_name} ON CLUSTER '{cluster}'
+(
+    team_id Int64,
+    event String,
+    -- start of the UTC hour of the events
+    hour DateTime('UTC'),
+    count SimpleAggregateFunction(sum, UInt64),
+    distinct_ids AggregateFunction(uniqExact, String),
+    -- only meaningful for teams with persons on events
+    person_ids AggregateFunction(uniqExact, UUID),
+    session_ids AggregateFunction(uniqExact, String)
+) ENGINE = {engine}
+"""
+
+EVENTS_HOURLY_ROLLUP_TABLE_SQL = lambda: (
+    EVENTS_HOURLY_ROLLUP_TABLE_BASE_SQL
+    + """
+PARTITION BY toYYYYMM(hour)
+ORDER BY (team_id, event, hour)
+"""
+).format(
+    table_name=EVENTS_HOURLY_ROLLUP_DATA_TABLE(),
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=SHARDED_EVENTS_HOURLY_ROLLUP_TABLE_ENGINE(),
+)
+
+DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL = lambda: EVENTS_HOURLY_ROLLUP_TABLE_BASE_SQL.format(
+    table_name="events_hourly_rollup",
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=Distributed(data_table=EVENTS_HOURLY_ROLLUP_DATA_TABLE(), sharding_key="sipHash64(team_id)"),
+)
+
+# Reads the events inserted into each shard, so that rollup rows stay on the shard of their events
+EVENTS_HOURLY_ROLLUP_MV_SQL = (
+    lambda: f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS events_hourly_rollup_mv ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'
+TO {settings.CLICKHOUSE_DATABASE}.{EVENTS_HOURLY_ROLLUP_DATA_TABLE()}
+AS SELECT
+    team_id,
+    event,
+    toStartOfHour(timestamp) AS hour,
+    count() AS count,
+    uniqExactState(distinct_id) AS distinct_ids,
+    uniqExactState(person_id) AS person_ids,
+    uniqExactState(`$session_id`) AS session_ids
+FROM {settings.CLICKHOUSE_DATABASE}.sharded_events
+GROUP BY team_id, event, hour
+"""
+)
+
+DROP_EVENTS_HOURLY_ROLLUP_TABLE_SQL = lambda: (
+    f"DROP TABLE IF EXISTS {EVENTS_HOURLY_ROLLUP_DATA_TABLE()} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+DROP_DISTRIBUTED_EVENTS_HOURLY_ROLLUP_TABLE_SQL = lambda: (
+    f"DROP TABLE IF EXISTS events_hourly_rollup ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+DROP_EVENTS_HOURLY_ROLLUP_MV_SQL = lambda: (
+    f"DROP TABLE IF EXISTS events_hourly_rollup_mv ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+TRUNCATE_EVENTS_HOURLY_ROLLUP_TABLE_SQL = lambda: (
+    f"TRUNCATE TABLE IF EXISTS {EVENTS_HOURLY_ROLLUP_DATA_TABLE()} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+# Rolls up the events of a team ingested before `before`, i.e. before the materialized view was created, so that no
+# event is rolled up twice
+BACKFILL_EVENTS_HOURLY_ROLLUP_SQL = """
+INSERT INTO events_hourly_rollup (team_id, event, hour, count, distinct_ids, person_ids, session_ids)
+SELECT
+    team_id,
+    event,
+    toStartOfHour(timestamp) AS hour,
+    count() AS count,
+    uniqExactState(distinct_id) AS distinct_ids,
+    uniqExactState(person_id) AS person_ids,
+    uniqExactState(`$session_id`) AS session_ids
+FROM events
+WHERE team_id = %(team_id)s AND _timestamp < %(before)s
+GROUP BY team_id, event, hour
+"""
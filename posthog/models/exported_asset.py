@@ -1,6 +1,7 @@
 import secrets
 from datetime import timedelta
-from typing import List, Optional
+from itertools import chain
+from typing import Iterable, List, Optional
 
 import structlog
 from django.conf import settings
@@ -48,6 +49,8 @@ class ExportedAsset(models.Model):
     # path in object storage or some other location identifier for the asset
     # 1000 characters would hold a 20 UUID forward slash separated path with space to spare
     content_location: models.TextField = models.TextField(null=True, blank=True, max_length=1000)
+    # how many rows a CSV export has written so far, for reporting the progress of large exports
+    exported_row_count: models.PositiveIntegerField = models.PositiveIntegerField(null=True, blank=True)
 
     # DEPRECATED: We now use JWT for accessing assets
     access_token: models.CharField = models.CharField(
@@ -131,12 +134,39 @@ def save_content(exported_asset: ExportedAsset, content: bytes) -> None:
         save_content_to_exported_asset(exported_asset, content)
 
 
+def save_content_parts(exported_asset: ExportedAsset, parts: Iterable[bytes]) -> None:
+    """
+    Saves content that is produced part by part, e.g. by a streaming export. Content of more than one part is
+    uploaded to object storage as it is produced, without ever holding all of it in memory
+    """
+    parts = iter(parts)
+    first_part = next(parts, b"")
+    second_part = next(parts, None)
+    if second_part is None or not settings.OBJECT_STORAGE_ENABLED:
+        save_content(exported_asset, b"".join(chain([first_part, second_part or b""], parts)))
+        return
+
+    # Parts that were already consumed can't be read again, so failing multipart uploads can't fall back to
+    # saving the content on the asset
+    object_path = _object_storage_path(exported_asset)
+    object_storage.write_parts(object_path, chain([first_part, second_part], parts))
+    exported_asset.content_location = object_path
+    exported_asset.save(update_fields=["content_location"])
+
+
 def save_content_to_exported_asset(exported_asset: ExportedAsset, content: bytes) -> None:
     exported_asset.content = content
     exported_asset.save(update_fields=["content"])
 
 
 def save_content_to_object_storage(exported_asset: ExportedAsset, content: bytes) -> None:
+    object_path = _object_storage_path(exported_asset)
+    object_storage.write(object_path, content)
+    exported_asset.content_location = object_path
+    exported_asset.save(update_fields=["content_location"])
+
+
+def _object_storage_path(exported_asset: ExportedAsset) -> str:
     path_parts: List[str] = [
         settings.OBJECT_STORAGE_EXPORTS_FOLDER,
         exported_asset.export_format.split("/")[1],
@@ -144,7 +174,4 @@ def save_content_to_object_storage(exported_asset: ExportedAsset, content: bytes
         f"task-{exported_asset.id}",
         str(UUIDT()),
     ]
-    object_path = "/".join(path_parts)
-    object_storage.write(object_path, content)
-    exported_asset.content_location = object_path
-    exported_asset.save(update_fields=["content_location"])
+    return "/".join(path_parts)
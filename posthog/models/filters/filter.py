@@ -7,6 +7,7 @@ from rest_framework.exceptions import ValidationError
 from posthog.constants import PROPERTIES
 from posthog.models.filters.base_filter import BaseFilter
 from posthog.models.filters.mixins.common import (
+    ActorPropertiesMixin,
     BreakdownMixin,
     BreakdownValueMixin,
     ClientQueryIdMixin,
@@ -89,6 +90,7 @@ class Filter(
     FunnelCorrelationActorsMixin,
     SimplifyFilterMixin,
     IncludeRecordingsMixin,
+    ActorPropertiesMixin,
     SearchMixin,
     DistinctIdMixin,
     EmailMixin,
@@ -11,6 +11,7 @@ from rest_framework.exceptions import ValidationError
 
 from posthog.constants import (
     ACTIONS,
+    AUTO_SAMPLING,
     BREAKDOWN,
     BREAKDOWN_ATTRIBUTION_TYPE,
     BREAKDOWN_ATTRIBUTION_VALUE,
@@ -524,6 +525,20 @@ class IncludeRecordingsMixin(BaseParamMixin):
         return {"include_recordings": self.include_recordings} if self.include_recordings else {}
 
 
+class ActorPropertiesMixin(BaseParamMixin):
+    @cached_property
+    def actor_properties(self) -> Optional[List[str]]:
+        """Keys of the properties to return with each actor, all of them if not set"""
+        actor_properties = self._data.get("actor_properties")
+        if isinstance(actor_properties, str):
+            return json.loads(actor_properties)
+        return actor_properties
+
+    @include_dict
+    def actor_properties_to_dict(self):
+        return {"actor_properties": self.actor_properties} if self.actor_properties is not None else {}
+
+
 class SearchMixin(BaseParamMixin):
     @cached_property
     def search(self) -> Optional[str]:
@@ -577,6 +592,10 @@ class SampleMixin(BaseParamMixin):
     def sampling_factor(self) -> Optional[float]:
         sampling_factor = self._data.get("sampling_factor", None)
 
+        # Auto sampling is resolved to a factor when the filter is simplified for a team, until then there's none
+        if sampling_factor == AUTO_SAMPLING:
+            return None
+
         # cover for both None and empty strings - also ok to filter out 0s here
         if sampling_factor:
             sampling_factor = float(sampling_factor)
@@ -589,4 +608,6 @@ class SampleMixin(BaseParamMixin):
 
     @include_dict
     def sampling_factor_to_dict(self):
+        if self._data.get(SAMPLING_FACTOR) == AUTO_SAMPLING:
+            return {SAMPLING_FACTOR: AUTO_SAMPLING}
         return {SAMPLING_FACTOR: self.sampling_factor or ""}
@@ -23,6 +23,7 @@ from posthog.constants import (
     FUNNEL_CORRELATION_PERSON_ENTITY,
     FUNNEL_CORRELATION_PERSON_LIMIT,
     FUNNEL_CORRELATION_PERSON_OFFSET,
+    FUNNEL_CORRELATION_PROGRESSIVE,
     FUNNEL_CORRELATION_PROPERTY_VALUES,
     FUNNEL_CORRELATION_TYPE,
     FUNNEL_CUSTOM_STEPS,
@@ -333,6 +334,11 @@ class FunnelCorrelationMixin(BaseParamMixin):
             return json.loads(property_names)
         return property_names
 
+    @cached_property
+    def correlation_progressive(self) -> bool:
+        # Run the correlation on a sample first and refine it asynchronously
+        return str_to_bool(self._data.get(FUNNEL_CORRELATION_PROGRESSIVE, False))
+
     @include_dict
     def funnel_correlation_to_dict(self):
         result_dict: Dict = {}
@@ -348,6 +354,8 @@ class FunnelCorrelationMixin(BaseParamMixin):
             result_dict[FUNNEL_CORRELATION_EXCLUDE_EVENT_NAMES] = self.correlation_event_exclude_names
         if self.correlation_event_exclude_property_names:
             result_dict[FUNNEL_CORRELATION_EVENT_EXCLUDE_PROPERTY_NAMES] = self.correlation_event_exclude_property_names
+        if self.correlation_progressive:
+            result_dict[FUNNEL_CORRELATION_PROGRESSIVE] = self.correlation_progressive
         return result_dict
 
 
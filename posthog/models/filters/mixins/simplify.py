@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, Any, Dict, List, Literal, TypeVar, cast
 
-from posthog.constants import PropertyOperatorType
+from posthog.constants import AUTO_SAMPLING, SAMPLING_FACTOR, PropertyOperatorType
 from posthog.models.property import GroupTypeIndex, PropertyGroup
 
 if TYPE_CHECKING:  # Avoid circular import
@@ -19,6 +19,8 @@ class SimplifyFilterMixin:
         - if filter.filter_test_accounts, adds property filters to `filter.properties`
         - if aggregating by groups, adds property filter to remove blank groups
         - for cohort properties, replaces them with more concrete lookups or with cohort conditions
+        - for auto sampling, picks the sampling factor from the team's volume of events, so that all queries of the
+          filter sample the same
         """
         if self._data.get("is_simplified"):  # type: ignore
             return self
@@ -35,6 +37,14 @@ class SimplifyFilterMixin:
             )
             result = result.shallow_clone({"properties": prop_group, "filter_test_accounts": False})
 
+        if result._data.get(SAMPLING_FACTOR) == AUTO_SAMPLING:
+            from posthog.queries.sampling import get_auto_sampling_factor
+
+            sampling_factor = get_auto_sampling_factor(
+                team.pk, getattr(result, "date_from", None), getattr(result, "date_to", None)
+            )
+            result = result.shallow_clone({SAMPLING_FACTOR: sampling_factor or ""})
+
         updated_entities = {}
         if hasattr(result, "entities_to_dict"):
             for entity_type, entities in result.entities_to_dict().items():
@@ -5,6 +5,7 @@ from rest_framework.request import Request
 from posthog.constants import INSIGHT_PATHS
 from posthog.models.filters.base_filter import BaseFilter
 from posthog.models.filters.mixins.common import (
+    ActorPropertiesMixin,
     BreakdownMixin,
     ClientQueryIdMixin,
     DateMixin,
@@ -69,6 +70,7 @@ class PathFilter(
     ClientQueryIdMixin,
     SimplifyFilterMixin,
     IncludeRecordingsMixin,
+    ActorPropertiesMixin,
     SearchMixin,
     # TODO: proper fix for EventQuery abstraction
     BaseFilter,
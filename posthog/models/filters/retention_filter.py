@@ -6,6 +6,7 @@ from rest_framework.request import Request
 from posthog.constants import INSIGHT_RETENTION
 from posthog.models.filters.base_filter import BaseFilter
 from posthog.models.filters.mixins.common import (
+    ActorPropertiesMixin,
     BreakdownMixin,
     ClientQueryIdMixin,
     DisplayDerivedMixin,
@@ -42,6 +43,7 @@ class RetentionFilter(
     ClientQueryIdMixin,
     SimplifyFilterMixin,
     SampleMixin,
+    ActorPropertiesMixin,
     BaseFilter,
 ):
     def __init__(self, data: Dict[str, Any] = {}, request: Optional[Request] = None, **kwargs) -> None:
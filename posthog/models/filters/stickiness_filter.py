@@ -6,6 +6,7 @@ from rest_framework.request import Request
 
 from posthog.models.filters.base_filter import BaseFilter
 from posthog.models.filters.mixins.common import (
+    ActorPropertiesMixin,
     ClientQueryIdMixin,
     CompareMixin,
     EntitiesMixin,
@@ -36,6 +37,7 @@ class StickinessFilter(
     EntityMathMixin,
     SelectedIntervalMixin,
     SearchMixin,
+    ActorPropertiesMixin,
     PropertyMixin,
     FilterTestAccountsMixin,
     OffsetMixin,
@@ -0,0 +1,62 @@
+from django.conf import settings
+
+from posthog.clickhouse.table_engines import MergeTreeEngine, ReplicationScheme
+
+# Steps reached by each actor entering a funnel within a slice of its date range, written by sliced funnel execution,
+# see `posthog/queries/funnels/sliced.py`. Rows of one slice share a `run_id`, which is what finished slices are
+# cached by. Rows are only kept for a while, as they're only worth reusing while the funnel is being looked at.
+FUNNEL_SLICE_RESULTS_TABLE = "funnel_slice_results"
+FUNNEL_SLICE_RESULTS_TTL_DAYS = 7
+
+FUNNEL_SLICE_RESULTS_TABLE_ENGINE = lambda: MergeTreeEngine(
+    FUNNEL_SLICE_RESULTS_TABLE, replication_scheme=ReplicationScheme.REPLICATED
+)
+
+FUNNEL_SLICE_RESULTS_TABLE_SQL = lambda: """
+CREATE TABLE IF NOT EXISTS {table_name} ON CLUSTER '{cluster}'
+(
+    team_id Int64,
+    run_id UUID,
+    -- person id, distinct id or group key, depending on the aggregation of the funnel
+    aggregation_target String,
+    steps UInt8,
+    -- per step after the first, the conversion times of the actor's attempts reaching `steps`, which are merged with
+    -- those of other slices rather than averaged, so that averages and medians are the same as over the whole range
+    conversion_times Array(Array(Float64)),
+    created_at DateTime64(6, 'UTC') DEFAULT now64()
+) ENGINE = {engine}
+ORDER BY (team_id, run_id, aggregation_target)
+TTL toDate(created_at) + INTERVAL {ttl_days} DAY
+""".format(
+    table_name=FUNNEL_SLICE_RESULTS_TABLE,
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=FUNNEL_SLICE_RESULTS_TABLE_ENGINE(),
+    ttl_days=FUNNEL_SLICE_RESULTS_TTL_DAYS,
+)
+
+DROP_FUNNEL_SLICE_RESULTS_TABLE_SQL = (
+    lambda: f"DROP TABLE IF EXISTS {FUNNEL_SLICE_RESULTS_TABLE} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+TRUNCATE_FUNNEL_SLICE_RESULTS_TABLE_SQL = (
+    lambda: f"TRUNCATE TABLE IF EXISTS {FUNNEL_SLICE_RESULTS_TABLE} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+INSERT_FUNNEL_SLICE_RESULTS_SQL = """
+INSERT INTO funnel_slice_results (team_id, run_id, aggregation_target, steps, conversion_times)
+SELECT
+    %(team_id)s,
+    %(funnel_slice_run_id)s,
+    toString(aggregation_target),
+    steps,
+    [{conversion_times}]
+FROM (
+    {step_counts_query}
+)
+"""
+
+# Slices are read right after they're written, possibly from another replica, so inserts wait for all replicas
+FUNNEL_SLICE_RESULTS_REPLICAS_SQL = f"""
+SELECT max(total_replicas) FROM system.replicas
+WHERE database = '{settings.CLICKHOUSE_DATABASE}' AND table = '{FUNNEL_SLICE_RESULTS_TABLE}'
+"""
@@ -17,7 +17,7 @@ from semantic_version.base import SimpleSpec, Version
 from posthog.cloud_utils import is_cloud
 from posthog.models.organization import Organization
 from posthog.models.signals import mutable_receiver
-from posthog.models.team import Team
+from posthog.models.team import Team, delete_decide_config_in_cache
 from posthog.plugins.access import can_configure_plugins, can_install_plugins
 from posthog.plugins.reload import reload_plugins_on_workers
 from posthog.plugins.site import get_decide_site_apps
@@ -453,6 +453,7 @@ def plugin_reload_needed(sender, instance, created=None, **kwargs):
     # Newly created plugins don't have a config yet, so no need to reload
     if not created:
         reload_plugins_on_workers()
+        delete_decide_config_of_plugin_teams(instance.pk)
 
 
 @mutable_receiver([post_save, post_delete], sender=PluginConfig)
@@ -464,6 +465,18 @@ def plugin_config_reload_needed(sender, instance, created=None, **kwargs):
         team = None
     if team is not None:
         sync_team_inject_web_apps(instance.team)
+    delete_decide_config_in_cache(instance.team_id)
+
+
+@mutable_receiver([post_save, post_delete], sender=PluginSourceFile)
+def plugin_source_file_changed(sender, instance, **kwargs):
+    # Site apps are part of decide configs
+    delete_decide_config_of_plugin_teams(instance.plugin_id)
+
+
+def delete_decide_config_of_plugin_teams(plugin_id: int):
+    team_ids = set(PluginConfig.objects.filter(plugin_id=plugin_id).values_list("team_id", flat=True))
+    delete_decide_config_in_cache(*team_ids)
 
 
 def sync_team_inject_web_apps(team: Team):
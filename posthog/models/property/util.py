@@ -17,7 +17,12 @@ from rest_framework import exceptions
 
 from posthog.clickhouse.client.escape import escape_param_for_clickhouse
 from posthog.clickhouse.kafka_engine import trim_quotes_expr
-from posthog.clickhouse.materialized_columns import TableWithProperties, get_materialized_columns
+from posthog.clickhouse.materialized_columns import (
+    MaterializedColumnType,
+    TableWithProperties,
+    get_materialized_columns,
+    get_typed_materialized_columns,
+)
 from posthog.constants import PropertyOperatorType
 from posthog.hogql import ast
 from posthog.hogql.hogql import HogQLContext
@@ -394,19 +399,26 @@ def prop_filter_json_extract(
     if transform_expression is not None:
         prop_var = transform_expression(prop_var)
 
+    table = "events" if use_event_column else property_table(prop)
+    materialised_table_column = use_event_column if use_event_column else "properties"
     property_expr, is_denormalized = get_property_string_expr(
-        "events" if use_event_column else property_table(prop),
+        table,
         prop.key,
         f"%(k{prepend}_{idx})s",
         prop_var,
         allow_denormalized_props,
         table_name,
-        materialised_table_column=use_event_column if use_event_column else "properties",
+        materialised_table_column=materialised_table_column,
     )
 
     if is_denormalized and transform_expression:
         property_expr = transform_expression(property_expr)
 
+    def typed_property_expr(column_type: MaterializedColumnType) -> Optional[str]:
+        if not allow_denormalized_props or transform_expression is not None:
+            return None
+        return get_typed_property_expr(table, prop.key, column_type, table_name, materialised_table_column)
+
     operator = prop.operator
     if prop.negation:
         operator = negate_operator(operator or "exact")
@@ -490,10 +502,14 @@ def prop_filter_json_extract(
         # if we're comparing against a date with no time,
         # truncate the values in the DB which may have times
         granularity = "day" if re.match(r"^\d{4}-\d{2}-\d{2}$", prop.value) else "second"
-        query = f"""AND date_trunc('{granularity}', coalesce(
+        date_expr = (
+            typed_property_expr("DateTime")
+            or f"""coalesce(
             parseDateTimeBestEffortOrNull({property_expr}),
             parseDateTimeBestEffortOrNull(substring({property_expr}, 1, 10))
-        )) = %({prop_value_param_key})s"""
+        )"""
+        )
+        query = f"""AND date_trunc('{granularity}', {date_expr}) = %({prop_value_param_key})s"""
 
         return (query, {"k{}_{}".format(prepend, idx): prop.key, prop_value_param_key: prop.value})
     elif operator == "is_date_after":
@@ -508,7 +524,9 @@ def prop_filter_json_extract(
 
         try_parse_as_date = f"parseDateTimeBestEffortOrNull({property_expr})"
         try_parse_as_timestamp = f"parseDateTimeBestEffortOrNull(substring({property_expr}, 1, 10))"
-        first_of_date_or_timestamp = f"coalesce({try_parse_as_date},{try_parse_as_timestamp})"
+        first_of_date_or_timestamp = (
+            typed_property_expr("DateTime") or f"coalesce({try_parse_as_date},{try_parse_as_timestamp})"
+        )
 
         if is_date_only:
             adjusted_value = f"subtractSeconds(addDays(toDate(%({prop_value_param_key})s), 1), 1)"
@@ -524,7 +542,9 @@ def prop_filter_json_extract(
         prop_value_param_key = "v{}_{}".format(prepend, idx)
         try_parse_as_date = f"parseDateTimeBestEffortOrNull({property_expr})"
         try_parse_as_timestamp = f"parseDateTimeBestEffortOrNull(substring({property_expr}, 1, 10))"
-        first_of_date_or_timestamp = f"coalesce({try_parse_as_date},{try_parse_as_timestamp})"
+        first_of_date_or_timestamp = (
+            typed_property_expr("DateTime") or f"coalesce({try_parse_as_date},{try_parse_as_timestamp})"
+        )
         query = f"""{property_operator} {first_of_date_or_timestamp} < %({prop_value_param_key})s"""
 
         return (query, {"k{}_{}".format(prepend, idx): prop.key, prop_value_param_key: prop.value})
@@ -532,9 +552,12 @@ def prop_filter_json_extract(
         count_operator = get_count_operator(operator)
 
         params = {"k{}_{}".format(prepend, idx): prop.key, "v{}_{}".format(prepend, idx): prop.value}
-        extract_property_expr = trim_quotes_expr(f"replaceRegexpAll({property_expr}, ' ', '')")
+        numeric_expr = typed_property_expr("Float64")
+        if numeric_expr is None:
+            extract_property_expr = trim_quotes_expr(f"replaceRegexpAll({property_expr}, ' ', '')")
+            numeric_expr = f"toFloat64OrNull({extract_property_expr})"
         return (
-            f" {property_operator} toFloat64OrNull({extract_property_expr}) {count_operator} %(v{prepend}_{idx})s",
+            f" {property_operator} {numeric_expr} {count_operator} %(v{prepend}_{idx})s",
             params,
         )
     else:
@@ -668,6 +691,28 @@ def get_property_string_expr(
     return trim_quotes_expr(f"JSONExtractRaw({table_string}{column}, {var})"), False
 
 
+def get_typed_property_expr(
+    table: TableWithProperties,
+    property_name: PropertyName,
+    column_type: MaterializedColumnType,
+    table_alias: Optional[str] = None,
+    materialised_table_column: str = "properties",
+) -> Optional[str]:
+    """
+    Returns the typed materialized column holding the property parsed as `column_type`, if there is one.
+    These replace the parsing done for numeric and date comparisons, see `materialize_typed`.
+    """
+    if table != "events":
+        return None
+
+    column_name = get_typed_materialized_columns(table).get((property_name, materialised_table_column, column_type))
+    if column_name is None:
+        return None
+
+    table_string = f"{table_alias}." if table_alias is not None and table_alias != "" else ""
+    return f'{table_string}"{column_name}"'
+
+
 def box_value(value: Any, remove_spaces=False) -> List[Any]:
     if not isinstance(value, List):
         value = [value]
@@ -0,0 +1,130 @@
+from django.conf import settings
+
+from posthog.clickhouse.table_engines import AggregatingMergeTree, Distributed, ReplicationScheme
+
+# Index of the most common values of each property key, backing property value autocomplete.
+# Filled periodically from recently ingested events and persons, see `posthog/tasks/property_values.py`.
+PROPERTY_VALUES_DATA_TABLE = lambda: "sharded_property_values"
+
+# Values of event and person properties kept per key (and event) for every indexed batch of data
+PROPERTY_VALUES_TOP_N = 100
+# Longer values are not worth suggesting, and would bloat the index
+PROPERTY_VALUES_MAX_LENGTH = 1000
+
+SHARDED_PROPERTY_VALUES_TABLE_ENGINE = lambda: AggregatingMergeTree(
+    "sharded_property_values", replication_scheme=ReplicationScheme.SHARDED
+)
+
+PROPERTY_VALUES_TABLE_BASE_SQL = """
+CREATE TABLE IF NOT EXISTS {table_name} ON CLUSTER '{cluster}'
+(
+    team_id Int64,
+    -- `event` or `person`
+    property_type LowCardinality(String),
+    -- empty for person properties
+    event String,
+    property_key String,
+    -- the raw JSON value without surrounding quotes, as returned by the property value queries over raw data
+    property_value String,
+    date Date,
+    count SimpleAggregateFunction(sum, UInt64)
+) ENGINE = {engine}
+"""
+
+# Autocomplete only looks at the last week of events. Person values are dated by when the person last changed, and
+# are kept longer so that values of persons that rarely change are still suggested
+PROPERTY_VALUES_TTL = "date + INTERVAL 30 DAY DELETE WHERE property_type = 'event', date + INTERVAL 180 DAY DELETE"
+
+PROPERTY_VALUES_TABLE_SQL = lambda: (
+    PROPERTY_VALUES_TABLE_BASE_SQL
+    + """
+PARTITION BY toYYYYMM(date)
+ORDER BY (team_id, property_type, property_key, event, property_value, date)
+TTL {ttl}
+"""
+).format(
+    table_name=PROPERTY_VALUES_DATA_TABLE(),
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=SHARDED_PROPERTY_VALUES_TABLE_ENGINE(),
+    ttl=PROPERTY_VALUES_TTL,
+)
+
+ALTER_PROPERTY_VALUES_TTL_SQL = lambda: (
+    f"ALTER TABLE {PROPERTY_VALUES_DATA_TABLE()} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}' MODIFY TTL {PROPERTY_VALUES_TTL}"
+)
+
+DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL = lambda: PROPERTY_VALUES_TABLE_BASE_SQL.format(
+    table_name="property_values",
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=Distributed(data_table=PROPERTY_VALUES_DATA_TABLE(), sharding_key="rand()"),
+)
+
+DROP_PROPERTY_VALUES_TABLE_SQL = lambda: (
+    f"DROP TABLE IF EXISTS {PROPERTY_VALUES_DATA_TABLE()} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+TRUNCATE_PROPERTY_VALUES_TABLE_SQL = lambda: (
+    f"TRUNCATE TABLE IF EXISTS {PROPERTY_VALUES_DATA_TABLE()} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+# Both inserts index the rows ingested between `begin` and `end`, so that every row is indexed exactly once
+INSERT_EVENT_PROPERTY_VALUES_SQL = """
+INSERT INTO sharded_property_values (team_id, property_type, event, property_key, property_value, date, count)
+SELECT
+    team_id,
+    'event',
+    event,
+    property.1 AS property_key,
+    replaceRegexpAll(property.2, '^"|"$', '') AS property_value,
+    toDate(timestamp) AS date,
+    count() AS count
+FROM events
+ARRAY JOIN JSONExtractKeysAndValuesRaw(properties) AS property
+WHERE _timestamp >= %(begin)s AND _timestamp < %(end)s
+  -- events are ordered by timestamp, events ingested long after they happened are not worth suggesting
+  AND timestamp >= toDateTime(%(begin)s) - INTERVAL 7 DAY
+  AND property_value != '' AND property_value != 'null'
+  AND length(property_value) <= %(max_length)s
+GROUP BY team_id, event, property_key, property_value, date
+ORDER BY count DESC
+LIMIT %(top_n)s BY team_id, event, property_key, date
+"""
+
+INSERT_PERSON_PROPERTY_VALUES_SQL = """
+INSERT INTO sharded_property_values (team_id, property_type, event, property_key, property_value, date, count)
+SELECT
+    team_id,
+    'person',
+    '',
+    property.1 AS property_key,
+    replaceRegexpAll(property.2, '^"|"$', '') AS property_value,
+    toDate(_timestamp) AS date,
+    count() AS count
+FROM person
+ARRAY JOIN JSONExtractKeysAndValuesRaw(properties) AS property
+WHERE _timestamp >= %(begin)s AND _timestamp < %(end)s
+  AND is_deleted = 0
+  AND property_value != '' AND property_value != 'null'
+  AND length(property_value) <= %(max_length)s
+GROUP BY team_id, property_key, property_value, date
+ORDER BY count DESC
+LIMIT %(top_n)s BY team_id, property_key, date
+"""
+
+# Values of the key matching the searched value come first. No rows at all means the key was not indexed yet.
+SELECT_PROPERTY_VALUES_FROM_INDEX_SQL = """
+SELECT
+    property_value,
+    sum(count) AS total,
+    {value_filter} AS matches
+FROM property_values
+WHERE
+    team_id = %(team_id)s
+    AND property_type = %(property_type)s
+    AND property_key = %(key)s
+    {event_filter}
+    {date_filter}
+GROUP BY property_value
+ORDER BY matches DESC, total DESC
+LIMIT %(limit)s
+"""
@@ -38,6 +38,8 @@ class SessionRecording(UUIDModel):
     click_count: models.IntegerField = models.IntegerField(blank=True, null=True)
     keypress_count: models.IntegerField = models.IntegerField(blank=True, null=True)
     start_url: models.CharField = models.CharField(blank=True, null=True, max_length=512)
+    # Number of times the recording could not be moved to object storage, see `persist_finished_recordings`
+    persist_attempts: models.IntegerField = models.IntegerField(blank=True, null=True)
 
     # DYNAMIC FIELDS
 
@@ -72,19 +74,22 @@ class SessionRecording(UUIDModel):
             if not metadata:
                 return False
 
-            self._metadata = metadata
-
-            # Some fields of the metadata are persisted fully in the model
-            self.distinct_id = metadata["distinct_id"]
-            self.start_time = metadata["start_time"]
-            self.end_time = metadata["end_time"]
-            self.duration = metadata["duration"]
-            self.click_count = metadata["click_count"]
-            self.keypress_count = metadata["keypress_count"]
-            self.set_start_url_from_urls(metadata["urls"])
+            self.set_metadata(metadata)
 
         return True
 
+    def set_metadata(self, metadata: RecordingMetadata) -> None:
+        self._metadata = metadata
+
+        # Some fields of the metadata are persisted fully in the model
+        self.distinct_id = metadata["distinct_id"]
+        self.start_time = metadata["start_time"]
+        self.end_time = metadata["end_time"]
+        self.duration = metadata["duration"]
+        self.click_count = metadata["click_count"]
+        self.keypress_count = metadata["keypress_count"]
+        self.set_start_url_from_urls(metadata["urls"])
+
     def load_snapshots(self, limit=20, offset=0) -> None:
         from posthog.queries.session_recordings.session_recording_events import SessionRecordingEvents
 
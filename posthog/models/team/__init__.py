@@ -1,2 +1,8 @@
 from .team import *
-from .team_caching import get_team_in_cache, set_team_in_cache
+from .team_caching import (
+    delete_decide_config_in_cache,
+    get_decide_config_in_cache,
+    get_team_in_cache,
+    set_decide_config_in_cache,
+    set_team_in_cache,
+)
@@ -0,0 +1,132 @@
+"""
+Bloom filter of project API tokens, letting capture and decide reject tokens that belong to no team without a
+Postgres round trip.
+
+The filter is rebuilt periodically by the `rebuild_api_token_filter` Celery task and stored in Redis, where saving a
+team sets the bits of its token. Every process keeps a copy of it in memory, reloaded every
+API_TOKEN_FILTER_RELOAD_SECONDS, so a token created in another process may only be found in the team cache for up to
+that long. Without a filter in Redis, for instance before the task first ran, every token is let through.
+"""
+import hashlib
+import time
+from typing import Iterator, Optional, Tuple
+
+import structlog
+from django.conf import settings
+from django.utils import timezone
+from sentry_sdk import capture_exception
+
+from posthog.redis import get_client
+
+logger = structlog.get_logger(__name__)
+
+API_TOKEN_FILTER_REDIS_KEY = "posthog:api_token_filter"
+# With this many bits and hash functions per token, about 1 in 1000 unknown tokens gets through the filter
+BITS_PER_TOKEN = 15
+HASH_COUNT = 10
+# Room for teams created before the next rebuild, so the false positive rate holds until then
+MIN_CAPACITY = 1000
+CAPACITY_HEADROOM = 1.5
+
+# When the copy was loaded (in time.monotonic() seconds) and the filter, None if Redis had none
+_local_filter: Optional[Tuple[float, Optional["TokenBloomFilter"]]] = None
+
+
+class TokenBloomFilter:
+    """
+    Bits are numbered from the most significant one of each byte, like Redis SETBIT does, so the filter can be stored
+    in and updated through a plain Redis string.
+    """
+
+    def __init__(self, bits: bytes):
+        self.bits = bytearray(bits)
+        self.size = len(self.bits) * 8
+
+    @classmethod
+    def for_capacity(cls, token_count: int) -> "TokenBloomFilter":
+        capacity = max(int(token_count * CAPACITY_HEADROOM), MIN_CAPACITY)
+        return cls(bytes(-(-capacity * BITS_PER_TOKEN // 8)))
+
+    def add(self, token: str) -> None:
+        for position in bit_positions(token, self.size):
+            self.bits[position >> 3] |= 0x80 >> (position & 7)
+
+    def __contains__(self, token: str) -> bool:
+        return all(self.bits[position >> 3] & (0x80 >> (position & 7)) for position in bit_positions(token, self.size))
+
+
+def bit_positions(token: str, size: int) -> Iterator[int]:
+    # Double hashing, which is as good as HASH_COUNT independent hash functions for a bloom filter
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "little")
+    second = int.from_bytes(digest[8:], "little") | 1
+    for index in range(HASH_COUNT):
+        yield (first + index * second) % size
+
+
+def might_be_team_api_token(token: str) -> bool:
+    "False only for tokens that belonged to no team when this process last loaded the filter"
+    if settings.API_TOKEN_FILTER_RELOAD_SECONDS <= 0:
+        return True
+    token_filter = _get_local_filter()
+    return token_filter is None or token in token_filter
+
+
+def _get_local_filter() -> Optional[TokenBloomFilter]:
+    global _local_filter
+
+    now = time.monotonic()
+    if _local_filter is not None and now - _local_filter[0] < settings.API_TOKEN_FILTER_RELOAD_SECONDS:
+        return _local_filter[1]
+
+    try:
+        bits = get_client().get(API_TOKEN_FILTER_REDIS_KEY)
+    except Exception as e:
+        # redis is unavailable, keep using the copy we have
+        logger.warning("api_token_filter_load_failed", exc_info=e)
+        _local_filter = (now, _local_filter[1] if _local_filter is not None else None)
+        return _local_filter[1]
+
+    _local_filter = (now, TokenBloomFilter(bits) if bits else None)
+    return _local_filter[1]
+
+
+def add_api_token_to_filter(token: str) -> None:
+    "Lets `token` through the filter, in this process right away and in others once they reload it"
+    if _local_filter is not None and _local_filter[1] is not None:
+        _local_filter[1].add(token)
+
+    try:
+        client = get_client()
+        size = client.strlen(API_TOKEN_FILTER_REDIS_KEY) * 8
+        if not size:
+            # No filter to add to, the next rebuild picks the token up
+            return
+        pipeline = client.pipeline(transaction=False)
+        for position in bit_positions(token, size):
+            pipeline.setbit(API_TOKEN_FILTER_REDIS_KEY, position, 1)
+        pipeline.execute()
+    except Exception as e:
+        # Other processes reject the token until the next rebuild
+        logger.warning("api_token_filter_add_failed", exc_info=e)
+        capture_exception(e)
+
+
+def rebuild_api_token_filter() -> None:
+    """
+    Builds the filter from scratch, dropping the tokens of deleted teams and resizing it for the current team count.
+    """
+    from posthog.models.team import Team
+
+    started_at = timezone.now()
+    token_filter = TokenBloomFilter.for_capacity(Team.objects.count())
+    for token in Team.objects.values_list("api_token", flat=True).iterator():
+        token_filter.add(token)
+
+    get_client().set(API_TOKEN_FILTER_REDIS_KEY, bytes(token_filter.bits))
+
+    # Teams saved while the filter was built had their tokens added to the previous one
+    for token in Team.objects.filter(updated_at__gte=started_at).values_list("api_token", flat=True):
+        add_api_token_to_filter(token)
+
+    logger.info("api_token_filter_rebuilt", size=token_filter.size)
@@ -23,7 +23,14 @@ from posthog.models.utils import UUIDClassicModel, generate_random_token_project
 from posthog.settings.utils import get_list
 from posthog.utils import GenericEmails, PersonOnEventsMode
 
-from .team_caching import get_team_in_cache, set_team_in_cache
+from .api_token_filter import add_api_token_to_filter, might_be_team_api_token
+from .team_caching import (
+    delete_decide_config_in_cache,
+    get_team_in_cache,
+    is_invalid_token_in_cache,
+    set_invalid_token_in_cache,
+    set_team_in_cache,
+)
 
 TIMEZONES = [(tz, tz) for tz in pytz.common_timezones]
 
@@ -96,12 +103,17 @@ class TeamManager(models.Manager):
             team = get_team_in_cache(token)
             if team:
                 return team
+            # A team created in another process since this one loaded the filter may be cached, so only Postgres is
+            # skipped for tokens the filter rejects
+            if not might_be_team_api_token(token) or is_invalid_token_in_cache(token):
+                return None
 
             team = Team.objects.get(api_token=token)
             set_team_in_cache(token, team)
             return team
 
         except Team.DoesNotExist:
+            set_invalid_token_in_cache(token)
             return None
 
 
@@ -296,11 +308,14 @@ class Team(UUIDClassicModel):
 @mutable_receiver(post_save, sender=Team)
 def put_team_in_cache_on_save(sender, instance: Team, **kwargs):
     set_team_in_cache(instance.api_token, instance)
+    delete_decide_config_in_cache(instance.pk)
+    add_api_token_to_filter(instance.api_token)
 
 
 @mutable_receiver(post_delete, sender=Team)
 def delete_team_in_cache_on_delete(sender, instance: Team, **kwargs):
     set_team_in_cache(instance.api_token, None)
+    delete_decide_config_in_cache(instance.pk)
 
 
 def groups_on_events_querying_enabled():
@@ -1,6 +1,8 @@
 import json
-from typing import TYPE_CHECKING, Optional
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
+from django.conf import settings
 from django.core.cache import cache
 from sentry_sdk import capture_exception
 
@@ -8,6 +10,11 @@ if TYPE_CHECKING:
     from posthog.models.team import Team
 
 FIVE_DAYS = 60 * 60 * 24 * 5  # 5 days in seconds
+# Above this many teams, the process-local copies of decide configs are dropped rather than grown further
+MAX_LOCAL_DECIDE_CONFIGS = 10_000
+
+# Team id to when the copy expires (in time.monotonic() seconds) and the decide config
+_local_decide_configs: Dict[int, Tuple[float, Dict[str, Any]]] = {}
 
 
 def set_team_in_cache(token: str, team: Optional["Team"] = None) -> None:
@@ -24,6 +31,7 @@ def set_team_in_cache(token: str, team: Optional["Team"] = None) -> None:
     serialized_team = CachingTeamSerializer(team).data
 
     cache.set(f"team_token:{token}", json.dumps(serialized_team), FIVE_DAYS)
+    cache.delete(f"team_token_invalid:{token}")
 
 
 def get_team_in_cache(token: str) -> Optional["Team"]:
@@ -44,3 +52,71 @@ def get_team_in_cache(token: str) -> Optional["Team"]:
             return None
 
     return None
+
+
+def set_invalid_token_in_cache(token: str) -> None:
+    "Remembers that no team has `token` for INVALID_API_TOKEN_CACHE_SECONDS, or until a team is saved with it"
+    if settings.INVALID_API_TOKEN_CACHE_SECONDS <= 0:
+        return
+    try:
+        cache.set(f"team_token_invalid:{token}", True, settings.INVALID_API_TOKEN_CACHE_SECONDS)
+    except Exception:
+        # redis is unavailable
+        pass
+
+
+def is_invalid_token_in_cache(token: str) -> bool:
+    if settings.INVALID_API_TOKEN_CACHE_SECONDS <= 0:
+        return False
+    try:
+        return bool(cache.get(f"team_token_invalid:{token}"))
+    except Exception:
+        # redis is unavailable
+        return False
+
+
+def get_decide_config_in_cache(team_id: int) -> Optional[Dict[str, Any]]:
+    "The decide config of a team computed by `posthog.api.decide.get_team_decide_config`, if cached"
+    local = _local_decide_configs.get(team_id)
+    if local is not None and local[0] > time.monotonic():
+        return local[1]
+
+    try:
+        config_data = cache.get(f"team_decide_config_{team_id}")
+    except Exception:
+        # redis is unavailable
+        return None
+
+    if config_data:
+        try:
+            config = json.loads(config_data)
+        except Exception as e:
+            capture_exception(e)
+            return None
+        set_decide_config_in_local_cache(team_id, config)
+        return config
+
+    return None
+
+
+def set_decide_config_in_cache(team_id: int, config: Dict[str, Any]) -> None:
+    cache.set(f"team_decide_config_{team_id}", json.dumps(config), FIVE_DAYS)
+    set_decide_config_in_local_cache(team_id, config)
+
+
+def set_decide_config_in_local_cache(team_id: int, config: Dict[str, Any]) -> None:
+    if settings.DECIDE_CONFIG_LOCAL_CACHE_SECONDS <= 0:
+        return
+    if len(_local_decide_configs) >= MAX_LOCAL_DECIDE_CONFIGS:
+        _local_decide_configs.clear()
+    _local_decide_configs[team_id] = (time.monotonic() + settings.DECIDE_CONFIG_LOCAL_CACHE_SECONDS, config)
+
+
+def delete_decide_config_in_cache(*team_ids: int) -> None:
+    """
+    Drops cached decide configs so that the next decide request recomputes them. Other processes keep using their
+    local copies for up to DECIDE_CONFIG_LOCAL_CACHE_SECONDS.
+    """
+    for team_id in team_ids:
+        _local_decide_configs.pop(team_id, None)
+    cache.delete_many([f"team_decide_config_{team_id}" for team_id in team_ids])
@@ -138,6 +138,7 @@ class TestAsyncDeletion(ClickhouseTestMixin, ClickhouseDestroyTablesMixin, BaseT
         AsyncEventDeletion().run()
 
         self.assertRowCount(0)
+        self.assertRowCount(0, "events_hourly_rollup")
 
     @snapshot_clickhouse_alter_queries
     def test_delete_teams_unrelated(self):
@@ -150,6 +151,7 @@ class TestAsyncDeletion(ClickhouseTestMixin, ClickhouseDestroyTablesMixin, BaseT
         AsyncEventDeletion().run()
 
         self.assertRowCount(1)
+        self.assertRowCount(1, "events_hourly_rollup")
 
     @snapshot_clickhouse_alter_queries
     def test_delete_person(self):
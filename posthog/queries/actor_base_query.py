@@ -2,6 +2,7 @@ import uuid
 from datetime import datetime
 from typing import (
     Any,
+    Callable,
     Dict,
     List,
     Literal,
@@ -9,10 +10,13 @@ from typing import (
     Set,
     Tuple,
     TypedDict,
+    TypeVar,
     Union,
     cast,
 )
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import OuterRef, Subquery
 from django.db.models.query import Prefetch, QuerySet
 
@@ -115,6 +119,9 @@ class ActorBaseQuery:
 
     def query_for_session_ids_with_recordings(self, session_ids: Set[str]) -> Set[str]:
         """Filters a list of session_ids to those that actually have recordings"""
+        if not session_ids:
+            return set()
+
         query = """
         SELECT DISTINCT session_id
         FROM session_recording_events
@@ -191,12 +198,20 @@ class ActorBaseQuery:
         actor_ids = [row[0] for row in raw_result]
         value_per_actor_id = {str(row[0]): row[1] for row in raw_result} if self.ACTOR_VALUES_INCLUDED else None
 
+        properties_to_include = getattr(self._filter, "actor_properties", None)
+
         if self.is_aggregating_by_groups:
             actors, serialized_actors = get_groups(
-                self._team.pk, cast(int, self.aggregation_group_type_index), actor_ids, value_per_actor_id
+                self._team.pk,
+                cast(int, self.aggregation_group_type_index),
+                actor_ids,
+                value_per_actor_id,
+                properties_to_include=properties_to_include,
             )
         else:
-            actors, serialized_actors = get_people(self._team, actor_ids, value_per_actor_id)
+            actors, serialized_actors = get_people(
+                self._team, actor_ids, value_per_actor_id, properties_to_include=properties_to_include
+            )
 
         if self.ACTOR_VALUES_INCLUDED:
             # We fetched actors from Postgres in get_groups/get_people, so `ORDER BY actor_value DESC` no longer holds
@@ -206,38 +221,132 @@ class ActorBaseQuery:
         return actors, serialized_actors
 
 
+# Actors are loaded from Postgres in chunks, to keep `IN` lists at a reasonable size
+ACTOR_HYDRATION_CHUNK_SIZE = 1000
+
+
 def get_groups(
-    team_id: int, group_type_index: int, group_ids: List[Any], value_per_actor_id: Optional[Dict[str, float]] = None
+    team_id: int,
+    group_type_index: int,
+    group_ids: List[Any],
+    value_per_actor_id: Optional[Dict[str, float]] = None,
+    properties_to_include: Optional[List[str]] = None,
 ) -> Tuple[QuerySet[Group], List[SerializedGroup]]:
     """Get groups from raw SQL results in data model and dict formats"""
     groups: QuerySet[Group] = Group.objects.filter(
         team_id=team_id, group_type_index=group_type_index, group_key__in=group_ids
     )
-    return groups, serialize_groups(groups, value_per_actor_id)
+
+    def load_groups(group_keys: List[str]) -> Dict[str, SerializedGroup]:
+        chunk = Group.objects.filter(team_id=team_id, group_type_index=group_type_index, group_key__in=group_keys).only(
+            "group_key", "group_type_index", "created_at", "group_properties"
+        )
+        return {
+            group.group_key: serialized_group for group, serialized_group in zip(chunk, serialize_groups(chunk, None))
+        }
+
+    serialized_groups = _get_cached_actors(
+        f"actor_group_{team_id}_{group_type_index}", [str(group_id) for group_id in group_ids], load_groups
+    )
+    return groups, [
+        _with_actor_data(serialized_group, value_per_actor_id, properties_to_include)
+        for serialized_group in serialized_groups
+    ]
 
 
 def get_people(
-    team: Team, people_ids: List[Any], value_per_actor_id: Optional[Dict[str, float]] = None, distinct_id_limit=1000
+    team: Team,
+    people_ids: List[Any],
+    value_per_actor_id: Optional[Dict[str, float]] = None,
+    distinct_id_limit=1000,
+    properties_to_include: Optional[List[str]] = None,
 ) -> Tuple[QuerySet[Person], List[SerializedPerson]]:
     """Get people from raw SQL results in data model and dict formats"""
+    persons = _get_persons_queryset(team, people_ids, distinct_id_limit)
+
+    def load_people(uuids: List[str]) -> Dict[str, SerializedPerson]:
+        return {
+            str(serialized_person["uuid"]): serialized_person
+            for serialized_person in serialize_people(team, _get_persons_queryset(team, uuids, distinct_id_limit), None)
+        }
+
+    serialized_people = _get_cached_actors(
+        f"actor_person_{team.pk}_{distinct_id_limit}", [str(person_id) for person_id in people_ids], load_people
+    )
+    # Same order as the persons queryset
+    serialized_people.sort(key=lambda serialized_person: str(serialized_person["uuid"]))
+    serialized_people.sort(key=lambda serialized_person: cast(datetime, serialized_person["created_at"]), reverse=True)
+    return persons, [
+        _with_actor_data(serialized_person, value_per_actor_id, properties_to_include)
+        for serialized_person in serialized_people
+    ]
+
+
+def _get_persons_queryset(team: Team, people_ids: List[Any], distinct_id_limit: int) -> QuerySet[Person]:
     distinct_id_subquery = Subquery(
         PersonDistinctId.objects.filter(person_id=OuterRef("person_id")).values_list("id", flat=True)[
             :distinct_id_limit
         ]
     )
-    persons: QuerySet[Person] = (
+    return (
         Person.objects.filter(team_id=team.pk, uuid__in=people_ids)
         .prefetch_related(
             Prefetch(
                 "persondistinctid_set",
                 to_attr="distinct_ids_cache",
-                queryset=PersonDistinctId.objects.filter(id__in=distinct_id_subquery),
+                queryset=PersonDistinctId.objects.filter(id__in=distinct_id_subquery).only(
+                    "id", "person_id", "distinct_id"
+                ),
             )
         )
         .order_by("-created_at", "uuid")
         .only("id", "is_identified", "created_at", "properties", "uuid")
     )
-    return persons, serialize_people(team, persons, value_per_actor_id)
+
+
+SerializedActorType = TypeVar("SerializedActorType", SerializedPerson, SerializedGroup)
+
+
+def _get_cached_actors(
+    cache_key_prefix: str, actor_ids: List[str], load: Callable[[List[str]], Dict[str, SerializedActorType]]
+) -> List[SerializedActorType]:
+    """
+    Serialized actors by id, from the cache where possible, with the missing ones loaded chunk by chunk.
+    Actors are often shown again right away (next funnel step, next page of the persons modal), which the short lived
+    cache saves the Postgres round trips for. Actors which don't exist (anymore) are left out.
+    """
+    cache_keys = {actor_id: f"{cache_key_prefix}_{actor_id}" for actor_id in dict.fromkeys(actor_ids)}
+    cached_actors = cache.get_many(list(cache_keys.values())) if settings.ACTOR_CACHE_TTL_SECONDS else {}
+    actors: Dict[str, SerializedActorType] = {
+        actor_id: cached_actors[cache_key] for actor_id, cache_key in cache_keys.items() if cache_key in cached_actors
+    }
+
+    missing_actor_ids = [actor_id for actor_id in cache_keys if actor_id not in actors]
+    for index in range(0, len(missing_actor_ids), ACTOR_HYDRATION_CHUNK_SIZE):
+        loaded_actors = load(missing_actor_ids[index : index + ACTOR_HYDRATION_CHUNK_SIZE])
+        if settings.ACTOR_CACHE_TTL_SECONDS:
+            cache.set_many(
+                {cache_keys[actor_id]: actor for actor_id, actor in loaded_actors.items() if actor_id in cache_keys},
+                settings.ACTOR_CACHE_TTL_SECONDS,
+            )
+        actors.update(loaded_actors)
+
+    return [actors[actor_id] for actor_id in cache_keys if actor_id in actors]
+
+
+def _with_actor_data(
+    serialized_actor: SerializedActorType,
+    value_per_actor_id: Optional[Dict[str, float]],
+    properties_to_include: Optional[List[str]],
+) -> SerializedActorType:
+    "Copy of the (possibly cached) serialized actor, with the data of this query"
+    actor = cast(SerializedActorType, {**serialized_actor, "matched_recordings": []})
+    actor["value_at_data_point"] = value_per_actor_id[str(actor["id"])] if value_per_actor_id else None
+    if properties_to_include is not None:
+        actor["properties"] = {
+            key: value for key, value in serialized_actor["properties"].items() if key in properties_to_include
+        }
+    return actor
 
 
 def serialize_people(
@@ -10,6 +10,8 @@ from posthog.models.filters.mixins.utils import cached_property
 from posthog.models.property import BehavioralPropertyType, OperatorInterval, Property, PropertyGroup, PropertyName
 from posthog.models.property.util import prop_filter_json_extract
 from posthog.queries.event_query import EventQuery
+from posthog.queries.person_distinct_id_query import get_team_distinct_ids_query
+from posthog.queries.person_query import PersonQuery
 from posthog.queries.util import PersonPropertiesMode
 from posthog.utils import PersonOnEventsMode
 
@@ -124,6 +126,8 @@ class FOSSCohortQuery(EventQuery):
         extra_event_properties: List[PropertyName] = [],
         extra_person_fields: List[ColumnName] = [],
         override_aggregate_users_by_distinct_id: Optional[bool] = None,
+        # Subquery returning person ids, only these persons are evaluated against the cohort filter
+        person_ids_query: Optional[str] = None,
         **kwargs,
     ) -> None:
         self._fields = []
@@ -131,6 +135,7 @@ class FOSSCohortQuery(EventQuery):
         self._earliest_time_for_event_query = None
         self._restrict_event_query_by_time = True
         self._cohort_pk = cohort_pk
+        self._person_ids_query = person_ids_query
 
         super().__init__(
             filter=FOSSCohortQuery.unwrap_cohort(filter, team.pk),
@@ -322,6 +327,7 @@ class FOSSCohortQuery(EventQuery):
             WHERE team_id = %(team_id)s
             AND event IN %({event_param_name})s
             {date_condition}
+            {self._get_person_ids_condition()}
             {person_prop_query}
             GROUP BY person_id
             """
@@ -343,6 +349,31 @@ class FOSSCohortQuery(EventQuery):
 
         return query, params, self.PERSON_TABLE_ALIAS
 
+    @cached_property
+    def _person_query(self) -> PersonQuery:
+        return PersonQuery(
+            self._filter,
+            self._team_id,
+            self._column_optimizer,
+            extra_fields=self._extra_person_fields,
+            person_ids_query=self._person_ids_query,
+        )
+
+    def _get_person_ids_condition(self) -> str:
+        if not self._person_ids_query:
+            return ""
+
+        if self._person_on_events_mode != PersonOnEventsMode.DISABLED:
+            return f"AND {self._person_id_alias} IN ({self._person_ids_query})"
+
+        # Filter on distinct_id so that only the events of these persons are read, rather than after the join
+        return f"""
+            AND {self.EVENT_TABLE_ALIAS}.distinct_id IN (
+                SELECT distinct_id FROM ({get_team_distinct_ids_query(self._team_id)})
+                WHERE person_id IN ({self._person_ids_query})
+            )
+        """
+
     @cached_property
     def should_pushdown_persons(self) -> bool:
         return "person" not in [
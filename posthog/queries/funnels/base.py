@@ -1,12 +1,15 @@
 import urllib.parse
 import uuid
 from abc import ABC
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
+import structlog
 from rest_framework.exceptions import ValidationError
 
 from posthog.clickhouse.materialized_columns import ColumnName
 from posthog.constants import (
+    FUNNEL_STEP_BREAKDOWN,
     FUNNEL_WINDOW_INTERVAL,
     FUNNEL_WINDOW_INTERVAL_UNIT,
     LIMIT,
@@ -31,13 +34,22 @@ from posthog.queries.breakdown_props import (
     get_breakdown_prop_values,
 )
 from posthog.queries.funnels.funnel_event_query import FunnelEventQuery
+from posthog.queries.funnels.sliced import SlicedFunnelQuery, is_insert_quorum_error
 from posthog.queries.insight import insight_sync_execute
-from posthog.queries.util import correct_result_for_sampling, get_person_properties_mode
-from posthog.utils import PersonOnEventsMode, relative_date_parse
+from posthog.queries.util import (
+    correct_result_for_sampling,
+    get_person_properties_mode,
+    sampling_confidence_intervals,
+)
+from posthog.utils import PersonOnEventsMode, encode_get_request_params, relative_date_parse
+
+logger = structlog.get_logger(__name__)
 
 
 class ClickhouseFunnelBase(ABC):
     QUERY_TYPE = "funnel_base"  # should be overridden in subclasses
+    # Whether `run` can compute the funnel one slice of the date range at a time, see `SlicedFunnelQuery`
+    SLICED_EXECUTION_SUPPORTED = False
 
     _filter: Filter
     _team: Team
@@ -46,6 +58,8 @@ class ClickhouseFunnelBase(ABC):
     _extra_event_fields: List[ColumnName]
     _extra_event_properties: List[PropertyName]
     _include_properties: List[str]
+    # When computing a slice of a sliced funnel, the end of the entries into the funnel of the slice
+    _slice_entries_before: Optional[datetime] = None
 
     def __init__(
         self,
@@ -67,6 +81,7 @@ class ClickhouseFunnelBase(ABC):
         self._include_timestamp = include_timestamp
         self._include_preceding_timestamp = include_preceding_timestamp
         self._include_properties = include_properties or []
+        self._people_url_prefixes: Dict[Tuple[int, bool], str] = {}
 
         self._filter.hogql_context.person_on_events_mode = team.person_on_events_mode
 
@@ -203,6 +218,9 @@ class ClickhouseFunnelBase(ABC):
             serialized_result = self._serialize_step(
                 step, total_people, [], self._filter.sampling_factor
             )  # persons not needed on initial return
+            confidence_intervals = sampling_confidence_intervals([total_people], self._filter.sampling_factor)
+            if confidence_intervals is not None:
+                serialized_result["count_confidence_interval"] = confidence_intervals[0]
             if cast(int, step.index) > 0:
                 serialized_result.update(
                     {
@@ -215,8 +233,7 @@ class ClickhouseFunnelBase(ABC):
 
             # Construct converted and dropped people URLs
             funnel_step = step.index + 1
-            converted_people_filter = self._filter.shallow_clone({"funnel_step": funnel_step})
-            dropped_people_filter = self._filter.shallow_clone({"funnel_step": -funnel_step})
+            people_url_breakdown_value: Optional[Any] = None
 
             if with_breakdown:
                 # breakdown will return a display ready value
@@ -233,16 +250,15 @@ class ClickhouseFunnelBase(ABC):
                 # are keys for fetching persons
 
                 # Add in the breakdown to people urls as well
-                converted_people_filter = converted_people_filter.shallow_clone(
-                    {"funnel_step_breakdown": breakdown_value}
-                )
-                dropped_people_filter = dropped_people_filter.shallow_clone({"funnel_step_breakdown": breakdown_value})
+                people_url_breakdown_value = breakdown_value
 
             serialized_result.update(
                 {
-                    "converted_people_url": f"{self._base_uri}api/person/funnel/?{urllib.parse.urlencode(converted_people_filter.to_params())}",
+                    "converted_people_url": self._get_people_url(
+                        funnel_step, with_breakdown, people_url_breakdown_value
+                    ),
                     "dropped_people_url": (
-                        f"{self._base_uri}api/person/funnel/?{urllib.parse.urlencode(dropped_people_filter.to_params())}"
+                        self._get_people_url(-funnel_step, with_breakdown, people_url_breakdown_value)
                         # NOTE: If we are looking at the first step, there is no drop off,
                         # everyone converted, otherwise they would not have been
                         # included in the funnel.
@@ -256,6 +272,25 @@ class ClickhouseFunnelBase(ABC):
 
         return steps[::-1]  # reverse
 
+    def _get_people_url(self, funnel_step: int, with_breakdown: bool, breakdown_value: Optional[Any]) -> str:
+        """People url of a step (negative for people who dropped off before it), for a breakdown value if given"""
+        prefix_key = (funnel_step, with_breakdown)
+        if prefix_key not in self._people_url_prefixes:
+            # Serializing the filter is slow, so it's done once per step rather than for every breakdown value
+            people_filter = self._filter.shallow_clone(
+                {"funnel_step": funnel_step, **({FUNNEL_STEP_BREAKDOWN: None} if with_breakdown else {})}
+            )
+            self._people_url_prefixes[
+                prefix_key
+            ] = f"{self._base_uri}api/person/funnel/?{urllib.parse.urlencode(people_filter.to_params())}"
+
+        people_url = self._people_url_prefixes[prefix_key]
+        if breakdown_value is not None:
+            people_url += (
+                f"&{urllib.parse.urlencode(encode_get_request_params({FUNNEL_STEP_BREAKDOWN: breakdown_value}))}"
+            )
+        return people_url
+
     def _format_results(self, results):
         if not results or len(results) == 0:
             return []
@@ -266,6 +301,17 @@ class ClickhouseFunnelBase(ABC):
             return self._format_single_funnel(results[0])
 
     def _exec_query(self) -> List[Tuple]:
+        if self.SLICED_EXECUTION_SUPPORTED:
+            sliced_query = SlicedFunnelQuery(self)
+            if sliced_query.is_eligible:
+                try:
+                    return sliced_query.run()
+                except Exception as err:
+                    # Slices can't be read back reliably while a replica is down, so run the funnel as a whole
+                    if not is_insert_quorum_error(err):
+                        raise
+                    logger.warning("funnel_sliced_execution_unavailable", team_id=self._team.pk, exc_info=True)
+
         query = self.get_query()
         return insight_sync_execute(
             query,
@@ -322,6 +368,13 @@ class ClickhouseFunnelBase(ABC):
         else:
             return "", ""
 
+    def _get_slice_entries_condition(self) -> str:
+        "Drops entries into the funnel past the end of the slice being computed, if any"
+        if self._slice_entries_before is None:
+            return ""
+        self.params["funnel_slice_entries_before"] = self._slice_entries_before.strftime("%Y-%m-%d %H:%M:%S")
+        return "AND timestamp < toDateTime(%(funnel_slice_entries_before)s, %(timezone)s)"
+
     def _get_step_times(self, max_steps: int):
         conditions: List[str] = []
         for i in range(1, max_steps):
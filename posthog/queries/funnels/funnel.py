@@ -27,6 +27,7 @@ class ClickhouseFunnel(ClickhouseFunnelBase):
     """
 
     QUERY_TYPE = "funnel"
+    SLICED_EXECUTION_SUPPORTED = True
 
     def get_query(self):
         max_steps = len(self._filter.entities)
@@ -69,7 +70,7 @@ class ClickhouseFunnel(ClickhouseFunnelBase):
         return f"""
         SELECT *, {self._get_sorting_condition(max_steps, max_steps)} AS steps {exclusion_clause} {self._get_step_times(max_steps)}{self._get_matching_events(max_steps)} {breakdown_query} {self._get_person_and_group_properties()} FROM (
             {formatted_query}
-        ) WHERE step_0 = 1
+        ) WHERE step_0 = 1 {self._get_slice_entries_condition()}
         {'AND exclusion = 0' if exclusion_clause else ''}
         """
 
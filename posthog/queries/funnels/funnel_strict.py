@@ -5,6 +5,7 @@ from posthog.queries.funnels.base import ClickhouseFunnelBase
 
 class ClickhouseFunnelStrict(ClickhouseFunnelBase):
     QUERY_TYPE = "funnel_strict"
+    SLICED_EXECUTION_SUPPORTED = True
 
     def get_query(self):
         max_steps = len(self._filter.entities)
@@ -53,7 +54,7 @@ class ClickhouseFunnelStrict(ClickhouseFunnelBase):
         formatted_query = f"""
             SELECT *, {sorting_condition} AS steps {self._get_step_times(max_steps)}{self._get_matching_events(max_steps)} {self._get_person_and_group_properties()} FROM (
                     {inner_query}
-                ) WHERE step_0 = 1"""
+                ) WHERE step_0 = 1 {self._get_slice_entries_condition()}"""
 
         return formatted_query
 
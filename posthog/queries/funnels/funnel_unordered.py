@@ -35,6 +35,7 @@ class ClickhouseFunnelUnordered(ClickhouseFunnelBase):
     """
 
     QUERY_TYPE = "funnel_unordered"
+    SLICED_EXECUTION_SUPPORTED = True
 
     def _serialize_step(
         self,
@@ -110,7 +111,7 @@ class ClickhouseFunnelUnordered(ClickhouseFunnelBase):
             formatted_query = f"""
                 SELECT *, {sorting_condition} AS steps {exclusion_clause} {self._get_step_times(max_steps)} {self._get_person_and_group_properties()} FROM (
                         {inner_query}
-                    ) WHERE step_0 = 1
+                    ) WHERE step_0 = 1 {self._get_slice_entries_condition()}
                     {'AND exclusion = 0' if exclusion_clause else ''}
                     """
 
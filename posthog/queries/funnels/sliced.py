@@ -0,0 +1,326 @@
+import hashlib
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import pytz
+import structlog
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from posthog.clickhouse.query_tagging import get_query_tags, reset_query_tags, tag_queries
+from posthog.constants import EXPLICIT_DATE
+from posthog.models.filters.mixins.utils import cached_property
+from posthog.client import sync_execute
+from posthog.models.funnel_slice_results.sql import (
+    FUNNEL_SLICE_RESULTS_REPLICAS_SQL,
+    FUNNEL_SLICE_RESULTS_TTL_DAYS,
+    INSERT_FUNNEL_SLICE_RESULTS_SQL,
+)
+from posthog.queries.funnels.sql import (
+    FUNNEL_INLINE_SLICE_STEP_COUNTS_SQL,
+    FUNNEL_SLICES_MERGED_CONVERSION_TIMES_SQL,
+    FUNNEL_SLICE_STEP_COUNTS_SQL,
+    FUNNEL_SLICES_STEP_COUNTS_SQL,
+)
+from posthog.queries.insight import insight_sync_execute
+from posthog.queries.query_date_range import QueryDateRange
+from posthog.utils import PersonOnEventsMode
+
+if TYPE_CHECKING:
+    from posthog.queries.funnels.base import ClickhouseFunnelBase
+
+logger = structlog.get_logger(__name__)
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Events keep arriving for a while after they happened, so slices are only kept once all of their events are this old
+SLICE_SETTLED_AFTER = timedelta(days=1)
+# Finished slices are looked up for a day less than their rows are kept, so that they're never read half expired
+SLICE_RUN_CACHE_TTL_SECONDS = (FUNNEL_SLICE_RESULTS_TTL_DAYS - 1) * 24 * 60 * 60
+# Without person-on-events slices are aggregated by the persons of distinct ids at the time they were written, which
+# merges change. They're reused for as long as insight results are cached before a refresh (see TargetCacheAge)
+SLICE_RUN_CACHE_TTL_WITHOUT_PERSONS_ON_EVENTS_SECONDS = 24 * 60 * 60
+# Property filters whose matches change over time without new events, unless person properties are on events
+PERSON_PROPERTY_TYPES = {"person", "cohort", "precalculated-cohort", "static-cohort", "hogql"}
+# How long writing a slice waits for all replicas to have it
+SLICE_INSERT_QUORUM_TIMEOUT_MS = 60_000
+# Errors of inserts whose rows may be missing on some replicas, which sliced execution can't be used without
+INSERT_QUORUM_ERROR_CODES = {
+    285,  # TOO_FEW_LIVE_REPLICAS
+    286,  # UNSATISFIED_QUORUM_FOR_PREVIOUS_WRITE
+    289,  # REPLICA_IS_NOT_IN_QUORUM
+    319,  # UNKNOWN_STATUS_OF_INSERT
+}
+
+# Entries into the funnel of a slice, from the first datetime and before the second one, if any
+EntryRange = Tuple[datetime, Optional[datetime]]
+
+
+class SlicedFunnelQuery:
+    """
+    Runs a funnel over a long date range as one query per slice of the range, by when actors entered the funnel. Each
+    slice reads the events of its entries and of their conversion window, so the steps an entry reaches are the same as
+    in a funnel over the whole range. Actors count with their best attempt across slices, as they do in one query.
+
+    Slices whose events are done changing are written to `funnel_slice_results` in parallel, and are reused by later
+    runs of the same funnel, so refreshing a year long funnel only reads the latest events. The slice that's still
+    changing is computed by the query merging slices.
+    """
+
+    def __init__(self, funnel: "ClickhouseFunnelBase") -> None:
+        self._funnel = funnel
+        self._filter = funnel._filter
+        self._team = funnel._team
+
+    @cached_property
+    def is_eligible(self) -> bool:
+        if settings.FUNNEL_SLICED_EXECUTION_MIN_DAYS <= 0:
+            return False
+        # Breakdown values and attribution are picked over the whole date range, and exclusions look past conversion
+        # windows, so these can't be computed one slice at a time
+        if self._filter.breakdown or self._filter.exclusions:
+            return False
+        if self._filter.include_recordings or self._filter.funnel_step is not None:
+            return False
+        # Stored slices would keep counting persons by the properties and cohorts they had when the slice was written
+        if self._team.person_on_events_mode == PersonOnEventsMode.DISABLED and self._has_person_filters:
+            return False
+        if self._date_to - self._date_from < timedelta(days=settings.FUNNEL_SLICED_EXECUTION_MIN_DAYS):
+            return False
+        return len(self._settled_entry_ranges) > 0
+
+    @property
+    def _has_person_filters(self) -> bool:
+        properties = [*self._filter.property_groups.flat]
+        for entity in self._filter.entities:
+            properties.extend(entity.property_groups.flat)
+        return any(prop.type in PERSON_PROPERTY_TYPES for prop in properties)
+
+    @property
+    def _slice_run_cache_ttl(self) -> int:
+        if self._team.person_on_events_mode == PersonOnEventsMode.DISABLED:
+            return SLICE_RUN_CACHE_TTL_WITHOUT_PERSONS_ON_EVENTS_SECONDS
+        return SLICE_RUN_CACHE_TTL_SECONDS
+
+    def run(self) -> List[Tuple]:
+        run_ids = self._run_settled_slices()
+        max_steps = len(self._filter.entities)
+        params: Dict[str, Any] = {"team_id": self._team.pk, "funnel_slice_run_ids": run_ids}
+
+        inline_slice = ""
+        if self._changing_entry_range is not None:
+            funnel = self._slice_funnel(self._changing_entry_range)
+            inline_slice = FUNNEL_INLINE_SLICE_STEP_COUNTS_SQL.format(
+                inline_conversion_times="".join(f", step_{i}_conversion_times" for i in range(1, max_steps)),
+                step_counts_query=_slice_step_counts_query(funnel),
+            )
+            params = {**funnel.params, **funnel._filter.hogql_context.values, **params}
+
+        step_counts_query = FUNNEL_SLICES_STEP_COUNTS_SQL.format(
+            merged_conversion_times="".join(
+                FUNNEL_SLICES_MERGED_CONVERSION_TIMES_SQL.format(step=i) for i in range(1, max_steps)
+            ),
+            slice_conversion_time_names="".join(f", step_{i}_conversion_times" for i in range(1, max_steps)),
+            stored_conversion_times="".join(
+                f", conversion_times[{i}] AS step_{i}_conversion_times" for i in range(1, max_steps)
+            ),
+            inline_slice=inline_slice,
+        )
+        query = f"""
+        SELECT {self._funnel._get_count_columns(max_steps)} {self._funnel._get_step_time_avgs(max_steps)} {self._funnel._get_step_time_median(max_steps)} FROM (
+            {step_counts_query}
+        )
+        """
+
+        return insight_sync_execute(
+            query, params, query_type=self._funnel.QUERY_TYPE, filter=self._filter, team_id=self._team.pk
+        )
+
+    def _run_settled_slices(self) -> List[str]:
+        "Writes the settled slices that weren't written by earlier runs, and returns the run ids of all of them"
+        max_steps = len(self._filter.entities)
+        run_ids: List[str] = []
+        pending: List[Tuple[str, str, Dict]] = []
+
+        for entry_range in self._settled_entry_ranges:
+            funnel = self._slice_funnel(entry_range)
+            step_counts_query = _slice_step_counts_query(funnel)
+            params = {**funnel.params, **funnel._filter.hogql_context.values}
+            cache_key = _slice_cache_key(self._team.pk, step_counts_query, params)
+
+            run_id = cache.get(cache_key)
+            if run_id is None:
+                run_id = str(uuid.uuid4())
+                query = INSERT_FUNNEL_SLICE_RESULTS_SQL.format(
+                    conversion_times=", ".join(f"step_{i}_conversion_times" for i in range(1, max_steps)),
+                    step_counts_query=step_counts_query,
+                )
+                pending.append((cache_key, query, {**params, "funnel_slice_run_id": run_id}))
+            run_ids.append(run_id)
+
+        tag_queries(funnel_slices=len(run_ids), funnel_slices_reused=len(run_ids) - len(pending))
+        if pending:
+            self._insert_slices(pending)
+        return run_ids
+
+    def _insert_slices(self, pending: List[Tuple[str, str, Dict]]) -> None:
+        """
+        Writes slices in parallel. Slices that were written are kept even when others fail, so that retrying only runs
+        the slices that failed.
+        """
+        query_tags = get_query_tags()
+        insert_settings = _insert_quorum_settings()
+        errors: List[Exception] = []
+
+        with ThreadPoolExecutor(
+            max_workers=max(min(settings.FUNNEL_SLICE_CONCURRENCY, len(pending)), 1), thread_name_prefix="funnel-slice"
+        ) as executor:
+            futures = [
+                (cache_key, params, executor.submit(self._insert_slice, query, params, insert_settings, query_tags))
+                for cache_key, query, params in pending
+            ]
+            for cache_key, params, future in futures:
+                try:
+                    future.result()
+                except Exception as err:
+                    errors.append(err)
+                else:
+                    cache.set(cache_key, params["funnel_slice_run_id"], self._slice_run_cache_ttl)
+
+        if errors:
+            logger.warn(
+                "funnel_slices_failed", team_id=self._team.pk, failed=len(errors), written=len(pending) - len(errors)
+            )
+            raise errors[0]
+
+    def _insert_slice(
+        self, query: str, params: Dict, insert_settings: Dict[str, Any], query_tags: Dict[str, Any]
+    ) -> None:
+        tag_queries(**query_tags)
+        try:
+            insight_sync_execute(
+                query,
+                params,
+                settings=insert_settings,
+                query_type=f"{self._funnel.QUERY_TYPE}_slice",
+                filter=self._filter,
+                team_id=self._team.pk,
+            )
+        finally:
+            reset_query_tags()
+
+    def _slice_funnel(self, entry_range: EntryRange) -> "ClickhouseFunnelBase":
+        entries_from, entries_before = entry_range
+        events_to = self._date_to
+        if entries_before is not None:
+            events_to = min(entries_before + self._conversion_window, self._date_to)
+
+        # A HogQL context of its own per slice, so that the queries of a slice are the same whichever slices precede it
+        filter_kwargs = {key: value for key, value in self._filter.kwargs.items() if key != "hogql_context"}
+        slice_filter = type(self._filter)(
+            data={
+                **self._filter._data,
+                "date_from": entries_from.strftime(DATE_FORMAT),
+                "date_to": events_to.strftime(DATE_FORMAT),
+                EXPLICIT_DATE: True,
+            },
+            **filter_kwargs,
+        )
+        funnel = type(self._funnel)(slice_filter, self._team, base_uri=self._funnel._base_uri)
+        funnel._slice_entries_before = entries_before
+        return funnel
+
+    @cached_property
+    def _entry_ranges(self) -> List[EntryRange]:
+        """
+        Slices of FUNNEL_SLICE_DAYS days, aligned to whole slices since the start of the calendar rather than to the
+        start of the date range, so that slices stay the same as relative date ranges move along
+        """
+        slice_days = settings.FUNNEL_SLICE_DAYS
+        boundaries = [self._date_from]
+        day = self._date_from.date().toordinal()
+        boundary = datetime.combine(date.fromordinal(day - day % slice_days + slice_days), time.min)
+        while boundary < self._date_to:
+            boundaries.append(boundary)
+            boundary += timedelta(days=slice_days)
+        return list(zip(boundaries, [*boundaries[1:], None]))
+
+    @cached_property
+    def _settled_entry_ranges(self) -> List[EntryRange]:
+        settled_before = timezone.now().astimezone(pytz.timezone(self._team.timezone)).replace(tzinfo=None)
+        settled_before -= SLICE_SETTLED_AFTER
+
+        settled = []
+        for entries_from, entries_before in self._entry_ranges:
+            if entries_before is None or min(entries_before + self._conversion_window, self._date_to) >= settled_before:
+                break
+            settled.append((entries_from, entries_before))
+        return settled
+
+    @cached_property
+    def _changing_entry_range(self) -> Optional[EntryRange]:
+        "Entries after the settled slices, which are computed by one inline slice"
+        if len(self._settled_entry_ranges) == len(self._entry_ranges):
+            return None
+        return self._entry_ranges[len(self._settled_entry_ranges)][0], None
+
+    @cached_property
+    def _conversion_window(self) -> relativedelta:
+        unit = self._filter.funnel_window_interval_unit or "day"
+        return relativedelta(**{f"{unit}s": self._filter.funnel_window_interval})
+
+    @cached_property
+    def _date_from(self) -> datetime:
+        return self._to_team_time(self._query_date_range.date_from_param)
+
+    @cached_property
+    def _date_to(self) -> datetime:
+        return self._to_team_time(self._query_date_range.date_to_param)
+
+    @cached_property
+    def _query_date_range(self) -> QueryDateRange:
+        # The same dates as the events query of the funnel
+        return QueryDateRange(filter=self._filter, team=self._team, should_round=False)
+
+    def _to_team_time(self, value: datetime) -> datetime:
+        "Naive datetime in the team's timezone, as dates of queries are formatted"
+        if value.tzinfo is None:
+            return value.replace(microsecond=0)
+        return value.astimezone(pytz.timezone(self._team.timezone)).replace(tzinfo=None, microsecond=0)
+
+
+def _slice_step_counts_query(funnel: "ClickhouseFunnelBase") -> str:
+    max_steps = len(funnel._filter.entities)
+    return FUNNEL_SLICE_STEP_COUNTS_SQL.format(
+        conversion_times="".join(
+            f", arrayMap(x -> toFloat64(x), groupArray(step_{i}_conversion_time)) step_{i}_conversion_times"
+            for i in range(1, max_steps)
+        ),
+        step_time_names=funnel._get_step_time_names(max_steps),
+        steps_per_person_query=funnel.get_step_counts_without_aggregation_query(),
+    )
+
+
+def _insert_quorum_settings() -> Dict[str, Any]:
+    """
+    Slices are written to a replicated table and read right away, by a query that may be served by another replica,
+    so inserts only succeed once all replicas have the slice's rows
+    """
+    replicas = sync_execute(FUNNEL_SLICE_RESULTS_REPLICAS_SQL)[0][0] or 1
+    if replicas <= 1:
+        return {}
+    return {"insert_quorum": replicas, "insert_quorum_timeout": SLICE_INSERT_QUORUM_TIMEOUT_MS}
+
+
+def is_insert_quorum_error(err: Exception) -> bool:
+    return getattr(err, "code", None) in INSERT_QUORUM_ERROR_CODES
+
+
+def _slice_cache_key(team_id: int, query: str, params: Dict) -> str:
+    digest = hashlib.sha256(json.dumps([team_id, query, params], sort_keys=True, default=str).encode()).hexdigest()
+    # Versioned by how slices are stored, so that slices written in another shape are never read
+    return f"funnel_slice_v2:{digest}"
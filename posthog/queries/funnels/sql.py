@@ -8,3 +8,44 @@ ORDER BY aggregation_target
 {limit}
 {offset}
 """
+
+# Steps per actor in a slice of a sliced funnel, like `get_step_counts_query` but with the conversion times of each of
+# the actor's best attempts rather than their average and median
+FUNNEL_SLICE_STEP_COUNTS_SQL = """
+SELECT aggregation_target, steps {conversion_times} FROM (
+    SELECT aggregation_target, steps, max(steps) over (PARTITION BY aggregation_target) as max_steps {step_time_names} FROM (
+        {steps_per_person_query}
+    )
+) GROUP BY aggregation_target, steps
+HAVING steps = max_steps
+"""
+
+# Steps per actor over the slices of a sliced funnel, in the shape of `get_step_counts_query`: stored slices are read
+# from `funnel_slice_results`, and the slice that's still changing, if any, is computed inline. Averages and medians
+# are computed over the conversion times of the best attempts of all slices, as they are over the whole range
+FUNNEL_SLICES_STEP_COUNTS_SQL = """
+SELECT aggregation_target, steps {merged_conversion_times} FROM (
+    SELECT aggregation_target, steps, max(steps) over (PARTITION BY aggregation_target) as max_steps {slice_conversion_time_names} FROM (
+        SELECT aggregation_target, steps {stored_conversion_times}
+        FROM funnel_slice_results
+        WHERE team_id = %(team_id)s AND run_id IN %(funnel_slice_run_ids)s
+        {inline_slice}
+    )
+) GROUP BY aggregation_target, steps
+HAVING steps = max_steps
+"""
+
+# Average and median conversion time of an actor at a step over all slices, NULL like `avg` and `median` of no times
+FUNNEL_SLICES_MERGED_CONVERSION_TIMES_SQL = """
+, groupArrayArray(step_{step}_conversion_times) step_{step}_merged_conversion_times
+, if(empty(step_{step}_merged_conversion_times), NULL, arrayReduce('avg', step_{step}_merged_conversion_times)) step_{step}_average_conversion_time_inner
+, if(empty(step_{step}_merged_conversion_times), NULL, arrayReduce('median', step_{step}_merged_conversion_times)) step_{step}_median_conversion_time_inner
+"""
+
+FUNNEL_INLINE_SLICE_STEP_COUNTS_SQL = """
+UNION ALL
+SELECT toString(aggregation_target), steps {inline_conversion_times}
+FROM (
+    {step_counts_query}
+)
+"""
@@ -0,0 +1,182 @@
+from datetime import datetime
+from typing import Dict, Optional, Type
+from unittest.mock import patch
+
+from clickhouse_driver.errors import ServerException
+from django.core.cache import cache
+from freezegun import freeze_time
+
+from posthog.client import sync_execute
+from posthog.constants import INSIGHT_FUNNELS
+from posthog.models.filters import Filter
+from posthog.queries.funnels import (
+    ClickhouseFunnel,
+    ClickhouseFunnelBase,
+    ClickhouseFunnelStrict,
+    ClickhouseFunnelUnordered,
+)
+from posthog.queries.funnels.sliced import SlicedFunnelQuery
+from posthog.test.base import APIBaseTest, ClickhouseTestMixin
+from posthog.test.test_journeys import journeys_for
+
+FILTER = {
+    "insight": INSIGHT_FUNNELS,
+    "events": [
+        {"id": "user signed up", "order": 0},
+        {"id": "$pageview", "order": 1},
+        {"id": "purchase", "order": 2},
+    ],
+    "date_from": "2021-01-01",
+    "date_to": "2021-03-31",
+    "funnel_window_interval": 14,
+    "funnel_window_interval_unit": "day",
+}
+
+
+class TestSlicedFunnel(ClickhouseTestMixin, APIBaseTest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+        self.people = journeys_for(
+            {
+                "converted_across_slices": [
+                    {"event": "user signed up", "timestamp": datetime(2021, 1, 6, 23)},
+                    {"event": "$pageview", "timestamp": datetime(2021, 1, 12)},
+                    {"event": "purchase", "timestamp": datetime(2021, 1, 15)},
+                ],
+                "converted_on_second_attempt": [
+                    {"event": "user signed up", "timestamp": datetime(2021, 1, 2)},
+                    {"event": "$pageview", "timestamp": datetime(2021, 1, 3)},
+                    {"event": "user signed up", "timestamp": datetime(2021, 2, 10)},
+                    {"event": "$pageview", "timestamp": datetime(2021, 2, 11)},
+                    {"event": "purchase", "timestamp": datetime(2021, 2, 12, 6)},
+                ],
+                "converted_too_slowly": [
+                    {"event": "user signed up", "timestamp": datetime(2021, 1, 20)},
+                    {"event": "$pageview", "timestamp": datetime(2021, 2, 10)},
+                ],
+                "dropped_off": [{"event": "user signed up", "timestamp": datetime(2021, 3, 1)}],
+                "entered_before_range": [
+                    {"event": "user signed up", "timestamp": datetime(2020, 12, 30)},
+                    {"event": "$pageview", "timestamp": datetime(2021, 1, 2)},
+                ],
+            },
+            self.team,
+        )
+
+    def _run(self, funnel_class: Type[ClickhouseFunnelBase], data: Dict, sliced: bool):
+        with self.settings(FUNNEL_SLICED_EXECUTION_MIN_DAYS=30 if sliced else 0, FUNNEL_SLICE_DAYS=7):
+            funnel = funnel_class(Filter(data={**FILTER, **data}, team=self.team), self.team)
+            self.assertEqual(SlicedFunnelQuery(funnel).is_eligible, sliced)
+            return funnel.run()
+
+    def _assert_sliced_funnel_matches_funnel(
+        self, funnel_class: Type[ClickhouseFunnelBase], data: Optional[Dict] = None
+    ):
+        data = data or {}
+        sliced_result = self._run(funnel_class, data, sliced=True)
+        result = self._run(funnel_class, data, sliced=False)
+
+        self.assertEqual(
+            [
+                (step["count"], step["average_conversion_time"], step["median_conversion_time"])
+                for step in sliced_result
+            ],
+            [(step["count"], step["average_conversion_time"], step["median_conversion_time"]) for step in result],
+        )
+        return sliced_result
+
+    @freeze_time("2021-06-01")
+    def test_sliced_funnel_matches_funnel(self):
+        result = self._assert_sliced_funnel_matches_funnel(ClickhouseFunnel)
+        self.assertEqual([step["count"] for step in result], [4, 2, 2])
+
+        self._assert_sliced_funnel_matches_funnel(ClickhouseFunnelStrict)
+        self._assert_sliced_funnel_matches_funnel(ClickhouseFunnelUnordered)
+        self._assert_sliced_funnel_matches_funnel(
+            ClickhouseFunnel, {"funnel_window_interval": 3, "funnel_window_interval_unit": "week"}
+        )
+
+    @freeze_time("2021-03-20")
+    def test_slice_of_latest_events_is_computed_inline(self):
+        result = self._assert_sliced_funnel_matches_funnel(ClickhouseFunnel, {"date_to": None})
+        self.assertEqual([step["count"] for step in result], [4, 2, 2])
+
+        # Entries whose conversion window ends within the last day aren't stored, as their events may still change
+        stored_actors = [row[0] for row in sync_execute("SELECT DISTINCT aggregation_target FROM funnel_slice_results")]
+        self.assertIn(str(self.people["converted_across_slices"].uuid), stored_actors)
+        self.assertNotIn(str(self.people["dropped_off"].uuid), stored_actors)
+
+    @freeze_time("2021-06-01")
+    def test_settled_slices_are_reused(self):
+        self._run(ClickhouseFunnel, {}, sliced=True)
+        slice_runs = sync_execute("SELECT DISTINCT run_id FROM funnel_slice_results ORDER BY run_id")
+        self.assertGreater(len(slice_runs), 1)
+
+        result = self._run(ClickhouseFunnel, {}, sliced=True)
+
+        self.assertEqual([step["count"] for step in result], [4, 2, 2])
+        self.assertEqual(sync_execute("SELECT DISTINCT run_id FROM funnel_slice_results ORDER BY run_id"), slice_runs)
+
+        # Moving the date range along only computes the slices that changed
+        self._run(ClickhouseFunnel, {"date_from": "2021-01-05"}, sliced=True)
+        self.assertEqual(
+            len(sync_execute("SELECT DISTINCT run_id FROM funnel_slice_results")),
+            len(slice_runs) + 1,
+        )
+
+    @freeze_time("2021-06-01")
+    def test_conversion_times_are_merged_across_slices(self):
+        # Two attempts in one slice and one in another, whose average isn't the average of the slices' averages
+        journeys_for(
+            {
+                "converted_in_several_slices": [
+                    {"event": "user signed up", "timestamp": datetime(2021, 1, 20, 10)},
+                    {"event": "user signed up", "timestamp": datetime(2021, 1, 20, 12)},
+                    {"event": "$pageview", "timestamp": datetime(2021, 1, 22, 12)},
+                    {"event": "purchase", "timestamp": datetime(2021, 1, 23)},
+                    {"event": "user signed up", "timestamp": datetime(2021, 3, 10)},
+                    {"event": "$pageview", "timestamp": datetime(2021, 3, 10, 6)},
+                    {"event": "purchase", "timestamp": datetime(2021, 3, 11)},
+                ]
+            },
+            self.team,
+        )
+
+        self._assert_sliced_funnel_matches_funnel(ClickhouseFunnel)
+        self._assert_sliced_funnel_matches_funnel(ClickhouseFunnelUnordered)
+
+    @freeze_time("2021-06-01")
+    def test_funnel_runs_unsliced_when_slices_can_not_be_written_to_all_replicas(self):
+        with patch(
+            "posthog.queries.funnels.sliced.SlicedFunnelQuery._insert_slices",
+            side_effect=ServerException("Too few live replicas", code=285),
+        ):
+            result = self._run(ClickhouseFunnel, {}, sliced=True)
+
+        self.assertEqual([step["count"] for step in result], [4, 2, 2])
+        self.assertEqual(sync_execute("SELECT count() FROM funnel_slice_results"), [(0,)])
+
+    @freeze_time("2021-06-01")
+    def test_funnels_that_can_not_be_sliced(self):
+        with self.settings(FUNNEL_SLICED_EXECUTION_MIN_DAYS=30, FUNNEL_SLICE_DAYS=7):
+            for data in [
+                {"breakdown": "$browser", "breakdown_type": "event"},
+                {"exclusions": [{"id": "x", "type": "events", "funnel_from_step": 0, "funnel_to_step": 1}]},
+                {"date_from": "2021-03-10"},
+                {"properties": [{"key": "email", "value": "test@posthog.com", "type": "person"}]},
+                {"properties": [{"key": "id", "value": 1, "type": "cohort"}]},
+                {
+                    "events": [
+                        {"id": "user signed up", "order": 0},
+                        {
+                            "id": "$pageview",
+                            "order": 1,
+                            "properties": [{"key": "email", "value": "test@posthog.com", "type": "person"}],
+                        },
+                    ]
+                },
+            ]:
+                funnel = ClickhouseFunnel(Filter(data={**FILTER, **data}, team=self.team), self.team)
+                self.assertFalse(SlicedFunnelQuery(funnel).is_eligible, data)
@@ -4,8 +4,16 @@ from posthog.clickhouse.materialized_columns import ColumnName
 from posthog.constants import PropertyOperatorType
 from posthog.models import Filter
 from posthog.models.cohort import Cohort
-from posthog.models.cohort.sql import GET_COHORTPEOPLE_BY_COHORT_ID, GET_STATIC_COHORTPEOPLE_BY_COHORT_ID
-from posthog.models.cohort.util import format_precalculated_cohort_query, format_static_cohort_query
+from posthog.models.cohort.sql import (
+    GET_COHORTPEOPLE_BY_COHORT_ID,
+    GET_INCREMENTAL_COHORTPEOPLE_BY_COHORT_ID,
+    GET_STATIC_COHORTPEOPLE_BY_COHORT_ID,
+)
+from posthog.models.cohort.util import (
+    format_precalculated_cohort_query,
+    format_static_cohort_query,
+    has_incremental_cohortpeople,
+)
 from posthog.models.entity import Entity
 from posthog.models.filters.path_filter import PathFilter
 from posthog.models.filters.retention_filter import RetentionFilter
@@ -54,6 +62,8 @@ class PersonQuery:
         # A sub-optimal version of the `cohort` parameter above, the difference being that
         # this supports multiple cohort filters, but is not as performant as the above.
         cohort_filters: Optional[List[Property]] = None,
+        # Subquery returning person ids, restricts the persons read to just these
+        person_ids_query: Optional[str] = None,
     ) -> None:
         self._filter = filter
         self._team_id = team_id
@@ -62,6 +72,7 @@ class PersonQuery:
         self._column_optimizer = column_optimizer or ColumnOptimizer(self._filter, self._team_id)
         self._extra_fields = set(extra_fields) if extra_fields else set()
         self._cohort_filters = cohort_filters
+        self._person_ids_query = person_ids_query
 
         if self.PERSON_PROPERTIES_ALIAS in self._extra_fields:
             self._extra_fields = self._extra_fields - {self.PERSON_PROPERTIES_ALIAS} | {"properties"}
@@ -105,6 +116,7 @@ class PersonQuery:
             "AND argMax(created_at, version) < now() + INTERVAL 1 DAY" if filter_future_persons else ""
         )
         updated_after_condition, updated_after_params = self._get_updated_after_clause()
+        person_ids_condition = f"AND id IN ({self._person_ids_query})" if self._person_ids_query else ""
 
         # If there are person filters or search, we do a prefiltering lookup so that the dataset is as small
         # as possible BEFORE the `HAVING` clause (but without eliminating any rows that should be matched).
@@ -132,6 +144,7 @@ class PersonQuery:
             WHERE team_id = %(team_id)s
             {prefiltering_lookup}
             {multiple_cohorts_condition}
+            {person_ids_condition}
             GROUP BY id
             HAVING max(is_deleted) = 0
             {filter_future_persons_condition} {updated_after_condition}
@@ -212,9 +225,12 @@ class PersonQuery:
 
     def _get_fast_single_cohort_clause(self) -> Tuple[str, Dict]:
         if self._cohort:
-            cohort_table = (
-                GET_STATIC_COHORTPEOPLE_BY_COHORT_ID if self._cohort.is_static else GET_COHORTPEOPLE_BY_COHORT_ID
-            )
+            if self._cohort.is_static:
+                cohort_table = GET_STATIC_COHORTPEOPLE_BY_COHORT_ID
+            elif has_incremental_cohortpeople(self._cohort):
+                cohort_table = GET_INCREMENTAL_COHORTPEOPLE_BY_COHORT_ID
+            else:
+                cohort_table = GET_COHORTPEOPLE_BY_COHORT_ID
             return (
                 f"""
             INNER JOIN (
@@ -1,10 +1,13 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
+from django.conf import settings
 from django.utils import timezone
 
 from posthog.models.event.sql import SELECT_PROP_VALUES_SQL_WITH_FILTER
 from posthog.models.person.sql import SELECT_PERSON_PROP_VALUES_SQL, SELECT_PERSON_PROP_VALUES_SQL_WITH_FILTER
 from posthog.models.property.util import get_property_string_expr
+from posthog.models.property_values.sql import SELECT_PROPERTY_VALUES_FROM_INDEX_SQL
 from posthog.models.team import Team
 from posthog.queries.insight import insight_sync_execute
 from posthog.utils import relative_date_parse
@@ -13,6 +16,12 @@ from posthog.utils import relative_date_parse
 def get_property_values_for_key(
     key: str, team: Team, event_names: Optional[List[str]] = None, value: Optional[str] = None
 ):
+    indexed_values = get_property_values_from_index(
+        "event", key, team, event_names=event_names, value=value, date_from=relative_date_parse("-7d"), limit=10
+    )
+    if indexed_values is not None:
+        return [(property_value,) for property_value, _ in indexed_values]
+
     property_field, mat_column_exists = get_property_string_expr("events", key, "%(key)s", "properties")
     parsed_date_from = "AND timestamp >= '{}'".format(relative_date_parse("-7d").strftime("%Y-%m-%d 00:00:00"))
     parsed_date_to = "AND timestamp <= '{}'".format(timezone.now().strftime("%Y-%m-%d 23:59:59"))
@@ -56,6 +65,10 @@ def get_property_values_for_key(
 
 
 def get_person_property_values_for_key(key: str, team: Team, value: Optional[str] = None):
+    indexed_values = get_property_values_from_index("person", key, team, value=value, limit=20)
+    if indexed_values is not None:
+        return indexed_values
+
     property_field, _ = get_property_string_expr("person", key, "%(key)s", "properties")
 
     if value:
@@ -71,3 +84,53 @@ def get_person_property_values_for_key(key: str, team: Team, value: Optional[str
         query_type="get_person_property_values",
         team_id=team.pk,
     )
+
+
+def get_property_values_from_index(
+    property_type: str,
+    key: str,
+    team: Team,
+    event_names: Optional[List[str]] = None,
+    value: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    limit: int = 10,
+) -> Optional[List[Tuple[str, int]]]:
+    """
+    Most common values of the property with their counts, from the property values index.
+
+    Returns `None` when the key is not in the index yet (e.g. just started being sent), or when fewer than `limit`
+    indexed values match the searched value, as only the most common values are indexed. Callers then fall back to
+    scanning raw data.
+    """
+    if not settings.PROPERTY_VALUES_INDEX_SCHEDULE_CRON:
+        return None
+
+    event_filter = ""
+    date_filter = ""
+    value_filter = "1"
+    params: Dict[str, Any] = {"team_id": team.pk, "property_type": property_type, "key": key, "limit": limit}
+
+    if event_names:
+        event_filter = "AND event IN %(event_names)s"
+        params["event_names"] = tuple(event_names)
+    if date_from is not None:
+        date_filter = "AND date >= %(date_from)s"
+        params["date_from"] = date_from.strftime("%Y-%m-%d")
+    if value:
+        value_filter = "property_value ILIKE %(value)s"
+        params["value"] = "%{}%".format(value)
+
+    rows = insight_sync_execute(
+        SELECT_PROPERTY_VALUES_FROM_INDEX_SQL.format(
+            event_filter=event_filter, date_filter=date_filter, value_filter=value_filter
+        ),
+        params,
+        query_type=f"get_{property_type}_property_values_from_index",
+        team_id=team.pk,
+    )
+    if not rows:
+        return None
+    matching_values = [(property_value, total) for property_value, total, matches in rows if matches]
+    if value and len(matching_values) < limit:
+        return None
+    return matching_values
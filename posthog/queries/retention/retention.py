@@ -11,8 +11,8 @@ from posthog.queries.retention.actors_query import RetentionActorsByPeriod, buil
 from posthog.queries.retention.retention_events_query import RetentionEventsQuery
 from posthog.queries.retention.sql import RETENTION_BREAKDOWN_SQL
 from posthog.queries.retention.types import BreakdownValues, CohortKey
-from posthog.queries.util import correct_result_for_sampling
-from posthog.utils import PersonOnEventsMode
+from posthog.queries.util import correct_results_for_sampling
+from posthog.utils import PersonOnEventsMode, encode_get_request_params
 
 
 class Retention:
@@ -45,26 +45,36 @@ class Retention:
             team_id=team.pk,
         )
 
+        people_url_prefix = self._construct_people_url_prefix(filter)
+        counts = correct_results_for_sampling([count for (_, _, count) in result], filter.sampling_factor)
         result_dict = {
             CohortKey(tuple(breakdown_values), intervals_from_base): {
-                "count": correct_result_for_sampling(count, filter.sampling_factor),
+                "count": count,
                 "people": [],
                 "people_url": self._construct_people_url_for_trend_breakdown_interval(
-                    filter=filter, breakdown_values=breakdown_values, selected_interval=intervals_from_base
+                    people_url_prefix, breakdown_values=breakdown_values, selected_interval=intervals_from_base
                 ),
             }
-            for (breakdown_values, intervals_from_base, count) in result
+            for (breakdown_values, intervals_from_base, _), count in zip(result, counts)
         }
 
         return result_dict
 
+    def _construct_people_url_prefix(self, filter: RetentionFilter) -> str:
+        "People url with the filter params shared by all breakdown values and intervals"
+        data = {
+            key: value for key, value in filter._data.items() if key not in ("breakdown_values", "selected_interval")
+        }
+        params = RetentionFilter(data).to_params()
+        return f"{self._base_uri}api/person/retention/?{urlencode(params)}"
+
     def _construct_people_url_for_trend_breakdown_interval(
-        self, filter: RetentionFilter, selected_interval: int, breakdown_values: BreakdownValues
+        self, people_url_prefix: str, selected_interval: int, breakdown_values: BreakdownValues
     ):
-        params = RetentionFilter(
-            {**filter._data, "breakdown_values": breakdown_values, "selected_interval": selected_interval},
-        ).to_params()
-        return f"{self._base_uri}api/person/retention/?{urlencode(params)}"
+        params = encode_get_request_params(
+            {"breakdown_values": breakdown_values, "selected_interval": selected_interval}
+        )
+        return f"{people_url_prefix}&{urlencode(params)}"
 
     def process_breakdown_table_result(self, resultset: Dict[CohortKey, Dict[str, Any]], filter: RetentionFilter):
         result = [
@@ -0,0 +1,108 @@
+import datetime
+import json
+from collections import defaultdict
+from typing import Dict, Optional
+
+import structlog
+from django.conf import settings
+
+from posthog.clickhouse.client.connection import Workload
+from posthog.client import sync_execute
+from posthog.redis import get_client
+
+logger = structlog.get_logger(__name__)
+
+# Factors auto sampling picks from. Sticking to a few factors keeps the factor of an insight, and so the cache key of
+# its results, the same while the volume of events it covers changes a little
+AUTO_SAMPLING_FACTORS = [0.5, 0.2, 0.1, 0.05, 0.02, 0.01]
+DAILY_EVENT_COUNTS_KEY_PREFIX = "posthog:daily_event_counts"
+# Last day counted by `calculate_daily_event_counts`, later runs only count the days since
+DAILY_EVENT_COUNTS_WATERMARK_KEY = "posthog:daily_event_counts_watermark"
+DAILY_EVENT_COUNTS_PERIOD = datetime.timedelta(days=365)
+# Counts of teams without new events are only refreshed by new events, so they are kept for the whole period
+DAILY_EVENT_COUNTS_TTL = DAILY_EVENT_COUNTS_PERIOD + datetime.timedelta(days=2)
+DAILY_EVENT_COUNTS_BATCH_SIZE = 1000
+
+
+def get_auto_sampling_factor(
+    team_id: int, date_from: Optional[datetime.datetime], date_to: Optional[datetime.datetime]
+) -> Optional[float]:
+    """
+    Picks the largest sampling factor that reads at most AUTO_SAMPLING_TARGET_ROWS of the team's events between the
+    dates, or None if all of them can be read. Both dates are optional, for all time insights.
+    """
+    day_from = date_from.date() if date_from else datetime.date.min
+    day_to = date_to.date() if date_to else datetime.date.max
+    estimated_rows = sum(count for day, count in get_daily_event_counts(team_id).items() if day_from <= day <= day_to)
+
+    if estimated_rows <= settings.AUTO_SAMPLING_TARGET_ROWS:
+        return None
+    target_factor = settings.AUTO_SAMPLING_TARGET_ROWS / estimated_rows
+    return next(
+        (factor for factor in AUTO_SAMPLING_FACTORS if factor <= target_factor),
+        AUTO_SAMPLING_FACTORS[-1],
+    )
+
+
+def get_daily_event_counts(team_id: int) -> Dict[datetime.date, int]:
+    """
+    Events of the team per day over the last year, as counted by `calculate_daily_event_counts`. Empty for teams
+    without events, and when the counts are not available.
+    """
+    try:
+        counts = get_client().get(f"{DAILY_EVENT_COUNTS_KEY_PREFIX}:{team_id}")
+    except Exception as e:
+        logger.warning("daily_event_counts_load_failed", team_id=team_id, exc_info=e)
+        return {}
+
+    if counts is None:
+        return {}
+    return {datetime.date.fromisoformat(day): count for day, count in json.loads(counts).items()}
+
+
+def calculate_daily_event_counts() -> None:
+    """
+    Counts the events of every team per day over the last year, for auto sampling. Only the days since the previous
+    run are counted (the last counted day again, as it was partial), and merged into the stored counts.
+    """
+    today = datetime.datetime.now(tz=datetime.timezone.utc).date()
+    first_day = today - DAILY_EVENT_COUNTS_PERIOD
+    redis_client = get_client()
+
+    watermark = redis_client.get(DAILY_EVENT_COUNTS_WATERMARK_KEY)
+    if watermark is not None:
+        first_day = max(first_day, datetime.date.fromisoformat(watermark.decode()))
+
+    rows = sync_execute(
+        """
+        SELECT team_id, toDate(timestamp) AS day, count()
+        FROM events
+        WHERE timestamp >= toDateTime(%(first_day)s, 'UTC')
+        GROUP BY team_id, day
+        """,
+        {"first_day": first_day.isoformat()},
+        workload=Workload.OFFLINE,
+    )
+
+    new_counts_by_team_id: Dict[int, Dict[str, int]] = defaultdict(dict)
+    for team_id, day, count in rows:
+        new_counts_by_team_id[team_id][day.isoformat()] = count
+
+    # Counts are stored for every team, as the days of a team with few events add up to being sampled over time
+    oldest_day = (today - DAILY_EVENT_COUNTS_PERIOD).isoformat()
+    team_ids = list(new_counts_by_team_id)
+    for index in range(0, len(team_ids), DAILY_EVENT_COUNTS_BATCH_SIZE):
+        batch = team_ids[index : index + DAILY_EVENT_COUNTS_BATCH_SIZE]
+        stored_counts = redis_client.mget([f"{DAILY_EVENT_COUNTS_KEY_PREFIX}:{team_id}" for team_id in batch])
+
+        pipeline = redis_client.pipeline(transaction=False)
+        for team_id, stored in zip(batch, stored_counts):
+            counts = json.loads(stored) if stored is not None else {}
+            counts.update(new_counts_by_team_id[team_id])
+            counts = {day: count for day, count in counts.items() if day >= oldest_day}
+            pipeline.set(f"{DAILY_EVENT_COUNTS_KEY_PREFIX}:{team_id}", json.dumps(counts), ex=DAILY_EVENT_COUNTS_TTL)
+        pipeline.execute()
+
+    redis_client.set(DAILY_EVENT_COUNTS_WATERMARK_KEY, today.isoformat())
+
+    logger.info("Calculated daily event counts", teams=len(team_ids), first_day=first_day)
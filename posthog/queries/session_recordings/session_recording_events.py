@@ -71,17 +71,7 @@ class SessionRecordingEvents:
             query, {"team_id": self._team.id, "session_id": self._session_recording_id, **date_clause_params}
         )
 
-        return [
-            SessionRecordingEvent(
-                session_id=columns[0],
-                window_id=columns[1],
-                distinct_id=columns[2],
-                timestamp=columns[3],
-                events_summary=[json.loads(x) for x in columns[4]] if columns[4] else [],
-                snapshot_data=json.loads(columns[5]) if len(columns) > 5 else None,
-            )
-            for columns in response
-        ]
+        return [_parse_recording_snapshot_row(columns) for columns in response]
 
     # Fast constant time query that checks if session exists.
     def query_session_exists(self) -> bool:
@@ -113,6 +103,57 @@ class SessionRecordingEvents:
         if len(snapshots) == 0:
             return None
 
+        return self.get_metadata_from_snapshots(snapshots)
+
+    @classmethod
+    def get_metadata_for_sessions(
+        cls, team: Team, session_ids: List[str], recording_start_times: Optional[List[datetime]] = None
+    ) -> Dict[str, RecordingMetadata]:
+        """
+        Loads the metadata for many recordings of the same team with one shared query over `session_recording_events`.
+        Sessions that have no events are left out of the result.
+        """
+        if not session_ids:
+            return {}
+
+        date_clause = ""
+        date_clause_params: Dict = {}
+        if recording_start_times:
+            # Bound the scan by the whole batch rather than per recording, with the same buffer as a single recording
+            date_clause = """
+                AND toTimeZone(toDateTime(timestamp, 'UTC'), %(timezone)s) >= toDateTime(%(min_start_time)s, %(timezone)s) - INTERVAL 1 DAY
+                AND toTimeZone(toDateTime(timestamp, 'UTC'), %(timezone)s) <= toDateTime(%(max_start_time)s, %(timezone)s) + INTERVAL 2 DAY
+            """
+            date_clause_params = {
+                "min_start_time": min(recording_start_times),
+                "max_start_time": max(recording_start_times),
+                "timezone": team.timezone,
+            }
+
+        query = """
+            SELECT session_id, window_id, distinct_id, timestamp, events_summary
+            FROM session_recording_events
+            PREWHERE
+                team_id = %(team_id)s
+                AND session_id IN %(session_ids)s
+                {date_clause}
+            ORDER BY session_id, timestamp
+        """.format(
+            date_clause=date_clause
+        )
+
+        response = sync_execute(query, {"team_id": team.pk, "session_ids": session_ids, **date_clause_params})
+
+        snapshots_by_session_id: Dict[str, List[SessionRecordingEvent]] = {}
+        for columns in response:
+            snapshots_by_session_id.setdefault(columns[0], []).append(_parse_recording_snapshot_row(columns))
+
+        return {
+            session_id: cls(session_recording_id=session_id, team=team).get_metadata_from_snapshots(snapshots)
+            for session_id, snapshots in snapshots_by_session_id.items()
+        }
+
+    def get_metadata_from_snapshots(self, snapshots: List[SessionRecordingEvent]) -> RecordingMetadata:
         distinct_id = snapshots[0]["distinct_id"]
 
         events_summary_by_window_id = self._get_events_summary_by_window_id(snapshots)
@@ -286,3 +327,14 @@ class SessionRecordingEvents:
             keypress_count=keypress_count,
             urls=urls,
         )
+
+
+def _parse_recording_snapshot_row(columns) -> SessionRecordingEvent:
+    return SessionRecordingEvent(
+        session_id=columns[0],
+        window_id=columns[1],
+        distinct_id=columns[2],
+        timestamp=columns[3],
+        events_summary=[json.loads(x) for x in columns[4]] if columns[4] else [],
+        snapshot_data=json.loads(columns[5]) if len(columns) > 5 else None,
+    )
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import override_settings
+from django.utils import timezone
+
+from posthog.models import Group, Person
+from posthog.queries.actor_base_query import get_groups, get_people
+from posthog.test.base import BaseTest
+
+
+@override_settings(ACTOR_CACHE_TTL_SECONDS=60)
+class TestActorHydration(BaseTest):
+    def test_get_people(self):
+        older = Person.objects.create(
+            team=self.team,
+            distinct_ids=["1"],
+            properties={"email": "older@posthog.com", "plan": "free"},
+            created_at=timezone.now() - timedelta(days=1),
+        )
+        newer = Person.objects.create(
+            team=self.team, distinct_ids=["2", "3"], properties={"email": "newer@posthog.com"}
+        )
+        people_ids = [older.uuid, newer.uuid]
+
+        _, serialized_people = get_people(self.team, people_ids, {str(older.uuid): 2, str(newer.uuid): 1})
+
+        self.assertEqual([person["uuid"] for person in serialized_people], [newer.uuid, older.uuid])
+        self.assertEqual(serialized_people[1]["properties"], {"email": "older@posthog.com", "plan": "free"})
+        self.assertEqual(serialized_people[1]["name"], "older@posthog.com")
+        self.assertCountEqual(serialized_people[0]["distinct_ids"], ["2", "3"])
+        self.assertEqual([person["value_at_data_point"] for person in serialized_people], [1, 2])
+
+        # Hydrated from cache, with the values and properties of this query
+        with self.assertNumQueries(0):
+            _, serialized_people = get_people(self.team, people_ids, properties_to_include=["plan"])
+
+        self.assertEqual([person["uuid"] for person in serialized_people], [newer.uuid, older.uuid])
+        self.assertEqual([person["properties"] for person in serialized_people], [{}, {"plan": "free"}])
+        self.assertEqual([person["value_at_data_point"] for person in serialized_people], [None, None])
+
+    def test_get_people_in_chunks(self):
+        people = [Person.objects.create(team=self.team, distinct_ids=[str(index)]) for index in range(5)]
+
+        # One query for persons and one for their distinct ids per chunk
+        with patch("posthog.queries.actor_base_query.ACTOR_HYDRATION_CHUNK_SIZE", 2), self.assertNumQueries(6):
+            _, serialized_people = get_people(self.team, [person.uuid for person in people])
+
+        self.assertCountEqual([person["uuid"] for person in serialized_people], [person.uuid for person in people])
+
+    def test_get_groups(self):
+        Group.objects.create(
+            team=self.team,
+            group_type_index=0,
+            group_key="org:1",
+            group_properties={"name": "PostHog", "industry": "tech"},
+            version=1,
+        )
+
+        _, serialized_groups = get_groups(self.team.pk, 0, ["org:1", "org:2"], {"org:1": 3, "org:2": 1})
+
+        self.assertEqual(len(serialized_groups), 1)
+        self.assertEqual(serialized_groups[0]["properties"], {"name": "PostHog", "industry": "tech"})
+        self.assertEqual(serialized_groups[0]["value_at_data_point"], 3)
+
+        with self.assertNumQueries(0):
+            _, serialized_groups = get_groups(self.team.pk, 0, ["org:1"], properties_to_include=["industry"])
+
+        self.assertEqual(serialized_groups[0]["properties"], {"industry": "tech"})
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import override_settings
+from django.utils import timezone
+
+from posthog.models import Filter
+from posthog.queries.sampling import (
+    DAILY_EVENT_COUNTS_KEY_PREFIX,
+    DAILY_EVENT_COUNTS_WATERMARK_KEY,
+    calculate_daily_event_counts,
+    get_daily_event_counts,
+)
+from posthog.queries.trends.trends import Trends
+from posthog.redis import get_client
+from posthog.test.base import APIBaseTest, ClickhouseTestMixin, _create_event, flush_persons_and_events
+
+
+@override_settings(AUTO_SAMPLING_TARGET_ROWS=2)
+class TestAutoSampling(ClickhouseTestMixin, APIBaseTest):
+    def setUp(self):
+        super().setUp()
+        for distinct_id in ["1", "2", "3", "4"]:
+            _create_event(event="$pageview", team=self.team, distinct_id=distinct_id, timestamp=timezone.now())
+        _create_event(event="$pageview", team=self.team, distinct_id="1", timestamp=timezone.now() - timedelta(days=30))
+        flush_persons_and_events()
+        get_client().delete(DAILY_EVENT_COUNTS_WATERMARK_KEY)
+        calculate_daily_event_counts()
+
+    def test_sampling_factor_is_picked_from_events_in_date_range(self):
+        filter = Filter(data={"sampling_factor": "auto", "date_from": "-7d"}, team=self.team)
+        self.assertEqual(filter.sampling_factor, 0.5)
+        # Queries of clones of the filter sample the same
+        self.assertEqual(filter.to_dict()["sampling_factor"], 0.5)
+        self.assertEqual(filter.shallow_clone({"date_from": "-14d"}).sampling_factor, 0.5)
+
+        filter = Filter(data={"sampling_factor": "auto", "date_from": "all"}, team=self.team)
+        self.assertEqual(filter.sampling_factor, 0.2)
+
+    def test_no_sampling_when_events_are_under_target(self):
+        with self.settings(AUTO_SAMPLING_TARGET_ROWS=10):
+            filter = Filter(data={"sampling_factor": "auto", "date_from": "-7d"}, team=self.team)
+
+        self.assertIsNone(filter.sampling_factor)
+        self.assertEqual(filter.to_dict()["sampling_factor"], "")
+
+    def test_no_sampling_without_event_counts(self):
+        get_client().delete(f"{DAILY_EVENT_COUNTS_KEY_PREFIX}:{self.team.pk}")
+
+        with patch("posthog.queries.sampling.sync_execute") as mock_sync_execute:
+            filter = Filter(data={"sampling_factor": "auto", "date_from": "-7d"}, team=self.team)
+
+        self.assertIsNone(filter.sampling_factor)
+        mock_sync_execute.assert_not_called()
+
+    def test_event_counts_are_merged_with_counts_of_previous_days(self):
+        today = timezone.now().date()
+        month_ago = today - timedelta(days=30)
+        _create_event(event="$pageview", team=self.team, distinct_id="1", timestamp=timezone.now())
+        # Days before the previous run are not counted again
+        _create_event(event="$pageview", team=self.team, distinct_id="1", timestamp=timezone.now() - timedelta(days=30))
+        flush_persons_and_events()
+
+        calculate_daily_event_counts()
+
+        self.assertEqual(get_daily_event_counts(self.team.pk), {month_ago: 1, today: 5})
+        self.assertEqual(get_client().get(DAILY_EVENT_COUNTS_WATERMARK_KEY).decode(), today.isoformat())
+
+    def test_sampling_factor_is_unresolved_without_team(self):
+        filter = Filter(data={"sampling_factor": "auto"})
+
+        self.assertIsNone(filter.sampling_factor)
+        self.assertEqual(filter.to_dict()["sampling_factor"], "auto")
+
+    def test_sampled_trends_have_confidence_intervals(self):
+        filter = Filter(
+            data={"sampling_factor": "auto", "date_from": "-7d", "events": [{"id": "$pageview"}]}, team=self.team
+        )
+
+        result = Trends().run(filter, self.team)
+
+        self.assertEqual(result[0]["filter"]["sampling_factor"], 0.5)
+        self.assertEqual(len(result[0]["confidence_intervals"]), len(result[0]["data"]))
+        for (low, high), value in zip(result[0]["confidence_intervals"], result[0]["data"]):
+            self.assertLessEqual(low, value)
+            self.assertGreaterEqual(high, value)
@@ -1,6 +1,10 @@
 from django.test import TestCase
 
-from posthog.queries.util import correct_result_for_sampling
+from posthog.queries.util import (
+    correct_result_for_sampling,
+    correct_results_for_sampling,
+    sampling_confidence_intervals,
+)
 
 
 class TestQueriesUtil(TestCase):
@@ -22,3 +26,21 @@ class TestQueriesUtil(TestCase):
 
         res = correct_result_for_sampling(1, 0.01, "sum")
         self.assertEqual(res, 100)
+
+    def test_correct_results_for_sampling(self):
+        self.assertEqual(correct_results_for_sampling([1, 2, 0], 0.1), [10, 20, 0])
+        self.assertEqual(correct_results_for_sampling([1, 2, 0], None), [1, 2, 0])
+        self.assertEqual(correct_results_for_sampling([1.5, 2.5], 0.01, "max"), [1.5, 2.5])
+        self.assertEqual(correct_results_for_sampling([1.5, 2.5], 0.01, "sum"), [150, 250])
+        # Same rounding as for single results
+        self.assertEqual(
+            correct_results_for_sampling([1, 3, 7], 0.3),
+            [correct_result_for_sampling(value, 0.3) for value in [1, 3, 7]],
+        )
+
+    def test_sampling_confidence_intervals(self):
+        self.assertEqual(sampling_confidence_intervals([100, 0], 0.1), [[814, 1186], [0, 19]])
+        self.assertEqual(sampling_confidence_intervals([], 0.1), [])
+        self.assertIsNone(sampling_confidence_intervals([100], None))
+        self.assertIsNone(sampling_confidence_intervals([100], 1))
+        self.assertIsNone(sampling_confidence_intervals([100], 0.1, "max"))
@@ -58,17 +58,28 @@ from posthog.queries.trends.sql import (
 from posthog.queries.trends.util import (
     COUNT_PER_ACTOR_MATH_FUNCTIONS,
     PROPERTY_MATH_FUNCTIONS,
-    correct_result_for_sampling,
     ensure_value_is_json_serializable,
+    format_date_axis,
     enumerate_time_range,
     get_active_user_params,
     parse_response,
     process_math,
 )
-from posthog.queries.util import get_person_properties_mode
+from posthog.queries.util import correct_result_for_sampling, get_person_properties_mode
 from posthog.utils import PersonOnEventsMode, encode_get_request_params, generate_short_id
 from posthog.queries.person_on_events_v2_sql import PERSON_OVERRIDES_JOIN_SQL
 
+# Params of persons urls which are specific to each breakdown value and date
+PERSONS_URL_EXTRA_PARAMS = (
+    "entity_id",
+    "entity_type",
+    "entity_math",
+    "date_from",
+    "date_to",
+    "breakdown_value",
+    "breakdown_type",
+)
+
 
 class TrendsBreakdown:
     DISTINCT_ID_TABLE_ALIAS = EventQuery.DISTINCT_ID_TABLE_ALIAS
@@ -549,18 +560,28 @@ class TrendsBreakdown:
     def _parse_trend_result(self, filter: Filter, entity: Entity) -> Callable:
         def _parse(result: List) -> List:
             parsed_results = []
+            # Serializing the filter is slow, so do it once for all breakdown values
+            filter_dict = filter.to_dict()
+            persons_url_prefix = self._get_persons_url_prefix(filter, self.team_id)
+            # Breakdown values mostly share the same dates, which then don't need formatting again
+            date_axes: Dict[Tuple, Tuple[List[str], List[str]]] = {}
             for stats in result:
                 result_descriptors = self._breakdown_result_descriptors(stats[2], filter, entity)
-                parsed_result = parse_response(stats, filter, additional_values=result_descriptors, entity=entity)
+                dates = tuple(stats[0])
+                if dates not in date_axes:
+                    date_axes[dates] = format_date_axis(stats[0], filter)
+                parsed_result = parse_response(
+                    stats, filter, additional_values=result_descriptors, entity=entity, date_axis=date_axes[dates]
+                )
                 parsed_result.update(
                     {
                         "persons_urls": self._get_persons_url(
-                            filter, entity, self.team_id, stats[0], result_descriptors["breakdown_value"]
+                            filter, entity, persons_url_prefix, stats[0], result_descriptors["breakdown_value"]
                         )
                     }
                 )
                 parsed_results.append(parsed_result)
-                parsed_result.update({"filter": filter.to_dict()})
+                parsed_result.update({"filter": {**filter_dict}})
 
             try:
                 return sorted(parsed_results, key=lambda x: self.breakdown_sort_function(x))
@@ -569,8 +590,18 @@ class TrendsBreakdown:
 
         return _parse
 
+    def _get_persons_url_prefix(self, filter: Filter, team_id: int) -> str:
+        "Persons url with the filter params shared by all breakdown values and dates"
+        filter_params = {key: value for key, value in filter.to_params().items() if key not in PERSONS_URL_EXTRA_PARAMS}
+        return f"api/projects/{team_id}/persons/trends/?{urllib.parse.urlencode(filter_params)}"
+
     def _get_persons_url(
-        self, filter: Filter, entity: Entity, team_id: int, dates: List[datetime], breakdown_value: Union[str, int]
+        self,
+        filter: Filter,
+        entity: Entity,
+        persons_url_prefix: str,
+        dates: List[datetime],
+        breakdown_value: Union[str, int],
     ) -> List[Dict[str, Any]]:
         persons_url = []
         cache_invalidation_key = generate_short_id()
@@ -584,7 +615,6 @@ class TrendsBreakdown:
                 getattr(date, "second", 0),
                 tzinfo=getattr(date, "tzinfo", pytz.UTC),
             ).astimezone(pytz.UTC)
-            filter_params = filter.to_params()
             extra_params = {
                 "entity_id": entity.id,
                 "entity_type": entity.type,
@@ -594,11 +624,11 @@ class TrendsBreakdown:
                 "breakdown_value": breakdown_value,
                 "breakdown_type": filter.breakdown_type or "event",
             }
-            parsed_params: Dict[str, str] = encode_get_request_params({**filter_params, **extra_params})
+            parsed_params: Dict[str, str] = encode_get_request_params(extra_params)
             persons_url.append(
                 {
                     "filter": extra_params,
-                    "url": f"api/projects/{team_id}/persons/trends/?{urllib.parse.urlencode(parsed_params)}&cache_invalidation_key={cache_invalidation_key}",
+                    "url": f"{persons_url_prefix}&{urllib.parse.urlencode(parsed_params)}&cache_invalidation_key={cache_invalidation_key}",
                 }
             )
         return persons_url
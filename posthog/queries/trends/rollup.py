@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import pytz
+from django.conf import settings
+from django.utils import timezone
+
+from posthog.constants import (
+    MONTHLY_ACTIVE,
+    NON_TIME_SERIES_DISPLAY_TYPES,
+    TREND_FILTER_TYPE_EVENTS,
+    TRENDS_CUMULATIVE,
+    UNIQUE_USERS,
+    WEEKLY_ACTIVE,
+)
+from posthog.models.entity import Entity
+from posthog.models.filters import Filter
+from posthog.models.team import Team
+from posthog.queries.query_date_range import QueryDateRange
+from posthog.queries.trends.sql import (
+    ROLLUP_ACTIVE_USERS_SQL,
+    ROLLUP_VOLUME_AGGREGATE_SQL,
+    ROLLUP_VOLUME_SQL,
+)
+from posthog.queries.util import get_trunc_func_ch
+from posthog.utils import PersonOnEventsMode
+
+ACTIVE_USERS_WINDOW_DAYS = {WEEKLY_ACTIVE: 7, MONTHLY_ACTIVE: 30}
+
+
+class TrendsRollupQuery:
+    """
+    Reads a trends series from `events_hourly_rollup` rather than from events, for the series most dashboards are
+    made of: one event without property filters, counting events, unique users or sessions, or daily weekly and
+    monthly active users. Other series, and series whose date range doesn't cover whole hours, read events.
+
+    Unique counts are exact, as over events, but the rollup drifts from events where events change after ingestion:
+    events ingested twice stay counted twice, whereas events deduplicate them on merges, and events deleted with
+    their person (e.g. for GDPR requests) stay counted. Teams where this is common shouldn't read the rollup.
+    """
+
+    def __init__(self, entity: Entity, filter: Filter, team: Team) -> None:
+        self._entity = entity
+        self._filter = filter
+        self._team = team
+        self._query_date_range = QueryDateRange(filter, team)
+
+    @property
+    def is_eligible(self) -> bool:
+        if str(self._team.pk) not in settings.TRENDS_ROLLUP_TEAM_IDS:
+            return False
+        if self._entity.type != TREND_FILTER_TYPE_EVENTS or not isinstance(self._entity.id, str):
+            return False
+        if self._entity.property_groups.flat or self._filter.property_groups.flat:
+            return False
+        if self._filter.filter_test_accounts or self._filter.breakdown or self._filter.sampling_factor:
+            return False
+        if self._aggregate_operation is None:
+            return False
+
+        is_time_series = self._filter.display not in NON_TIME_SERIES_DISPLAY_TYPES
+        if self._entity.math in ACTIVE_USERS_WINDOW_DAYS and (not is_time_series or self._filter.interval != "day"):
+            return False
+        if self._entity.math == UNIQUE_USERS and is_time_series and self._filter.display == TRENDS_CUMULATIVE:
+            return False
+
+        return self._is_hour_aligned_date_range()
+
+    def get_query(self) -> Tuple[str, Dict]:
+        "The content query of the series, returning the same columns as the respective query over events"
+        _, date_from_params = self._query_date_range.date_from
+        _, date_to_params = self._query_date_range.date_to
+        params = {"team_id": self._team.pk, "event": self._entity.id, **date_from_params, **date_to_params}
+
+        date_from_expr = "toDateTime(%(date_from)s, %(timezone)s)"
+        if self._query_date_range.should_round:
+            date_from_expr = QueryDateRange._truncate_normalized_datetime(
+                date_from_expr, self._query_date_range.interval_annotation
+            )
+        format_params = {
+            "aggregate_operation": self._aggregate_operation,
+            "parsed_date_from": f"AND toTimeZone(hour, %(timezone)s) >= {date_from_expr}",
+            "parsed_date_to": "AND toTimeZone(hour, %(timezone)s) <= toDateTime(%(date_to)s, %(timezone)s)",
+        }
+
+        if self._filter.display in NON_TIME_SERIES_DISPLAY_TYPES:
+            return ROLLUP_VOLUME_AGGREGATE_SQL.format(**format_params), params
+
+        if self._entity.math in ACTIVE_USERS_WINDOW_DAYS:
+            params["active_user_days"] = ACTIVE_USERS_WINDOW_DAYS[self._entity.math]
+            return (
+                ROLLUP_ACTIVE_USERS_SQL.format(
+                    state_column=self._state_column, date_from_expr=date_from_expr, **format_params
+                ),
+                params,
+            )
+
+        return ROLLUP_VOLUME_SQL.format(interval=get_trunc_func_ch(self._filter.interval), **format_params), params
+
+    @property
+    def _aggregate_operation(self) -> Optional[str]:
+        if self._entity.math in (None, "total"):
+            return "sum(count)"
+        if self._state_column is None:
+            return None
+        return f"uniqExactMerge({self._state_column})"
+
+    @property
+    def _state_column(self) -> Optional[str]:
+        if self._entity.math == "unique_session":
+            return "session_ids"
+        if self._entity.math in (UNIQUE_USERS, WEEKLY_ACTIVE, MONTHLY_ACTIVE):
+            if self._team.aggregate_users_by_distinct_id:
+                return "distinct_ids"
+            # Persons of events are only known without a join when they're stored on events and not overridden
+            if self._team.person_on_events_mode == PersonOnEventsMode.V1_ENABLED:
+                return "person_ids"
+        return None
+
+    def _is_hour_aligned_date_range(self) -> bool:
+        """
+        Whether the date range covers whole hours of the rollup: starting at the start of an hour and ending at the end
+        of one or at the current time. Timezones with offsets of part of an hour never are.
+        """
+        tz = pytz.timezone(self._team.timezone)
+        date_from = _localize(self._query_date_range.date_from_param, tz)
+        date_to = _localize(self._query_date_range.date_to_param, tz)
+
+        if any(offset % timedelta(hours=1) for offset in (date_from.utcoffset(), date_to.utcoffset())):
+            return False
+        starts_at_hour = self._filter._date_from == "all" or (date_from.minute, date_from.second) == (0, 0)
+        ends_at_hour = (date_to.minute, date_to.second) == (59, 59) or date_to >= timezone.now()
+        return starts_at_hour and ends_at_hour
+
+
+def _localize(value: datetime, tz: pytz.BaseTzInfo) -> datetime:
+    return tz.localize(value) if value.tzinfo is None else value.astimezone(tz)
@@ -78,6 +78,36 @@ SELECT
 {event_query_base}
 """
 
+ROLLUP_VOLUME_SQL = """
+SELECT
+    {aggregate_operation} AS total,
+    {interval}(toTimeZone(hour, %(timezone)s)) AS date
+FROM events_hourly_rollup
+WHERE team_id = %(team_id)s AND event = %(event)s {parsed_date_from} {parsed_date_to}
+GROUP BY date
+"""
+
+ROLLUP_VOLUME_AGGREGATE_SQL = """
+SELECT {aggregate_operation} AS total
+FROM events_hourly_rollup
+WHERE team_id = %(team_id)s AND event = %(event)s {parsed_date_from} {parsed_date_to}
+"""
+
+ROLLUP_ACTIVE_USERS_SQL = """
+SELECT {aggregate_operation} AS total, day_start FROM (
+    /* Each hour counts towards the active users of its day and of the days after it within the window */
+    SELECT
+        {state_column},
+        arrayJoin(arrayMap(n -> toStartOfDay(toTimeZone(hour, %(timezone)s)) + toIntervalDay(n), range(%(active_user_days)s))) AS day_start
+    FROM events_hourly_rollup
+    WHERE team_id = %(team_id)s AND event = %(event)s
+      AND toTimeZone(hour, %(timezone)s) >= {date_from_expr} - toIntervalDay(%(active_user_days)s)
+      {parsed_date_to}
+)
+WHERE day_start >= {date_from_expr} AND day_start <= toDateTime(%(date_to)s, %(timezone)s)
+GROUP BY day_start
+"""
+
 FINAL_TIME_SERIES_SQL = """
 SELECT groupArray(day_start) as date, groupArray({aggregate}) AS total FROM (
     SELECT {smoothing_operation} AS count, day_start
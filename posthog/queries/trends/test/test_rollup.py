@@ -0,0 +1,105 @@
+from typing import Dict
+
+from django.test import override_settings
+from freezegun.api import freeze_time
+
+from posthog.client import sync_execute
+from posthog.constants import TRENDS_BOLD_NUMBER
+from posthog.models.events_hourly_rollup.sql import BACKFILL_EVENTS_HOURLY_ROLLUP_SQL
+from posthog.models.filters.filter import Filter
+from posthog.queries.trends.rollup import TrendsRollupQuery
+from posthog.queries.trends.trends import Trends
+from posthog.test.base import APIBaseTest, ClickhouseTestMixin, _create_event, flush_persons_and_events
+
+
+@freeze_time("2020-01-10T13:01:01Z")
+class TestTrendsRollup(ClickhouseTestMixin, APIBaseTest):
+    def setUp(self):
+        super().setUp()
+        self.team.aggregate_users_by_distinct_id = True
+        self.team.save()
+
+        for timestamp, distinct_id, session_id in [
+            ("2020-01-01T12:00:00Z", "1", "a"),
+            ("2020-01-01T12:30:00Z", "2", "a"),
+            ("2020-01-03T08:00:00Z", "1", "b"),
+            ("2020-01-06T23:59:59Z", "3", "c"),
+            ("2020-01-09T00:00:00Z", "1", "d"),
+            ("2020-01-10T13:00:00Z", "2", "e"),
+        ]:
+            _create_event(
+                team=self.team,
+                event="$pageview",
+                distinct_id=distinct_id,
+                timestamp=timestamp,
+                properties={"$session_id": session_id, "$browser": "Chrome" if distinct_id == "1" else "Firefox"},
+            )
+        _create_event(team=self.team, event="$pageleave", distinct_id="1", timestamp="2020-01-02T12:00:00Z")
+        flush_persons_and_events()
+        sync_execute(BACKFILL_EVENTS_HOURLY_ROLLUP_SQL, {"team_id": self.team.pk, "before": "2100-01-01 00:00:00"})
+
+    def _run(self, data: Dict, rollup: bool):
+        with override_settings(TRENDS_ROLLUP_TEAM_IDS=[str(self.team.pk)] if rollup else []):
+            filter = Filter(data={"date_from": "2020-01-01", "date_to": "2020-01-10", **data}, team=self.team)
+            self.assertEqual(TrendsRollupQuery(filter.entities[0], filter, self.team).is_eligible, rollup)
+            return Trends().run(filter, self.team)
+
+    def _assert_rollup_matches_events(self, data: Dict):
+        rollup_result = self._run(data, rollup=True)
+        events_result = self._run(data, rollup=False)
+
+        for key in ["data", "days", "aggregated_value"]:
+            self.assertEqual(
+                [series.get(key) for series in rollup_result], [series.get(key) for series in events_result]
+            )
+        return rollup_result
+
+    def test_counts_match_events(self):
+        result = self._assert_rollup_matches_events({"events": [{"id": "$pageview"}]})
+        self.assertEqual(result[0]["data"], [2, 0, 1, 0, 0, 1, 0, 0, 1, 1])
+
+        self._assert_rollup_matches_events({"events": [{"id": "$pageview"}], "interval": "week"})
+        self._assert_rollup_matches_events(
+            {"events": [{"id": "$pageview"}], "date_from": "2020-01-01 10:00:00", "interval": "hour"}
+        )
+
+    def test_unique_users_and_sessions_match_events(self):
+        for math in ["dau", "weekly_active", "monthly_active", "unique_session"]:
+            self._assert_rollup_matches_events({"events": [{"id": "$pageview", "math": math}]})
+
+    def test_aggregate_displays_match_events(self):
+        for math in ["total", "dau", "unique_session"]:
+            result = self._assert_rollup_matches_events(
+                {"events": [{"id": "$pageview", "math": math}], "display": TRENDS_BOLD_NUMBER}
+            )
+        self.assertEqual(result[0]["aggregated_value"], 5)
+
+    def test_team_timezone_matches_events(self):
+        self.team.timezone = "US/Pacific"
+        self.team.save()
+
+        self._assert_rollup_matches_events({"events": [{"id": "$pageview"}]})
+        self._assert_rollup_matches_events({"events": [{"id": "$pageview", "math": "weekly_active"}]})
+
+    def test_queries_the_rollup_can_not_answer_read_events(self):
+        with override_settings(TRENDS_ROLLUP_TEAM_IDS=[str(self.team.pk)]):
+            for data in [
+                {"events": [{"id": "$pageview", "properties": [{"key": "$browser", "value": "Chrome"}]}]},
+                {"events": [{"id": "$pageview"}], "properties": [{"key": "$browser", "value": "Chrome"}]},
+                {"events": [{"id": "$pageview"}], "breakdown": "$browser"},
+                {"events": [{"id": "$pageview", "math": "sum", "math_property": "$screen_width"}]},
+                {"events": [{"id": "$pageview", "math": "weekly_active"}], "interval": "week"},
+                {"events": [{"id": "$pageview"}], "date_from": "2020-01-01 10:30:00", "interval": "hour"},
+                {"events": [{"id": "$pageview"}], "date_to": "2020-01-05 10:30:00", "interval": "hour"},
+                {"events": [{"id": None}]},
+            ]:
+                filter = Filter(data={"date_from": "2020-01-01", **data}, team=self.team)
+                self.assertFalse(TrendsRollupQuery(filter.entities[0], filter, self.team).is_eligible, data)
+
+            self.team.aggregate_users_by_distinct_id = False
+            filter = Filter(data={"events": [{"id": "$pageview", "math": "dau"}]}, team=self.team)
+            self.assertFalse(TrendsRollupQuery(filter.entities[0], filter, self.team).is_eligible)
+
+            self.team.timezone = "Asia/Kolkata"
+            filter = Filter(data={"events": [{"id": "$pageview"}]}, team=self.team)
+            self.assertFalse(TrendsRollupQuery(filter.entities[0], filter, self.team).is_eligible)
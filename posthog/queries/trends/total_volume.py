@@ -28,6 +28,7 @@ from posthog.queries.trends.sql import (
     VOLUME_PER_ACTOR_SQL,
     VOLUME_SQL,
 )
+from posthog.queries.trends.rollup import TrendsRollupQuery
 from posthog.queries.trends.trends_actors import offset_time_series_date_by_interval
 from posthog.queries.trends.trends_event_query import TrendsEventQuery
 from posthog.queries.trends.util import (
@@ -49,6 +50,9 @@ class TrendsTotalVolume:
     PERSON_ID_OVERRIDES_TABLE_ALIAS = EventQuery.PERSON_ID_OVERRIDES_TABLE_ALIAS
 
     def _total_volume_query(self, entity: Entity, filter: Filter, team: Team) -> Tuple[str, Dict, Callable]:
+        rollup_query = TrendsRollupQuery(entity, filter, team)
+        if rollup_query.is_eligible:
+            return self._total_volume_rollup_query(rollup_query, entity, filter, team)
 
         trunc_func = get_trunc_func_ch(filter.interval)
         interval_func = get_interval_func_ch(filter.interval)
@@ -122,7 +126,6 @@ class TrendsTotalVolume:
             return (content_sql, params, self._parse_aggregate_volume_result(filter, entity, team.id))
         else:
             tag_queries(trend_volume_display="time_series")
-            null_sql = NULL_SQL.format(trunc_func=trunc_func, interval_func=interval_func)
 
             if entity.math in [WEEKLY_ACTIVE, MONTHLY_ACTIVE]:
                 tag_queries(trend_volume_type="active_users")
@@ -176,29 +179,50 @@ class TrendsTotalVolume:
                 )
 
             params["interval"] = filter.interval
+            final_query = self._final_time_series_query(filter, content_sql)
 
-            # If we have a smoothing interval > 1 then add in the sql to
-            # handling rolling average. Else just do a sum. This is possibly an
-            # nessacary optimization.
-            if filter.smoothing_intervals > 1:
-                smoothing_operation = f"""
-                    AVG(SUM(total))
-                    OVER (
-                        ORDER BY day_start
-                        ROWS BETWEEN {filter.smoothing_intervals - 1} PRECEDING
-                        AND CURRENT ROW
-                    )"""
-            else:
-                smoothing_operation = "SUM(total)"
+            return final_query, params, self._parse_total_volume_result(filter, entity, team)
 
-            final_query = FINAL_TIME_SERIES_SQL.format(
-                null_sql=null_sql,
-                content_sql=content_sql,
-                smoothing_operation=smoothing_operation,
-                aggregate="count" if filter.smoothing_intervals < 2 else "floor(count)",
-            )
+    def _total_volume_rollup_query(
+        self, rollup_query: TrendsRollupQuery, entity: Entity, filter: Filter, team: Team
+    ) -> Tuple[str, Dict, Callable]:
+        tag_queries(trend_volume_source="events_hourly_rollup")
+        content_sql, params = rollup_query.get_query()
 
-            return final_query, params, self._parse_total_volume_result(filter, entity, team)
+        if filter.display in NON_TIME_SERIES_DISPLAY_TYPES:
+            tag_queries(trend_volume_display="non_time_series")
+            return content_sql, params, self._parse_aggregate_volume_result(filter, entity, team.id)
+
+        tag_queries(trend_volume_display="time_series")
+        params["interval"] = filter.interval
+        final_query = self._final_time_series_query(filter, content_sql)
+        return final_query, params, self._parse_total_volume_result(filter, entity, team)
+
+    def _final_time_series_query(self, filter: Filter, content_sql: str) -> str:
+        null_sql = NULL_SQL.format(
+            trunc_func=get_trunc_func_ch(filter.interval), interval_func=get_interval_func_ch(filter.interval)
+        )
+
+        # If we have a smoothing interval > 1 then add in the sql to
+        # handling rolling average. Else just do a sum. This is possibly an
+        # nessacary optimization.
+        if filter.smoothing_intervals > 1:
+            smoothing_operation = f"""
+                AVG(SUM(total))
+                OVER (
+                    ORDER BY day_start
+                    ROWS BETWEEN {filter.smoothing_intervals - 1} PRECEDING
+                    AND CURRENT ROW
+                )"""
+        else:
+            smoothing_operation = "SUM(total)"
+
+        return FINAL_TIME_SERIES_SQL.format(
+            null_sql=null_sql,
+            content_sql=content_sql,
+            smoothing_operation=smoothing_operation,
+            aggregate="count" if filter.smoothing_intervals < 2 else "floor(count)",
+        )
 
     def _parse_total_volume_result(self, filter: Filter, entity: Entity, team: Team) -> Callable:
         def _parse(result: List) -> List:
@@ -18,7 +18,11 @@ from posthog.models.filters.properties_timeline_filter import PropertiesTimeline
 from posthog.models.filters.utils import validate_group_type_index
 from posthog.models.property.util import get_property_string_expr
 from posthog.models.team import Team
-from posthog.queries.util import correct_result_for_sampling, get_earliest_timestamp
+from posthog.queries.util import (
+    correct_results_for_sampling,
+    get_earliest_timestamp,
+    sampling_confidence_intervals,
+)
 from posthog.utils import PersonOnEventsMode
 
 logger = structlog.get_logger(__name__)
@@ -92,23 +96,34 @@ def process_math(
 
 
 def parse_response(
-    stats: Dict, filter: Filter, additional_values: Dict = {}, entity: Optional[Entity] = None
+    stats: Dict,
+    filter: Filter,
+    additional_values: Dict = {},
+    entity: Optional[Entity] = None,
+    date_axis: Optional[Tuple[List[str], List[str]]] = None,
 ) -> Dict[str, Any]:
-    counts = stats[1]
-    labels = [item.strftime("%-d-%b-%Y{}".format(" %H:%M" if filter.interval == "hour" else "")) for item in stats[0]]
-    days = [item.strftime("%Y-%m-%d{}".format(" %H:%M:%S" if filter.interval == "hour" else "")) for item in stats[0]]
+    labels, days = date_axis or format_date_axis(stats[0], filter)
 
     entity_math = entity.math if entity is not None else None
-    counts = [correct_result_for_sampling(c, filter.sampling_factor, entity_math) for c in counts]
+    counts = correct_results_for_sampling(stats[1], filter.sampling_factor, entity_math)
+    confidence_intervals = sampling_confidence_intervals(stats[1], filter.sampling_factor, entity_math)
     return {
         "data": [float(c) for c in counts],
         "count": float(sum(counts)),
-        "labels": labels,
-        "days": days,
+        "labels": list(labels),
+        "days": list(days),
+        **({"confidence_intervals": confidence_intervals} if confidence_intervals is not None else {}),
         **additional_values,
     }
 
 
+def format_date_axis(dates: List[datetime.datetime], filter: Filter) -> Tuple[List[str], List[str]]:
+    "Labels and days of a result's dates, which can be shared by all results of a query with the same dates"
+    labels = [item.strftime("%-d-%b-%Y{}".format(" %H:%M" if filter.interval == "hour" else "")) for item in dates]
+    days = [item.strftime("%Y-%m-%d{}".format(" %H:%M:%S" if filter.interval == "hour" else "")) for item in dates]
+    return labels, days
+
+
 def get_active_user_params(filter: Filter, entity: Entity, team_id: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     diff = timedelta(days=7 if entity.math == WEEKLY_ACTIVE else 30)
 
@@ -1,8 +1,9 @@
 import json
 from datetime import datetime, timedelta
 from enum import Enum, auto
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Union, cast
 
+import numpy as np
 import pytz
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
@@ -133,22 +134,64 @@ def convert_to_datetime_aware(date_obj):
     return date_obj
 
 
+# z-score of the confidence intervals of sampled results
+SAMPLING_CONFIDENCE_Z = 1.96
+
+
 def correct_result_for_sampling(
     value: Union[int, float], sampling_factor: Optional[float], entity_math: Optional[str] = None
 ) -> Union[int, float]:
+    if not _is_corrected_for_sampling(sampling_factor, entity_math):
+        return value
+
+    result = round(value * (1 / cast(float, sampling_factor)))
+    return result
+
+
+def correct_results_for_sampling(
+    values: Sequence[Union[int, float]], sampling_factor: Optional[float], entity_math: Optional[str] = None
+) -> List[Union[int, float]]:
+    """Same as `correct_result_for_sampling`, for a whole series of results at once"""
+    if not _is_corrected_for_sampling(sampling_factor, entity_math):
+        return list(values)
+
+    # np.rint rounds half to even, same as round()
+    return np.rint(np.asarray(values, dtype=np.float64) * (1 / cast(float, sampling_factor))).astype(np.int64).tolist()
+
+
+def sampling_confidence_intervals(
+    values: Sequence[Union[int, float]], sampling_factor: Optional[float], entity_math: Optional[str] = None
+) -> Optional[List[List[int]]]:
+    """
+    95% confidence intervals of the results `correct_results_for_sampling` scales up, as [low, high] per result. None
+    when the results aren't estimates, i.e. aren't sampled or aren't scaled up.
+
+    Each event being sampled is treated as independent, which understates the error of results where some persons
+    have many of the events, as all events of a person are sampled or not together.
+    """
+    if not _is_corrected_for_sampling(sampling_factor, entity_math) or cast(float, sampling_factor) >= 1:
+        return None
+
+    factor = cast(float, sampling_factor)
+    sampled = np.asarray(values, dtype=np.float64)
+    # Results with no events sampled are still uncertain, so that they're treated as having one
+    margin = SAMPLING_CONFIDENCE_Z * np.sqrt(np.maximum(sampled, 1) * (1 - factor)) / factor
+    estimate = sampled / factor
+    low = np.maximum(np.rint(estimate - margin), 0).astype(np.int64)
+    high = np.rint(estimate + margin).astype(np.int64)
+    return np.stack([low, high], axis=-1).tolist()
+
+
+def _is_corrected_for_sampling(sampling_factor: Optional[float], entity_math: Optional[str]) -> bool:
     from posthog.queries.trends.util import ALL_SUPPORTED_MATH_FUNCTIONS
 
     # We don't adjust results for sampling if:
     # - There's no sampling_factor specified i.e. the query isn't sampled
     # - The query performs a math operation other than 'sum' because statistical math operations
     # on sampled data yield results in the correct format
-    if (not sampling_factor) or (
-        entity_math is not None and entity_math != "sum" and entity_math in ALL_SUPPORTED_MATH_FUNCTIONS
-    ):
-        return value
-
-    result = round(value * (1 / sampling_factor))
-    return result
+    return bool(sampling_factor) and (
+        entity_math is None or entity_math == "sum" or entity_math not in ALL_SUPPORTED_MATH_FUNCTIONS
+    )
 
 
 def get_person_properties_mode(team: Team) -> PersonPropertiesMode:
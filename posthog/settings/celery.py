@@ -5,6 +5,7 @@ from kombu import Exchange, Queue
 from posthog.settings.base_variables import TEST
 from posthog.settings.data_stores import REDIS_URL
 from posthog.settings.ee import EE_AVAILABLE
+from posthog.settings.utils import get_from_env
 
 # Only listen to the default queue "celery", unless overridden via the CLI
 CELERY_QUEUES = (Queue("celery", Exchange("celery"), "celery"),)
@@ -17,6 +18,14 @@ CELERY_IGNORE_RESULT = True  # only applies to delay(), must do @shared_task(ign
 CELERY_RESULT_EXPIRES = timedelta(days=4)  # expire tasks after 4 days instead of the default 1
 REDBEAT_LOCK_TIMEOUT = 45  # keep distributed beat lock for 45sec
 
+# How many headless browsers each worker process keeps warm for image exports, which also bounds how many images it
+# renders at the same time. Tests render one image at a time in the calling thread, as other threads can't see the
+# test's transaction
+IMAGE_EXPORT_BROWSER_POOL_SIZE = get_from_env("IMAGE_EXPORT_BROWSER_POOL_SIZE", 1 if TEST else 2, type_cast=int)
+# Browsers are restarted after this many renders, and closed once idle for this long
+IMAGE_EXPORT_BROWSER_MAX_RENDERS = get_from_env("IMAGE_EXPORT_BROWSER_MAX_RENDERS", 50, type_cast=int)
+IMAGE_EXPORT_BROWSER_MAX_IDLE_SECONDS = get_from_env("IMAGE_EXPORT_BROWSER_MAX_IDLE_SECONDS", 300, type_cast=int)
+
 if TEST:
     import celery
 
@@ -146,6 +146,40 @@ try:
 except Exception:
     CLICKHOUSE_PER_TEAM_SETTINGS = {}
 
+# Insights with `"sampling_factor": "auto"` are sampled to read about this many events
+AUTO_SAMPLING_TARGET_ROWS = get_from_env("AUTO_SAMPLING_TARGET_ROWS", 10_000_000, type_cast=int)
+
+# Teams whose simple trends insights read the events_hourly_rollup table instead of events. Only add teams once the
+# rollup covers the date ranges of their insights, i.e. once their events were backfilled
+TRENDS_ROLLUP_TEAM_IDS = get_list(os.getenv("TRENDS_ROLLUP_TEAM_IDS", ""))
+
+# Funnels over date ranges of at least this many days run as one query per slice of FUNNEL_SLICE_DAYS days, with
+# slices that are done changing kept for later runs, see posthog/queries/funnels/sliced.py. 0 disables slicing, which
+# is opt-in
+FUNNEL_SLICED_EXECUTION_MIN_DAYS = get_from_env("FUNNEL_SLICED_EXECUTION_MIN_DAYS", 0, type_cast=int)
+FUNNEL_SLICE_DAYS = get_from_env("FUNNEL_SLICE_DAYS", 30, type_cast=int)
+FUNNEL_SLICE_CONCURRENCY = get_from_env("FUNNEL_SLICE_CONCURRENCY", 4, type_cast=int)
+
+# Admission control of ClickHouse queries by their estimated bytes read, see posthog/clickhouse/client/admission.py.
+# "off", "observe" (only report what would have been decided) or "enforce"
+CLICKHOUSE_ADMISSION_CONTROL = os.getenv("CLICKHOUSE_ADMISSION_CONTROL", "off")
+# Upper bounds of the estimated bytes read by the queries in flight of a team, and of all queries of a workload
+CLICKHOUSE_ADMISSION_TEAM_BUDGET_BYTES = get_from_env(
+    "CLICKHOUSE_ADMISSION_TEAM_BUDGET_BYTES", 200 * 1024**3, type_cast=int  # 200GB
+)
+CLICKHOUSE_ADMISSION_WORKLOAD_BUDGET_BYTES = get_from_env(
+    "CLICKHOUSE_ADMISSION_WORKLOAD_BUDGET_BYTES", 2 * 1024**4, type_cast=int  # 2TB
+)
+# How long queries over budget wait for budget to free up, before they're rejected
+CLICKHOUSE_ADMISSION_QUEUE_SECONDS = get_from_env("CLICKHOUSE_ADMISSION_QUEUE_SECONDS", 10, type_cast=int)
+try:
+    # Team budgets that differ from the default, e.g. {"2": 1099511627776}
+    CLICKHOUSE_ADMISSION_TEAM_BUDGET_OVERRIDES = json.loads(
+        os.getenv("CLICKHOUSE_ADMISSION_TEAM_BUDGET_OVERRIDES", "{}")
+    )
+except Exception:
+    CLICKHOUSE_ADMISSION_TEAM_BUDGET_OVERRIDES = {}
+
 _clickhouse_http_protocol = "http://"
 _clickhouse_http_port = "8123"
 if CLICKHOUSE_SECURE:
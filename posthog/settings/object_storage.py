@@ -26,4 +26,11 @@ OBJECT_STORAGE_SESSION_RECORDING_LTS_FOLDER = os.getenv(
     "OBJECT_STORAGE_SESSION_RECORDING_LTS_FOLDER", "session_recordings_lts"
 )
 OBJECT_STORAGE_EXPORTS_FOLDER = os.getenv("OBJECT_STORAGE_EXPORTS_FOLDER", "exports")
+# CSV exports larger than this are uploaded to object storage part by part while they're written. Needs to be at least
+# 5MB, the smallest part size object storage accepts
+OBJECT_STORAGE_EXPORTS_PART_SIZE_BYTES = get_from_env(
+    "OBJECT_STORAGE_EXPORTS_PART_SIZE_BYTES", 1024 * 1024 * 8, type_cast=int  # 8MB
+)
+# Upper bound of the rows of a CSV export, whatever the export asks for
+CSV_EXPORT_MAX_ROWS = get_from_env("CSV_EXPORT_MAX_ROWS", 1_000_000, type_cast=int)
 OBJECT_STORAGE_MEDIA_UPLOADS_FOLDER = os.getenv("OBJECT_STORAGE_MEDIA_UPLOADS_FOLDER", "media_uploads")
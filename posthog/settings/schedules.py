@@ -3,6 +3,16 @@ from posthog.settings.utils import get_from_env, str_to_bool
 
 USE_PRECALCULATED_CH_COHORT_PEOPLE = not TEST
 CALCULATE_X_COHORTS_PARALLEL = get_from_env("CALCULATE_X_COHORTS_PARALLEL", 5, type_cast=int)
+# Upper bound of the estimated ClickHouse time of a team's cohort calculations in flight at the same time
+COHORT_CALCULATION_MAX_TEAM_COST_SECONDS = get_from_env("COHORT_CALCULATION_MAX_TEAM_COST_SECONDS", 300, type_cast=int)
+# Whether dynamic cohorts only apply the changes since their last calculation between periodic full rebuilds
+COHORT_INCREMENTAL_CALCULATION_ENABLED = get_from_env(
+    "COHORT_INCREMENTAL_CALCULATION_ENABLED", False, type_cast=str_to_bool
+)
+# Whether due cohorts of the same team are calculated together with one scan over the team's events and persons
+COHORT_BATCH_CALCULATION_ENABLED = get_from_env("COHORT_BATCH_CALCULATION_ENABLED", False, type_cast=str_to_bool)
+# Upper bound of cohorts calculated by one shared scan
+COHORT_CALCULATION_BATCH_SIZE = get_from_env("COHORT_CALCULATION_BATCH_SIZE", 20, type_cast=int)
 
 ACTION_EVENT_MAPPING_INTERVAL_SECONDS = get_from_env("ACTION_EVENT_MAPPING_INTERVAL_SECONDS", 300, type_cast=int)
 
@@ -12,6 +22,11 @@ EVENT_PROPERTY_USAGE_INTERVAL_CRON = get_from_env(
     "0 */6 * * *",
 )
 
+# Schedule to add recently ingested property values to the index used for autocomplete. Follows crontab syntax.
+# Runs should be an hour apart, as each one indexes the last full hour. Use empty string to prevent this, which
+# also makes autocomplete always scan raw data
+PROPERTY_VALUES_INDEX_SCHEDULE_CRON = get_from_env("PROPERTY_VALUES_INDEX_SCHEDULE_CRON", "" if TEST else "5 * * * *")
+
 # Schedule to syncronize insight cache states on. Follows crontab syntax.
 SYNC_INSIGHT_CACHE_STATES_SCHEDULE = get_from_env(
     "SYNC_INSIGHT_CACHE_STATES_SCHEDULE",
@@ -24,12 +39,21 @@ UPDATE_CACHED_DASHBOARD_ITEMS_INTERVAL_SECONDS = get_from_env(
     "UPDATE_CACHED_DASHBOARD_ITEMS_INTERVAL_SECONDS", 90, type_cast=int
 )
 
+# How many stale dashboard tiles a dashboard load refreshes at the same time, and for how long at most. Tiles that
+# aren't refreshed in time return their cached result, while their refresh keeps running. Tests refresh one tile at a
+# time in the request thread, as other threads can't see the test's transaction
+DASHBOARD_TILE_REFRESH_CONCURRENCY = get_from_env("DASHBOARD_TILE_REFRESH_CONCURRENCY", 1 if TEST else 4, type_cast=int)
+DASHBOARD_TILE_REFRESH_BUDGET_SECONDS = get_from_env("DASHBOARD_TILE_REFRESH_BUDGET_SECONDS", 30, type_cast=int)
+
 COUNT_TILES_WITH_NO_FILTERS_HASH_INTERVAL_SECONDS = get_from_env(
     "COUNT_TILES_WITH_NO_FILTERS_HASH_INTERVAL_SECONDS", 1800, type_cast=int
 )
 
 
 CACHED_RESULTS_TTL = 7 * 24 * 60 * 60  # how long to keep cached results for
+# How long to keep persons and groups loaded for actor queries (e.g. persons modal, exports) cached for.
+# 0 disables the cache
+ACTOR_CACHE_TTL_SECONDS = get_from_env("ACTOR_CACHE_TTL_SECONDS", 0 if TEST else 60, type_cast=int)
 
 # Schedule to run asynchronous data deletion on. Follows crontab syntax.
 # Use empty string to prevent this
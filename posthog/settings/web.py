@@ -31,6 +31,18 @@ DECIDE_BUCKET_REPLENISH_RATE = get_from_env("DECIDE_BUCKET_REPLENISH_RATE", type
 DECIDE_BILLING_SAMPLING_RATE = get_from_env("DECIDE_BILLING_SAMPLING_RATE", 0.1, type_cast=float)
 DECIDE_BILLING_ANALYTICS_TOKEN = get_from_env("DECIDE_BILLING_ANALYTICS_TOKEN", None, type_cast=str, optional=True)
 
+# Decide team config caching
+# Site apps are transpiled by the plugin server without signals, so cached team configs are recomputed this often
+DECIDE_CONFIG_REFRESH_SECONDS = get_from_env("DECIDE_CONFIG_REFRESH_SECONDS", 300, type_cast=int)
+# How long a process reuses a team config without reading Redis, so how long it can miss changes made elsewhere
+DECIDE_CONFIG_LOCAL_CACHE_SECONDS = get_from_env("DECIDE_CONFIG_LOCAL_CACHE_SECONDS", 0 if TEST else 10, type_cast=int)
+
+# Rejecting unknown API tokens
+# How long a token that belongs to no team, or a personal API key that matches no key, is rejected without a lookup
+INVALID_API_TOKEN_CACHE_SECONDS = get_from_env("INVALID_API_TOKEN_CACHE_SECONDS", 0 if TEST else 60, type_cast=int)
+# How often processes reload the bloom filter of project API tokens, so how long they can reject a new token. 0 disables
+API_TOKEN_FILTER_RELOAD_SECONDS = get_from_env("API_TOKEN_FILTER_RELOAD_SECONDS", 0 if TEST else 30, type_cast=int)
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -1,5 +1,5 @@
 import abc
-from typing import Optional, Union, List
+from typing import Dict, Iterable, List, Optional, Union
 
 import structlog
 from boto3 import client
@@ -41,6 +41,10 @@ class ObjectStorageClient(metaclass=abc.ABCMeta):
     def write(self, bucket: str, key: str, content: Union[str, bytes]) -> None:
         pass
 
+    @abc.abstractmethod
+    def write_parts(self, bucket: str, key: str, parts: Iterable[bytes]) -> None:
+        pass
+
 
 class UnavailableStorage(ObjectStorageClient):
     def head_bucket(self, bucket: str):
@@ -61,6 +65,9 @@ class UnavailableStorage(ObjectStorageClient):
     def write(self, bucket: str, key: str, content: Union[str, bytes]) -> None:
         pass
 
+    def write_parts(self, bucket: str, key: str, parts: Iterable[bytes]) -> None:
+        pass
+
 
 class ObjectStorage(ObjectStorageClient):
     def __init__(self, aws_client) -> None:
@@ -124,6 +131,51 @@ class ObjectStorage(ObjectStorageClient):
             capture_exception(e)
             raise ObjectStorageError("write failed") from e
 
+    def write_parts(self, bucket: str, key: str, parts: Iterable[bytes]) -> None:
+        """
+        Writes the object with a multipart upload, consuming one part at a time. All parts but the last need to
+        be at least 5MB
+        """
+        upload_id = self._call_for_write(bucket, key, "create_multipart_upload", Bucket=bucket, Key=key)["UploadId"]
+        try:
+            uploaded_parts = []
+            for part_number, content in enumerate(parts, start=1):
+                s3_response = self._call_for_write(
+                    bucket,
+                    key,
+                    "upload_part",
+                    Bucket=bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=content,
+                )
+                uploaded_parts.append({"ETag": s3_response["ETag"], "PartNumber": part_number})
+            self._call_for_write(
+                bucket,
+                key,
+                "complete_multipart_upload",
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": uploaded_parts},
+            )
+        except BaseException:
+            # Uploaded parts are kept until the upload is aborted, also when producing the parts failed
+            try:
+                self.aws_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            except Exception as e:
+                logger.warn("object_storage.abort_multipart_upload_failed", bucket=bucket, file_name=key, error=e)
+            raise
+
+    def _call_for_write(self, bucket: str, key: str, method: str, **kwargs) -> Dict:
+        try:
+            return getattr(self.aws_client, method)(**kwargs)
+        except Exception as e:
+            logger.error("object_storage.write_failed", bucket=bucket, file_name=key, method=method, error=e)
+            capture_exception(e)
+            raise ObjectStorageError("write failed") from e
+
 
 _client: ObjectStorageClient = UnavailableStorage()
 
@@ -152,6 +204,10 @@ def write(file_name: str, content: Union[str, bytes]) -> None:
     return object_storage_client().write(bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name, content=content)
 
 
+def write_parts(file_name: str, parts: Iterable[bytes]) -> None:
+    return object_storage_client().write_parts(bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name, parts=parts)
+
+
 def read(file_name: str) -> Optional[str]:
     return object_storage_client().read(bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name)
 
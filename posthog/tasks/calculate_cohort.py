@@ -1,44 +1,116 @@
 import time
-from typing import Any, Dict, List
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
 
 import structlog
 from celery import shared_task
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
-from django.db.models import F
+from django.db.models import Q
 from django.utils import timezone
 
 from posthog.models import Cohort
 from posthog.models.cohort import get_and_update_pending_version
+from posthog.models.cohort.scheduling import get_cohorts_to_calculate
 from posthog.models.cohort.util import clear_stale_cohortpeople
 
 logger = structlog.get_logger(__name__)
 
 MAX_AGE_MINUTES = 15
+# Incremental calculations only apply changes, a full rebuild is still done at this interval as a consistency pass
+FULL_RECALCULATION_INTERVAL_HOURS = 24
 
 
 def calculate_cohorts() -> None:
     # This task will be run every minute
-    # Every minute, grab a few cohorts off the list and execute them
-    for cohort in (
-        Cohort.objects.filter(
-            deleted=False,
-            is_calculating=False,
-            last_calculation__lte=timezone.now() - relativedelta(minutes=MAX_AGE_MINUTES),
-            errors_calculating__lte=20,
-        )
-        .exclude(is_static=True)
-        .order_by(F("last_calculation").asc(nulls_first=True))[0 : settings.CALCULATE_X_COHORTS_PARALLEL]
-    ):
-
+    # Every minute, grab a few cohorts off the list and execute them, see `get_cohorts_to_calculate` for the order
+    batch_size = settings.COHORT_CALCULATION_BATCH_SIZE if settings.COHORT_BATCH_CALCULATION_ENABLED else 1
+    cohorts = get_cohorts_to_calculate(
+        limit=settings.CALCULATE_X_COHORTS_PARALLEL * batch_size, max_age=timedelta(minutes=MAX_AGE_MINUTES)
+    )
+
+    # Full calculations of cohorts of the same team are batched into shared scans of up to `batch_size` cohorts,
+    # each batch counting as one of the parallel calculations
+    calculations: List[List[Cohort]] = []
+    open_batches: Dict[int, List[Cohort]] = {}
+    for cohort in cohorts:
         cohort = Cohort.objects.filter(pk=cohort.pk).get()
-        update_cohort(cohort)
-
-
-def update_cohort(cohort: Cohort) -> None:
-    pending_version = get_and_update_pending_version(cohort)
-    clear_stale_cohort.delay(cohort.id, cohort.version)
-    calculate_cohort_ch.delay(cohort.id, pending_version)
+        if batch_size == 1 or should_calculate_incrementally(cohort):
+            calculations.append([cohort])
+            continue
+
+        batch = open_batches.get(cohort.team_id)
+        if batch is None or len(batch) >= batch_size:
+            batch = open_batches[cohort.team_id] = []
+            calculations.append(batch)
+        batch.append(cohort)
+
+    for calculation in calculations[: settings.CALCULATE_X_COHORTS_PARALLEL]:
+        if len(calculation) == 1:
+            update_cohort(calculation[0], incremental=should_calculate_incrementally(calculation[0]))
+        else:
+            update_cohorts_batch(calculation)
+
+
+def should_calculate_incrementally(cohort: Cohort) -> bool:
+    return bool(
+        settings.COHORT_INCREMENTAL_CALCULATION_ENABLED
+        and cohort.calculation_watermark
+        and cohort.last_full_calculation
+        and cohort.last_full_calculation > timezone.now() - relativedelta(hours=FULL_RECALCULATION_INTERVAL_HOURS)
+        # A full calculation of a new version is still in flight
+        and cohort.version is not None
+        and cohort.pending_version == cohort.version
+    )
+
+
+def update_cohort(cohort: Cohort, incremental: bool = False) -> None:
+    # Marks the calculation as in flight, which the scheduler uses to cap concurrent calculations per team
+    mark_calculations_in_flight([cohort.pk])
+
+    try:
+        if incremental:
+            calculate_cohort_ch_incremental.delay(cohort.id)
+            return
+
+        pending_version = get_and_update_pending_version(cohort)
+        clear_stale_cohort.delay(cohort.id, cohort.version)
+        calculate_cohort_ch.delay(cohort.id, pending_version)
+    except Exception:
+        clear_calculations_in_flight([cohort.pk], scheduled_before=timezone.now())
+        raise
+
+
+def update_cohorts_batch(cohorts: List[Cohort]) -> None:
+    cohort_ids = [cohort.pk for cohort in cohorts]
+    mark_calculations_in_flight(cohort_ids)
+
+    try:
+        pending_versions: List[Tuple[int, int]] = []
+        for cohort in cohorts:
+            pending_versions.append((cohort.id, get_and_update_pending_version(cohort)))
+            clear_stale_cohort.delay(cohort.id, cohort.version)
+        calculate_cohorts_ch_batch.delay(pending_versions)
+    except Exception:
+        clear_calculations_in_flight(cohort_ids, scheduled_before=timezone.now())
+        raise
+
+
+def mark_calculations_in_flight(cohort_ids: Iterable[int]) -> None:
+    Cohort.objects.filter(pk__in=cohort_ids).update(is_calculating=True, calculation_started_at=timezone.now())
+
+
+def clear_calculations_in_flight(cohort_ids: Iterable[int], scheduled_before: datetime) -> None:
+    """
+    Calculations clear the flag themselves once done. This covers tasks that fail before or around them, e.g. when
+    the cohort can't be loaded, so that the cohorts are scheduled again right away. Calculations scheduled since
+    `scheduled_before` are left in flight
+    """
+    Cohort.objects.filter(
+        Q(calculation_started_at__lt=scheduled_before) | Q(calculation_started_at__isnull=True),
+        pk__in=cohort_ids,
+        is_calculating=True,
+    ).update(is_calculating=False)
 
 
 @shared_task(ignore_result=True)
@@ -49,8 +121,37 @@ def clear_stale_cohort(cohort_id: int, current_version: int) -> None:
 
 @shared_task(ignore_result=True, max_retries=2)
 def calculate_cohort_ch(cohort_id: int, pending_version: int) -> None:
-    cohort: Cohort = Cohort.objects.get(pk=cohort_id)
-    cohort.calculate_people_ch(pending_version)
+    task_started_at = timezone.now()
+    try:
+        cohort: Cohort = Cohort.objects.get(pk=cohort_id)
+        cohort.calculate_people_ch(pending_version)
+    finally:
+        clear_calculations_in_flight([cohort_id], scheduled_before=task_started_at)
+
+
+@shared_task(ignore_result=True, max_retries=2)
+def calculate_cohorts_ch_batch(pending_versions: List[Tuple[int, int]]) -> None:
+    pending_version_by_id = {cohort_id: pending_version for cohort_id, pending_version in pending_versions}
+    task_started_at = timezone.now()
+    try:
+        cohorts = Cohort.objects.filter(pk__in=pending_version_by_id.keys()).select_related("team")
+        Cohort.calculate_people_ch_batch({cohort: pending_version_by_id[cohort.pk] for cohort in cohorts})
+    finally:
+        clear_calculations_in_flight(list(pending_version_by_id), scheduled_before=task_started_at)
+
+
+@shared_task(ignore_result=True, max_retries=2)
+def calculate_cohort_ch_incremental(cohort_id: int) -> None:
+    task_started_at = timezone.now()
+    try:
+        cohort: Cohort = Cohort.objects.get(pk=cohort_id)
+        calculated = cohort.calculate_people_ch_incremental()
+    finally:
+        clear_calculations_in_flight([cohort_id], scheduled_before=task_started_at)
+
+    if not calculated:
+        # Not eligible (anymore), e.g. because its filters changed, so rebuild it fully instead
+        update_cohort(cohort)
 
 
 @shared_task(ignore_result=True, max_retries=1)
@@ -0,0 +1,153 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional
+
+import structlog
+from django.conf import settings
+from selenium import webdriver
+
+logger = structlog.get_logger(__name__)
+
+
+class BrowserPoolTimeout(Exception):
+    pass
+
+
+@dataclass
+class PooledBrowser:
+    driver: webdriver.Chrome
+    render_count: int = 0
+    last_used_at: float = field(default_factory=time.monotonic)
+
+
+class BrowserPool:
+    """
+    Headless browser sessions that are kept warm between renders of this process, so that renders don't each pay for
+    starting a browser. At most IMAGE_EXPORT_BROWSER_POOL_SIZE sessions exist at once, which also bounds how many
+    renders run at the same time. Sessions are recycled after IMAGE_EXPORT_BROWSER_MAX_RENDERS renders, so that
+    long-lived browsers don't keep growing in memory. Sessions idle for IMAGE_EXPORT_BROWSER_MAX_IDLE_SECONDS are closed
+    by a timer, so that a process that stopped rendering doesn't keep browsers around.
+    """
+
+    def __init__(self, create_driver: Callable[[], webdriver.Chrome]) -> None:
+        self._create_driver = create_driver
+        self._condition = threading.Condition()
+        self._idle: List[PooledBrowser] = []
+        self._in_use_count = 0
+        self._reaper: Optional[threading.Timer] = None
+
+    @contextmanager
+    def driver(self, timeout: float = 60) -> Iterator[webdriver.Chrome]:
+        """
+        Lends a healthy browser session, waiting up to `timeout` seconds for one to be free. Sessions are only put
+        back into the pool after successful renders, as failed ones may have left them in any state.
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._in_use_count < settings.IMAGE_EXPORT_BROWSER_POOL_SIZE, timeout=timeout
+            ):
+                raise BrowserPoolTimeout(f"No browser became available within {timeout} seconds")
+            self._in_use_count += 1
+
+        browser = None
+        try:
+            browser = self._take_healthy_browser()
+            yield browser.driver
+            browser.render_count += 1
+            self._release(browser)
+        except BaseException:
+            if browser:
+                _quit(browser)
+            raise
+        finally:
+            with self._condition:
+                self._in_use_count -= 1
+                self._condition.notify()
+
+    def close(self) -> None:
+        with self._condition:
+            idle = self._idle
+            self._idle = []
+            if self._reaper:
+                self._reaper.cancel()
+                self._reaper = None
+        for browser in idle:
+            _quit(browser)
+
+    def reap_idle(self) -> None:
+        "Closes the sessions that have been idle for longer than IMAGE_EXPORT_BROWSER_MAX_IDLE_SECONDS"
+        now = time.monotonic()
+        with self._condition:
+            if self._reaper:
+                # When called directly, otherwise a no-op as the timer is the one running
+                self._reaper.cancel()
+                self._reaper = None
+            expired = [browser for browser in self._idle if _is_expired(browser, now)]
+            self._idle = [browser for browser in self._idle if not _is_expired(browser, now)]
+            self._schedule_reaper()
+        for browser in expired:
+            _quit(browser)
+
+    def _schedule_reaper(self) -> None:
+        "Runs `reap_idle` when the longest idle session expires. Must be called holding the condition"
+        if self._reaper or not self._idle:
+            return
+        oldest_last_used_at = min(browser.last_used_at for browser in self._idle)
+        delay = oldest_last_used_at + settings.IMAGE_EXPORT_BROWSER_MAX_IDLE_SECONDS - time.monotonic()
+        # A second late, so that the session has surely expired by then
+        self._reaper = threading.Timer(max(delay, 0) + 1, self.reap_idle)
+        # Don't keep the process alive for the sake of closing browsers
+        self._reaper.daemon = True
+        self._reaper.start()
+
+    def _take_healthy_browser(self) -> PooledBrowser:
+        while True:
+            with self._condition:
+                candidate = self._idle.pop() if self._idle else None
+
+            if candidate is None:
+                return PooledBrowser(driver=self._create_driver())
+            if _is_expired(candidate, time.monotonic()):
+                _quit(candidate)
+            elif _is_healthy(candidate):
+                return candidate
+            else:
+                logger.warn("browser_pool.unhealthy_browser", render_count=candidate.render_count)
+                _quit(candidate)
+
+    def _release(self, browser: PooledBrowser) -> None:
+        if browser.render_count >= settings.IMAGE_EXPORT_BROWSER_MAX_RENDERS:
+            _quit(browser)
+            return
+
+        try:
+            # Drop the rendered page, so that it doesn't keep running scripts and holding memory while idle
+            browser.driver.get("about:blank")
+        except Exception:
+            _quit(browser)
+            return
+
+        browser.last_used_at = time.monotonic()
+        with self._condition:
+            self._idle.append(browser)
+            self._schedule_reaper()
+
+
+def _is_expired(browser: PooledBrowser, now: float) -> bool:
+    return now - browser.last_used_at > settings.IMAGE_EXPORT_BROWSER_MAX_IDLE_SECONDS
+
+
+def _is_healthy(browser: PooledBrowser) -> bool:
+    try:
+        return browser.driver.execute_script("return document.readyState") is not None
+    except Exception:
+        return False
+
+
+def _quit(browser: PooledBrowser) -> None:
+    try:
+        browser.driver.quit()
+    except Exception as e:
+        logger.warn("browser_pool.quit_failed", error=e)
@@ -1,16 +1,26 @@
+import csv
 import datetime
-from typing import Any, Dict, List, Optional, Tuple
+import io
+import json
+import pickle
+import tempfile
+from itertools import chain
+from typing import IO, Any, Dict, Generator, Iterator, List, Optional, Tuple
 from urllib.parse import parse_qsl, quote, urlencode, urlparse, urlunparse
 
-import requests
 import structlog
+from django.conf import settings
+from django.test import RequestFactory
+from django.urls import resolve
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from sentry_sdk import capture_exception, push_scope
 from statshog.defaults.django import statsd
 
 from posthog.jwt import PosthogJwtAudience, encode_jwt
 from posthog.api.query import process_query
 from posthog.logging.timing import timed
-from posthog.models.exported_asset import ExportedAsset, save_content
+from posthog.models.exported_asset import ExportedAsset, save_content_parts
 from posthog.utils import absolute_uri
 
 from .ordered_csv_renderer import OrderedCsvRenderer
@@ -37,10 +47,10 @@ logger = structlog.get_logger(__name__)
 
 # HOW DOES THIS WORK
 # 1. We receive an export task with a given resource uri (identical to the API)
-# 2. We call the actual API to load the data with the given params so that we receive a paginateable response
-# 3. We save the response to a chunk in object storage and then load the `next` page of results
-# 4. Repeat until exhausted or limit reached
-# 5. We save the final blob output and update the ExportedAsset
+# 2. We call the actual API in-process to load the data with the given params so that we receive a paginateable response
+# 3. We write the response's rows as CSV, uploading each full part to object storage, and then load the `next` page
+# 4. Repeat until exhausted or limit reached, updating the ExportedAsset's progress after every page
+# 5. We complete the upload (or save small exports in one go) and update the ExportedAsset
 
 
 def add_query_params(url: str, params: Dict[str, str]) -> str:
@@ -165,12 +175,24 @@ class UnexpectedEmptyJsonResponse(Exception):
     pass
 
 
-def _export_to_csv(exported_asset: ExportedAsset, limit: int = 1000, max_limit: int = 3_500) -> None:
-    resource = exported_asset.export_context
+def _export_to_csv(exported_asset: ExportedAsset, limit: int, max_limit: int) -> None:
+    columns: List[str] = exported_asset.export_context.get("columns", [])
+
+    row_batches = _iter_csv_row_batches(exported_asset, limit, max_limit)
+    parts = _iter_csv_parts(row_batches, columns, settings.OBJECT_STORAGE_EXPORTS_PART_SIZE_BYTES)
+    save_content_parts(exported_asset, parts)
+
 
-    columns: List[str] = resource.get("columns", [])
+def _iter_csv_row_batches(
+    exported_asset: ExportedAsset, limit: int, max_limit: int
+) -> Generator[List[Dict[str, Any]], None, None]:
+    """
+    Yields the rows to export one page at a time, updating the export's progress as each page is written
+    """
+    resource = exported_asset.export_context
 
-    all_csv_rows: List[Any] = []
+    row_count = 0
+    _report_progress(exported_asset, row_count)
 
     if resource.get("source"):
         from posthog.hogql.constants import MAX_SELECT_RETURNED_ROWS
@@ -179,78 +201,142 @@ def _export_to_csv(exported_asset: ExportedAsset, limit: int = 1000, max_limit:
         query_response = process_query(
             team=exported_asset.team, query_json=query, default_limit=MAX_SELECT_RETURNED_ROWS
         )
-        all_csv_rows = _convert_response_to_csv_data(query_response)
-
-    else:
-        path: str = resource["path"]
-        method: str = resource.get("method", "GET")
-        body = resource.get("body", None)
-        next_url = None
-        access_token = encode_jwt(
-            {"id": exported_asset.created_by_id}, datetime.timedelta(minutes=15), PosthogJwtAudience.IMPERSONATED_USER
-        )
+        csv_rows = _convert_response_to_csv_data(query_response)
+        yield csv_rows
 
-        while len(all_csv_rows) < max_limit:
-            response = make_api_call(access_token, body, limit, method, next_url, path)
-
-            if response.status_code != 200:
-                # noinspection PyBroadException
-                try:
-                    response_json = response.json()
-                except Exception:
-                    response_json = "no response json to parse"
-                raise Exception(f"export API call failed with status_code: {response.status_code}. {response_json}")
-
-            # Figure out how to handle funnel polling....
-            data = response.json()
-
-            if data is None:
-                unexpected_empty_json_response = UnexpectedEmptyJsonResponse("JSON is None when calling API for data")
-                logger.error(
-                    "csv_exporter.json_was_none",
-                    exc=unexpected_empty_json_response,
-                    exc_info=True,
-                    response_text=response.text,
-                )
+        _report_progress(exported_asset, len(csv_rows))
+        return
+
+    path: str = resource["path"]
+    method: str = resource.get("method", "GET")
+    body = resource.get("body", None)
+    next_url = None
+    access_token = encode_jwt(
+        {"id": exported_asset.created_by_id}, datetime.timedelta(minutes=15), PosthogJwtAudience.IMPERSONATED_USER
+    )
+
+    while row_count < max_limit:
+        response = make_api_call(access_token, body, limit, method, next_url, path)
+
+        if response.status_code != 200:
+            raise Exception(f"export API call failed with status_code: {response.status_code}. {response.data}")
+
+        # Figure out how to handle funnel polling....
+        # Rendered and parsed back so that values such as datetimes and UUIDs are written as the API returns them
+        data = json.loads(JSONRenderer().render(response.data))
 
-                raise unexpected_empty_json_response
+        if data is None:
+            unexpected_empty_json_response = UnexpectedEmptyJsonResponse("JSON is None when calling API for data")
+            logger.error(
+                "csv_exporter.json_was_none",
+                exc=unexpected_empty_json_response,
+                exc_info=True,
+                status_code=response.status_code,
+            )
 
-            csv_rows = _convert_response_to_csv_data(data)
+            raise unexpected_empty_json_response
 
-            all_csv_rows = all_csv_rows + csv_rows
+        csv_rows = _convert_response_to_csv_data(data)[: max_limit - row_count]
+        yield csv_rows
 
-            if not data.get("next") or not csv_rows:
-                break
+        row_count += len(csv_rows)
+        _report_progress(exported_asset, row_count)
 
-            next_url = data.get("next")
+        if not data.get("next") or not csv_rows:
+            break
 
+        next_url = data.get("next")
+
+
+def _report_progress(exported_asset: ExportedAsset, row_count: int) -> None:
+    exported_asset.exported_row_count = row_count
+    exported_asset.save(update_fields=["exported_row_count"])
+
+
+def _iter_csv_parts(
+    row_batches: Iterator[List[Dict[str, Any]]], columns: List[str], part_size_bytes: int
+) -> Generator[bytes, None, None]:
+    """
+    Renders the rows the way OrderedCsvRenderer does, but as they come in. Yields the CSV in parts of at least
+    `part_size_bytes`, except for the last one
+    """
     renderer = OrderedCsvRenderer()
 
+    row_batches = (csv_rows for csv_rows in row_batches if csv_rows)
+    first_csv_rows = next(row_batches, None)
+    if first_csv_rows is None:
+        return
+
+    header: List[str] = columns
     # NOTE: This is not ideal as some rows _could_ have different keys
-    # Ideally we would extend the csvrenderer to supported keeping the order in place
-    if len(all_csv_rows):
-        if not [x for x in all_csv_rows[0].values() if isinstance(x, dict) or isinstance(x, list)]:
-            # If values are serialised then keep the order of the keys, else allow it to be unordered
-            renderer.header = all_csv_rows[0].keys()
+    if not header and not [x for x in first_csv_rows[0].values() if isinstance(x, dict) or isinstance(x, list)]:
+        # If values are serialised then keep the order of the keys, else allow it to be unordered
+        header = list(first_csv_rows[0].keys())
+
+    flat_rows: Iterator[Dict[str, Any]] = renderer.flatten_data(chain(first_csv_rows, chain.from_iterable(row_batches)))
+    if not header:
+        # The header is made of the keys of all rows, so it's only known once all rows are flattened
+        flat_rows, header = _spool_flat_rows(flat_rows, part_size_bytes)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for flat_row in flat_rows:
+        writer.writerow([flat_row.get(key, None) for key in header])
+        if buffer.tell() >= part_size_bytes:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _spool_flat_rows(
+    flat_rows: Iterator[Dict[str, Any]], max_memory_bytes: int
+) -> Tuple[Iterator[Dict[str, Any]], List[str]]:
+    """
+    Collects the fields of all rows, keeping the rows themselves in a temporary file once they outgrow the memory limit
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory_bytes)
+    fields: Dict[str, None] = {}
+    for flat_row in flat_rows:
+        fields.update(dict.fromkeys(flat_row))
+        pickle.dump(flat_row, spool)
 
-    render_context = {}
-    if columns:
-        render_context["header"] = columns
+    spool.seek(0)
+    return _iter_spooled_rows(spool), OrderedCsvRenderer.ordered_header(fields)
 
-    rendered_csv_content = renderer.render(all_csv_rows, renderer_context=render_context)
-    save_content(exported_asset, rendered_csv_content)
+
+def _iter_spooled_rows(spool: IO[bytes]) -> Generator[Dict[str, Any], None, None]:
+    with spool:
+        while True:
+            try:
+                yield pickle.load(spool)
+            except EOFError:
+                return
 
 
 def make_api_call(
     access_token: str, body: Any, limit: int, method: str, next_url: Optional[str], path: str
-) -> requests.models.Response:
+) -> Response:
+    """
+    Calls our own API in-process, authenticated like the export's creator, rather than over HTTP
+    """
     request_url: str = absolute_uri(next_url or path)
     try:
-        url = add_query_params(request_url, {"limit": str(limit), "is_csv_export": "1"})
-        response = requests.request(
-            method=method.lower(), url=url, json=body, headers={"Authorization": f"Bearer {access_token}"}
+        url = urlparse(add_query_params(request_url, {"limit": str(limit), "is_csv_export": "1"}))
+        view = resolve(url.path)
+        request = RequestFactory().generic(
+            method.upper(),
+            f"{url.path}?{url.query}",
+            data=json.dumps(body) if body is not None else "",
+            content_type="application/json",
+            secure=url.scheme == "https",
+            HTTP_HOST=url.netloc,
+            HTTP_AUTHORIZATION=f"Bearer {access_token}",
         )
-        return response
+        return view.func(request, *view.args, **view.kwargs)
     except Exception as ex:
         logger.error(
             "csv_exporter.error_making_api_call",
@@ -265,9 +351,10 @@ def make_api_call(
 
 
 @timed("csv_exporter")
-def export_csv(exported_asset: ExportedAsset, limit: Optional[int] = None, max_limit: int = 3_500) -> None:
+def export_csv(exported_asset: ExportedAsset, limit: Optional[int] = None, max_limit: Optional[int] = None) -> None:
     if not limit:
         limit = 1000
+    max_limit = min(max_limit or settings.CSV_EXPORT_MAX_ROWS, settings.CSV_EXPORT_MAX_ROWS)
 
     try:
         if exported_asset.export_format == "text/csv":
@@ -2,10 +2,12 @@ import json
 import os
 import uuid
 from datetime import timedelta
-from typing import Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Literal
 
 import structlog
 from django.conf import settings
+from django.db import connection
 from prometheus_client import Counter, Summary
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -21,6 +23,7 @@ from posthog.caching.fetch_from_cache import synchronously_update_cache
 from posthog.logging.timing import timed
 from posthog.metrics import LABEL_TEAM_ID
 from posthog.models.exported_asset import ExportedAsset, get_public_access_token, save_content
+from posthog.tasks.exports.browser_pool import BrowserPool
 from posthog.utils import absolute_uri
 
 logger = structlog.get_logger(__name__)
@@ -48,8 +51,7 @@ TMP_DIR = "/tmp"  # NOTE: Externalise this to ENV var
 ScreenWidth = Literal[800, 1920]
 CSSSelector = Literal[".InsightCard", ".ExportedInsight"]
 
-# NOTE: We purporsefully DONT re-use the driver. It would be slightly faster but would keep an in-memory browser
-# window permanently around which is unnecessary
+
 def get_driver() -> webdriver.Chrome:
     options = Options()
     options.headless = True
@@ -69,6 +71,10 @@ def get_driver() -> webdriver.Chrome:
     )
 
 
+# Browsers are kept warm between exports of this process, see BrowserPool
+browser_pool = BrowserPool(lambda: get_driver())
+
+
 def _export_to_png(exported_asset: ExportedAsset) -> None:
     """
     Exporting an Insight means:
@@ -130,41 +136,38 @@ def _export_to_png(exported_asset: ExportedAsset) -> None:
 def _screenshot_asset(
     image_path: str, url_to_render: str, screenshot_width: ScreenWidth, wait_for_css_selector: CSSSelector
 ) -> None:
-    driver: Optional[webdriver.Chrome] = None
-    try:
-        driver = get_driver()
-        driver.set_window_size(screenshot_width, screenshot_width * 0.5)
-        driver.get(url_to_render)
-        WebDriverWait(driver, 20).until(lambda x: x.find_element_by_css_selector(wait_for_css_selector))
-        # Also wait until nothing is loading
+    with browser_pool.driver() as driver:
         try:
-            WebDriverWait(driver, 20).until_not(lambda x: x.find_element_by_class_name("Spinner"))
-        except TimeoutException:
-            capture_exception()
-        height = driver.execute_script("return document.body.scrollHeight")
-        driver.set_window_size(screenshot_width, height)
-        driver.save_screenshot(image_path)
-    except Exception as e:
-        if driver:
+            driver.set_window_size(screenshot_width, screenshot_width * 0.5)
+            driver.get(url_to_render)
+            WebDriverWait(driver, 20).until(lambda x: x.find_element_by_css_selector(wait_for_css_selector))
+            # Also wait until nothing is loading
+            try:
+                WebDriverWait(driver, 20).until_not(lambda x: x.find_element_by_class_name("Spinner"))
+            except TimeoutException:
+                capture_exception()
+            height = driver.execute_script("return document.body.scrollHeight")
+            driver.set_window_size(screenshot_width, height)
+            driver.save_screenshot(image_path)
+        except Exception as e:
             # To help with debugging, add a screenshot and any chrome logs
             with configure_scope() as scope:
-                # If we encounter issues getting extra info we should silenty fail rather than creating a new exception
+                # Failing to get the extra info is reported, but mustn't hide the original exception
                 try:
                     all_logs = [x for x in driver.get_log("browser")]
                     scope.add_attachment(json.dumps(all_logs).encode("utf-8"), "logs.txt")
-                except Exception:
-                    pass
+                except Exception as logs_error:
+                    logger.warning("image_exporter.browser_logs_failed", exc_info=logs_error)
+                    capture_exception(logs_error)
                 try:
                     driver.save_screenshot(image_path)
                     scope.add_attachment(None, None, image_path)
-                except Exception:
-                    pass
+                except Exception as screenshot_error:
+                    logger.warning("image_exporter.failure_screenshot_failed", exc_info=screenshot_error)
+                    capture_exception(screenshot_error)
                 capture_exception(e)
 
-        raise e
-    finally:
-        if driver:
-            driver.quit()
+            raise e
 
 
 @timed("image_exporter")
@@ -198,3 +201,34 @@ def export_image(exported_asset: ExportedAsset) -> None:
             logger.error("image_exporter.failed", exception=e, exc_info=True)
             IMAGE_EXPORT_FAILED_COUNTER.labels(team_id=team_id).inc()
             raise e
+
+
+def export_images(exported_assets: List[ExportedAsset]) -> None:
+    """
+    Exports several images at once, rendering as many of them at the same time as the browser pool allows. Failed
+    exports are reported by `export_image` and leave their asset without content, without failing the others.
+    """
+    concurrency = min(settings.IMAGE_EXPORT_BROWSER_POOL_SIZE, len(exported_assets))
+    if concurrency <= 1:
+        for exported_asset in exported_assets:
+            _export_image_for_batch(exported_asset)
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="image_export") as executor:
+        list(executor.map(_export_image_in_thread, exported_assets))
+
+
+def _export_image_for_batch(exported_asset: ExportedAsset) -> None:
+    try:
+        export_image(exported_asset)
+    except Exception as e:
+        # Already reported by `export_image`, but the other exports of the batch go on
+        logger.warning("image_exporter.batch_export_failed", exported_asset_id=exported_asset.id, exc_info=e)
+
+
+def _export_image_in_thread(exported_asset: ExportedAsset) -> None:
+    try:
+        _export_image_for_batch(exported_asset)
+    finally:
+        # Each thread has its own database connection, which would otherwise be left open
+        connection.close()
@@ -1,5 +1,5 @@
 from collections import OrderedDict
-from typing import Any, Dict, Generator
+from typing import Any, Dict, Generator, Iterable, List
 
 from more_itertools import unique_everseen
 from rest_framework_csv.renderers import CSVRenderer
@@ -8,6 +8,26 @@ from rest_framework_csv.renderers import CSVRenderer
 class OrderedCsvRenderer(
     CSVRenderer,
 ):
+    @staticmethod
+    def ordered_header(unique_fields: Iterable[str]) -> List[str]:
+        """
+        Orders flattened fields by their top level field, e.g. keeping all `properties.*` fields together.
+        """
+        ordered_fields: Dict[str, Any] = OrderedDict()
+        for item in unique_fields:
+            field = item.split(".")
+            field = field[0]
+            if field in ordered_fields:
+                ordered_fields[field].append(item)
+            else:
+                ordered_fields[field] = [item]
+
+        header = []
+        for fields in ordered_fields.values():
+            for field in fields:
+                header.append(field)
+        return header
+
     def tablize(self, data: Any, header: Any = None, labels: Any = None) -> Generator:
         """
         Convert a list of data into a table.
@@ -30,21 +50,7 @@ class OrderedCsvRenderer(
                 for item in data:
                     headers.extend(item.keys())
 
-                unique_fields = list(unique_everseen(headers))
-
-                ordered_fields: Dict[str, Any] = OrderedDict()
-                for item in unique_fields:
-                    field = item.split(".")
-                    field = field[0]
-                    if field in ordered_fields:
-                        ordered_fields[field].append(item)
-                    else:
-                        ordered_fields[field] = [item]
-
-                header = []
-                for fields in ordered_fields.values():
-                    for field in fields:
-                        header.append(field)
+                header = self.ordered_header(unique_everseen(headers))
 
             # Return your "table", with the headers as the first row.
             if labels:
@@ -0,0 +1,75 @@
+from unittest.mock import MagicMock
+
+import pytest
+from django.test import override_settings
+
+from posthog.tasks.exports.browser_pool import BrowserPool, BrowserPoolTimeout
+from posthog.test.base import BaseTest
+
+
+@override_settings(IMAGE_EXPORT_BROWSER_POOL_SIZE=1, IMAGE_EXPORT_BROWSER_MAX_RENDERS=2)
+class TestBrowserPool(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.drivers = []
+
+        def create_driver():
+            driver = MagicMock()
+            self.drivers.append(driver)
+            return driver
+
+        self.browser_pool = BrowserPool(create_driver)
+
+    def tearDown(self):
+        self.browser_pool.close()
+        super().tearDown()
+
+    def test_reuses_browsers_until_max_renders(self):
+        for _ in range(3):
+            with self.browser_pool.driver() as driver:
+                driver.get("http://localhost:8000/exporter")
+
+        self.assertEqual(len(self.drivers), 2)
+        self.drivers[0].quit.assert_called_once()
+        self.drivers[1].quit.assert_not_called()
+
+    def test_replaces_unhealthy_browsers(self):
+        with self.browser_pool.driver():
+            pass
+        self.drivers[0].execute_script.side_effect = Exception("chrome not reachable")
+
+        with self.browser_pool.driver() as driver:
+            self.assertIs(driver, self.drivers[1])
+        self.drivers[0].quit.assert_called_once()
+
+    def test_discards_browsers_of_failed_renders(self):
+        with pytest.raises(ValueError):
+            with self.browser_pool.driver():
+                raise ValueError("render failed")
+
+        self.drivers[0].quit.assert_called_once()
+        with self.browser_pool.driver() as driver:
+            self.assertIs(driver, self.drivers[1])
+
+    def test_bounds_browsers_in_use(self):
+        with self.browser_pool.driver():
+            with pytest.raises(BrowserPoolTimeout):
+                with self.browser_pool.driver(timeout=0.1):
+                    pass
+
+        self.assertEqual(len(self.drivers), 1)
+
+    def test_closes_idle_browsers_without_further_renders(self):
+        with self.settings(IMAGE_EXPORT_BROWSER_MAX_IDLE_SECONDS=60):
+            with self.browser_pool.driver():
+                pass
+
+            self.assertIsNotNone(self.browser_pool._reaper)
+            self.browser_pool.reap_idle()
+            self.drivers[0].quit.assert_not_called()
+
+        with self.settings(IMAGE_EXPORT_BROWSER_MAX_IDLE_SECONDS=0):
+            self.browser_pool.reap_idle()
+
+        self.drivers[0].quit.assert_called_once()
+        self.assertIsNone(self.browser_pool._reaper)
@@ -1,14 +1,17 @@
+from datetime import datetime
 from typing import Any, Dict, Optional
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import Mock, patch
+from uuid import UUID
 
 import pytest
+import pytz
 from boto3 import resource
 from botocore.client import Config
 from dateutil.relativedelta import relativedelta
 from django.test import override_settings
 from django.utils.timezone import now
 
-from posthog.models import ExportedAsset
+from posthog.models import Annotation, ExportedAsset
 from posthog.models.utils import UUIDT
 from posthog.settings import (
     OBJECT_STORAGE_ACCESS_KEY_ID,
@@ -33,58 +36,58 @@ regression_11204 = "api/projects/6642/insights/trend/?events=%5B%7B%22id%22%3A%2
 class TestCSVExporter(APIBaseTest):
     @pytest.fixture(autouse=True)
     def patched_request(self):
-        with patch("posthog.tasks.exports.csv_exporter.requests.request") as patched_request:
-            mock_response = Mock()
-            mock_response.status_code = 200
+        with patch("posthog.tasks.exports.csv_exporter.make_api_call") as patched_request:
             # API responses copied from https://github.com/PostHog/posthog/runs/7221634689?check_suite_focus=true
-            mock_response.json.side_effect = [
-                {
-                    "next": "http://testserver/api/projects/169/events?orderBy=%5B%22-timestamp%22%5D&properties=%5B%7B%22key%22%3A%22%24browser%22%2C%22value%22%3A%5B%22Safari%22%5D%2C%22operator%22%3A%22exact%22%2C%22type%22%3A%22event%22%7D%5D&after=2022-07-06T19%3A27%3A43.206326&limit=1&before=2022-07-06T19%3A37%3A43.095295%2B00%3A00",
-                    "results": [
-                        {
-                            "id": "e9ca132e-400f-4854-a83c-16c151b2f145",
-                            "distinct_id": "2",
-                            "properties": {"$browser": "Safari"},
-                            "event": "event_name",
-                            "timestamp": "2022-07-06T19:37:43.095295+00:00",
-                            "person": None,
-                            "elements": [],
-                            "elements_chain": "",
-                        }
-                    ],
-                },
-                {
-                    "next": "http://testserver/api/projects/169/events?orderBy=%5B%22-timestamp%22%5D&properties=%5B%7B%22key%22%3A%22%24browser%22%2C%22value%22%3A%5B%22Safari%22%5D%2C%22operator%22%3A%22exact%22%2C%22type%22%3A%22event%22%7D%5D&after=2022-07-06T19%3A27%3A43.206326&limit=1&before=2022-07-06T19%3A37%3A43.095279%2B00%3A00",
-                    "results": [
-                        {
-                            "id": "1624228e-a4f1-48cd-aabc-6baa3ddb22e4",
-                            "distinct_id": "2",
-                            "properties": {"$browser": "Safari"},
-                            "event": "event_name",
-                            "timestamp": "2022-07-06T19:37:43.095279+00:00",
-                            "person": None,
-                            "elements": [],
-                            "elements_chain": "",
-                        }
-                    ],
-                },
-                {
-                    "next": None,
-                    "results": [
-                        {
-                            "id": "66d45914-bdf5-4980-a54a-7dc699bdcce9",
-                            "distinct_id": "2",
-                            "properties": {"$browser": "Safari"},
-                            "event": "event_name",
-                            "timestamp": "2022-07-06T19:37:43.095262+00:00",
-                            "person": None,
-                            "elements": [],
-                            "elements_chain": "",
-                        }
-                    ],
-                },
+            patched_request.side_effect = [
+                Mock(status_code=200, data=data)
+                for data in [
+                    {
+                        "next": "http://testserver/api/projects/169/events?orderBy=%5B%22-timestamp%22%5D&properties=%5B%7B%22key%22%3A%22%24browser%22%2C%22value%22%3A%5B%22Safari%22%5D%2C%22operator%22%3A%22exact%22%2C%22type%22%3A%22event%22%7D%5D&after=2022-07-06T19%3A27%3A43.206326&limit=1&before=2022-07-06T19%3A37%3A43.095295%2B00%3A00",
+                        "results": [
+                            {
+                                "id": "e9ca132e-400f-4854-a83c-16c151b2f145",
+                                "distinct_id": "2",
+                                "properties": {"$browser": "Safari"},
+                                "event": "event_name",
+                                "timestamp": "2022-07-06T19:37:43.095295+00:00",
+                                "person": None,
+                                "elements": [],
+                                "elements_chain": "",
+                            }
+                        ],
+                    },
+                    {
+                        "next": "http://testserver/api/projects/169/events?orderBy=%5B%22-timestamp%22%5D&properties=%5B%7B%22key%22%3A%22%24browser%22%2C%22value%22%3A%5B%22Safari%22%5D%2C%22operator%22%3A%22exact%22%2C%22type%22%3A%22event%22%7D%5D&after=2022-07-06T19%3A27%3A43.206326&limit=1&before=2022-07-06T19%3A37%3A43.095279%2B00%3A00",
+                        "results": [
+                            {
+                                "id": "1624228e-a4f1-48cd-aabc-6baa3ddb22e4",
+                                "distinct_id": "2",
+                                "properties": {"$browser": "Safari"},
+                                "event": "event_name",
+                                "timestamp": "2022-07-06T19:37:43.095279+00:00",
+                                "person": None,
+                                "elements": [],
+                                "elements_chain": "",
+                            }
+                        ],
+                    },
+                    {
+                        "next": None,
+                        "results": [
+                            {
+                                "id": "66d45914-bdf5-4980-a54a-7dc699bdcce9",
+                                "distinct_id": "2",
+                                "properties": {"$browser": "Safari"},
+                                "event": "event_name",
+                                "timestamp": "2022-07-06T19:37:43.095262+00:00",
+                                "person": None,
+                                "elements": [],
+                                "elements_chain": "",
+                            }
+                        ],
+                    },
+                ]
             ]
-            patched_request.return_value = mock_response
             yield patched_request
 
     def _create_asset(self, extra_context: Optional[Dict] = None) -> ExportedAsset:
@@ -219,15 +222,49 @@ class TestCSVExporter(APIBaseTest):
                 == b"distinct_id,properties.$browser,event,tomato\r\n2,Safari,event_name,\r\n2,Safari,event_name,\r\n2,Safari,event_name,\r\n"
             )
 
+    @patch("posthog.models.exported_asset.UUIDT")
+    @patch("posthog.models.exported_asset.object_storage.write_parts")
+    def test_csv_exporter_uploads_large_exports_in_parts(self, mocked_object_storage_write_parts, mocked_uuidt) -> None:
+        exported_asset = self._create_asset({"columns": ["id", "timestamp"]})
+        mocked_uuidt.return_value = "a-guid"
+        uploaded_parts = []
+        mocked_object_storage_write_parts.side_effect = lambda file_name, parts: uploaded_parts.extend(parts)
+
+        with self.settings(
+            OBJECT_STORAGE_ENABLED=True,
+            OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports",
+            OBJECT_STORAGE_EXPORTS_PART_SIZE_BYTES=80,
+        ):
+            csv_exporter.export_csv(exported_asset)
+
+        assert (
+            exported_asset.content_location == f"{TEST_PREFIX}/csv/team-{self.team.id}/task-{exported_asset.id}/a-guid"
+        )
+        assert exported_asset.content is None
+        assert exported_asset.exported_row_count == 3
+        assert uploaded_parts == [
+            b"id,timestamp\r\ne9ca132e-400f-4854-a83c-16c151b2f145,2022-07-06T19:37:43.095295+00:00\r\n",
+            b"1624228e-a4f1-48cd-aabc-6baa3ddb22e4,2022-07-06T19:37:43.095279+00:00\r\n66d45914-bdf5-4980-a54a-7dc699bdcce9,2022-07-06T19:37:43.095262+00:00\r\n",
+        ]
+
+    def test_csv_exporter_stops_at_max_limit(self) -> None:
+        exported_asset = self._create_asset({"columns": ["id"]})
+
+        with self.settings(OBJECT_STORAGE_ENABLED=False):
+            csv_exporter.export_csv(exported_asset, max_limit=2)
+
+        assert (
+            exported_asset.content
+            == b"id\r\ne9ca132e-400f-4854-a83c-16c151b2f145\r\n1624228e-a4f1-48cd-aabc-6baa3ddb22e4\r\n"
+        )
+        assert exported_asset.exported_row_count == 2
+
     @patch("posthog.tasks.exports.csv_exporter.logger")
     @patch("posthog.tasks.exports.csv_exporter.statsd")
     def test_failing_export_api_is_reported(self, mock_statsd, mock_logger) -> None:
-        with patch("posthog.tasks.exports.csv_exporter.requests.request") as patched_request:
+        with patch("posthog.tasks.exports.csv_exporter.make_api_call") as patched_request:
             exported_asset = self._create_asset()
-            mock_response = MagicMock()
-            mock_response.status_code = 403
-            mock_response.ok = False
-            patched_request.return_value = mock_response
+            patched_request.return_value = Mock(status_code=403, data={"detail": "nope"})
 
             with pytest.raises(Exception, match="export API call failed with status_code: 403"):
                 csv_exporter.export_csv(exported_asset)
@@ -248,13 +285,34 @@ class TestCSVExporter(APIBaseTest):
             expected_bits = {**self._split_to_dict(regression_11204), **{"limit": "3500"}}
             assert expected_bits == actual_bits
 
+    @patch("posthog.tasks.exports.csv_exporter.make_api_call")
+    def test_csv_exporter_writes_values_as_the_api_renders_them(self, patched_api_call) -> None:
+        # e.g. persons modal rows, which aren't serialized by a serializer
+        patched_api_call.return_value = Mock(
+            status_code=200,
+            data={
+                "next": None,
+                "results": [
+                    {
+                        "id": UUID("e9ca132e-400f-4854-a83c-16c151b2f145"),
+                        "created_at": datetime(2022, 7, 6, 19, 37, 43, 95295, tzinfo=pytz.UTC),
+                    }
+                ],
+            },
+        )
+        exported_asset = self._create_asset()
+
+        with self.settings(OBJECT_STORAGE_ENABLED=False):
+            csv_exporter.export_csv(exported_asset)
+
+        assert (
+            exported_asset.content
+            == b"id,created_at\r\ne9ca132e-400f-4854-a83c-16c151b2f145,2022-07-06T19:37:43.095295Z\r\n"
+        )
+
     @patch("posthog.tasks.exports.csv_exporter.make_api_call")
     def test_raises_expected_error_when_json_is_none(self, patched_api_call) -> None:
-        mock_response = Mock()
-        mock_response.json.return_value = None
-        mock_response.status_code = 200
-        mock_response.text = "i am the text"
-        patched_api_call.return_value = mock_response
+        patched_api_call.return_value = Mock(status_code=200, data=None)
 
         with pytest.raises(UnexpectedEmptyJsonResponse, match="JSON is None when calling API for data"):
             csv_exporter.export_csv(self._create_asset())
@@ -345,3 +403,29 @@ class TestCSVExporter(APIBaseTest):
         first_split_parts = url.split("?")
         assert len(first_split_parts) == 2
         return {bits[0]: bits[1] for bits in [param.split("=") for param in first_split_parts[1].split("&")]}
+
+
+@override_settings(SITE_URL="http://testserver")
+class TestCSVExporterAPICalls(APIBaseTest):
+    def test_csv_exporter_calls_api_in_process(self) -> None:
+        for content in ["first", "second", "third"]:
+            Annotation.objects.create(team=self.team, content=content, created_by=self.user)
+
+        exported_asset = ExportedAsset.objects.create(
+            team=self.team,
+            created_by=self.user,
+            export_format=ExportedAsset.ExportFormat.CSV,
+            export_context={"path": f"/api/projects/{self.team.id}/annotations/", "columns": ["content"]},
+        )
+
+        with self.settings(OBJECT_STORAGE_ENABLED=False), patch(
+            "posthog.tasks.exports.csv_exporter.make_api_call", wraps=csv_exporter.make_api_call
+        ) as wrapped_api_call:
+            # One row per page
+            csv_exporter.export_csv(exported_asset, limit=1)
+
+        assert wrapped_api_call.call_count == 3
+        csv_rows = exported_asset.content.decode("utf-8").split("\r\n")
+        assert csv_rows[0] == "content"
+        self.assertCountEqual(csv_rows[1:], ["first", "second", "third", ""])
+        assert exported_asset.exported_row_count == 3
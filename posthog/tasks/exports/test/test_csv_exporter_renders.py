@@ -22,7 +22,7 @@ for file in os.listdir(directory):
 
 @pytest.mark.parametrize("filename", fixtures)
 @pytest.mark.django_db
-@patch("posthog.tasks.exports.csv_exporter.requests.request")
+@patch("posthog.tasks.exports.csv_exporter.make_api_call")
 @patch("posthog.models.exported_asset.settings")
 def test_csv_rendering(mock_settings, mock_request, filename):
     mock_settings.OBJECT_STORAGE_ENABLED = False
@@ -37,10 +37,7 @@ def test_csv_rendering(mock_settings, mock_request, filename):
     )
     asset.save()
 
-    mock = Mock()
-    mock.status_code = 200
-    mock.json.return_value = fixture["response"]
-    mock_request.return_value = mock
+    mock_request.return_value = Mock(status_code=200, data=fixture["response"])
     csv_exporter.export_csv(asset)
     csv_rows = asset.content.decode("utf-8").split("\r\n")
 
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytz
+import structlog
+from django.utils import timezone
+
+from posthog.client import sync_execute
+from posthog.models.property_values.sql import (
+    INSERT_EVENT_PROPERTY_VALUES_SQL,
+    INSERT_PERSON_PROPERTY_VALUES_SQL,
+    PROPERTY_VALUES_MAX_LENGTH,
+    PROPERTY_VALUES_TOP_N,
+)
+from posthog.redis import get_client
+
+logger = structlog.get_logger(__name__)
+
+# End of the data indexed so far, so that runs catch up on the hours missed since
+PROPERTY_VALUES_INDEX_WATERMARK_KEY = "posthog:property_values_index:watermark"
+# Hours older than this are not caught up on anymore, as autocomplete only looks at the last week of events
+MAX_CATCH_UP_HOURS = 24
+WATERMARK_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def index_property_values(end: Optional[datetime] = None) -> None:
+    """
+    Adds the most common property values of the events and persons ingested since the last run, one hour at a time, to
+    the property values index. Indexes up to the last full hour by default. The end of every indexed hour is kept as a
+    watermark, so that every row is indexed exactly once, even when runs are missed or retried.
+    """
+    end = end or timezone.now().replace(minute=0, second=0, microsecond=0)
+    begin = max(
+        get_property_values_index_watermark() or end - timedelta(hours=1), end - timedelta(hours=MAX_CATCH_UP_HOURS)
+    )
+
+    while begin < end:
+        batch_end = min(begin + timedelta(hours=1), end)
+        params = {
+            "begin": begin.strftime(WATERMARK_FORMAT),
+            "end": batch_end.strftime(WATERMARK_FORMAT),
+            "top_n": PROPERTY_VALUES_TOP_N,
+            "max_length": PROPERTY_VALUES_MAX_LENGTH,
+        }
+
+        sync_execute(INSERT_EVENT_PROPERTY_VALUES_SQL, params)
+        sync_execute(INSERT_PERSON_PROPERTY_VALUES_SQL, params)
+        get_client().set(PROPERTY_VALUES_INDEX_WATERMARK_KEY, batch_end.strftime(WATERMARK_FORMAT))
+
+        logger.info("Indexed property values", begin=begin, end=batch_end)
+        begin = batch_end
+
+
+def get_property_values_index_watermark() -> Optional[datetime]:
+    watermark = get_client().get(PROPERTY_VALUES_INDEX_WATERMARK_KEY)
+    if watermark is None:
+        return None
+    return datetime.strptime(watermark.decode("utf-8"), WATERMARK_FORMAT).replace(tzinfo=pytz.UTC)
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 from posthog.models.dashboard import Dashboard
 from posthog.models.exported_asset import ExportedAsset
 from posthog.tasks import exporter
+from posthog.tasks.exports import image_exporter
 from posthog.tasks.exports.image_exporter import get_driver
 from posthog.test.base import APIBaseTest
 
@@ -34,6 +35,11 @@ class TestExporterTask(APIBaseTest):
         with open("/tmp/posthog_test_exporter.png", "wb") as fh:
             fh.write(base64.decodebytes(example_png))
 
+    def tearDown(self) -> None:
+        # Don't keep mock browsers warm for other tests
+        image_exporter.browser_pool.close()
+        super().tearDown()
+
     @patch("posthog.tasks.exports.image_exporter.get_driver")
     def test_exporter_runs(self, mock_get_driver: MagicMock, mock_uuid: MagicMock) -> None:
         mock_uuid.uuid4.return_value = "posthog_test_exporter"
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import override_settings
+from django.utils import timezone
+
+from posthog.client import sync_execute
+from posthog.models.property_values.sql import TRUNCATE_PROPERTY_VALUES_TABLE_SQL
+from posthog.queries.property_values import get_person_property_values_for_key, get_property_values_for_key
+from posthog.redis import get_client
+from posthog.tasks.property_values import (
+    PROPERTY_VALUES_INDEX_WATERMARK_KEY,
+    get_property_values_index_watermark,
+    index_property_values,
+)
+from posthog.test.base import APIBaseTest, ClickhouseTestMixin, _create_event, _create_person, flush_persons_and_events
+
+
+@override_settings(PROPERTY_VALUES_INDEX_SCHEDULE_CRON="5 * * * *")
+class TestPropertyValuesIndex(ClickhouseTestMixin, APIBaseTest):
+    def setUp(self):
+        super().setUp()
+        sync_execute(TRUNCATE_PROPERTY_VALUES_TABLE_SQL())
+        get_client().delete(PROPERTY_VALUES_INDEX_WATERMARK_KEY)
+
+    def _index_property_values(self):
+        # Rows are indexed by ingestion time, which is the time ClickHouse inserted them in tests
+        index_property_values(end=timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+
+    def test_property_values_come_from_index(self):
+        for browser in ["Chrome", "Chrome", "Firefox"]:
+            _create_event(event="$pageview", team=self.team, distinct_id="1", properties={"$browser": browser})
+        _create_event(event="$autocapture", team=self.team, distinct_id="1", properties={"$browser": "Edge"})
+        _create_person(team_id=self.team.pk, distinct_ids=["1"], properties={"email": "someone@posthog.com"})
+        flush_persons_and_events()
+
+        self._index_property_values()
+
+        # Values ingested after the last indexing only show up once indexed
+        _create_event(event="$pageview", team=self.team, distinct_id="1", properties={"$browser": "Safari"})
+        flush_persons_and_events()
+
+        values = get_property_values_for_key("$browser", self.team)
+        # Most common values first
+        self.assertEqual(values[0], ("Chrome",))
+        self.assertCountEqual(values, [("Chrome",), ("Edge",), ("Firefox",)])
+        self.assertEqual(get_property_values_for_key("$browser", self.team, value="fire"), [("Firefox",)])
+        # Searches matching fewer values than asked for may match values that aren't indexed, so raw data is scanned
+        self.assertEqual(get_property_values_for_key("$browser", self.team, value="safari"), [("Safari",)])
+        self.assertEqual(get_property_values_for_key("$browser", self.team, value="opera"), [])
+        self.assertCountEqual(
+            get_property_values_for_key("$browser", self.team, event_names=["$pageview"]), [("Chrome",), ("Firefox",)]
+        )
+        self.assertEqual(get_person_property_values_for_key("email", self.team), [("someone@posthog.com", 1)])
+
+    def test_property_values_of_keys_not_in_index_come_from_raw_data(self):
+        _create_event(event="$pageview", team=self.team, distinct_id="1", properties={"$browser": "Chrome"})
+        flush_persons_and_events()
+
+        self._index_property_values()
+
+        _create_event(event="$pageview", team=self.team, distinct_id="1", properties={"$os": "Mac OS X"})
+        _create_person(team_id=self.team.pk, distinct_ids=["1"], properties={"email": "someone@posthog.com"})
+        flush_persons_and_events()
+
+        self.assertEqual(get_property_values_for_key("$os", self.team), [("Mac OS X",)])
+        self.assertEqual(get_person_property_values_for_key("email", self.team), [("someone@posthog.com", 1)])
+
+    def test_indexing_catches_up_from_watermark(self):
+        end = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        get_client().set(PROPERTY_VALUES_INDEX_WATERMARK_KEY, (end - timedelta(hours=3)).strftime("%Y-%m-%d %H:%M:%S"))
+
+        with patch("posthog.tasks.property_values.sync_execute") as patched_sync_execute:
+            index_property_values(end=end)
+            # Runs for hours that were already indexed don't index them again
+            index_property_values(end=end)
+
+        self.assertEqual(
+            [call.args[1]["begin"] for call in patched_sync_execute.call_args_list[::2]],
+            [(end - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S") for hours in [3, 2, 1]],
+        )
+        self.assertEqual(get_property_values_index_watermark(), end)
@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import Any, Dict, List
 from unittest.mock import ANY, MagicMock, Mock, call, patch
 from uuid import uuid4
+from django.core.cache import cache
 from django.test import TestCase
 
 import structlog
@@ -925,6 +926,47 @@ class SendUsageTest(LicensedTestMixin, ClickhouseDestroyTablesMixin, APIBaseTest
             "period": ["2021-10-01T00:00:00Z", "2021-10-31T00:00:00Z"],
         }
 
+    @freeze_time("2021-10-10T23:01:00Z")
+    @patch("posthog.tasks.usage_report.Client")
+    @patch("requests.post")
+    def test_resumes_usage_reports_of_run(self, mock_post: MagicMock, mock_client: MagicMock) -> None:
+        mockresponse = Mock()
+        mock_post.return_value = mockresponse
+        mockresponse.status_code = 200
+        mockresponse.json = lambda: self._usage_report_response()
+        mock_client.return_value = MagicMock()
+
+        other_organization = Organization.objects.create(name="Other org")
+        other_team = Team.objects.create(organization=other_organization)
+        _create_event(event="$pageview", team=other_team, distinct_id=1, timestamp="2021-10-09T14:01:01Z")
+        flush_persons_and_events()
+
+        # As if the run failed after sending the report of the first organization
+        first_organization_id, second_organization_id = sorted([self.organization.id, other_organization.id])
+        cache.set("usage_report_last_organization_id:some_run", first_organization_id)
+
+        all_reports = send_all_org_usage_reports(dry_run=False, run_id="some_run")
+
+        assert [report["organization_id"] for report in all_reports] == [str(second_organization_id)]
+        assert cache.get("usage_report_last_organization_id:some_run") is None
+        assert cache.get("usage_report_counters:some_run") is None
+
+    @freeze_time("2021-10-10T23:01:00Z")
+    @patch("posthog.tasks.usage_report.send_report_to_billing_service")
+    @patch("posthog.tasks.usage_report.capture_report")
+    def test_failed_run_keeps_progress_of_queued_reports(
+        self, mock_capture_report: MagicMock, mock_send_report: MagicMock
+    ) -> None:
+        other_organization = Organization.objects.create(name="Other org")
+        Team.objects.create(organization=other_organization)
+        first_organization_id, _ = sorted([self.organization.id, other_organization.id])
+        mock_capture_report.delay.side_effect = [None, Exception("Broker unavailable")]
+
+        with self.assertRaises(Exception):
+            send_all_org_usage_reports(dry_run=False, run_id="failing_run")
+
+        assert cache.get("usage_report_last_organization_id:failing_run") == str(first_organization_id)
+
 
 class SendNoUsageTest(LicensedTestMixin, ClickhouseDestroyTablesMixin, APIBaseTest):
     @freeze_time("2021-10-10T23:01:00Z")
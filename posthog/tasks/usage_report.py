@@ -5,20 +5,21 @@ from datetime import datetime
 from typing import (
     Any,
     Dict,
+    Iterable,
+    Iterator,
     List,
     Optional,
-    Sequence,
     Tuple,
     TypedDict,
     Union,
     cast,
-    Literal,
 )
 
 import dateutil
 import requests
 import structlog
 from django.conf import settings
+from django.core.cache import cache
 from django.db import connection
 from django.db.models import Count, Q
 from posthoganalytics.client import Client
@@ -29,7 +30,6 @@ from posthog import version_requirement
 from posthog.celery import app
 from posthog.client import sync_execute
 from posthog.cloud_utils import is_cloud
-from posthog.constants import FlagRequestType
 from posthog.models import GroupTypeMapping, OrganizationMembership, User
 from posthog.models.dashboard import Dashboard
 from posthog.models.feature_flag import FeatureFlag
@@ -43,6 +43,20 @@ from posthog.version import VERSION
 
 logger = structlog.get_logger(__name__)
 
+# Usage counters fed by the query log -> query types and access method of the queries they measure
+QUERY_LOG_USAGE: Dict[str, Tuple[List[str], str]] = {
+    "hogql_app": (["hogql_query", "HogQLQuery"], ""),
+    "hogql_api": (["hogql_query", "HogQLQuery"], "personal_api_key"),
+    "event_explorer_app": (["EventsQuery"], ""),
+    "event_explorer_api": (["EventsQuery"], "personal_api_key"),
+}
+# Query log column -> suffix of the usage counter
+QUERY_LOG_METRICS = {"read_bytes": "bytes_read", "read_rows": "rows_read", "query_duration_ms": "duration_ms"}
+# Feature flag request counter prefix -> event counting the requests
+FEATURE_FLAG_REQUEST_EVENTS = {"decide": "decide usage", "local_evaluation": "local evaluation usage"}
+
+USAGE_REPORT_PROGRESS_TTL = 60 * 60 * 24
+
 Period = TypedDict("Period", {"start_inclusive": str, "end_inclusive": str})
 TableSizes = TypedDict("TableSizes", {"posthog_event": int, "posthog_sessionrecordingevent": int})
 
@@ -213,10 +227,6 @@ def get_instance_metadata(period: Tuple[datetime, datetime]) -> InstanceMetadata
     return metadata
 
 
-def get_org_user_count(organization_id: str) -> int:
-    return OrganizationMembership.objects.filter(organization_id=organization_id).count()
-
-
 def get_org_owner_or_first_user(organization_id: str) -> Optional[User]:
     # Find the membership object for the org owner
     user = None
@@ -331,18 +341,28 @@ def get_teams_with_event_count_in_period(begin: datetime, end: datetime) -> List
     return result
 
 
-def get_teams_with_event_count_with_groups_in_period(begin: datetime, end: datetime) -> List[Tuple[int, int]]:
-    result = sync_execute(
+def get_teams_with_event_counts(begin: datetime, end: datetime) -> Dict[str, Dict[int, int]]:
+    """
+    Event counts of the period and of its month up to the end of the period, in one scan of the month
+    """
+    results = sync_execute(
         """
-        SELECT team_id, count(1) as count
+        SELECT team_id,
+               countIf(timestamp >= %(begin)s) as count_in_period,
+               count(1) as count_in_month,
+               countIf(
+                   timestamp >= %(begin)s
+                   AND ($group_0 != '' OR $group_1 != '' OR $group_2 != '' OR $group_3 != '' OR $group_4 != '')
+               ) as count_with_groups_in_period
         FROM events
-        WHERE timestamp between %(begin)s AND %(end)s
-        AND ($group_0 != '' OR $group_1 != '' OR $group_2 != '' OR $group_3 != '' OR $group_4 != '')
+        WHERE timestamp between %(month_begin)s AND %(end)s
         GROUP BY team_id
     """,
-        {"begin": begin, "end": end},
+        {"begin": begin, "end": end, "month_begin": begin.replace(day=1)},
+    )
+    return _index_columns_by_team(
+        results, ["event_count_in_period", "event_count_in_month", "event_count_with_groups_in_period"]
     )
-    return result
 
 
 def get_teams_with_event_count_by_lib(begin: datetime, end: datetime) -> List[Tuple[int, str, int]]:
@@ -406,359 +426,274 @@ def get_teams_with_recording_count_total() -> List[Tuple[int, int]]:
     return result
 
 
-def get_teams_with_hogql_metric(
-    begin: datetime,
-    end: datetime,
-    query_types: List[str],
-    access_method: str = "",
-    metric: Literal["read_bytes", "read_rows", "query_duration_ms"] = "read_bytes",
-) -> List[Tuple[int, int]]:
-    if metric not in ["read_bytes", "read_rows", "query_duration_ms"]:
-        # :TRICKY: Inlined into the query below.
-        raise ValueError(f"Invalid metric {metric}")
-    result = sync_execute(
+def get_teams_with_query_log_metrics(begin: datetime, end: datetime) -> Dict[str, Dict[int, int]]:
+    """
+    Sums the metrics of `QUERY_LOG_USAGE` queries, in one scan of the query log
+    """
+    query_types = sorted({query_type for query_types, _ in QUERY_LOG_USAGE.values() for query_type in query_types})
+    access_methods = sorted({access_method for _, access_method in QUERY_LOG_USAGE.values()})
+    results = sync_execute(
         f"""
         WITH JSONExtractInt(log_comment, 'team_id') as team_id,
              JSONExtractString(log_comment, 'query_type') as query_type,
              JSONExtractString(log_comment, 'access_method') as access_method
-        SELECT team_id, sum({metric}) as count
+        SELECT team_id, query_type, access_method, sum(read_bytes), sum(read_rows), sum(query_duration_ms)
         FROM clusterAllReplicas({CLICKHOUSE_CLUSTER}, system.query_log)
         WHERE (type = 'QueryFinish' OR type = 'ExceptionWhileProcessing')
           AND is_initial_query = 1
           AND query_type IN (%(query_types)s)
           AND query_start_time between %(begin)s AND %(end)s
-          AND access_method = %(access_method)s
-        GROUP BY team_id
+          AND access_method IN (%(access_methods)s)
+        GROUP BY team_id, query_type, access_method
     """,
-        {"begin": begin, "end": end, "query_types": query_types, "access_method": access_method},
+        {"begin": begin, "end": end, "query_types": query_types, "access_methods": access_methods},
     )
-    return result
 
+    counters: Dict[str, Dict[int, int]] = {
+        f"{usage}_{metric}": {} for usage in QUERY_LOG_USAGE for metric in QUERY_LOG_METRICS.values()
+    }
+    for team_id, query_type, access_method, *metric_values in results:
+        for usage, (usage_query_types, usage_access_method) in QUERY_LOG_USAGE.items():
+            if query_type not in usage_query_types or access_method != usage_access_method:
+                continue
+            for metric, value in zip(QUERY_LOG_METRICS.values(), metric_values):
+                team_counts = counters[f"{usage}_{metric}"]
+                team_counts[team_id] = team_counts.get(team_id, 0) + value
+    return counters
 
-def get_teams_with_feature_flag_requests_count_in_period(
-    begin: datetime, end: datetime, request_type: FlagRequestType
-) -> List[Tuple[int, int]]:
+
+def get_teams_with_feature_flag_requests_counts(begin: datetime, end: datetime) -> Dict[str, Dict[int, int]]:
+    """
+    Decide and local evaluation request counts of the period and of its month up to the end of the period
+    """
     # depending on the region, events are stored in different teams
     team_to_query = 1 if get_instance_region() == "EU" else 2
     validity_token = settings.DECIDE_BILLING_ANALYTICS_TOKEN
 
-    target_event = "decide usage" if request_type == FlagRequestType.DECIDE else "local evaluation usage"
-
-    result = sync_execute(
+    results = sync_execute(
         """
-        SELECT distinct_id as team, sum(JSONExtractInt(properties, 'count')) as sum
+        SELECT distinct_id as team,
+               event,
+               sumIf(JSONExtractInt(properties, 'count'), timestamp >= %(begin)s) as sum_in_period,
+               sum(JSONExtractInt(properties, 'count')) as sum_in_month
         FROM events
-        WHERE team_id = %(team_to_query)s AND event=%(target_event)s AND timestamp between %(begin)s AND %(end)s
+        WHERE team_id = %(team_to_query)s AND event IN (%(target_events)s)
+        AND timestamp between %(month_begin)s AND %(end)s
         AND has([%(validity_token)s], replaceRegexpAll(JSONExtractRaw(properties, 'token'), '^"|"$', ''))
-        GROUP BY team
+        GROUP BY team, event
     """,
         {
             "begin": begin,
             "end": end,
+            "month_begin": begin.replace(day=1),
             "team_to_query": team_to_query,
             "validity_token": validity_token,
-            "target_event": target_event,
+            "target_events": list(FEATURE_FLAG_REQUEST_EVENTS.values()),
         },
     )
 
-    return result
-
-
-def find_count_for_team_in_rows(team_id: int, rows: list) -> int:
-    for row in rows:
-        if "team_id" in row:
-            if row["team_id"] == team_id:
-                return row["total"]
-        elif str(row[0]) == str(team_id):
-            return row[1]
-    return 0
-
-
-@app.task(ignore_result=True, retries=0)
-def capture_report(
-    capture_event_name: str, org_id: str, full_report_dict: Dict[str, Any], at_date: Optional[datetime] = None
-) -> None:
-    pha_client = Client("sTMFPsFhdP1Ssg")
-    try:
-        capture_event(pha_client, capture_event_name, org_id, full_report_dict, timestamp=at_date)
-        logger.info(f"UsageReport sent to PostHog for organization {org_id}")
-    except Exception as err:
-        logger.error(
-            f"UsageReport sent to PostHog for organization {org_id} failed: {str(err)}",
+    counters: Dict[str, Dict[int, int]] = {}
+    for request_type, target_event in FEATURE_FLAG_REQUEST_EVENTS.items():
+        counters.update(
+            _index_columns_by_team(
+                [(team, *sums) for team, event, *sums in results if event == target_event],
+                [f"{request_type}_requests_count_in_period", f"{request_type}_requests_count_in_month"],
+            )
         )
-        capture_event(pha_client, f"{capture_event_name} failure", org_id, {"error": str(err)})
-    pha_client.flush()
+    return counters
 
 
-# extend this with future usage based products
-def has_non_zero_usage(report: FullUsageReport) -> bool:
-    return (
-        report.event_count_in_period > 0
-        or report.recording_count_in_period > 0
-        or report.decide_requests_count_in_period > 0
-        or report.local_evaluation_requests_count_in_period > 0
-    )
+def index_rows_by_team(rows: list) -> Dict[int, int]:
+    """
+    Indexes `(team_id, count)` rows from ClickHouse or `{"team_id": ..., "total": ...}` rows from Postgres by team
+    """
+    return _index_columns_by_team(
+        [(row["team_id"], row["total"]) if isinstance(row, dict) else row for row in rows], ["total"]
+    )["total"]
 
 
-@app.task(ignore_result=True, retries=3)
-def send_all_org_usage_reports(
-    dry_run: bool = False,
-    at: Optional[str] = None,
-    capture_event_name: Optional[str] = None,
-    skip_capture_event: bool = False,
-    only_organization_id: Optional[str] = None,
-) -> List[dict]:  # Dict[str, OrgReport]:
-    capture_event_name = capture_event_name or "organization usage report"
+def _index_columns_by_team(rows: list, columns: List[str]) -> Dict[str, Dict[int, int]]:
+    counters: Dict[str, Dict[int, int]] = {column: {} for column in columns}
+    for team_id, *values in rows:
+        # Feature flag requests are counted by distinct_id, which isn't necessarily a team id
+        if not str(team_id).isdigit():
+            continue
+        for column, value in zip(columns, values):
+            counters[column][int(team_id)] = value
+    return counters
 
-    at_date = dateutil.parser.parse(at) if at else None
-    period = get_previous_day(at=at_date)
-    period_start, period_end = period
 
-    instance_metadata = get_instance_metadata(period)
+def get_all_usage_counters(begin: datetime, end: datetime) -> Dict[str, Dict[int, int]]:
+    """
+    Counts the usage of all teams, keyed by `UsageReportCounters` field and then by team id.
 
-    # Clickhouse is good at counting things so we count across all teams rather than doing it one by one
-    all_data = dict(
-        teams_with_event_count_lifetime=get_teams_with_event_count_lifetime(),
-        teams_with_event_count_in_period=get_teams_with_event_count_in_period(period_start, period_end),
-        teams_with_event_count_in_month=get_teams_with_event_count_in_period(period_start.replace(day=1), period_end),
-        teams_with_event_count_with_groups_in_period=get_teams_with_event_count_with_groups_in_period(
-            period_start, period_end
-        ),
-        # teams_with_event_count_by_lib=get_teams_with_event_count_by_lib(period_start, period_end),
-        # teams_with_event_count_by_name=get_teams_with_event_count_by_name(period_start, period_end),
-        teams_with_recording_count_in_period=get_teams_with_recording_count_in_period(period_start, period_end),
-        teams_with_recording_count_total=get_teams_with_recording_count_total(),
-        teams_with_decide_requests_count_in_period=get_teams_with_feature_flag_requests_count_in_period(
-            period_start, period_end, FlagRequestType.DECIDE
-        ),
-        teams_with_decide_requests_count_in_month=get_teams_with_feature_flag_requests_count_in_period(
-            period_start.replace(day=1), period_end, FlagRequestType.DECIDE
-        ),
-        teams_with_local_evaluation_requests_count_in_period=get_teams_with_feature_flag_requests_count_in_period(
-            period_start, period_end, FlagRequestType.LOCAL_EVALUATION
-        ),
-        teams_with_local_evaluation_requests_count_in_month=get_teams_with_feature_flag_requests_count_in_period(
-            period_start.replace(day=1), period_end, FlagRequestType.LOCAL_EVALUATION
-        ),
-        teams_with_group_types_total=list(
+    Clickhouse is good at counting things so we count across all teams rather than doing it one by one, scanning
+    each table once for all the counters it's involved in.
+    """
+    return {
+        "event_count_lifetime": index_rows_by_team(get_teams_with_event_count_lifetime()),
+        **get_teams_with_event_counts(begin, end),
+        # "event_count_by_lib": get_teams_with_event_count_by_lib(begin, end),
+        # "event_count_by_name": get_teams_with_event_count_by_name(begin, end),
+        "recording_count_in_period": index_rows_by_team(get_teams_with_recording_count_in_period(begin, end)),
+        "recording_count_total": index_rows_by_team(get_teams_with_recording_count_total()),
+        **get_teams_with_feature_flag_requests_counts(begin, end),
+        **get_teams_with_query_log_metrics(begin, end),
+        "group_types_total": index_rows_by_team(
             GroupTypeMapping.objects.values("team_id").annotate(total=Count("id")).order_by("team_id")
         ),
-        teams_with_dashboard_count=list(
+        "dashboard_count": index_rows_by_team(
             Dashboard.objects.values("team_id").annotate(total=Count("id")).order_by("team_id")
         ),
-        teams_with_dashboard_template_count=list(
+        "dashboard_template_count": index_rows_by_team(
             Dashboard.objects.filter(creation_mode="template")
             .values("team_id")
             .annotate(total=Count("id"))
             .order_by("team_id")
         ),
-        teams_with_dashboard_shared_count=list(
+        "dashboard_shared_count": index_rows_by_team(
             Dashboard.objects.filter(sharingconfiguration__enabled=True)
             .values("team_id")
             .annotate(total=Count("id"))
             .order_by("team_id")
         ),
-        teams_with_dashboard_tagged_count=list(
+        "dashboard_tagged_count": index_rows_by_team(
             Dashboard.objects.filter(tagged_items__isnull=False)
             .values("team_id")
             .annotate(total=Count("id"))
             .order_by("team_id")
         ),
-        teams_with_ff_count=list(FeatureFlag.objects.values("team_id").annotate(total=Count("id")).order_by("team_id")),
-        teams_with_ff_active_count=list(
-            FeatureFlag.objects.filter(active=True).values("team_id").annotate(total=Count("id")).order_by("team_id")
-        ),
-        teams_with_hogql_app_bytes_read=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_bytes",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="",
-        ),
-        teams_with_hogql_app_rows_read=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_rows",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="",
-        ),
-        teams_with_hogql_app_duration_ms=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="query_duration_ms",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="",
-        ),
-        teams_with_hogql_api_bytes_read=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_bytes",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="personal_api_key",
-        ),
-        teams_with_hogql_api_rows_read=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_rows",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="personal_api_key",
-        ),
-        teams_with_hogql_api_duration_ms=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="query_duration_ms",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="personal_api_key",
-        ),
-        teams_with_event_explorer_app_bytes_read=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_bytes",
-            query_types=["EventsQuery"],
-            access_method="",
-        ),
-        teams_with_event_explorer_app_rows_read=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_rows",
-            query_types=["EventsQuery"],
-            access_method="",
+        "ff_count": index_rows_by_team(
+            FeatureFlag.objects.values("team_id").annotate(total=Count("id")).order_by("team_id")
         ),
-        teams_with_event_explorer_app_duration_ms=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="query_duration_ms",
-            query_types=["EventsQuery"],
-            access_method="",
-        ),
-        teams_with_event_explorer_api_bytes_read=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_bytes",
-            query_types=["EventsQuery"],
-            access_method="personal_api_key",
-        ),
-        teams_with_event_explorer_api_rows_read=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_rows",
-            query_types=["EventsQuery"],
-            access_method="personal_api_key",
-        ),
-        teams_with_event_explorer_api_duration_ms=get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="query_duration_ms",
-            query_types=["EventsQuery"],
-            access_method="personal_api_key",
+        "ff_active_count": index_rows_by_team(
+            FeatureFlag.objects.filter(active=True).values("team_id").annotate(total=Count("id")).order_by("team_id")
         ),
-    )
+    }
 
-    teams: Sequence[Team] = list(
-        Team.objects.select_related("organization").exclude(
-            Q(organization__for_internal_metrics=True) | Q(is_demo=True)
-        )
-    )
 
-    org_reports: Dict[str, OrgReport] = {}
+def get_org_reports(teams: Iterable[Team], counters: Dict[str, Dict[int, int]], date: str) -> Iterator[OrgReport]:
+    """
+    Builds the reports of organizations in one pass over their teams, which must be ordered by organization.
+    """
+    org_user_counts = {
+        str(row["organization_id"]): row["total"]
+        for row in OrganizationMembership.objects.values("organization_id").annotate(total=Count("id"))
+    }
+    org_report: Optional[OrgReport] = None
 
     for team in teams:
         team_report = UsageReportCounters(
-            event_count_lifetime=find_count_for_team_in_rows(team.id, all_data["teams_with_event_count_lifetime"]),
-            event_count_in_period=find_count_for_team_in_rows(team.id, all_data["teams_with_event_count_in_period"]),
-            event_count_in_month=find_count_for_team_in_rows(team.id, all_data["teams_with_event_count_in_month"]),
-            event_count_with_groups_in_period=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_event_count_with_groups_in_period"]
-            ),
-            # event_count_by_lib: Difind_count_for_team_in_rows(team.id, all_data["teams_with_#"]),
-            # event_count_by_name: Difind_count_for_team_in_rows(team.id, all_data["teams_with_#"]),
-            recording_count_in_period=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_recording_count_in_period"]
-            ),
-            recording_count_total=find_count_for_team_in_rows(team.id, all_data["teams_with_recording_count_total"]),
-            group_types_total=find_count_for_team_in_rows(team.id, all_data["teams_with_group_types_total"]),
-            decide_requests_count_in_period=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_decide_requests_count_in_period"]
-            ),
-            decide_requests_count_in_month=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_decide_requests_count_in_month"]
-            ),
-            local_evaluation_requests_count_in_period=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_local_evaluation_requests_count_in_period"]
-            ),
-            local_evaluation_requests_count_in_month=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_local_evaluation_requests_count_in_month"]
-            ),
-            dashboard_count=find_count_for_team_in_rows(team.id, all_data["teams_with_dashboard_count"]),
-            dashboard_template_count=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_dashboard_template_count"]
-            ),
-            dashboard_shared_count=find_count_for_team_in_rows(team.id, all_data["teams_with_dashboard_shared_count"]),
-            dashboard_tagged_count=find_count_for_team_in_rows(team.id, all_data["teams_with_dashboard_tagged_count"]),
-            ff_count=find_count_for_team_in_rows(team.id, all_data["teams_with_ff_count"]),
-            ff_active_count=find_count_for_team_in_rows(team.id, all_data["teams_with_ff_active_count"]),
-            hogql_app_bytes_read=find_count_for_team_in_rows(team.id, all_data["teams_with_hogql_app_bytes_read"]),
-            hogql_app_rows_read=find_count_for_team_in_rows(team.id, all_data["teams_with_hogql_app_rows_read"]),
-            hogql_app_duration_ms=find_count_for_team_in_rows(team.id, all_data["teams_with_hogql_app_duration_ms"]),
-            hogql_api_bytes_read=find_count_for_team_in_rows(team.id, all_data["teams_with_hogql_api_bytes_read"]),
-            hogql_api_rows_read=find_count_for_team_in_rows(team.id, all_data["teams_with_hogql_api_rows_read"]),
-            hogql_api_duration_ms=find_count_for_team_in_rows(team.id, all_data["teams_with_hogql_api_duration_ms"]),
-            event_explorer_app_bytes_read=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_event_explorer_app_bytes_read"]
-            ),
-            event_explorer_app_rows_read=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_event_explorer_app_rows_read"]
-            ),
-            event_explorer_app_duration_ms=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_event_explorer_app_duration_ms"]
-            ),
-            event_explorer_api_bytes_read=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_event_explorer_api_bytes_read"]
-            ),
-            event_explorer_api_rows_read=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_event_explorer_api_rows_read"]
-            ),
-            event_explorer_api_duration_ms=find_count_for_team_in_rows(
-                team.id, all_data["teams_with_event_explorer_api_duration_ms"]
-            ),
+            **{field: team_counts.get(team.id, 0) for field, team_counts in counters.items()}
         )
+        org_id = str(team.organization_id)
 
-        org_id = str(team.organization.id)
+        if org_report is not None and org_report.organization_id != org_id:
+            yield org_report
+            org_report = None
 
-        if org_id not in org_reports:
+        if org_report is None:
             org_report = OrgReport(
-                date=period_start.strftime("%Y-%m-%d"),
+                date=date,
                 organization_id=org_id,
                 organization_name=team.organization.name,
                 organization_created_at=team.organization.created_at.isoformat(),
-                organization_user_count=get_org_user_count(org_id),
+                organization_user_count=org_user_counts.get(org_id, 0),
                 team_count=1,
                 teams={str(team.id): team_report},
                 **dataclasses.asdict(team_report),  # Clone the team report as the basis
             )
-            org_reports[org_id] = org_report
         else:
-            org_report = org_reports[org_id]
             org_report.teams[str(team.id)] = team_report
             org_report.team_count += 1
 
             # Iterate on all fields of the UsageReportCounters and add the values from the team report to the org report
             for field in dataclasses.fields(UsageReportCounters):
-                if hasattr(team_report, field.name):
-                    setattr(
-                        org_report,
-                        field.name,
-                        getattr(org_report, field.name) + getattr(team_report, field.name),
-                    )
+                setattr(org_report, field.name, getattr(org_report, field.name) + getattr(team_report, field.name))
+
+    if org_report is not None:
+        yield org_report
+
+
+@app.task(ignore_result=True, retries=0)
+def capture_report(
+    capture_event_name: str, org_id: str, full_report_dict: Dict[str, Any], at_date: Optional[datetime] = None
+) -> None:
+    pha_client = Client("sTMFPsFhdP1Ssg")
+    try:
+        capture_event(pha_client, capture_event_name, org_id, full_report_dict, timestamp=at_date)
+        logger.info(f"UsageReport sent to PostHog for organization {org_id}")
+    except Exception as err:
+        logger.error(
+            f"UsageReport sent to PostHog for organization {org_id} failed: {str(err)}",
+        )
+        capture_event(pha_client, f"{capture_event_name} failure", org_id, {"error": str(err)})
+    pha_client.flush()
+
+
+# extend this with future usage based products
+def has_non_zero_usage(report: FullUsageReport) -> bool:
+    return (
+        report.event_count_in_period > 0
+        or report.recording_count_in_period > 0
+        or report.decide_requests_count_in_period > 0
+        or report.local_evaluation_requests_count_in_period > 0
+    )
+
+
+@app.task(ignore_result=True, bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def send_all_org_usage_reports(
+    self,
+    dry_run: bool = False,
+    at: Optional[str] = None,
+    capture_event_name: Optional[str] = None,
+    skip_capture_event: bool = False,
+    only_organization_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+) -> List[dict]:  # Dict[str, OrgReport]:
+    """
+    Sends the usage reports of all organizations.
+
+    Runs with a `run_id` are resumable: the usage counters and the last organization whose reports were queued are
+    kept in the cache, so that running again with the same `run_id` only sends the remaining reports. Retries of the
+    task resume from where they failed, as the task id is used by default.
+    """
+    run_id = run_id or self.request.id
+    capture_event_name = capture_event_name or "organization usage report"
+
+    at_date = dateutil.parser.parse(at) if at else None
+    period = get_previous_day(at=at_date)
+    period_start, period_end = period
+
+    instance_metadata = get_instance_metadata(period)
+
+    resumable = run_id is not None and not dry_run
+    counters_cache_key = f"usage_report_counters:{run_id}"
+    progress_cache_key = f"usage_report_last_organization_id:{run_id}"
+
+    counters = cache.get(counters_cache_key) if resumable else None
+    if counters is None:
+        counters = get_all_usage_counters(period_start, period_end)
+        if resumable:
+            cache.set(counters_cache_key, counters, USAGE_REPORT_PROGRESS_TTL)
+
+    teams = (
+        Team.objects.select_related("organization")
+        .exclude(Q(organization__for_internal_metrics=True) | Q(is_demo=True))
+        .order_by("organization_id", "id")
+    )
+    if only_organization_id:
+        teams = teams.filter(organization_id=only_organization_id)
+    last_organization_id = cache.get(progress_cache_key) if resumable else None
+    if last_organization_id:
+        logger.info("Resuming usage reports", run_id=run_id, last_organization_id=last_organization_id)
+        teams = teams.filter(organization_id__gt=last_organization_id)
 
     all_reports = []
 
-    for org_report in org_reports.values():
+    for org_report in get_org_reports(teams.iterator(), counters, period_start.strftime("%Y-%m-%d")):
         org_id = org_report.organization_id
 
-        if only_organization_id and only_organization_id != org_id:
-            continue
-
         full_report = FullUsageReport(
             **dataclasses.asdict(org_report),
             **dataclasses.asdict(instance_metadata),
@@ -776,4 +711,12 @@ def send_all_org_usage_reports(
         # Then capture the events to Billing
         if has_non_zero_usage(full_report):
             send_report_to_billing_service.delay(org_id, full_report_dict)
+
+        # Checkpoint every organization, so that a retry never queues the same report twice
+        if resumable:
+            cache.set(progress_cache_key, org_id, USAGE_REPORT_PROGRESS_TTL)
+
+    if resumable:
+        cache.delete_many([counters_cache_key, progress_cache_key])
+
     return all_reports
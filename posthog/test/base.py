@@ -278,7 +278,10 @@ def default_materialised_columns():
 
 def cleanup_materialized_columns():
     try:
-        from ee.clickhouse.materialized_columns.analyze import get_materialized_columns
+        from ee.clickhouse.materialized_columns.analyze import (
+            get_materialized_columns,
+            get_typed_materialized_columns,
+        )
     except:
         # EE not available? Skip
         return
@@ -287,6 +290,8 @@ def cleanup_materialized_columns():
     for column_name in get_materialized_columns("events").values():
         if column_name not in default_columns:
             sync_execute(f"ALTER TABLE events DROP COLUMN {column_name}")
+    for column_name in get_typed_materialized_columns("events").values():
+        sync_execute(f"ALTER TABLE events DROP COLUMN {column_name}")
     for column_name in get_materialized_columns("person").values():
         sync_execute(f"ALTER TABLE person DROP COLUMN {column_name}")
     for column_name in get_materialized_columns("groups").values():
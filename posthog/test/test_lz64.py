@@ -0,0 +1,63 @@
+import json
+import random
+import string
+from unittest import TestCase
+
+import lzstring
+
+from posthog.lz64 import decompress_from_base64
+
+
+def _lzstring_decompress(compressed):
+    try:
+        return lzstring.LZString().decompressFromBase64(compressed)
+    except (IndexError, KeyError, NameError):
+        return None
+
+
+def _event(rng: random.Random, index: int):
+    return {
+        "event": rng.choice(["$pageview", "$autocapture", "clicked 🤓", "注文"]),
+        "properties": {
+            "$current_url": f"https://app.example.com/project/{rng.randint(1, 999)}/insights?index={index}",
+            "distinct_id": f"user-{rng.randint(1, 50)}",
+            "$elements": [
+                {"tag_name": "button", "attr__class": "btn btn-primary", "$el_text": "Sävé ünïcödé"}
+                for _ in range(rng.randint(0, 4))
+            ],
+            "$time": 1680000000 + index,
+        },
+    }
+
+
+class TestLz64(TestCase):
+    def assert_decompresses_like_lzstring(self, compressed):
+        self.assertEqual(decompress_from_base64(compressed), _lzstring_decompress(compressed), compressed)
+
+    def test_decompresses_like_lzstring(self):
+        rng = random.Random(0)
+        payloads = [
+            "a",
+            "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+            "🤓",
+            "\ud83d lone surrogate",
+            "".join(chr(rng.randint(0, 0xFFFF)) for _ in range(2000)),
+            "".join(rng.choice(string.ascii_letters) for _ in range(5000)),
+            json.dumps({"event": "$pageview", "properties": {"distinct_id": "eeeeeeegϥeeeee"}}),
+            json.dumps([_event(rng, index) for index in range(500)], ensure_ascii=False),
+        ]
+
+        for payload in payloads:
+            compressed = lzstring.LZString().compressToBase64(payload)
+            self.assert_decompresses_like_lzstring(compressed)
+
+    def test_decompresses_malformed_input_like_lzstring(self):
+        rng = random.Random(0)
+        compressed = lzstring.LZString().compressToBase64(json.dumps([_event(rng, index) for index in range(5)]))
+
+        for malformed in [None, "", "foo", "=", "é", "foo bar", "ABC-", compressed[:-4], compressed[:100]]:
+            self.assert_decompresses_like_lzstring(malformed)
+
+        alphabet = string.ascii_letters + string.digits + "+/="
+        for _ in range(2000):
+            self.assert_decompresses_like_lzstring("".join(rng.choice(alphabet) for _ in range(rng.randint(1, 40))))
@@ -1,3 +1,4 @@
+import time
 from unittest import mock
 
 from django.core.cache import cache
@@ -5,8 +6,9 @@ from django.test import TestCase
 
 from posthog.models import Dashboard, DashboardTile, Organization, PluginConfig, Team, User
 from posthog.models.instance_setting import override_instance_config
-from posthog.models.team import get_team_in_cache, util
+from posthog.models.team import api_token_filter, get_team_in_cache, set_team_in_cache, util
 from posthog.plugins.test.mock import mocked_plugin_requests_get
+from posthog.redis import get_client
 from posthog.utils import PersonOnEventsMode
 
 from .base import BaseTest
@@ -56,6 +58,89 @@ class TestModelCache(TestCase):
         cached_team = get_team_in_cache(api_token)
         assert cached_team is None
 
+    def test_unknown_tokens_are_cached(self):
+        org = Organization.objects.create(name="org name")
+
+        with self.settings(INVALID_API_TOKEN_CACHE_SECONDS=60):
+            with self.assertNumQueries(1):
+                self.assertIsNone(Team.objects.get_team_from_cache_or_token("unknown_token"))
+            with self.assertNumQueries(0):
+                self.assertIsNone(Team.objects.get_team_from_cache_or_token("unknown_token"))
+
+            team = Team.objects.create(organization=org, api_token="unknown_token")
+
+            with self.assertNumQueries(0):
+                self.assertEqual(Team.objects.get_team_from_cache_or_token("unknown_token"), team)
+
+
+class TestAPITokenFilter(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        get_client().delete(api_token_filter.API_TOKEN_FILTER_REDIS_KEY)
+        api_token_filter._local_filter = None
+
+    def tearDown(self):
+        get_client().delete(api_token_filter.API_TOKEN_FILTER_REDIS_KEY)
+        api_token_filter._local_filter = None
+        super().tearDown()
+
+    def test_filter_has_no_false_negatives_and_few_false_positives(self):
+        token_filter = api_token_filter.TokenBloomFilter.for_capacity(2000)
+        for index in range(2000):
+            token_filter.add(f"phc_token_{index}")
+
+        self.assertTrue(all(f"phc_token_{index}" in token_filter for index in range(2000)))
+        false_positives = sum(f"phc_unknown_{index}" in token_filter for index in range(10_000))
+        self.assertLess(false_positives, 50)
+
+    def test_filter_bits_match_redis(self):
+        get_client().set(api_token_filter.API_TOKEN_FILTER_REDIS_KEY, bytes(128))
+        token_filter = api_token_filter.TokenBloomFilter(bytes(128))
+
+        for token in ["phc_one", "phc_two", "phc_three"]:
+            api_token_filter.add_api_token_to_filter(token)
+            token_filter.add(token)
+
+        self.assertEqual(get_client().get(api_token_filter.API_TOKEN_FILTER_REDIS_KEY), bytes(token_filter.bits))
+
+    def test_tokens_not_in_filter_are_rejected_without_queries(self):
+        org = Organization.objects.create(name="org name")
+        team = Team.objects.create(organization=org, api_token="token_in_filter")
+
+        with self.settings(API_TOKEN_FILTER_RELOAD_SECONDS=60):
+            # Without a filter, every token is looked up
+            with self.assertNumQueries(1):
+                self.assertIsNone(Team.objects.get_team_from_cache_or_token("unknown_token"))
+
+            api_token_filter.rebuild_api_token_filter()
+            api_token_filter._local_filter = None
+
+            with self.assertNumQueries(0):
+                self.assertIsNone(Team.objects.get_team_from_cache_or_token("unknown_token"))
+            self.assertEqual(Team.objects.get_team_from_cache_or_token("token_in_filter"), team)
+
+            # New teams get into the filter
+            new_team = Team.objects.create(organization=org, api_token="new_token")
+            self.assertEqual(Team.objects.get_team_from_cache_or_token("new_token"), new_team)
+            self.assertIn(
+                "new_token",
+                api_token_filter.TokenBloomFilter(get_client().get(api_token_filter.API_TOKEN_FILTER_REDIS_KEY)),
+            )
+
+    def test_cached_teams_are_found_when_not_in_filter(self):
+        org = Organization.objects.create(name="org name")
+        team = Team.objects.create(organization=org, api_token="token_of_other_process")
+        set_team_in_cache("token_of_other_process", team)
+
+        with self.settings(API_TOKEN_FILTER_RELOAD_SECONDS=60):
+            # As loaded before another process created the team
+            api_token_filter._local_filter = (time.monotonic(), api_token_filter.TokenBloomFilter.for_capacity(0))
+            self.assertFalse(api_token_filter.might_be_team_api_token("token_of_other_process"))
+
+            with self.assertNumQueries(0):
+                self.assertEqual(Team.objects.get_team_from_cache_or_token("token_of_other_process"), team)
+
 
 class TestTeam(BaseTest):
     def test_team_has_expected_defaults(self):
@@ -1,3 +1,5 @@
+import base64
+import gzip
 from datetime import datetime
 from unittest.mock import call, patch
 
@@ -17,6 +19,7 @@ from posthog.test.base import BaseTest
 from posthog.utils import (
     PotentialSecurityProblemException,
     absolute_uri,
+    decompress,
     format_query_params_absolute_url,
     get_available_timezones_with_offsets,
     get_compare_period_dates,
@@ -286,22 +289,43 @@ class TestLoadDataFromRequest(TestCase):
             str(ctx.exception),
         )
 
-    @patch("posthog.utils.gzip")
-    def test_can_decompress_gzipped_body_received_with_no_compression_flag(self, patched_gzip):
+    def test_can_decompress_gzipped_body_received_with_no_compression_flag(self):
         # see https://sentry.io/organizations/posthog2/issues/3136510367
         # one organization is causing a request parsing error by sending an encoded body
         # but the empty string for the compression value
         # this accounts for a large majority of our Sentry errors
 
-        patched_gzip.decompress.return_value = '{"what is it": "the decompressed value"}'
-
         rf = RequestFactory()
         # a request with no compression set
-        post_request = rf.post("/s/", "the gzip compressed string", "text/plain")
+        post_request = rf.post("/s/", gzip.compress(b'{"what is it": "the decompressed value"}'), "text/plain")
 
         data = load_data_from_request(post_request)
         self.assertEqual({"what is it": "the decompressed value"}, data)
 
+    def test_decodes_plain_and_base64_json_bodies(self):
+        rf = RequestFactory()
+
+        data = load_data_from_request(rf.post("/s/", b'  {"event": "$pageview", "value": NaN}', "text/plain"))
+        self.assertEqual({"event": "$pageview", "value": None}, data)
+
+        data = load_data_from_request(rf.post("/s/", base64.b64encode(b'[{"event": "$pageview"}]'), "text/plain"))
+        self.assertEqual([{"event": "$pageview"}], data)
+
+    @patch("posthog.utils.decompress", wraps=decompress)
+    def test_decodes_request_body_once(self, patched_decompress):
+        rf = RequestFactory()
+        post_request = rf.post("/decide/", b'{"token": "abc"}', "text/plain")
+
+        self.assertEqual({"token": "abc"}, load_data_from_request(post_request))
+        self.assertEqual({"token": "abc"}, load_data_from_request(Request(post_request)))
+        patched_decompress.assert_called_once()
+
+        invalid_request = rf.post("/decide/", b"{not json", "text/plain")
+        for _ in range(2):
+            with self.assertRaises(RequestParsingError):
+                load_data_from_request(invalid_request)
+        self.assertEqual(patched_decompress.call_count, 2)
+
 
 class TestShouldRefresh(TestCase):
     def test_refresh_requested_by_client_with_refresh_true(self):
@@ -30,7 +30,7 @@ from typing import (
 from urllib.parse import urljoin, urlparse
 from django.db import DEFAULT_DB_ALIAS, connections
 
-import lzstring
+import orjson
 import posthoganalytics
 import pytz
 import structlog
@@ -50,6 +50,7 @@ from sentry_sdk.api import capture_exception
 from posthog.cloud_utils import is_cloud
 from posthog.constants import AvailableFeature
 from posthog.exceptions import RequestParsingError
+from posthog.lz64 import decompress_from_base64
 from posthog.redis import get_client
 
 if TYPE_CHECKING:
@@ -614,23 +615,58 @@ def get_celery_heartbeat() -> Union[str, int]:
     return "offline"
 
 
-def base64_decode(data):
+GZIP_MAGIC_BYTES = b"\x1f\x8b"
+# Attribute of a request its decoded body is kept on, so that throttles and views decode it only once
+DECODED_REQUEST_DATA_ATTR = "_posthog_decoded_data"
+
+
+def base64_decode(data: Union[str, bytes]) -> bytes:
+    """
+    Decodes base64 into bytes, taking into account necessary transformations to match client libraries.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+
+    return base64.b64decode(data.replace(b" ", b"+") + b"===")
+
+
+def parse_json_data(data: Union[str, bytes]) -> Any:
     """
-    Decodes base64 bytes into string taking into account necessary transformations to match client libraries.
+    Parses JSON with orjson, falling back to the standard library for what orjson rejects, such as NaN, Infinity or
+    lone surrogates. parse_constant gets called in case of NaN, Infinity etc. Default behaviour is to put those into
+    the DB directly, but we just want them to be None.
     """
-    if not isinstance(data, str):
-        data = data.decode()
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        pass
+
+    if isinstance(data, bytes):
+        data = data.decode("utf8", "surrogatepass")
+    return json.loads(data, parse_constant=lambda x: None)
 
-    data = base64.b64decode(data.replace(" ", "+") + "===")
 
-    return data.decode("utf8", "surrogatepass").encode("utf-16", "surrogatepass")
+def _looks_like_json(data: Union[str, bytes]) -> bool:
+    stripped = data[:64].lstrip()
+    if isinstance(stripped, bytes):
+        return stripped[:1] in (b"{", b"[")
+    return stripped[:1] in ("{", "[")
 
 
 def decompress(data: Any, compression: str):
+    """
+    Decodes request data, which is JSON that might be gzipped, lz64 compressed or base64 encoded. Uncompressed data is
+    sniffed so that only one way of decoding it is tried: gzip by its magic bytes, JSON by its leading bracket, and
+    base64 otherwise.
+    """
     if not data:
         return None
 
-    if compression == "gzip" or compression == "gzip-js":
+    if (
+        compression == "gzip"
+        or compression == "gzip-js"
+        or (isinstance(data, bytes) and data.startswith(GZIP_MAGIC_BYTES))
+    ):
         if data == b"undefined":
             raise RequestParsingError(
                 "data being loaded from the request body for decompression is the literal string 'undefined'"
@@ -641,48 +677,56 @@ def decompress(data: Any, compression: str):
         except (EOFError, OSError, zlib.error) as error:
             raise RequestParsingError("Failed to decompress data. %s" % (str(error)))
 
-    if compression == "lz64":
+    elif compression == "lz64":
         if not isinstance(data, str):
             data = data.decode()
         data = data.replace(" ", "+")
 
-        data = lzstring.LZString().decompressFromBase64(data)
+        data = decompress_from_base64(data)
 
         if not data:
             raise RequestParsingError("Failed to decompress data.")
 
         data = data.encode("utf-16", "surrogatepass").decode("utf-16")
 
-    base64_decoded = None
-    try:
-        base64_decoded = base64_decode(data)
-    except Exception:
-        pass
-
-    if base64_decoded:
-        data = base64_decoded
+    if not _looks_like_json(data):
+        try:
+            base64_decoded = base64_decode(data)
+        except Exception:
+            base64_decoded = None
 
-    try:
-        # parse_constant gets called in case of NaN, Infinity etc
-        # default behaviour is to put those into the DB directly
-        # but we just want it to return None
-        data = json.loads(data, parse_constant=lambda x: None)
-    except (json.JSONDecodeError, UnicodeDecodeError) as error_main:
-        if compression == "":
+        if base64_decoded:
             try:
-                return decompress(data, "gzip")
-            except Exception as inner:
-                # re-trying with compression set didn't succeed, throw original error
-                raise RequestParsingError("Invalid JSON: %s" % (str(error_main))) from inner
-        else:
-            raise RequestParsingError("Invalid JSON: %s" % (str(error_main)))
+                return parse_json_data(base64_decoded)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                # not base64 after all, the error of parsing the data as it is is more useful
+                pass
 
-    # TODO: data can also be an array, function assumes it's either None or a dictionary.
-    return data
+    try:
+        return parse_json_data(data)
+    except (json.JSONDecodeError, UnicodeDecodeError) as error:
+        raise RequestParsingError("Invalid JSON: %s" % (str(error)))
 
 
 # Used by non-DRF endpoints from capture.py and decide.py (/decide, /batch, /capture, etc)
 def load_data_from_request(request):
+    # Rate limiting reads the body of the same request before the view does
+    request = getattr(request, "_request", request)
+    decoded = getattr(request, DECODED_REQUEST_DATA_ATTR, None)
+    if decoded is None:
+        try:
+            decoded = (_load_data_from_request(request), None)
+        except RequestParsingError as error:
+            decoded = (None, error)
+        setattr(request, DECODED_REQUEST_DATA_ATTR, decoded)
+
+    data, error = decoded
+    if error is not None:
+        raise error
+    return data
+
+
+def _load_data_from_request(request):
     if request.method == "POST":
         if request.content_type in ["", "text/plain", "application/json"]:
             data = request.body
@@ -992,6 +1036,15 @@ def get_safe_cache(cache_key: str):
     return None
 
 
+def get_safe_cache_many(cache_keys: List[str]) -> Dict[str, Any]:
+    "Same as `get_safe_cache` for many keys, with one round trip to the cache. Missing keys are left out"
+    try:
+        return cache.get_many(cache_keys)
+    except Exception:  # one of the values is probably corrupted, find which one
+        cached_results = {cache_key: get_safe_cache(cache_key) for cache_key in cache_keys}
+        return {cache_key: value for cache_key, value in cached_results.items() if value is not None}
+
+
 def is_anonymous_id(distinct_id: str) -> bool:
     # Our anonymous ids are _not_ uuids, but a random collection of strings
     return bool(re.match(ANONYMOUS_REGEX, distinct_id))
@@ -1251,23 +1304,6 @@ def get_week_start_for_country_code(country_code: str) -> int:
     return 1  # Monday
 
 
-def wait_for_parallel_celery_group(task: Any, max_timeout: Optional[datetime.timedelta] = None) -> Any:
-    """
-    Wait for a group of celery tasks to finish, but don't wait longer than max_timeout.
-    For parallel tasks, this is the only way to await the entire group.
-    """
-    if not max_timeout:
-        max_timeout = datetime.timedelta(minutes=5)
-
-    start_time = timezone.now()
-
-    while not task.ready():
-        if timezone.now() - start_time > max_timeout:
-            raise TimeoutError("Timed out waiting for celery task to finish")
-        time.sleep(0.1)
-    return task
-
-
 def patchable(fn):
     """
     Decorator which allows patching behavior of a function at run-time.